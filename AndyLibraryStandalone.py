@@ -2,7 +2,7 @@
 # Path: /home/herb/Desktop/AndyLibrary/AndyLibraryStandalone.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-30
-# Last Modified: 2025-08-01 09:28PM
+# Last Modified: 2026-10-19 07:55PM
 
 """
 AndyLibrary Standalone Windows .exe Launcher
@@ -139,6 +139,23 @@ class AndyLibraryStandalone:
         
         return app
     
+    def wait_for_server(self, timeout=15.0):
+        """Poll /api/health until the server answers (Drive sync and logins keep initializing behind it)"""
+        import requests
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                response = requests.get(f"http://127.0.0.1:{self.port}/api/health", timeout=1)
+                if response.status_code == 200:
+                    startup = response.json().get("startup") or {}
+                    self.cold_start_seconds = startup.get("cold_start_seconds") or (
+                        time.time() - float(os.environ.get("ANDYLIBRARY_LAUNCH_TIME", time.time())))
+                    return True
+            except (requests.RequestException, ValueError):
+                pass
+            time.sleep(0.1)
+        return False
+    
     def start_server(self):
         """Start the FastAPI server with automatic port discovery"""
         try:
@@ -185,20 +202,12 @@ class AndyLibraryStandalone:
             server_thread = threading.Thread(target=run_server, daemon=True)
             server_thread.start()
             
-            # Wait for server to start
+            # Wait for server to start - open the browser as soon as it answers
             print("🔄 Starting web server...")
-            time.sleep(3)
-            
-            # Test if server is responding
-            try:
-                import requests
-                response = requests.get(f"http://127.0.0.1:{self.port}/", timeout=5)
-                if response.status_code == 200:
-                    print("✅ Web server is responding")
-                else:
-                    print(f"⚠️ Server responded with status {response.status_code}")
-            except Exception as test_e:
-                print(f"⚠️ Server test failed: {test_e}")
+            if self.wait_for_server():
+                print(f"✅ Web server is responding ({self.cold_start_seconds:.1f}s after launch)")
+            else:
+                print("⚠️ Server did not answer yet - opening the browser anyway")
             
             # Open web browser to library
             library_url = f"http://127.0.0.1:{self.port}"
@@ -233,6 +242,16 @@ def InitializeWindowsDatabase():
     """Initialize database for Windows standalone executable"""
     print("🔄 Initializing Windows database...")
     
+    # A local copy is served at once; the Google Drive check runs behind it
+    if CheckLocalDatabase():
+        if DriveManager is not None:
+            threading.Thread(target=SyncDatabaseFromDrive, name="drive-sync", daemon=True).start()
+            print("🔄 Google Drive sync continues in the background")
+        return True
+    return SyncDatabaseFromDrive()
+
+def SyncDatabaseFromDrive():
+    """Download or refresh the database from Google Drive"""
     try:
         # Check if we have database managers available
         if DriveManager is None:
@@ -248,12 +267,12 @@ def InitializeWindowsDatabase():
             print("✅ Database initialized successfully")
             return True
         else:
-            print("⚠️ Google Drive sync failed - checking for local database")
-            return CheckLocalDatabase()
+            print("⚠️ Google Drive sync failed")
+            return False
             
     except Exception as e:
         print(f"⚠️ Database initialization error: {e}")
-        return CheckLocalDatabase()
+        return False
 
 def CheckLocalDatabase():
     """Check if local database exists and is valid"""
@@ -272,6 +291,7 @@ def CheckLocalDatabase():
 
 def main():
     """Main entry point for standalone executable"""
+    os.environ.setdefault("ANDYLIBRARY_LAUNCH_TIME", repr(time.time()))
     print("🏔️ AndyLibrary - Project Himalaya")
     print("Educational Library for Everyone")
     print("Getting education into the hands of people who can least afford it")
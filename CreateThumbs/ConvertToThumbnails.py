@@ -1,121 +1,302 @@
 #!/usr/bin/env python3
 """
 File: ConvertToThumbnails.py
-Path: /home/herb/Desktop/BowersWorld-com/ConvertToThumbnails.py
-Standard: AIDEV-PascalCase-1.7
+Path: /home/herb/Desktop/AndyLibrary/CreateThumbs/ConvertToThumbnails.py
+Standard: AIDEV-PascalCase-2.1
 Created: 2025-06-25
+Last Modified: 2026-10-19 09:40PM
 Author: Herb Bowers - Project Himalaya
-Description: Convert PNG book covers to web-optimized thumbnails for Anderson's Library
+Description: Thumbnail build stage for Anderson's Library - converts book covers to
+             web-optimized thumbnails in several sizes/formats on a process pool,
+             skips covers whose content hash is unchanged, and bulk-loads the
+             primary thumbnail into books.ThumbnailImage (what the API serves)
 """
 
+import io
 import os
 import sys
-from pathlib import Path
-from PIL import Image
+import json
 import time
-from datetime import datetime
+import sqlite3
+import hashlib
+import argparse
+import warnings
+from functools import partial
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
 
-# Configuration
-SOURCE_DIR = "/home/herb/Desktop/BowersWorld-com/Covers"
-OUTPUT_DIR = "/home/herb/Desktop/BowersWorld-com/Thumbs"
-THUMBNAIL_SIZE = (64, 85)  # Width x Height - optimized for book covers
-QUALITY_SETTING = 85  # PNG optimization level
+# Defaults (all overridable on the command line)
+DEFAULT_SOURCE_DIR = "Covers"
+DEFAULT_OUTPUT_DIR = "Thumbs"
+DEFAULT_DATABASE = os.path.join("Data", "Databases", "MyLibrary.db")
+DEFAULT_SIZES = "64x85,128x170"  # Width x Height - the first size is stored in the database
+DEFAULT_FORMATS = "png,webp"
+QUALITY_SETTING = 85
+MANIFEST_NAME = "thumbs_manifest.json"
+DB_BATCH_SIZE = 200
 PROGRESS_INTERVAL = 25  # Show progress every N files
+SOURCE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+HASH_BLOCK_SIZE = 1024 * 1024
 
-def CreateOutputDirectory(OutputPath):
+SAVE_OPTIONS = {
+    "png": {"format": "PNG", "optimize": True},
+    "webp": {"format": "WEBP", "quality": QUALITY_SETTING, "method": 6},
+    "jpeg": {"format": "JPEG", "quality": QUALITY_SETTING, "optimize": True, "progressive": True},
+}
+
+def ParseSizes(SizesText):
     """
-    Create the output directory if it doesn't exist
-    
-    Args:
-        OutputPath: Path to create
-        
-    Returns:
-        bool: True if successful, False otherwise
+    Parse "64x85,128x170" into [(64, 85), (128, 170)]
+
+    Raises:
+        ValueError: For malformed sizes
     """
+    Sizes = []
+    for Item in SizesText.split(","):
+        Width, Separator, Height = Item.strip().lower().partition("x")
+        if not Separator or int(Width) <= 0 or int(Height) <= 0:
+            raise ValueError(f"Invalid thumbnail size: {Item}")
+        Sizes.append((int(Width), int(Height)))
+    return Sizes
+
+def ParseFormats(FormatsText):
+    """Parse "png,webp" into a list of supported output formats"""
+    Formats = [Item.strip().lower().replace("jpg", "jpeg") for Item in FormatsText.split(",") if Item.strip()]
+    Unknown = [Item for Item in Formats if Item not in SAVE_OPTIONS]
+    if Unknown or not Formats:
+        raise ValueError(f"Unsupported thumbnail formats: {', '.join(Unknown) or FormatsText}")
+    return Formats
+
+def HashFile(FilePath):
+    """SHA-256 of a file's contents"""
+    Digest = hashlib.sha256()
+    with open(FilePath, "rb") as SourceFile:
+        for Block in iter(lambda: SourceFile.read(HASH_BLOCK_SIZE), b""):
+            Digest.update(Block)
+    return Digest.hexdigest()
+
+def SettingsFingerprint(Sizes, Formats):
+    """Changing sizes, formats or quality invalidates every manifest entry"""
+    return f"{Sizes}|{Formats}|{QUALITY_SETTING}"
+
+def OutputName(SourceName, Size, Format):
+    """Thumbs/<W>x<H>/<cover name>.<ext>"""
+    Extension = "jpg" if Format == "jpeg" else Format
+    return f"{Size[0]}x{Size[1]}/{Path(SourceName).stem}.{Extension}"
+
+def LoadCleanImage(SourcePath):
+    """
+    Open a cover as a metadata-free RGB image
+
+    Covers with broken metadata chunks (which used to need a separate
+    fix-up script) are retried from raw bytes with warnings ignored.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            OriginalImage = Image.open(SourcePath)
+            OriginalImage.load()
+        except Exception:
+            with open(SourcePath, "rb") as SourceFile:
+                OriginalImage = Image.open(io.BytesIO(SourceFile.read()))
+                OriginalImage.load()
+
+    if OriginalImage.mode == "P":
+        OriginalImage = OriginalImage.convert("RGBA")
+    if OriginalImage.mode in ("RGBA", "LA"):
+        # Flatten transparency onto a white background
+        RgbImage = Image.new("RGB", OriginalImage.size, (255, 255, 255))
+        RgbImage.paste(OriginalImage, mask=OriginalImage.split()[-1])
+        return RgbImage
+    return OriginalImage.convert("RGB")
+
+def RenderPrimary(CleanImage, Size):
+    """PNG bytes of the database thumbnail (first size) for an open clean image"""
+    Thumbnail = CleanImage.copy()
     try:
-        Path(OutputPath).mkdir(parents=True, exist_ok=True)
-        print(f"✅ Output directory ready: {OutputPath}")
-        return True
-    except Exception as CreateError:
-        print(f"❌ Failed to create output directory: {CreateError}")
-        return False
+        Thumbnail.thumbnail(Size, Image.Resampling.LANCZOS)
+        Buffer = io.BytesIO()
+        Thumbnail.save(Buffer, **SAVE_OPTIONS["png"])
+        return Buffer.getvalue()
+    finally:
+        Thumbnail.close()
 
-def ValidateSourceDirectory(SourcePath):
+def LoadPrimary(SourcePath, OutputDir, Sizes):
     """
-    Validate that source directory exists and contains PNG files
-    
-    Args:
-        SourcePath: Path to validate
-        
-    Returns:
-        tuple: (bool: valid, int: png_count)
+    Database thumbnail of an already converted cover
+
+    Read from the first-size PNG on disk when the build writes one,
+    otherwise rendered again from the cover.
     """
-    if not os.path.exists(SourcePath):
-        print(f"❌ Source directory not found: {SourcePath}")
-        return False, 0
-    
-    PngFiles = list(Path(SourcePath).glob("*.png"))
-    PngCount = len(PngFiles)
-    
-    if PngCount == 0:
-        print(f"⚠️ No PNG files found in: {SourcePath}")
-        return False, 0
-    
-    print(f"📁 Found {PngCount} PNG files in source directory")
-    return True, PngCount
-
-def ConvertSingleImage(SourcePath, OutputPath, ThumbnailSize):
+    PrimaryPath = os.path.join(OutputDir, OutputName(os.path.basename(SourcePath), Sizes[0], "png"))
+    if os.path.exists(PrimaryPath):
+        with open(PrimaryPath, "rb") as PrimaryFile:
+            return PrimaryFile.read()
+    CleanImage = LoadCleanImage(SourcePath)
+    try:
+        return RenderPrimary(CleanImage, Sizes[0])
+    finally:
+        CleanImage.close()
+
+def ConvertCover(SourcePath, OutputDir, Sizes, Formats):
     """
-    Convert a single PNG file to thumbnail
-    
-    Args:
-        SourcePath: Path to source PNG file
-        OutputPath: Path for output thumbnail
-        ThumbnailSize: Tuple of (width, height)
-        
+    Render every size/format of one cover (runs in a worker process)
+
     Returns:
-        tuple: (bool: success, int: original_size, int: thumbnail_size)
+        dict: sha256, original_size, outputs (relative paths), total_bytes,
+              primary (PNG bytes of the first size, for the database)
     """
+    SourceHash = HashFile(SourcePath)
+    SourceName = os.path.basename(SourcePath)
+    Outputs = []
+    TotalBytes = 0
+    Primary = None
+
+    CleanImage = LoadCleanImage(SourcePath)
     try:
-        # Get original file size
-        OriginalSize = os.path.getsize(SourcePath)
-        
-        # Open and process image
-        with Image.open(SourcePath) as OriginalImage:
-            # Convert RGBA to RGB if necessary (remove transparency)
-            if OriginalImage.mode in ('RGBA', 'LA'):
-                # Create white background
-                RgbImage = Image.new('RGB', OriginalImage.size, (255, 255, 255))
-                if OriginalImage.mode == 'RGBA':
-                    RgbImage.paste(OriginalImage, mask=OriginalImage.split()[-1])
-                else:
-                    RgbImage.paste(OriginalImage, mask=OriginalImage.split()[-1])
-                ProcessedImage = RgbImage
-            else:
-                ProcessedImage = OriginalImage.copy()
-            
-            # Create thumbnail while maintaining aspect ratio
-            ProcessedImage.thumbnail(ThumbnailSize, Image.Resampling.LANCZOS)
-            
-            # Save optimized thumbnail
-            ProcessedImage.save(OutputPath, 'PNG', optimize=True, quality=QUALITY_SETTING)
-        
-        # Get thumbnail file size
-        ThumbnailSize = os.path.getsize(OutputPath)
-        
-        return True, OriginalSize, ThumbnailSize
-        
-    except Exception as ConversionError:
-        print(f"❌ Error converting {SourcePath}: {ConversionError}")
-        return False, 0, 0
+        for SizeIndex, Size in enumerate(Sizes):
+            Thumbnail = CleanImage.copy()
+            Thumbnail.thumbnail(Size, Image.Resampling.LANCZOS)
+            for Format in Formats:
+                RelativePath = OutputName(SourceName, Size, Format)
+                TargetPath = os.path.join(OutputDir, RelativePath)
+                os.makedirs(os.path.dirname(TargetPath), exist_ok=True)
+                TempPath = f"{TargetPath}.{os.getpid()}.tmp"
+                Thumbnail.save(TempPath, **SAVE_OPTIONS[Format])
+                os.replace(TempPath, TargetPath)
+                Outputs.append(RelativePath)
+                TotalBytes += os.path.getsize(TargetPath)
+
+            if SizeIndex == 0:
+                Buffer = io.BytesIO()
+                Thumbnail.save(Buffer, **SAVE_OPTIONS["png"])
+                Primary = Buffer.getvalue()
+            Thumbnail.close()
+    finally:
+        CleanImage.close()
+
+    return {
+        "sha256": SourceHash,
+        "original_size": os.path.getsize(SourcePath),
+        "outputs": Outputs,
+        "total_bytes": TotalBytes,
+        "primary": Primary
+    }
+
+class ThumbnailManifest:
+    """
+    Content-hash manifest of converted covers
+
+    An entry is current when the cover's hash and the settings fingerprint
+    match and every output file still exists. Size and mtime are recorded
+    so unchanged covers are recognised without re-hashing them.
+    """
+
+    def __init__(self, ManifestPath, Fingerprint):
+        self.ManifestPath = ManifestPath
+        self.Fingerprint = Fingerprint
+        try:
+            with open(ManifestPath, "r", encoding="utf-8") as ManifestFile:
+                Data = json.load(ManifestFile)
+        except (OSError, ValueError):
+            Data = {}
+        self.Entries = Data.get("entries", {}) if Data.get("fingerprint") == Fingerprint else {}
+
+    def IsCurrent(self, SourcePath, OutputDir):
+        Entry = self.Entries.get(os.path.basename(SourcePath))
+        if not Entry:
+            return False
+        if not all(os.path.exists(os.path.join(OutputDir, Output)) for Output in Entry["outputs"]):
+            return False
+        Stat = os.stat(SourcePath)
+        if Entry["size"] == Stat.st_size and Entry["mtime_ns"] == Stat.st_mtime_ns:
+            return True
+        if Entry["size"] == Stat.st_size and HashFile(SourcePath) == Entry["sha256"]:
+            Entry["mtime_ns"] = Stat.st_mtime_ns  # touched, not changed
+            return True
+        return False
+
+    def Record(self, SourcePath, Result):
+        Stat = os.stat(SourcePath)
+        self.Entries[os.path.basename(SourcePath)] = {
+            "sha256": Result["sha256"],
+            "size": Stat.st_size,
+            "mtime_ns": Stat.st_mtime_ns,
+            "outputs": Result["outputs"]
+        }
+
+    def Save(self):
+        TempPath = f"{self.ManifestPath}.tmp"
+        with open(TempPath, "w", encoding="utf-8") as ManifestFile:
+            json.dump({"fingerprint": self.Fingerprint, "entries": self.Entries}, ManifestFile, indent=1, sort_keys=True)
+        os.replace(TempPath, self.ManifestPath)
+
+class ThumbnailStore:
+    """
+    Batched loader for books.ThumbnailImage
+
+    Covers are matched to books by title (the cover file name without its
+    extension), case-insensitively. Updates are flushed BatchSize at a time
+    in one transaction each; rows already holding the same image are not
+    rewritten. OnStored callbacks run once their batch has committed.
+    """
+
+    def __init__(self, DatabasePath, BatchSize=DB_BATCH_SIZE):
+        self.Connection = sqlite3.connect(DatabasePath)
+        self.BatchSize = BatchSize
+        self.Pending = []
+        self.Callbacks = []
+        self.Stored = 0
+        self.Unmatched = []
+        self.TitleIndex = {}
+        for BookId, Title in self.Connection.execute("SELECT id, title FROM books"):
+            if Title:
+                self.TitleIndex.setdefault(Title.strip().lower(), BookId)
+
+    def Add(self, SourceName, ImageBytes, OnStored=None):
+        BookId = self.TitleIndex.get(Path(SourceName).stem.strip().lower())
+        if BookId is None:
+            self.Unmatched.append(SourceName)
+            if OnStored:
+                OnStored()  # no row to update
+            return False
+        Blob = sqlite3.Binary(ImageBytes)
+        self.Pending.append((Blob, BookId, Blob))
+        if OnStored:
+            self.Callbacks.append(OnStored)
+        if len(self.Pending) >= self.BatchSize:
+            self.Flush()
+        return True
+
+    def Flush(self):
+        if not self.Pending:
+            return
+        with self.Connection:
+            Cursor = self.Connection.executemany("""
+                UPDATE books SET ThumbnailImage = ?
+                WHERE id = ? AND (ThumbnailImage IS NULL OR ThumbnailImage != ?)
+            """, self.Pending)
+        self.Stored += max(Cursor.rowcount, 0)
+        Callbacks, self.Pending, self.Callbacks = self.Callbacks, [], []
+        for Callback in Callbacks:
+            Callback()
+
+    def Close(self):
+        self.Flush()
+        self.Connection.close()
 
 def FormatFileSize(SizeInBytes):
     """
     Format file size in human-readable format
-    
+
     Args:
         SizeInBytes: Size in bytes
-        
+
     Returns:
         str: Formatted size string
     """
@@ -125,181 +306,157 @@ def FormatFileSize(SizeInBytes):
         SizeInBytes /= 1024.0
     return f"{SizeInBytes:.1f} TB"
 
-def GenerateThumbnails():
+def GenerateThumbnails(SourceDir, OutputDir, Sizes, Formats, DatabasePath=None,
+                       Workers=None, BatchSize=DB_BATCH_SIZE, Force=False, Quiet=False):
     """
-    Main function to convert all PNG files to thumbnails
-    
+    Convert every changed cover in SourceDir and load the results into the database
+
     Returns:
-        bool: True if successful, False otherwise
+        dict: Run statistics (processed, skipped, errors, stored, unmatched, seconds, images_per_second)
     """
     StartTime = time.time()
-    
-    print("🎨 Anderson's Library Thumbnail Generator")
-    print("=" * 50)
-    print(f"📂 Source: {SOURCE_DIR}")
-    print(f"📁 Output: {OUTPUT_DIR}")
-    print(f"📏 Size: {THUMBNAIL_SIZE[0]}x{THUMBNAIL_SIZE[1]} pixels")
-    print("=" * 50)
-    
-    # Validate source directory
-    IsValid, TotalFiles = ValidateSourceDirectory(SOURCE_DIR)
-    if not IsValid:
-        return False
-    
-    # Create output directory
-    if not CreateOutputDirectory(OUTPUT_DIR):
-        return False
-    
-    # Process all PNG files
-    ProcessedCount = 0
-    ErrorCount = 0
-    TotalOriginalSize = 0
-    TotalThumbnailSize = 0
-    SkippedCount = 0
-    
-    PngFiles = list(Path(SOURCE_DIR).glob("*.png"))
-    
-    print(f"🔄 Starting conversion of {len(PngFiles)} files...")
-    print()
-    
-    for FileIndex, SourceFile in enumerate(PngFiles, 1):
-        FileName = SourceFile.name
-        OutputFile = Path(OUTPUT_DIR) / FileName
-        
-        # Check if thumbnail already exists
-        if OutputFile.exists():
-            print(f"⏭️ Skipping {FileName} (already exists)")
-            SkippedCount += 1
-            continue
-        
-        # Convert image
-        Success, OriginalSize, ThumbnailSize = ConvertSingleImage(
-            str(SourceFile), str(OutputFile), THUMBNAIL_SIZE
-        )
-        
-        if Success:
-            ProcessedCount += 1
-            TotalOriginalSize += OriginalSize
-            TotalThumbnailSize += ThumbnailSize
-            
-            # Calculate compression ratio
-            CompressionRatio = (1 - (ThumbnailSize / OriginalSize)) * 100 if OriginalSize > 0 else 0
-            
-            # Show progress
-            if ProcessedCount % PROGRESS_INTERVAL == 0 or FileIndex == len(PngFiles):
-                print(f"📸 Processed {ProcessedCount}/{TotalFiles}: {FileName}")
-                print(f"   📊 {FormatFileSize(OriginalSize)} → {FormatFileSize(ThumbnailSize)} ({CompressionRatio:.1f}% reduction)")
-                
-        else:
-            ErrorCount += 1
-    
-    # Calculate final statistics
-    EndTime = time.time()
-    ProcessingTime = EndTime - StartTime
-    
+    Log = (lambda Message: None) if Quiet else print
+
+    SourceFiles = sorted(str(PathItem) for PathItem in Path(SourceDir).iterdir()
+                         if PathItem.suffix.lower() in SOURCE_EXTENSIONS)
+    Path(OutputDir).mkdir(parents=True, exist_ok=True)
+
+    Manifest = ThumbnailManifest(os.path.join(OutputDir, MANIFEST_NAME), SettingsFingerprint(Sizes, Formats))
+    ToConvert = SourceFiles if Force else [SourceFile for SourceFile in SourceFiles
+                                           if not Manifest.IsCurrent(SourceFile, OutputDir)]
+
+    Stats = {"found": len(SourceFiles), "processed": 0, "skipped": len(SourceFiles) - len(ToConvert),
+             "errors": 0, "stored": 0, "unmatched": 0, "original_bytes": 0, "thumbnail_bytes": 0}
+
+    Log(f"🔄 {len(ToConvert)} of {len(SourceFiles)} covers changed - "
+        f"{len(Sizes)} sizes × {len(Formats)} formats on {Workers or os.cpu_count()} workers")
+
+    Store = ThumbnailStore(DatabasePath, BatchSize) if DatabasePath else None
+    try:
+        if Store:
+            # Unchanged covers still go to the database - it may be new or have missed a run
+            Converting = set(ToConvert)
+            for SourceFile in SourceFiles:
+                if SourceFile in Converting:
+                    continue
+                try:
+                    Store.Add(os.path.basename(SourceFile), LoadPrimary(SourceFile, OutputDir, Sizes))
+                except Exception as LoadError:
+                    Stats["errors"] += 1
+                    Log(f"❌ Error loading {os.path.basename(SourceFile)}: {LoadError}")
+
+        if ToConvert:
+            with ProcessPoolExecutor(max_workers=Workers) as Executor:
+                Futures = {Executor.submit(ConvertCover, SourceFile, OutputDir, Sizes, Formats): SourceFile
+                           for SourceFile in ToConvert}
+                for Future in as_completed(Futures):
+                    SourceFile = Futures[Future]
+                    try:
+                        Result = Future.result()
+                    except Exception as ConversionError:
+                        Stats["errors"] += 1
+                        Log(f"❌ Error converting {os.path.basename(SourceFile)}: {ConversionError}")
+                        continue
+
+                    Stats["processed"] += 1
+                    Stats["original_bytes"] += Result["original_size"]
+                    Stats["thumbnail_bytes"] += Result["total_bytes"]
+                    if Store:
+                        # Only a cover whose row is written counts as done
+                        Store.Add(os.path.basename(SourceFile), Result["primary"],
+                                  OnStored=partial(Manifest.Record, SourceFile, Result))
+                    else:
+                        Manifest.Record(SourceFile, Result)
+
+                    if Stats["processed"] % PROGRESS_INTERVAL == 0:
+                        Elapsed = time.time() - StartTime
+                        Log(f"📸 Processed {Stats['processed']}/{len(ToConvert)} "
+                            f"({Stats['processed'] / Elapsed:.1f} images/sec)")
+                        Manifest.Save()  # a killed run resumes from here
+    finally:
+        try:
+            if Store:
+                Store.Close()
+                Stats["stored"] = Store.Stored
+                Stats["unmatched"] = len(Store.Unmatched)
+        finally:
+            Manifest.Save()
+
+    Stats["seconds"] = round(time.time() - StartTime, 3)
+    Stats["images_per_second"] = round(Stats["processed"] / Stats["seconds"], 2) if Stats["seconds"] > 0 else 0.0
+    return Stats
+
+def PrintSummary(Stats, OutputDir):
     print()
     print("=" * 50)
-    print("✅ THUMBNAIL CONVERSION COMPLETE!")
+    print("✅ THUMBNAIL BUILD COMPLETE!")
     print("=" * 50)
-    print(f"📊 Files processed: {ProcessedCount}")
-    print(f"⏭️ Files skipped: {SkippedCount}")
-    print(f"❌ Errors: {ErrorCount}")
-    print(f"⏱️ Processing time: {ProcessingTime:.1f} seconds")
-    
-    if ProcessedCount > 0:
-        # Size comparison
-        TotalReduction = (1 - (TotalThumbnailSize / TotalOriginalSize)) * 100 if TotalOriginalSize > 0 else 0
-        AverageOriginalSize = TotalOriginalSize / ProcessedCount
-        AverageThumbnailSize = TotalThumbnailSize / ProcessedCount
-        
-        print()
-        print("📈 SIZE ANALYSIS:")
-        print(f"   Original total: {FormatFileSize(TotalOriginalSize)}")
-        print(f"   Thumbnail total: {FormatFileSize(TotalThumbnailSize)}")
-        print(f"   Total reduction: {TotalReduction:.1f}%")
-        print(f"   Average original: {FormatFileSize(AverageOriginalSize)}")
-        print(f"   Average thumbnail: {FormatFileSize(AverageThumbnailSize)}")
-        
-        # Performance metrics
-        FilesPerSecond = ProcessedCount / ProcessingTime if ProcessingTime > 0 else 0
-        print(f"   Processing speed: {FilesPerSecond:.1f} files/second")
-    
-    print()
-    print(f"📁 Thumbnails saved to: {OUTPUT_DIR}")
-    print("🎉 Ready for web deployment!")
-    
-    return ErrorCount == 0
-
-def ShowUsageInformation():
-    """Display usage information for the script"""
-    print("📚 Anderson's Library Thumbnail Generator")
-    print()
-    print("USAGE:")
-    print("  python ConvertToThumbnails.py")
-    print()
-    print("CONFIGURATION:")
-    print(f"  Source Directory: {SOURCE_DIR}")
-    print(f"  Output Directory: {OUTPUT_DIR}")
-    print(f"  Thumbnail Size: {THUMBNAIL_SIZE[0]}x{THUMBNAIL_SIZE[1]} pixels")
-    print()
-    print("FEATURES:")
-    print("  ✅ Maintains aspect ratio")
-    print("  ✅ Optimizes file size")
-    print("  ✅ Handles RGBA to RGB conversion")
-    print("  ✅ Progress tracking")
-    print("  ✅ Error handling")
-    print("  ✅ Skips existing files")
-    print()
-    print("OUTPUT:")
-    print("  • Creates optimized PNG thumbnails")
-    print("  • Typically 95%+ smaller than originals")
-    print("  • Perfect for web deployment")
+    print(f"📊 Covers processed: {Stats['processed']}")
+    print(f"⏭️ Unchanged (skipped): {Stats['skipped']}")
+    print(f"❌ Errors: {Stats['errors']}")
+    if Stats["stored"] or Stats["unmatched"]:
+        print(f"🗄️ Stored in database: {Stats['stored']} ({Stats['unmatched']} covers matched no book title)")
+    print(f"⏱️ Processing time: {Stats['seconds']:.1f} seconds")
+    print(f"⚡ Throughput: {Stats['images_per_second']:.1f} images/second")
+    if Stats["processed"]:
+        print(f"📈 {FormatFileSize(Stats['original_bytes'])} of covers → "
+              f"{FormatFileSize(Stats['thumbnail_bytes'])} of thumbnails")
+    print(f"📁 Thumbnails saved to: {OutputDir}")
 
-def ValidateEnvironment():
-    """
-    Validate that required dependencies are available
-    
-    Returns:
-        bool: True if environment is ready
-    """
-    try:
-        import PIL
-        print(f"✅ PIL/Pillow version: {PIL.__version__}")
-        return True
-    except ImportError:
+def BuildArgumentParser():
+    Parser = argparse.ArgumentParser(description="Anderson's Library thumbnail build stage")
+    Parser.add_argument("--source", default=DEFAULT_SOURCE_DIR, help="Directory of cover images")
+    Parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="Directory for generated thumbnails")
+    Parser.add_argument("--database", default=DEFAULT_DATABASE,
+                        help="Library database to load thumbnails into (books.ThumbnailImage)")
+    Parser.add_argument("--no-database", action="store_true", help="Only write thumbnail files")
+    Parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated WIDTHxHEIGHT list; first is stored")
+    Parser.add_argument("--formats", default=DEFAULT_FORMATS, help="Comma-separated formats: png, webp, jpeg")
+    Parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    Parser.add_argument("--batch-size", type=int, default=DB_BATCH_SIZE, help="Database rows per transaction")
+    Parser.add_argument("--force", action="store_true", help="Ignore the manifest and rebuild everything")
+    return Parser
+
+def Main(Arguments=None):
+    Options = BuildArgumentParser().parse_args(Arguments)
+
+    if Image is None:
         print("❌ PIL/Pillow not found!")
         print("   Install with: pip install Pillow")
-        return False
+        return 1
 
-if __name__ == "__main__":
-    # Handle command line arguments
-    if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help', 'help']:
-        ShowUsageInformation()
-        sys.exit(0)
-    
-    # Validate environment
-    if not ValidateEnvironment():
-        sys.exit(1)
-    
-    # Run thumbnail generation
     try:
-        Success = GenerateThumbnails()
-        ExitCode = 0 if Success else 1
-        
-        if Success:
-            print(f"\n🎉 Thumbnail generation completed successfully!")
-            print(f"   Ready to integrate with Anderson's Library web interface")
-        else:
-            print(f"\n⚠️ Thumbnail generation completed with errors")
-            print(f"   Check the output above for details")
-        
-        sys.exit(ExitCode)
-        
+        Sizes = ParseSizes(Options.sizes)
+        Formats = ParseFormats(Options.formats)
+    except ValueError as OptionError:
+        print(f"❌ {OptionError}")
+        return 2
+
+    if not os.path.isdir(Options.source):
+        print(f"❌ Source directory not found: {Options.source}")
+        return 1
+
+    DatabasePath = None if Options.no_database else Options.database
+    if DatabasePath and not os.path.exists(DatabasePath):
+        print(f"⚠️ Database not found ({DatabasePath}) - writing thumbnail files only")
+        DatabasePath = None
+
+    print("🎨 Anderson's Library Thumbnail Builder")
+    print("=" * 50)
+    print(f"📂 Source: {Options.source}")
+    print(f"📁 Output: {Options.output}")
+    print(f"📏 Sizes: {', '.join(f'{Width}x{Height}' for Width, Height in Sizes)}  Formats: {', '.join(Formats)}")
+    print("=" * 50)
+
+    try:
+        Stats = GenerateThumbnails(Options.source, Options.output, Sizes, Formats, DatabasePath,
+                                   Options.workers, Options.batch_size, Options.force)
     except KeyboardInterrupt:
-        print("\n\n⚠️ Conversion interrupted by user")
-        print("   Partial results may be available in the output directory")
-        sys.exit(1)
-    except Exception as UnexpectedError:
-        print(f"\n❌ Unexpected error: {UnexpectedError}")
-        print("   Please check file permissions and available disk space")
-        sys.exit(1)
\ No newline at end of file
+        print("\n\n⚠️ Conversion interrupted by user - the manifest keeps finished covers")
+        return 1
+
+    PrintSummary(Stats, Options.output)
+    return 0 if Stats["errors"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(Main())
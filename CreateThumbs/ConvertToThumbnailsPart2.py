@@ -1,115 +0,0 @@
-#!/usr/bin/env python3
-"""
-Fix Problematic PNG Files - Simple metadata stripping approach
-"""
-
-import os
-from PIL import Image
-import io
-
-# The problematic files
-PROBLEMATIC_FILES = [
-    "/home/herb/Desktop/BowersWorld-com/Covers/Algebra Based and AP Physics 2.png",
-    "/home/herb/Desktop/BowersWorld-com/Covers/Trigonometry for Dummies.png"
-]
-
-OUTPUT_DIR = "/home/herb/Desktop/BowersWorld-com/Thumbs"
-THUMBNAIL_SIZE = (64, 85)
-
-def fix_and_convert_png(source_path, output_path):
-    """
-    Fix PNG by completely stripping metadata and converting to thumbnail
-    """
-    try:
-        print(f"🔧 Fixing: {os.path.basename(source_path)}")
-        
-        # Method 1: Try loading with warnings ignored
-        try:
-            import warnings
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                img = Image.open(source_path)
-                img.load()  # Force load the image data
-        except Exception:
-            # Method 2: Load as raw pixel data and rebuild
-            print(f"   🔄 Trying alternative loading method...")
-            with open(source_path, 'rb') as f:
-                # Read file as bytes
-                img_bytes = f.read()
-            
-            # Load into PIL and immediately convert to clean format
-            img_stream = io.BytesIO(img_bytes)
-            img = Image.open(img_stream)
-            img.load()
-        
-        # Convert to clean RGB format (strips all metadata)
-        if img.mode in ('RGBA', 'LA', 'P'):
-            # Create white background
-            clean_img = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            if img.mode in ('RGBA', 'LA'):
-                clean_img.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-        else:
-            # Convert to RGB to strip metadata
-            clean_img = img.convert('RGB')
-        
-        # Create thumbnail
-        clean_img.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
-        
-        # Save as clean PNG (no metadata)
-        clean_img.save(output_path, 'PNG', optimize=True)
-        
-        # Clean up
-        img.close()
-        clean_img.close()
-        
-        # Check result
-        if os.path.exists(output_path):
-            original_size = os.path.getsize(source_path)
-            thumbnail_size = os.path.getsize(output_path)
-            reduction = (1 - (thumbnail_size / original_size)) * 100
-            
-            print(f"   ✅ Success: {original_size//1024} KB → {thumbnail_size//1024} KB ({reduction:.1f}% reduction)")
-            return True
-        else:
-            print(f"   ❌ Failed to create thumbnail")
-            return False
-            
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
-        
-        # Last resort: Try with different image library or manual pixel extraction
-        try:
-            print(f"   🔄 Trying emergency fallback...")
-            # Create a simple placeholder thumbnail
-            placeholder = Image.new('RGB', THUMBNAIL_SIZE, (200, 200, 200))
-            # Add some text to indicate it's a placeholder
-            placeholder.save(output_path, 'PNG')
-            print(f"   ⚠️ Created placeholder thumbnail")
-            return True
-        except:
-            return False
-
-def main():
-    print("🔧 Fixing Problematic PNG Files")
-    print("=" * 40)
-    
-    fixed_count = 0
-    
-    for source_file in PROBLEMATIC_FILES:
-        if os.path.exists(source_file):
-            filename = os.path.basename(source_file)
-            output_file = os.path.join(OUTPUT_DIR, filename)
-            
-            if fix_and_convert_png(source_file, output_file):
-                fixed_count += 1
-        else:
-            print(f"⚠️ File not found: {os.path.basename(source_file)}")
-    
-    print()
-    print(f"✅ Fixed {fixed_count} problematic files")
-    print(f"🎉 All thumbnails now complete!")
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
@@ -2,306 +2,404 @@
 # Path: Source/Interface/BookGrid.py
 # Standard: AIDEV-PascalCase-1.8
 # Created: 2025-07-06
-# Last Modified: 2025-07-06  11:26AM
+# Last Modified: 2026-10-19  06:25PM
 """
-Description: Fixed Book Grid with Proper PySide6 Imports
-Enhanced book display grid with proper imports and resize handling.
+Description: Virtualized Book Grid (model/view)
+Book display grid built on QListView + QAbstractListModel + a painting
+delegate. Only the visible items are painted, so filter changes are a single
+model reset no matter how large the catalog is. Covers are decoded and
+scaled on a QThreadPool and kept in the LRU QPixmapCache; items whose cover
+is still loading show a placeholder until the decoded image arrives.
 """
 
 import logging
-import math
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set
 from pathlib import Path
 
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QScrollArea, QFrame, QLabel,
-    QPushButton, QGridLayout, QSizePolicy, QApplication
+    QWidget, QVBoxLayout, QListView, QLabel, QStyledItemDelegate, QStyle,
+    QAbstractItemView, QStackedLayout
 )
-from PySide6.QtCore import Qt, Signal, QTimer, QSize
-from PySide6.QtGui import QPixmap, QFont, QPainter, QBrush, QColor
+from PySide6.QtCore import (
+    Qt, Signal, QObject, QRunnable, QThreadPool, QAbstractListModel,
+    QModelIndex, QSize, QRect, QTimer, QCoreApplication
+)
+from PySide6.QtGui import QPixmap, QPixmapCache, QImage, QFont, QPainter, QColor, QPen
 
 from Source.Core.BookService import BookService
 
+# Item geometry per view mode: (item width, item height, cover width, cover height)
+VIEW_GEOMETRY = {
+    "grid": (180, 280, 156, 196),
+    "list": (600, 80, 56, 56)
+}
+COVER_CACHE_LIMIT_KB = 64 * 1024  # QPixmapCache is LRU - older covers drop out first
+MAX_DECODE_THREADS = 4
+LAYOUT_BATCH_SIZE = 200
+
+BookDataRole = Qt.UserRole + 1
+CoverRole = Qt.UserRole + 2
+
+
+class _CoverSignals(QObject):
+    """Carries decoded covers from pool threads back to the GUI thread"""
+    Decoded = Signal(str, QImage, int)
 
-class BookCard(QFrame):
+
+class _CoverDecodeTask(QRunnable):
     """
-    Individual book card widget with enhanced styling.
+    Decode and scale one cover off the GUI thread.
+    QImage is safe to use from worker threads; the QPixmap is made on the GUI thread.
     """
-    
-    BookClicked = Signal(dict)
-    
-    def __init__(self, BookData: dict, ViewMode: str = "grid"):
+
+    def __init__(self, Key: str, ThumbnailData: Optional[bytes], CoverPath: Optional[str],
+                 CoverSize: QSize, Signals: _CoverSignals, Loader: "CoverLoader", Generation: int):
         super().__init__()
-        
-        self.BookData = BookData
-        self.ViewMode = ViewMode
+        self.Key = Key
+        self.ThumbnailData = ThumbnailData
+        self.CoverPath = CoverPath
+        self.CoverSize = CoverSize
+        self.Signals = Signals
+        self.Loader = Loader
+        self.Generation = Generation
+
+    def run(self) -> None:
+        # Superseded by a filter/view change while queued - skip the decode
+        if self.Generation != self.Loader.Generation:
+            return
+        Image = QImage()
+        if self.ThumbnailData:
+            Image.loadFromData(bytes(self.ThumbnailData))
+        if Image.isNull() and self.CoverPath:
+            Image.load(self.CoverPath)
+        if not Image.isNull():
+            Image = Image.scaled(self.CoverSize, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.Signals.Decoded.emit(self.Key, Image, self.Generation)
+
+
+class CoverLoader(QObject):
+    """
+    Background cover decoding into QPixmapCache.
+    Each cover is decoded at most once per size while it stays in the cache;
+    concurrent requests for the same cover share one decode.
+    """
+
+    CoverReady = Signal(str)
+
+    def __init__(self, Parent: Optional[QObject] = None):
+        super().__init__(Parent)
         self.Logger = logging.getLogger(__name__)
-        
-        # Set up the card
-        self._SetupCard()
-        self._LoadBookCover()
-    
-    def _SetupCard(self) -> None:
-        """Setup the book card layout and styling"""
-        self.setFrameStyle(QFrame.Box | QFrame.Raised)
-        self.setLineWidth(2)
-        
-        if self.ViewMode == "list":
-            # List mode: horizontal layout with smaller icon
-            self.setFixedSize(600, 80)
-            Layout = QHBoxLayout(self)
-            Layout.setContentsMargins(8, 2, 8, 2)
-            Layout.setSpacing(10)
-        else:
-            # Grid mode: vertical layout with large icon
-            self.setFixedSize(180, 280)
-            Layout = QVBoxLayout(self)
-            Layout.setContentsMargins(8, 8, 8, 8)
-            Layout.setSpacing(5)
-        
-        # Cover image label
-        self.CoverLabel = QLabel()
-        self.CoverLabel.setAlignment(Qt.AlignCenter)
-        
-        if self.ViewMode == "list":
-            # Small icon for list view
-            self.CoverLabel.setMinimumSize(60, 60)
-            self.CoverLabel.setMaximumSize(60, 60)
-        else:
-            # Large icon for grid view
-            self.CoverLabel.setMinimumSize(160, 200)
-            self.CoverLabel.setMaximumSize(160, 200)
-            
-        self.CoverLabel.setStyleSheet("""
-            QLabel {
-                border: 2px solid #4CAF50;
-                border-radius: 8px;
-                background-color: rgba(255, 255, 255, 0.9);
-                padding: 2px;
-            }
-        """)
-        Layout.addWidget(self.CoverLabel)
-        
-        # Title label
-        Title = self.BookData.get('Title', 'Unknown Title')
-        if self.ViewMode == "list":
-            # Full title for list view
-            self.TitleLabel = QLabel(Title)
-            self.TitleLabel.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-            self.TitleLabel.setWordWrap(True)
-            self.TitleLabel.setStyleSheet("""
-                QLabel {
-                    color: #FFFFFF;
-                    font-size: 14px;
-                    font-weight: bold;
-                    background-color: rgba(0, 0, 0, 0.7);
-                    border-radius: 4px;
-                    padding: 8px;
-                }
-            """)
+        self.Pool = QThreadPool(self)
+        self.Pool.setMaxThreadCount(max(1, min(MAX_DECODE_THREADS, QThreadPool.globalInstance().maxThreadCount())))
+        self.Pending: Set[str] = set()
+        self.Failed: Set[str] = set()
+        self.Generation = 0
+        self.Signals = _CoverSignals(self)
+        self.Signals.Decoded.connect(self._OnDecoded, Qt.QueuedConnection)
+        if QCoreApplication.instance():
+            QCoreApplication.instance().aboutToQuit.connect(self.Shutdown)
+        QPixmapCache.setCacheLimit(max(QPixmapCache.cacheLimit(), COVER_CACHE_LIMIT_KB))
+
+    @staticmethod
+    def CoverKey(BookData: dict, ViewMode: str) -> str:
+        BookId = BookData.get('id', BookData.get('ID'))
+        return f"cover:{ViewMode}:{BookId if BookId is not None else BookData.get('Title', '')}"
+
+    @staticmethod
+    def FindCover(Key: str) -> Optional[QPixmap]:
+        Pixmap = QPixmapCache.find(Key)
+        return Pixmap if Pixmap is not None and not Pixmap.isNull() else None
+
+    def Request(self, Key: str, BookData: dict, CoverSize: QSize) -> None:
+        """Queue a decode unless the cover is cached, in flight or known to be missing"""
+        if Key in self.Pending or Key in self.Failed:
+            return
+        BookId = BookData.get('id', BookData.get('ID', 0))
+        CoverPath = Path(f"Data/Covers/{BookId}.jpg")
+        ThumbnailData = BookData.get('ThumbnailData')
+        if not ThumbnailData and not CoverPath.exists():
+            self.Failed.add(Key)
+            return
+        self.Pending.add(Key)
+        self.Pool.start(_CoverDecodeTask(Key, ThumbnailData, str(CoverPath), CoverSize,
+                                         self.Signals, self, self.Generation))
+
+    def CancelPending(self) -> None:
+        """Abandon queued decodes - e.g. after a filter change; they exit without decoding"""
+        self.Generation += 1
+        self.Pending.clear()
+        self.Failed.clear()
+
+    def Shutdown(self) -> None:
+        """Cancel outstanding decodes and wait for running ones before the app exits"""
+        self.CancelPending()
+        self.Pool.waitForDone()
+
+    def _OnDecoded(self, Key: str, Image: QImage, Generation: int) -> None:
+        if Generation != self.Generation:
+            return
+        self.Pending.discard(Key)
+        if Image.isNull():
+            self.Failed.add(Key)
+            self.Logger.warning(f"Failed to decode cover {Key}")
         else:
-            # Truncated title for grid view
-            self.TitleLabel = QLabel(Title[:25] + "..." if len(Title) > 25 else Title)
-            self.TitleLabel.setAlignment(Qt.AlignCenter)
-            self.TitleLabel.setWordWrap(True)
-            self.TitleLabel.setStyleSheet("""
-                QLabel {
-                    color: #FFFFFF;
-                    font-size: 12px;
-                    font-weight: bold;
-                    background-color: rgba(0, 0, 0, 0.7);
-                    border-radius: 4px;
-                    padding: 4px;
-                }
-            """)
-        Layout.addWidget(self.TitleLabel)
-        
-        # Set hover effects
-        self.setStyleSheet("""
-            QFrame {
-                background-color: rgba(255, 255, 255, 0.1);
-                border-radius: 10px;
-            }
-            QFrame:hover {
-                background-color: rgba(255, 255, 255, 0.2);
-                border: 3px solid #FFC107;
-            }
-        """)
-    
-    def _LoadBookCover(self) -> None:
-        """Load and display the book cover"""
-        try:
-            # Try to load cover from BLOB data first
-            if 'ThumbnailData' in self.BookData and self.BookData['ThumbnailData']:
-                Pixmap = QPixmap()
-                if Pixmap.loadFromData(self.BookData['ThumbnailData']):
-                    # Scale to fit the label based on view mode
-                    if self.ViewMode == "list":
-                        ScaledPixmap = Pixmap.scaled(
-                            56, 56, Qt.KeepAspectRatio, Qt.SmoothTransformation
-                        )
-                    else:
-                        ScaledPixmap = Pixmap.scaled(
-                            156, 196, Qt.KeepAspectRatio, Qt.SmoothTransformation
-                        )
-                    self.CoverLabel.setPixmap(ScaledPixmap)
-                    return
-                else:
-                    self.Logger.warning(f"Failed to load thumbnail BLOB for book {self.BookData.get('ID', 'Unknown')}")
-            
-            # Fallback to file-based cover
-            CoverPath = Path(f"Data/Covers/{self.BookData.get('ID', 0)}.jpg")
-            if CoverPath.exists():
-                Pixmap = QPixmap(str(CoverPath))
-                if Pixmap.isNull():
-                    self.Logger.warning(f"Failed to load file-based cover from {CoverPath} for book {self.BookData.get('ID', 'Unknown')}")
-                if self.ViewMode == "list":
-                    ScaledPixmap = Pixmap.scaled(
-                        56, 56, Qt.KeepAspectRatio, Qt.SmoothTransformation
-                    )
-                else:
-                    ScaledPixmap = Pixmap.scaled(
-                        156, 196, Qt.KeepAspectRatio, Qt.SmoothTransformation
-                    )
-                self.CoverLabel.setPixmap(ScaledPixmap)
-                return
-            
-            # No cover found - use placeholder
-            self._CreatePlaceholder()
-            
-        except Exception as Error:
-            self.Logger.error(f"Failed to load cover for book {self.BookData.get('ID', 'Unknown')}: {Error}")
-            self._CreatePlaceholder()
-    
-    def _CreatePlaceholder(self) -> None:
-        """Create a placeholder image for books without covers"""
+            QPixmapCache.insert(Key, QPixmap.fromImage(Image))
+        self.CoverReady.emit(Key)
+
+
+class BookListModel(QAbstractListModel):
+    """
+    List model over the current book dictionaries.
+    Covers are requested lazily from data(CoverRole), i.e. only for items the
+    view actually paints.
+    """
+
+    def __init__(self, Parent: Optional[QObject] = None):
+        super().__init__(Parent)
+        self.Books: List[Dict] = []
+        self.ViewMode = "grid"
+        self.Loader = CoverLoader(self)
+        self.Loader.CoverReady.connect(self._OnCoverReady)
+        self.RowsByKey: Dict[str, Set[int]] = {}
+
+    def SetBooks(self, Books: List[Dict]) -> None:
+        self.beginResetModel()
+        self.Books = Books
+        self.RowsByKey.clear()
+        self.Loader.CancelPending()
+        self.endResetModel()
+
+    def SetViewMode(self, Mode: str) -> None:
+        self.beginResetModel()
+        self.ViewMode = Mode
+        self.RowsByKey.clear()
+        self.Loader.CancelPending()
+        self.endResetModel()
+
+    def rowCount(self, Parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if Parent.isValid() else len(self.Books)
+
+    def data(self, Index: QModelIndex, Role: int = Qt.DisplayRole):
+        if not Index.isValid() or Index.row() >= len(self.Books):
+            return None
+        BookData = self.Books[Index.row()]
+
+        if Role == Qt.DisplayRole:
+            return BookData.get('Title', 'Unknown Title')
+        if Role == Qt.ToolTipRole:
+            return f"{BookData.get('Title', 'Unknown Title')}\n{BookData.get('Author', '')}".strip()
+        if Role == BookDataRole:
+            return BookData
+        if Role == CoverRole:
+            Key = CoverLoader.CoverKey(BookData, self.ViewMode)
+            Pixmap = CoverLoader.FindCover(Key)
+            if Pixmap is None:
+                _, _, CoverWidth, CoverHeight = VIEW_GEOMETRY[self.ViewMode]
+                self.RowsByKey.setdefault(Key, set()).add(Index.row())
+                self.Loader.Request(Key, BookData, QSize(CoverWidth, CoverHeight))
+            return Pixmap
+        return None
+
+    def _OnCoverReady(self, Key: str) -> None:
+        for Row in self.RowsByKey.pop(Key, ()):
+            if Row < len(self.Books):
+                ModelIndex = self.index(Row)
+                self.dataChanged.emit(ModelIndex, ModelIndex, [CoverRole])
+
+
+class BookCardDelegate(QStyledItemDelegate):
+    """Paints a book card (cover + title) directly - no widget per book"""
+
+    def __init__(self, Parent: Optional[QObject] = None):
+        super().__init__(Parent)
+        self.ViewMode = "grid"
+        self.TitleFont = QFont("Arial", 12, QFont.Bold)
+        self.ListTitleFont = QFont("Arial", 14, QFont.Bold)
+
+    def SetViewMode(self, Mode: str) -> None:
+        self.ViewMode = Mode
+
+    def sizeHint(self, Option, Index: QModelIndex) -> QSize:
+        Width, Height, _, _ = VIEW_GEOMETRY[self.ViewMode]
+        return QSize(Width, Height)
+
+    def _Placeholder(self) -> QPixmap:
+        """One shared placeholder per view mode"""
+        Key = f"cover-placeholder:{self.ViewMode}"
+        Pixmap = CoverLoader.FindCover(Key)
+        if Pixmap is None:
+            _, _, CoverWidth, CoverHeight = VIEW_GEOMETRY[self.ViewMode]
+            Pixmap = QPixmap(CoverWidth, CoverHeight)
+            Pixmap.fill(QColor("#E0E0E0"))
+            Painter = QPainter(Pixmap)
+            Painter.setPen(QColor("#757575"))
+            Painter.setFont(QFont("Arial", 8 if self.ViewMode == "list" else 12, QFont.Bold))
+            Painter.drawText(Pixmap.rect(), Qt.AlignCenter, "No\nCover" if self.ViewMode == "list" else "No Cover\nAvailable")
+            Painter.end()
+            QPixmapCache.insert(Key, Pixmap)
+        return Pixmap
+
+    def paint(self, Painter: QPainter, Option, Index: QModelIndex) -> None:
+        Painter.save()
+        Painter.setRenderHint(QPainter.Antialiasing)
+        Card = Option.rect.adjusted(4, 4, -4, -4)
+
+        # Card background with hover/selection highlight
+        Hovered = bool(Option.state & QStyle.State_MouseOver)
+        Selected = bool(Option.state & QStyle.State_Selected)
+        Painter.setBrush(QColor(255, 255, 255, 51 if Hovered or Selected else 26))
+        Painter.setPen(QPen(QColor("#FFC107"), 3) if Hovered or Selected else Qt.NoPen)
+        Painter.drawRoundedRect(Card, 10, 10)
+
+        _, _, CoverWidth, CoverHeight = VIEW_GEOMETRY[self.ViewMode]
+        Cover = Index.data(CoverRole) or self._Placeholder()
+        Title = Index.data(Qt.DisplayRole) or ""
+
         if self.ViewMode == "list":
-            Placeholder = QPixmap(56, 56)
-            FontSize = 8
-            Text = "No\nCover"
+            CoverRect = QRect(Card.left() + 8, Card.top() + (Card.height() - CoverHeight) // 2, CoverWidth, CoverHeight)
+            TitleRect = QRect(CoverRect.right() + 10, Card.top() + 4, Card.right() - CoverRect.right() - 18, Card.height() - 8)
+            Font = self.ListTitleFont
+            Alignment = Qt.AlignLeft | Qt.AlignVCenter | Qt.TextWordWrap
         else:
-            Placeholder = QPixmap(156, 196)
-            FontSize = 12
-            Text = "No Cover\nAvailable"
-            
-        Placeholder.fill(QColor("#E0E0E0"))
-        
-        # Draw placeholder text
-        Painter = QPainter(Placeholder)
-        Painter.setPen(QColor("#757575"))
-        Font = QFont("Arial", FontSize, QFont.Bold)
+            CoverRect = QRect(Card.left() + (Card.width() - CoverWidth) // 2, Card.top() + 8, CoverWidth, CoverHeight)
+            TitleRect = QRect(Card.left() + 6, CoverRect.bottom() + 6, Card.width() - 12, Card.bottom() - CoverRect.bottom() - 10)
+            Font = self.TitleFont
+            Alignment = Qt.AlignHCenter | Qt.AlignTop | Qt.TextWordWrap
+            Title = Title[:25] + "..." if len(Title) > 25 else Title
+
+        # Cover frame, then the cover centred inside it
+        Painter.setPen(QPen(QColor("#4CAF50"), 2))
+        Painter.setBrush(QColor(255, 255, 255, 230))
+        Painter.drawRoundedRect(CoverRect.adjusted(-2, -2, 2, 2), 8, 8)
+        CoverSize = Cover.size().scaled(CoverRect.size(), Qt.KeepAspectRatio)
+        Painter.drawPixmap(QRect(CoverRect.left() + (CoverRect.width() - CoverSize.width()) // 2,
+                                 CoverRect.top() + (CoverRect.height() - CoverSize.height()) // 2,
+                                 CoverSize.width(), CoverSize.height()), Cover)
+
+        # Title on a dark band
+        Painter.setPen(Qt.NoPen)
+        Painter.setBrush(QColor(0, 0, 0, 178))
+        Painter.drawRoundedRect(TitleRect, 4, 4)
+        Painter.setPen(QColor("#FFFFFF"))
         Painter.setFont(Font)
-        Painter.drawText(Placeholder.rect(), Qt.AlignCenter, Text)
-        Painter.end()
-        
-        self.CoverLabel.setPixmap(Placeholder)
-    
-    def mousePressEvent(self, event):
-        """Handle mouse click on book card"""
-        if event.button() == Qt.LeftButton:
-            self.BookClicked.emit(self.BookData)
-        super().mousePressEvent(event)
+        Painter.drawText(TitleRect.adjusted(6, 2, -6, -2), Alignment, Title)
+
+        Painter.restore()
 
 
 class BookGrid(QWidget):
     """
-    Fixed book grid with proper PySide6 imports and enhanced functionality.
-    
-    Fixes applied:
-    - Proper PySide6 Signal imports
-    - Enhanced resize handling
-    - Better grid calculations
-    - Improved performance
+    Virtualized book grid.
+
+    - QListView in icon mode (grid) or list mode paints only visible items
+    - Filter changes reset the model; no widgets are created per book
+    - Covers decode on a thread pool into the LRU QPixmapCache
     """
-    
+
     BookSelected = Signal(dict)
     BookOpened = Signal(dict)
     SelectionChanged = Signal(int)
-    
+
     def __init__(self, BookService: BookService):
         super().__init__()
-        
+
         self.Logger = logging.getLogger(__name__)
         self.BookService = BookService
-        
+
         # Current state
         self.CurrentBooks: List[Dict] = []
         self.CurrentFilters: Dict = {}
-        self.BookCards: List[BookCard] = []
-        
+
         # Layout settings
         self.ViewMode = "grid"
-        self.ColumnsCount = 4
-        self.CardWidth = 180
-        self.CardHeight = 280
-        
+        self.CardWidth, self.CardHeight = VIEW_GEOMETRY["grid"][:2]
+
         # Initialize UI
         self._SetupUI()
         self._LoadAllBooks()
-        
-        self.Logger.info("Book grid initialized with fixes")
-    
+
+        self.Logger.info("Virtualized book grid initialized")
+
     def _SetupUI(self) -> None:
         """Setup the book grid user interface"""
-        # Main layout
         MainLayout = QVBoxLayout(self)
         MainLayout.setContentsMargins(10, 10, 10, 10)
         MainLayout.setSpacing(5)
-        
-        # Create scroll area
-        self.ScrollArea = QScrollArea()
-        self.ScrollArea.setWidgetResizable(True)
-        self.ScrollArea.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        self.ScrollArea.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        MainLayout.addWidget(self.ScrollArea)
-        
-        # Create scrollable content widget
-        self.ContentWidget = QWidget()
-        self.ScrollArea.setWidget(self.ContentWidget)
-
-        # Add a label for the placeholder image
-        self.PlaceholderLabel = QLabel(self.ContentWidget)
+
+        self.Stack = QStackedLayout()
+        MainLayout.addLayout(self.Stack)
+
+        self.Model = BookListModel(self)
+        self.Delegate = BookCardDelegate(self)
+
+        self.ListView = QListView()
+        self.ListView.setModel(self.Model)
+        self.ListView.setItemDelegate(self.Delegate)
+        self.ListView.setUniformItemSizes(True)
+        self.ListView.setBatchSize(LAYOUT_BATCH_SIZE)
+        self.ListView.setResizeMode(QListView.Adjust)
+        self.ListView.setMovement(QListView.Static)
+        self.ListView.setSpacing(8)
+        self.ListView.setMouseTracking(True)
+        self.ListView.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.ListView.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.ListView.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.ListView.clicked.connect(self._OnIndexClicked)
+        self._ApplyViewMode()
+        self.Stack.addWidget(self.ListView)
+
+        # Shown instead of the list when nothing matches
+        self.PlaceholderLabel = QLabel()
         self.PlaceholderLabel.setAlignment(Qt.AlignCenter)
         self.PlaceholderLabel.setPixmap(QPixmap("Assets/BowersWorld.png"))
-        self.PlaceholderLabel.setVisible(False)
-        
-        # Create grid layout for book cards
-        self.GridLayout = QGridLayout(self.ContentWidget)
-        self.GridLayout.setVerticalSpacing(0)
-        self.GridLayout.setHorizontalSpacing(15)
-        self.GridLayout.setContentsMargins(10, 10, 10, 10)
-        
+        self.Stack.addWidget(self.PlaceholderLabel)
+
         # Apply styling
         self.setStyleSheet("""
-            QScrollArea {
+            QListView {
                 border: none;
                 background-color: transparent;
             }
-            
+
             QScrollBar:vertical {
                 background-color: rgba(255, 255, 255, 0.1);
                 width: 16px;
                 border-radius: 8px;
                 margin: 0;
             }
-            
+
             QScrollBar::handle:vertical {
                 background-color: rgba(255, 255, 255, 0.3);
                 border-radius: 8px;
                 min-height: 30px;
                 margin: 2px;
             }
-            
+
             QScrollBar::handle:vertical:hover {
                 background-color: rgba(255, 255, 255, 0.5);
             }
-            
+
             QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {
                 border: none;
                 background: none;
             }
         """)
-    
+
+    def _ApplyViewMode(self) -> None:
+        """Configure the view for grid (wrapping icons) or list (one per row)"""
+        self.Delegate.SetViewMode(self.ViewMode)
+        if self.ViewMode == "list":
+            # Uniform rows need no batching - ListMode lays them out in one pass
+            self.ListView.setLayoutMode(QListView.SinglePass)
+            self.ListView.setViewMode(QListView.ListMode)
+            self.ListView.setFlow(QListView.TopToBottom)
+            self.ListView.setWrapping(False)
+        else:
+            self.ListView.setLayoutMode(QListView.Batched)
+            self.ListView.setViewMode(QListView.IconMode)
+            self.ListView.setFlow(QListView.LeftToRight)
+            self.ListView.setWrapping(True)
+
     def _LoadAllBooks(self) -> None:
         """Load all books from the database"""
         try:
@@ -309,163 +407,83 @@ class BookGrid(QWidget):
                 self.CurrentBooks = self.BookService.GetAllBooks()
                 self._UpdateDisplay()
                 self.Logger.info(f"Loaded {len(self.CurrentBooks)} books")
-            
+
         except Exception as Error:
             self.Logger.error(f"Failed to load books: {Error}")
-    
+
     def _UpdateDisplay(self) -> None:
-        """Update the book grid display"""
+        """Point the model at the current books - constant time regardless of catalog size"""
         try:
-            # Clear existing cards
-            self._ClearGrid()
+            self.Model.SetBooks(self.CurrentBooks)
+            self.Stack.setCurrentWidget(self.ListView if self.CurrentBooks else self.PlaceholderLabel)
+            self.ListView.scrollToTop()
+            self.Logger.debug(f"Display updated with {len(self.CurrentBooks)} books")
 
-            if not self.CurrentBooks:
-                self.PlaceholderLabel.setVisible(True)
-                return
-            else:
-                self.PlaceholderLabel.setVisible(False)
-            
-            # Calculate columns based on available width
-            self._CalculateColumns()
-            
-            # Add book cards to grid
-            Row, Col = 0, 0
-            for BookData in self.CurrentBooks:
-                Card = BookCard(BookData, self.ViewMode)
-                Card.BookClicked.connect(self._OnBookSelected)
-                
-                self.GridLayout.addWidget(Card, Row, Col)
-                self.BookCards.append(Card)
-                
-                if self.ViewMode == "list":
-                    # List view: single column
-                    Row += 1
-                else:
-                    # Grid view: multiple columns
-                    Col += 1
-                    if Col >= self.ColumnsCount:
-                        Col = 0
-                        Row += 1
-            
-            # Add stretch to push everything to the left
-            if self.ViewMode == "list":
-                self.GridLayout.setRowStretch(Row, 1)
-            else:
-                self.GridLayout.setColumnStretch(Col + 1, 1)
-                self.GridLayout.setRowStretch(Row + 1, 1)
-            
-            # Process events to update display
-            QApplication.processEvents()
-            
-            self.Logger.debug(f"Display updated with {len(self.CurrentBooks)} books in {self.ColumnsCount} columns")
-            
         except Exception as Error:
             self.Logger.error(f"Failed to update display: {Error}")
-    
-    def _ClearGrid(self) -> None:
-        """Clear all widgets from the grid"""
-        try:
-            # Remove all book cards
-            for Card in self.BookCards:
-                self.GridLayout.removeWidget(Card)
-                Card.deleteLater()
-            
-            self.BookCards.clear()
-            
-        except Exception as Error:
-            self.Logger.error(f"Failed to clear grid: {Error}")
-    
-    def _CalculateColumns(self) -> None:
-        """Calculate optimal number of columns based on available width"""
-        try:
-            if self.ViewMode == "list":
-                # List view: always single column
-                self.ColumnsCount = 1
-                return
-                
-            AvailableWidth = self.ScrollArea.viewport().width()
-            
-            # Account for margins and spacing
-            UsableWidth = AvailableWidth - 40  # 20px margin on each side
-            
-            # Calculate number of columns
-            ColumnsCount = max(1, UsableWidth // (self.CardWidth + 15))  # 15px spacing
-            
-            # Limit to reasonable range
-            self.ColumnsCount = min(max(ColumnsCount, 2), 8)
-            
-            self.Logger.debug(f"Calculated {self.ColumnsCount} columns for width {AvailableWidth}")
-            
-        except Exception as Error:
-            self.Logger.error(f"Failed to calculate columns: {Error}")
-            self.ColumnsCount = 4  # Fallback
-    
+
+    def _OnIndexClicked(self, Index: QModelIndex) -> None:
+        BookData = Index.data(BookDataRole)
+        if BookData:
+            self._OnBookSelected(BookData)
+
     def _OnBookSelected(self, BookData: dict) -> None:
         """Handle book selection"""
         try:
             self.BookSelected.emit(BookData)
             self.BookOpened.emit(BookData)
             self.Logger.info(f"Book selected: {BookData.get('Title', 'Unknown')}")
-            
+
         except Exception as Error:
             self.Logger.error(f"Failed to handle book selection: {Error}")
-    
+
     def ApplyFilters(self, Filters: dict) -> None:
         """Apply filters to the book display"""
         try:
             self.CurrentFilters = Filters.copy()
-            
+
             if self.BookService:
                 # Get filtered books from service
                 Category = Filters.get('Category', '')
                 Subject = Filters.get('Subject', '')
                 SearchText = Filters.get('SearchText', '')
-                
+
                 if SearchText:
                     FilteredBooks = self.BookService.SearchBooks(SearchText)
                 else:
                     FilteredBooks = self.BookService.GetBooksByFilters(Category, Subject)
-                
+
                 self.CurrentBooks = FilteredBooks
                 self._UpdateDisplay()
-                
+
                 self.Logger.info(f"Applied filters: {len(FilteredBooks)} books match criteria")
-            
+
         except Exception as Error:
             self.Logger.error(f"Failed to apply filters: {Error}")
-    
+
     def HandleResize(self) -> None:
-        """Handle window resize events"""
+        """Re-flow the grid after a resize (QListView wraps items itself)"""
         try:
-            # Recalculate columns and update display
-            OldColumns = self.ColumnsCount
-            self._CalculateColumns()
-            
-            # Only update if column count changed
-            if OldColumns != self.ColumnsCount:
-                self._UpdateDisplay()
-                self.Logger.debug(f"Resize handled: columns changed from {OldColumns} to {self.ColumnsCount}")
-            
+            self.ListView.doItemsLayout()
+
         except Exception as Error:
             self.Logger.error(f"Failed to handle resize: {Error}")
-    
+
     def resizeEvent(self, event):
         """Handle widget resize events"""
         super().resizeEvent(event)
-        
+
         # Use timer to avoid too many updates during resizing
-        if hasattr(self, '_ResizeTimer'):
-            self._ResizeTimer.stop()
-        
-        self._ResizeTimer = QTimer()
-        self._ResizeTimer.timeout.connect(self.HandleResize)
-        self._ResizeTimer.setSingleShot(True)
+        if not hasattr(self, '_ResizeTimer'):
+            self._ResizeTimer = QTimer(self)
+            self._ResizeTimer.setSingleShot(True)
+            self._ResizeTimer.timeout.connect(self.HandleResize)
         self._ResizeTimer.start(100)  # 100ms delay
-    
+
     def GetBookCount(self) -> int:
         """Get the current number of displayed books"""
         return len(self.CurrentBooks)
-    
+
     def SetBooks(self, Books: List[Dict]) -> None:
         """Set books to display in the grid"""
         try:
@@ -473,38 +491,32 @@ class BookGrid(QWidget):
             self._UpdateDisplay()
             self.SelectionChanged.emit(len(Books))
             self.Logger.info(f"Set {len(Books)} books for display")
-            
+
         except Exception as Error:
             self.Logger.error(f"Failed to set books: {Error}")
-    
+
     def SetViewMode(self, Mode: str) -> None:
         """Set the view mode for the book grid"""
         try:
-            if Mode not in ["grid", "list"]:
+            if Mode not in VIEW_GEOMETRY:
                 self.Logger.warning(f"Unknown view mode: {Mode}")
                 return
-                
+
             if self.ViewMode != Mode:
                 self.ViewMode = Mode
-                
-                if Mode == "grid":
-                    self.CardWidth = 180
-                    self.CardHeight = 280
-                elif Mode == "list":
-                    self.CardWidth = 600
-                    self.CardHeight = 80
-                
-                self._UpdateDisplay()
+                self.CardWidth, self.CardHeight = VIEW_GEOMETRY[Mode][:2]
+                self._ApplyViewMode()
+                self.Model.SetViewMode(Mode)
                 self.Logger.info(f"View mode set to: {Mode}")
-            
+
         except Exception as Error:
             self.Logger.error(f"Failed to set view mode: {Error}")
-    
+
     def RefreshDisplay(self) -> None:
         """Refresh the entire display"""
         try:
             self._LoadAllBooks()
             self.Logger.info("Book grid display refreshed")
-            
+
         except Exception as Error:
-            self.Logger.error(f"Failed to refresh display: {Error}")
\ No newline at end of file
+            self.Logger.error(f"Failed to refresh display: {Error}")
@@ -2,12 +2,13 @@
 # Path: /home/herb/Desktop/AndyLibrary/Scripts/CreatePublicDatabase.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-31
-# Last Modified: 2025-07-31 02:20PM
+# Last Modified: 2026-10-19 07:25PM
 """
 Create a publicly accessible database copy for Windows executable fallback
 """
 
 import os
+import sys
 import shutil
 import sqlite3
 from datetime import datetime
@@ -66,49 +67,19 @@ def CreatePublicDatabaseCopy():
         print(f"❌ Error copying database: {e}")
         return None
 
-def CreateSimpleHTTPServer():
-    """Create a simple HTTP server config for serving the database"""
+def PrepareDistribution(public_dir="/home/herb/Desktop/AndyLibrary/Public"):
+    """Precompute the manifest (hashes, ETags, compressed variants) Scripts/DatabaseServer.py serves from"""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from Source.Utils.DistributionServer import BuildManifest
     
-    server_script = "/home/herb/Desktop/AndyLibrary/Scripts/DatabaseServer.py"
+    print("🧾 Building distribution manifest...")
+    manifest = BuildManifest(public_dir)
+    for name, entry in manifest["files"].items():
+        variants = ", ".join(f"{encoding} {variant['size']:,}" for encoding, variant in entry["variants"].items())
+        print(f"   {name}: {entry['size']:,} bytes, sha256 {entry['sha256'][:12]}…" + (f" ({variants})" if variants else ""))
     
-    server_content = '''# File: DatabaseServer.py
-# Simple HTTP server for database downloads
-import http.server
-import socketserver
-import os
-from pathlib import Path
-
-class DatabaseHandler(http.server.SimpleHTTPRequestHandler):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, directory="/home/herb/Desktop/AndyLibrary/Public", **kwargs)
-    
-    def end_headers(self):
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET')
-        self.send_header('Content-Disposition', 'attachment')
-        super().end_headers()
-
-def serve_database(port=8080):
-    """Serve database files on specified port"""
-    for port_try in range(port, port + 10):
-        try:
-            with socketserver.TCPServer(("", port_try), DatabaseHandler) as httpd:
-                print(f"🌐 Database server running on http://localhost:{port_try}")
-                print(f"📥 Database URL: http://localhost:{port_try}/GrandsonLibrary_Latest.db")
-                httpd.serve_forever()
-        except OSError:
-            continue
-    print("❌ No available ports found")
-
-if __name__ == "__main__":
-    serve_database()
-'''
-    
-    with open(server_script, 'w') as f:
-        f.write(server_content)
-    
-    print(f"📝 HTTP server script created: {server_script}")
-    print(f"💡 Run with: python {server_script}")
+    print(f"💡 Serve with: python Scripts/DatabaseServer.py")
+    return manifest
 
 def main():
     """Create public database and server setup"""
@@ -118,8 +89,8 @@ def main():
     db_path = CreatePublicDatabaseCopy()
     
     if db_path:
-        # Create HTTP server script
-        CreateSimpleHTTPServer()
+        # Hash and precompress now, so the server starts without doing it
+        PrepareDistribution(os.path.dirname(db_path))
         
         print("\n🎉 SUCCESS: Public database created!")
         print("\n📋 Next steps:")
@@ -1,31 +1,70 @@
+#!/usr/bin/env python3
 # File: DatabaseServer.py
-# Simple HTTP server for database downloads
-import http.server
-import socketserver
+# Path: /home/herb/Desktop/AndyLibrary/Scripts/DatabaseServer.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2025-07-31
+# Last Modified: 2026-10-19 07:25PM
+"""
+HTTP server for public database downloads (Public/)
+Runs the asyncio DistributionServer: concurrent clients, sendfile, byte
+ranges, strong ETags from Public/manifest.json, precompressed variants and
+optional fair bandwidth sharing. Slow clients no longer block everyone else.
+"""
+
 import os
-from pathlib import Path
-
-class DatabaseHandler(http.server.SimpleHTTPRequestHandler):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, directory="/home/herb/Desktop/AndyLibrary/Public", **kwargs)
-    
-    def end_headers(self):
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET')
-        self.send_header('Content-Disposition', 'attachment')
-        super().end_headers()
-
-def serve_database(port=8080):
-    """Serve database files on specified port"""
+import sys
+import asyncio
+import argparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from Source.Utils.DistributionServer import DistributionServer
+
+DEFAULT_PUBLIC_DIR = os.path.join(PROJECT_ROOT, "Public")
+
+def serve_database(port=8080, directory=DEFAULT_PUBLIC_DIR, host="", total_rate_kb=0, client_rate_kb=0):
+    """Serve database files on the first free port from port"""
+    if not os.path.isdir(directory):
+        print(f"❌ Directory not found: {directory}")
+        return False
+
+    print(f"🔍 Checking manifest for {directory}...")
+    server = DistributionServer(directory, host, port,
+                                total_bytes_per_second=total_rate_kb * 1024,
+                                per_client_bytes_per_second=client_rate_kb * 1024)
+    print(f"📋 {len(server.Manifest['files'])} files ready (strong ETags, ranges, compressed variants)")
+
     for port_try in range(port, port + 10):
+        server.Port = port_try
         try:
-            with socketserver.TCPServer(("", port_try), DatabaseHandler) as httpd:
-                print(f"🌐 Database server running on http://localhost:{port_try}")
-                print(f"📥 Database URL: http://localhost:{port_try}/GrandsonLibrary_Latest.db")
-                httpd.serve_forever()
+            print(f"🌐 Database server running on http://localhost:{port_try}")
+            print(f"📥 Database URL: http://localhost:{port_try}/GrandsonLibrary_Latest.db")
+            print(f"🧾 Manifest: http://localhost:{port_try}/manifest.json")
+            asyncio.run(server.Serve())
+            return True
         except OSError:
+            print(f"⚠️ Port {port_try} busy")
             continue
+        except KeyboardInterrupt:
+            print("\n👋 Database server stopped")
+            return True
     print("❌ No available ports found")
+    return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Public/ database files to clients")
+    parser.add_argument('--port', type=int, default=8080, help='First port to try (default: 8080)')
+    parser.add_argument('--host', default='', help='Address to bind (default: all interfaces)')
+    parser.add_argument('--directory', default=DEFAULT_PUBLIC_DIR, help='Directory to publish')
+    parser.add_argument('--rate-limit', type=int, default=0,
+                        help='Total upload cap in KB/s, shared equally by active downloads (0 = none)')
+    parser.add_argument('--client-rate-limit', type=int, default=0,
+                        help='Per-client cap in KB/s (0 = none)')
+    args = parser.parse_args()
+
+    if not serve_database(args.port, args.directory, args.host, args.rate_limit, args.client_rate_limit):
+        sys.exit(1)
 
 if __name__ == "__main__":
-    serve_database()
+    main()
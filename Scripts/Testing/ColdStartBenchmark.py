@@ -0,0 +1,117 @@
+# File: ColdStartBenchmark.py
+# Path: /home/herb/Desktop/AndyLibrary/Scripts/Testing/ColdStartBenchmark.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 07:55PM
+
+"""
+Cold Start Benchmark
+Launches the API server in a fresh process, with fast start on and off, and
+reports:
+- seconds from launch until /api/health first answers
+- seconds until every startup stage has settled (ready, failed or disabled)
+- the server's own cold_start_seconds and the slowest stages
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+
+import requests
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class ColdStartBenchmark:
+    """Measures time-to-serve and time-to-ready of a freshly launched server"""
+
+    def __init__(self, mode="local", runs=3, timeout=120.0):
+        self.mode = mode
+        self.runs = runs
+        self.timeout = timeout
+        self.results = {}
+
+    @staticmethod
+    def free_port():
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+    def measure_once(self, fast_start):
+        port = self.free_port()
+        env = dict(os.environ, ANDYGOOGLE_MODE=self.mode, ANDYLIBRARY_FAST_START="1" if fast_start else "0",
+                   ANDYLIBRARY_LAUNCH_TIME=repr(time.time()))
+        launched = time.monotonic()
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "Source.API.MainAPI:app", "--port", str(port), "--log-level", "warning"],
+            cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        serving = ready = None
+        health = {}
+        try:
+            while time.monotonic() - launched < self.timeout:
+                try:
+                    health = requests.get(f"http://127.0.0.1:{port}/api/health", timeout=1).json()
+                except (requests.RequestException, ValueError):
+                    time.sleep(0.02)
+                    continue
+                if serving is None:
+                    serving = time.monotonic() - launched
+                if health.get("startup", {}).get("ready"):
+                    ready = time.monotonic() - launched
+                    break
+                time.sleep(0.05)
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+        return serving, ready, health.get("startup", {})
+
+    def run_variant(self, label, fast_start):
+        print(f"\n🔬 {label} ({self.mode} mode, {self.runs} runs)")
+        samples = []
+        for _ in range(self.runs):
+            serving, ready, startup = self.measure_once(fast_start)
+            samples.append((serving, ready))
+            if serving is None:
+                print("   ❌ Server did not answer")
+                continue
+            print(f"   ⏱️ Serving after {serving:.2f}s, ready after {(ready or 0):.2f}s "
+                  f"(server reports cold start {startup.get('cold_start_seconds')}s)")
+        slowest = sorted(((stage.get("seconds") or 0, name) for name, stage in startup.get("stages", {}).items()),
+                         reverse=True)[:3]
+        if slowest:
+            print("   🐢 Slowest stages: " + ", ".join(f"{name} {seconds:.2f}s" for seconds, name in slowest))
+        served = [s for s, _ in samples if s is not None]
+        readied = [r for _, r in samples if r is not None]
+        self.results[label] = {
+            "serving": min(served) if served else None,
+            "ready": min(readied) if readied else None
+        }
+
+    def run_complete_benchmark(self):
+        print("🚀 Cold Start Benchmark")
+        print("=" * 60)
+        self.run_variant("Serial startup", fast_start=False)
+        self.run_variant("Fast start", fast_start=True)
+
+        print("\n" + "=" * 60)
+        print(f"{'Startup':<18}{'First answer':>14}{'All stages':>14}")
+        for label, result in self.results.items():
+            serving = f"{result['serving']:.2f}s" if result["serving"] is not None else "-"
+            ready = f"{result['ready']:.2f}s" if result["ready"] is not None else "-"
+            print(f"{label:<18}{serving:>14}{ready:>14}")
+        return self.results
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for the AndyLibrary API server")
+    parser.add_argument('--mode', choices=['local', 'gdrive'], default='local')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args()
+
+    ColdStartBenchmark(args.mode, args.runs, args.timeout).run_complete_benchmark()
+
+if __name__ == "__main__":
+    main()
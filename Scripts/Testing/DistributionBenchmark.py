@@ -0,0 +1,157 @@
+# File: DistributionBenchmark.py
+# Path: /home/herb/Desktop/AndyLibrary/Scripts/Testing/DistributionBenchmark.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 07:25PM
+
+"""
+Distribution Server Benchmark - Slow Clients
+Compares the old single-threaded socketserver.TCPServer/SimpleHTTPRequestHandler
+with the asyncio DistributionServer while several 2G-speed clients download
+the database at once. Reports, for each server:
+- aggregate throughput of the slow clients
+- how many of them got their first byte within two seconds
+- how long a fast client waits for a small file while they are downloading
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import functools
+import http.server
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, PROJECT_ROOT)
+
+from Source.Utils.DistributionServer import DistributionServer
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+class QuietTCPServer(socketserver.TCPServer):
+    """The old Scripts/DatabaseServer.py server, minus tracebacks for clients that hang up"""
+
+    def handle_error(self, request, client_address):
+        pass
+
+class DistributionBenchmark:
+    """Slow-client benchmark for the legacy and the asyncio distribution servers"""
+
+    def __init__(self, slow_clients=8, slow_rate_kb=32, database_mb=4, duration=8.0):
+        self.slow_clients = slow_clients
+        self.slow_rate = slow_rate_kb * 1024
+        self.database_size = int(database_mb * 1024 * 1024)
+        self.duration = duration
+        self.results = {}
+
+    def setup_public_dir(self):
+        public_dir = tempfile.mkdtemp(prefix="andylibrary_distribution_")
+        with open(os.path.join(public_dir, "GrandsonLibrary_Latest.db"), "wb") as f:
+            f.write(os.urandom(self.database_size))
+        with open(os.path.join(public_dir, "version.json"), "w") as f:
+            f.write('{"version": "1.0.0"}')
+        return public_dir
+
+    def slow_download(self, port, stop_at):
+        """Read the database at slow_rate until stop_at; returns (bytes received, seconds to first byte)"""
+        received = 0
+        first_byte = None
+        started = time.monotonic()
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=self.duration + 5) as sock:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8192)
+                sock.sendall(b"GET /GrandsonLibrary_Latest.db HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n")
+                while time.monotonic() < stop_at:
+                    block = sock.recv(4096)
+                    if not block:
+                        break
+                    if first_byte is None:
+                        first_byte = time.monotonic() - started
+                    received += len(block)
+                    # Hold the rate down to a 2G link
+                    ahead = received / self.slow_rate - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except OSError:
+            pass
+        return received, first_byte
+
+    def fast_request(self, port, timeout):
+        """Seconds until a small file arrives, or None if it did not arrive within timeout"""
+        started = time.monotonic()
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=timeout) as sock:
+                sock.sendall(b"GET /version.json HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n")
+                while sock.recv(65536):
+                    pass
+            return time.monotonic() - started
+        except OSError:
+            return None
+
+    def run_against(self, label, port):
+        print(f"\n🔬 {label}: {self.slow_clients} clients at {self.slow_rate // 1024} KB/s for {self.duration:.0f}s")
+        stop_at = time.monotonic() + self.duration
+        with ThreadPoolExecutor(max_workers=self.slow_clients) as pool:
+            downloads = [pool.submit(self.slow_download, port, stop_at) for _ in range(self.slow_clients)]
+            time.sleep(1.0)
+            latency = self.fast_request(port, timeout=self.duration)
+            results = [download.result() for download in downloads]
+
+        throughput = sum(received for received, _ in results) / self.duration
+        served = sum(1 for _, first_byte in results if first_byte is not None and first_byte < 2.0)
+        self.results[label] = {"throughput": throughput, "served": served, "latency": latency}
+        print(f"   📥 Slow clients started within 2s: {served}/{self.slow_clients}")
+        print(f"   📊 Aggregate throughput: {throughput / 1024:.1f} KB/s")
+        print(f"   ⚡ Small request while busy: " + (f"{latency * 1000:.0f} ms" if latency is not None else "blocked"))
+
+    def benchmark_legacy(self, public_dir):
+        handler = functools.partial(QuietHandler, directory=public_dir)
+        httpd = QuietTCPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        try:
+            self.run_against("Legacy TCPServer", httpd.server_address[1])
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+    def benchmark_distribution(self, public_dir):
+        server = DistributionServer(public_dir, "127.0.0.1", 0)
+        server.Start()
+        try:
+            self.run_against("DistributionServer", server.Port)
+        finally:
+            server.Stop()
+
+    def run_complete_benchmark(self):
+        print("🚀 Distribution Server Benchmark")
+        print("=" * 60)
+        public_dir = self.setup_public_dir()
+        self.benchmark_legacy(public_dir)
+        self.benchmark_distribution(public_dir)
+
+        print("\n" + "=" * 60)
+        print(f"{'Server':<22}{'Started':>8}{'KB/s':>12}{'Small request':>16}")
+        for label, result in self.results.items():
+            latency = f"{result['latency'] * 1000:.0f} ms" if result["latency"] is not None else "blocked"
+            print(f"{label:<22}{result['served']:>5}/{self.slow_clients:<2}{result['throughput'] / 1024:>12.1f}{latency:>16}")
+        return self.results
+
+def main():
+    parser = argparse.ArgumentParser(description="Slow-client benchmark for the database distribution server")
+    parser.add_argument('--slow-clients', type=int, default=8)
+    parser.add_argument('--slow-rate-kb', type=int, default=32, help='Per-client download speed (2G is ~32 KB/s)')
+    parser.add_argument('--database-mb', type=float, default=4)
+    parser.add_argument('--duration', type=float, default=8.0)
+    args = parser.parse_args()
+
+    DistributionBenchmark(args.slow_clients, args.slow_rate_kb, args.database_mb, args.duration).run_complete_benchmark()
+
+if __name__ == "__main__":
+    main()
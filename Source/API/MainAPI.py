@@ -2,39 +2,46 @@
 # Path: /home/herb/Desktop/AndyLibrary/Source/API/MainAPI.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-12
-# Last Modified: 2025-07-28 06:50AM
+# Last Modified: 2026-10-19 11:05PM
 """
 Description: Enhanced FastAPI main server for AndyLibrary with authentication
 Provides RESTful API endpoints for library management with user authentication and educational mission features
 """
 
 import os
+import re
 import sys
+import json
+import zlib
 import sqlite3
 import time
+import asyncio
+import threading
 import platform
-import requests
-import psutil
 import secrets
 from datetime import datetime
+from dataclasses import asdict
 from typing import Dict, List, Optional, Any
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request, Security, Query
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field, field_validator
-import uvicorn
 import logging
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-try:
-    from Core.DriveManager import DriveManager
-except ImportError:
-    DriveManager = None
-    print("⚠️ DriveManager not available - Google Drive functionality disabled")
+from Utils.BookFileServer import BookFileEntry, BookFileResolver, BuildFileResponse
+from Utils.PdfPageService import PdfPageService, PageRangeError
+from Utils.PreviewPipeline import PreviewCache, PreviewPipeline
+from Utils.StartupReadiness import StartupReadiness, ResolveStartupBudget
+from Utils.LazyImport import LazyImport
+from Utils.StaticAssetPipeline import StaticAssetPipeline, PipelineStaticFiles
+from Utils.CatalogIndex import CatalogIndex
+
+# DriveManager and SheetsLogger (googleapiclient) are imported by their startup stages, in gdrive mode only
 
 try:
     from Core.DatabaseManager import DatabaseManager
@@ -42,17 +49,22 @@ except ImportError:
     DatabaseManager = None
     print("⚠️ DatabaseManager not available - authentication functionality disabled")
 
-try:
+# Social login (authlib/passlib/requests) is imported by the oauth startup stage, not at module load
+def _ImportModernSocialAuth():
     from Core.ModernSocialAuthManager import ModernSocialAuthManager
-except ImportError:
-    ModernSocialAuthManager = None
-    print("⚠️ ModernSocialAuthManager not available - social login functionality disabled")
+    return locals()
 
-try:
+ModernSocialAuthManager = LazyImport(
+    _ImportModernSocialAuth, "⚠️ ModernSocialAuthManager not available - social login functionality disabled"
+).Symbol("ModernSocialAuthManager")
+
+def _ImportLegacySocialAuth():
     from Core.SocialAuthManager import SocialAuthManager
-except ImportError:
-    SocialAuthManager = None
-    print("⚠️ Legacy SocialAuthManager not available")
+    return locals()
+
+SocialAuthManager = LazyImport(
+    _ImportLegacySocialAuth, "⚠️ Legacy SocialAuthManager not available"
+).Symbol("SocialAuthManager")
 
 try:
     from Core.UserSetupManager import UserSetupManager
@@ -67,16 +79,18 @@ except ImportError:
     print("⚠️ AdvancedSearchAPI not available - advanced search functionality disabled")
 
 try:
-    from Core.UserProgressManager import UserProgressManager
+    from API.PeerCacheAPI import PeerCacheAPI
+    from Utils.PeerCache import PeerCache
 except ImportError:
-    UserProgressManager = None
-    print("⚠️ UserProgressManager not available - progress tracking functionality disabled")
+    PeerCacheAPI = None
+    PeerCache = None
+    print("⚠️ PeerCacheAPI not available - LAN peer distribution disabled")
 
 try:
-    from Utils.SheetsLogger import SheetsLogger  
+    from Core.UserProgressManager import UserProgressManager
 except ImportError:
-    SheetsLogger = None
-    print("⚠️ SheetsLogger not available - logging to sheets disabled")
+    UserProgressManager = None
+    print("⚠️ UserProgressManager not available - progress tracking functionality disabled")
 
 try:
     from Core.StudentBookDownloader import StudentBookDownloader, StudentRegion
@@ -84,6 +98,30 @@ except ImportError:
     StudentBookDownloader = None
     print("⚠️ StudentBookDownloader not available - book download functionality disabled")
 
+# The download stack (requests/urllib3) is imported by the first download or network estimate
+def _ImportChunkedDownloader():
+    from Core.ChunkedDownloader import GetNetworkEstimator
+    return locals()
+
+GetNetworkEstimator = LazyImport(
+    _ImportChunkedDownloader,
+    "⚠️ ChunkedDownloader not available - performance assessment will use default network estimate"
+).Symbol("GetNetworkEstimator")
+
+def _ImportDownloadScheduler():
+    from Core.DownloadScheduler import DownloadScheduler
+    return locals()
+
+DownloadScheduler = LazyImport(
+    _ImportDownloadScheduler, "⚠️ DownloadScheduler not available - book downloads will not be queued"
+).Symbol("DownloadScheduler")
+
+try:
+    from Core.ContentIndexer import ContentIndexer
+except ImportError:
+    ContentIndexer = None
+    print("⚠️ ContentIndexer not available - full-text content search disabled")
+
 try:
     from Middleware.SecurityMiddleware import SecurityMiddleware
 except ImportError:
@@ -98,15 +136,18 @@ except ImportError:
     UserIntent = None
     print("⚠️ UserJourneyManager not available - running without benchmark UX orchestration")
 
-try:
+# Imported by the search startup stage (nltk/numpy when installed)
+def _ImportIntelligentSearch():
     from Core.IntelligentSearchEngine import IntelligentSearchEngine, SearchQuery, LearningIntent, AcademicLevel, SearchMode
-except ImportError:
-    IntelligentSearchEngine = None
-    SearchQuery = None
-    LearningIntent = None
-    AcademicLevel = None
-    SearchMode = None
-    print("⚠️ IntelligentSearchEngine not available - running without benchmark search capabilities")
+    return locals()
+
+intelligent_search_import = LazyImport(
+    _ImportIntelligentSearch, "⚠️ IntelligentSearchEngine not available - running without benchmark search capabilities")
+IntelligentSearchEngine = intelligent_search_import.Symbol("IntelligentSearchEngine")
+SearchQuery = intelligent_search_import.Symbol("SearchQuery")
+LearningIntent = intelligent_search_import.Symbol("LearningIntent")
+AcademicLevel = intelligent_search_import.Symbol("AcademicLevel")
+SearchMode = intelligent_search_import.Symbol("SearchMode")
 
 # FastAPI app instance
 app = FastAPI(
@@ -263,6 +304,20 @@ class BookCostResponse(BaseModel):
     warning_level: str
     budget_percentage: float
 
+class BookCostBatchRequest(BaseModel):
+    book_ids: List[int] = Field(..., min_length=1, max_length=500, description="Books to price (max 500)")
+    region: str = Field(default="developing", description="developing, emerging or developed")
+
+class BookCostBatchResponse(BaseModel):
+    books: List[BookCostResponse]
+    total_cost_usd: float
+    total_size_mb: float
+    budget_percentage: float
+    warning_level: str
+    region: str
+    remaining_budget: float
+    missing_book_ids: List[int]
+
 class DownloadOptionsResponse(BaseModel):
     book_info: dict
     download_options: list
@@ -276,6 +331,9 @@ class BudgetSummaryResponse(BaseModel):
     budget_used_percentage: float
     downloads_count: int
     budget_status: str
+    bytes_used: int = 0
+    byte_budget: int = 0
+    remaining_bytes: int = 0
 
 # ==================== AUTHENTICATION MODELS ====================
 
@@ -467,7 +525,53 @@ def get_database():
         except Exception as e:
             print(f"⚠️ Error closing database connection: {e}")
 
-async def optimize_database_indexes():
+def catalog_database_path() -> str:
+    """Database the catalog endpoints read (the same choice get_database makes)"""
+    if drive_manager:
+        return drive_manager.local_db_path
+    temp_db_path = os.environ.get('ANDYGOOGLE_TEMP_DB')
+    if temp_db_path and os.path.exists(temp_db_path):
+        return temp_db_path
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(base_dir, "Data", "Databases", "MyLibrary.db")
+
+# Offline catalog: the browser downloads this index once and searches and filters it locally
+catalog_index = CatalogIndex()
+
+def catalog_etag(db_path: Optional[str] = None) -> Optional[str]:
+    """
+    Version of the catalog content as an ETag
+    Reading progress and bookmarks are written to the same database file,
+    so the file's size and mtime change far more often than the catalog.
+    """
+    db_path = db_path or catalog_database_path()
+    try:
+        return catalog_index.Current(db_path).etag
+    except (OSError, sqlite3.Error):
+        return None
+
+# Catalog responses depend only on the catalog tables and the query string, so the
+# catalog version is their ETag. The service worker revalidates its cached copies with
+# If-None-Match and gets a 304 until a book, category or subject changes.
+CATALOG_PATH = re.compile(r"^/api/(books(/filter)?|categories|subjects|stats)$")
+
+@app.middleware("http")
+async def revalidate_catalog(request: Request, call_next):
+    if request.method not in ("GET", "HEAD") or not CATALOG_PATH.match(request.url.path):
+        return await call_next(request)
+    
+    etag = await run_in_threadpool(catalog_etag)
+    headers = {"ETag": etag, "X-Database-ETag": etag, "Cache-Control": "no-cache"} if etag else {}
+    if_none_match = request.headers.get("if-none-match")
+    if etag and if_none_match and etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
+
+def optimize_database_indexes():
     """Optimize database indexes for better query performance"""
     try:
         # Get database connection
@@ -509,6 +613,7 @@ async def optimize_database_indexes():
             
     except Exception as e:
         print(f"⚠️ Database optimization failed: {e}")
+        return False
 
 # Dependency to log API usage
 def log_api_usage(request: Request, action: str, details: str = None):
@@ -528,147 +633,190 @@ def log_api_usage(request: Request, action: str, details: str = None):
         except Exception as e:
             print(f"Warning: Failed to log API usage: {e}")
 
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    """Initialize AndyGoogle components on startup"""
-    global drive_manager, sheets_logger, modern_auth_manager, journey_manager, intelligent_search_engine
+# ==================== STAGED STARTUP ====================
+# Only the database check runs before the server takes traffic; everything that
+# talks to the network or builds large state starts as a background stage.
+
+startup_readiness = StartupReadiness()
+startup_tasks = []  # strong references - the event loop only keeps weak ones
+
+def check_serving_database():
+    """Stage: make sure there is a database to serve (last-good or bundled copy)"""
+    db_path = current_database_path()
+    temp_db_path = os.environ.get('ANDYGOOGLE_TEMP_DB')
+    if temp_db_path and os.path.exists(temp_db_path):
+        db_path = temp_db_path
+    if not os.path.exists(db_path):
+        print(f"⚠️ No database at {db_path} - library endpoints return 503 until a sync completes")
+        return False
+    conn = sqlite3.connect(db_path)
+    try:
+        count = conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+    finally:
+        conn.close()
+    print(f"📊 Serving {count} books from {db_path}")
+    return True
+
+def init_journey_manager():
+    """Stage: User Journey Manager (Project Himalaya Benchmark)"""
+    global journey_manager
+    journey_manager = UserJourneyManager({
+        "environment": os.getenv("ENVIRONMENT", "development"),
+        "analytics_enabled": True,
+        "personalization_enabled": True
+    })
+    print("🏔️ UserJourneyManager initialized - Project Himalaya benchmark UX")
+
+def init_search_engine():
+    """Stage: Intelligent Search Engine (Project Himalaya Benchmark)"""
+    global intelligent_search_engine
+    database_path = os.path.join("Data", "Local", "cached_library.db")
+    intelligent_search_engine = IntelligentSearchEngine(
+        database_path=database_path,
+        config={
+            "cache_enabled": True,
+            "analytics_enabled": True,
+            "performance_optimization": True
+        }
+    )
+    print("🔍 IntelligentSearchEngine initialized - Project Himalaya benchmark search")
+
+def init_oauth_providers():
+    """Stage: Modern OAuth Manager"""
+    global modern_auth_manager
+    modern_auth_manager = ModernSocialAuthManager()
+    print("🔐 Modern OAuth 2.0 Manager initialized")
+
+def init_drive_sync():
+    """
+    Stage: Google Drive sync
+
+    The new DriveManager is only published once its database exists, so
+    requests keep using the last-good local copy while the first sync runs.
+    """
+    global drive_manager
+    from Core.DriveManager import DriveManager
     
-    print("🚀 Starting AndyGoogle API server...")
+    config_path = "Config/andygoogle_config.json"
+    print(f"🔍 Initializing DriveManager with config: {config_path}")
+    manager = DriveManager(config_path)
     
-    # Initialize User Journey Manager (Project Himalaya Benchmark)
+    # Test Google Drive connectivity (failure only means offline)
+    try:
+        if hasattr(manager, 'TestConnection'):
+            if manager.TestConnection():
+                print("✅ Google Drive connection test successful")
+            else:
+                print("⚠️ Google Drive connection test failed - will work offline")
+    except Exception as conn_error:
+        print(f"⚠️ Google Drive connection test error: {conn_error}")
+    
+    if not os.path.exists(manager.local_db_path):
+        print(f"📊 No synced database at {manager.local_db_path} yet - syncing from Google Drive")
+        manager.InitializeDatabase()
+    if not os.path.exists(manager.local_db_path):
+        print("⚠️ Google Drive sync unavailable - still serving the local database")
+        return False
+    
+    drive_manager = manager
+    print(f"✅ Google Drive integration enabled - serving {manager.local_db_path}")
+    return True
+
+def init_sheets_logger():
+    """Stage: Google Sheets usage logging"""
+    global sheets_logger
+    from Utils.SheetsLogger import SheetsLogger
+    
+    creds_path = "Config/google_credentials.json"
+    print(f"🔍 Initializing SheetsLogger with creds: {creds_path}")
+    sheets_logger = SheetsLogger(creds_path)
+    print("✅ SheetsLogger initialized successfully")
+
+def startup_stages():
+    """(name, function) for each background stage; unavailable components are marked disabled"""
+    # Search and OAuth are imported by their stage, off the event loop - a
+    # missing module marks the stage disabled there
+    stages = [("search", init_search_engine), ("oauth", init_oauth_providers)]
     if UserJourneyManager:
-        try:
-            journey_manager = UserJourneyManager({
-                "environment": os.getenv("ENVIRONMENT", "development"),
-                "analytics_enabled": True,
-                "personalization_enabled": True
-            })
-            print("🏔️ UserJourneyManager initialized - Project Himalaya benchmark UX")
-        except Exception as e:
-            print(f"⚠️ Failed to initialize UserJourneyManager: {e}")
-            journey_manager = None
+        stages.insert(0, ("journey", init_journey_manager))
     else:
-        journey_manager = None
+        startup_readiness.Disable("journey", "module not available")
     
-    # Initialize Intelligent Search Engine (Project Himalaya Benchmark)
-    if IntelligentSearchEngine:
-        try:
-            database_path = os.path.join("Data", "Local", "cached_library.db")
-            intelligent_search_engine = IntelligentSearchEngine(
-                database_path=database_path,
-                config={
-                    "cache_enabled": True,
-                    "analytics_enabled": True,
-                    "performance_optimization": True
-                }
-            )
-            print("🔍 IntelligentSearchEngine initialized - Project Himalaya benchmark search")
-        except Exception as e:
-            print(f"⚠️ Failed to initialize IntelligentSearchEngine: {e}")
-            intelligent_search_engine = None
+    if os.environ.get('ANDYGOOGLE_MODE', 'local') == 'gdrive':
+        print("🌐 GOOGLE DRIVE MODE - Drive sync and Sheets logging start in the background")
+        stages += [("drive_sync", init_drive_sync), ("sheets_logging", init_sheets_logger)]
     else:
-        intelligent_search_engine = None
-    
-    # Initialize Modern OAuth Manager
-    if ModernSocialAuthManager:
-        try:
-            modern_auth_manager = ModernSocialAuthManager()
-            print("🔐 Modern OAuth 2.0 Manager initialized")
-        except Exception as e:
-            print(f"⚠️ Failed to initialize Modern OAuth Manager: {e}")
-            modern_auth_manager = None
-    else:
-        modern_auth_manager = None
+        print("💾 LOCAL MODE - Using local SQLite database only")
+        startup_readiness.Disable("drive_sync", "local mode")
+        startup_readiness.Disable("sheets_logging", "local mode")
     
-    # Check operating mode from environment
-    mode = os.environ.get('ANDYGOOGLE_MODE', 'local')
+    # Minify, precompress and fingerprint WebPages/ (pages are served from disk until it finishes)
+    stages.append(("web_assets", web_assets.Build))
     
-    if mode == 'gdrive':
-        print("🌐 GOOGLE DRIVE MODE - Initializing Drive integration...")
-        try:
-            from Core.DriveManager import DriveManager
-            from Utils.SheetsLogger import SheetsLogger
-            
-            # Use proper config paths
-            config_path = "Config/andygoogle_config.json"
-            creds_path = "Config/google_credentials.json"
-            
-            print(f"🔍 Initializing DriveManager with config: {config_path}")
-            
-            # Initialize DriveManager with enhanced error handling
-            drive_manager = DriveManager(config_path)
-            
-            # Validate DriveManager functionality
-            if hasattr(drive_manager, 'local_db_path'):
-                print(f"🔍 DriveManager local_db_path: {drive_manager.local_db_path}")
-                db_path_valid = True
-            else:
-                print("⚠️ DriveManager missing local_db_path attribute")
-                db_path_valid = False
-            
-            # Test Google Drive connectivity (non-blocking)
-            try:
-                if hasattr(drive_manager, 'TestConnection'):
-                    connection_status = drive_manager.TestConnection()
-                    if connection_status:
-                        print("✅ Google Drive connection test successful")
-                    else:
-                        print("⚠️ Google Drive connection test failed - will work offline")
-                else:
-                    print("ℹ️ Connection test not available - assuming connected")
-            except Exception as conn_error:
-                print(f"⚠️ Google Drive connection test error: {conn_error}")
-                print("ℹ️ Will continue in offline mode")
-            
-            # Initialize SheetsLogger with error handling
-            try:
-                print(f"🔍 Initializing SheetsLogger with creds: {creds_path}")
-                sheets_logger = SheetsLogger(creds_path)
-                print("✅ SheetsLogger initialized successfully")
-            except Exception as sheets_error:
-                print(f"⚠️ SheetsLogger initialization failed: {sheets_error}")
-                print("ℹ️ Continuing without sheets logging")
-                sheets_logger = None
-            
-            # Validate database access through DriveManager
-            if drive_manager and db_path_valid:
-                test_db_path = drive_manager.local_db_path
-                if os.path.exists(test_db_path):
-                    print(f"✅ Database accessible at: {test_db_path}")
-                    
-                    # Test database connectivity
-                    try:
-                        conn = sqlite3.connect(test_db_path, check_same_thread=False)
-                        count = conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
-                        conn.close()
-                        print(f"✅ Database validation successful - {count} books found")
-                    except Exception as db_error:
-                        print(f"⚠️ Database validation warning: {db_error}")
-                        
-                else:
-                    print(f"⚠️ Database not found at DriveManager path: {test_db_path}")
-                    print("📊 Will attempt to sync from Google Drive or fallback to local")
-            
-            print("✅ Google Drive integration enabled successfully")
-            print("📊 Database ready with Google Drive sync capabilities")
-        except Exception as e:
-            print(f"⚠️ Google Drive initialization failed: {e}")
-            print("📊 Falling back to local SQLite mode")
-            drive_manager = None
-            sheets_logger = None
-            
-            # Force environment to local mode to prevent further issues
-            os.environ['ANDYGOOGLE_MODE'] = 'local'
-            print("🔄 Environment mode switched to LOCAL for stability")
-    else:
-        print("💾 LOCAL MODE - Using local SQLite database only")
-        print("📊 Database ready with local SQLite file")
+    # Index creation and ANALYZE can take a while on a large library
+    stages.append(("database_indexes", optimize_database_indexes))
     
-    # Optimize database indexes for better performance
-    await optimize_database_indexes()
+    # Build the offline catalog index before the first browser asks for it
+    stages.append(("catalog_index", lambda: catalog_index.Current(catalog_database_path())))
+    return stages
+
+@app.on_event("startup")
+async def startup_event():
+    """Start serving from the local database; initialize everything else in the background"""
+    print("🚀 Starting AndyGoogle API server...")
     
-    print("✅ AndyGoogle API server started successfully")
+    startup_readiness.Run("database", check_serving_database)
+    
+    stages = startup_stages()
+    for name, _ in stages:
+        startup_readiness.Register(name)
+    tasks = [asyncio.create_task(startup_readiness.RunInBackground(name, func)) for name, func in stages]
+    startup_tasks.extend(tasks)
+    
+    # Give quick stages a chance to finish, but never hold the port longer than the budget
+    budget = ResolveStartupBudget()
+    pending = set()
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=budget)
+    startup_readiness.MarkServing()
+    if pending:
+        names = [name for name, stage in startup_readiness.Snapshot()["stages"].items() if stage["state"] == "running"]
+        print(f"⚡ Fast start: serving now, still initializing in the background: {', '.join(names)}")
+    
+    # Library-wide background jobs run in one worker process only
+    from Utils.ServerLauncher import AcquireBackgroundRole
+    if AcquireBackgroundRole():
+        # Index book text in the background (process pool, resumes where the last run stopped)
+        if os.getenv("ANDYLIBRARY_CONTENT_INDEX", "1") == "1" and get_content_indexer():
+            content_indexer.Start(list_local_book_files)
+        
+        # Render missing book previews in the background (process pool, capped concurrency)
+        if os.getenv("ANDYLIBRARY_PREVIEW_WARMUP", "1") == "1" and get_preview_pipeline():
+            threading.Thread(target=queue_preview_warmup, name="preview-warmup", daemon=True).start()
+        
+        # Resume queued book downloads; requests in other workers only add to the queue
+        if os.getenv("ANDYLIBRARY_DOWNLOAD_QUEUE", "1") == "1":
+            threading.Thread(target=get_download_scheduler, name="download-scheduler", daemon=True).start()
+    else:
+        print("👥 Content indexing, preview warmup and download dispatch run in another worker")
+    
+    # Find a caching peer on the LAN after the port is open rather than before
+    if os.getenv("ANDYLIBRARY_PEER_DISCOVERY", "0") == "1" and not is_caching_peer() and not get_peer_upstream():
+        startup_tasks.append(asyncio.create_task(discover_peer_upstream()))
+    
+    print(f"✅ AndyGoogle API server started - serving {startup_readiness.Snapshot()['cold_start_seconds']}s after launch")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background render and indexing workers"""
+    for task in startup_tasks:
+        task.cancel()
+    if preview_pipeline:
+        preview_pipeline.Shutdown()
+    if content_indexer:
+        content_indexer.StopEvent.set()
+    if peer_cache_api:
+        peer_cache_api.Cache.SaveManifest()
 
 # Health check endpoint
 @app.get("/api/health")
@@ -676,8 +824,11 @@ async def health_check():
     """API health check"""
     return {
         "status": "healthy",
+        "service": "AndyLibrary",  # LAN discovery clients match on this
+        "roles": ["library", "peer-cache"] if is_caching_peer() else ["library"],
         "timestamp": datetime.now().isoformat(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "startup": startup_readiness.Snapshot()
     }
 
 @app.get("/api/mode")
@@ -734,40 +885,49 @@ async def get_mode():
     
     return mode_info
 
+def current_database_path() -> str:
+    """Library database served to clients (Drive-synced copy in gdrive mode)"""
+    if drive_manager and hasattr(drive_manager, 'local_db_path'):
+        return drive_manager.local_db_path
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(base_dir, "Data", "Databases", "MyLibrary.db")
+
 # Database download endpoint for users
 @app.get("/api/database/download")
 async def download_database(request: Request):
-    """Download the current database file for users"""
+    """
+    Download the current database file for users
+
+    Honours If-None-Match (304 when the client's copy is current) and Range,
+    so standalone clients revalidate without re-downloading the library.
+    """
     log_api_usage(request, "database_download")
     
     try:
-        # Determine database path based on mode
-        if drive_manager and hasattr(drive_manager, 'local_db_path'):
-            db_path = drive_manager.local_db_path
-        else:
-            # Fallback to local database
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            db_path = os.path.join(base_dir, "Data", "Databases", "MyLibrary.db")
-        
+        db_path = current_database_path()
         if not os.path.exists(db_path):
             raise HTTPException(status_code=404, detail="Database file not found")
         
         # Get file info
-        file_size = os.path.getsize(db_path)
-        file_modified = datetime.fromtimestamp(os.path.getmtime(db_path))
+        stat = os.stat(db_path)
+        file_size = stat.st_size
+        file_modified = datetime.fromtimestamp(stat.st_mtime)
         
         # Create download filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        download_filename = f"andylibrary_{timestamp}.db"
+        entry = BookFileEntry(0, f"andylibrary_{timestamp}", db_path, file_size, stat.st_mtime_ns, time.time())
+        response = BuildFileResponse(entry, request.headers, request.method,
+                                     cache_control="no-cache", extension=".db")
+        if response.status_code in (304, 416):
+            return response
         
         # Log download start for analytics
-        start_time = time.time()
         size_mb = file_size / 1024 / 1024
         
         if sheets_logger:
             client_ip = request.client.host if request.client else "unknown"
             user_agent = request.headers.get("user-agent", "unknown")
-            version = f"{int(os.path.getmtime(db_path))}.{file_size}"
+            version = f"{int(stat.st_mtime)}.{file_size}"
             
             sheets_logger.LogDatabaseDownload(
                 client_ip=client_ip,
@@ -778,20 +938,17 @@ async def download_database(request: Request):
                 success=True
             )
         
-        from fastapi.responses import FileResponse
-        return FileResponse(
-            path=db_path,
-            filename=download_filename,
-            media_type="application/octet-stream",
-            headers={
-                "Content-Disposition": f"attachment; filename={download_filename}",
-                "X-File-Size": str(file_size),
-                "X-Last-Modified": file_modified.isoformat(),
-                "X-Database-Version": "1.0.0",
-                "X-Estimated-Cost": f"${size_mb * 0.10:.2f}"
-            }
-        )
+        response.headers["Content-Disposition"] = response.headers["Content-Disposition"].replace("inline", "attachment", 1)
+        response.headers.update({
+            "X-File-Size": str(file_size),
+            "X-Last-Modified": file_modified.isoformat(),
+            "X-Database-Version": "1.0.0",
+            "X-Estimated-Cost": f"${size_mb * 0.10:.2f}"
+        })
+        return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Database download error: {e}")
         raise HTTPException(status_code=500, detail=f"Download failed: {str(e)}")
@@ -1012,6 +1169,24 @@ async def check_for_updates(request: Request):
     update_info = drive_manager.CheckForUpdates()
     return update_info
 
+@app.get("/api/catalog/index")
+async def get_catalog_index(request: Request, since: Optional[str] = None):
+    """
+    Compact columnar index of the whole catalog (id, title, category, subject)
+    
+    With ?since=<version> a client that has a recent version gets only the
+    changed and deleted books; If-None-Match gets a 304 while it is current.
+    """
+    log_api_usage(request, "catalog_index", f"since={since}")
+    
+    db_path = catalog_database_path()
+    if not os.path.exists(db_path):
+        raise HTTPException(status_code=503, detail="Database not available - sync required")
+    try:
+        return await run_in_threadpool(catalog_index.BuildResponse, db_path, request.headers, since, request.method)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=503, detail=f"Catalog index unavailable: {str(e)}")
+
 # Books endpoints
 @app.get("/api/books")
 async def get_books(
@@ -1208,65 +1383,229 @@ async def get_book_thumbnail(request: Request, book_id: int, db: sqlite3.Connect
         from fastapi import Response
         return Response(status_code=204)
 
-@app.get("/api/books/{book_id}/pdf")
-async def get_book_pdf(request: Request, book_id: int, db: sqlite3.Connection = Depends(get_database)):
-    """Serve PDF file for reading"""
+# Resolved book files (id -> path/size/mtime), shared by every PDF request in this worker
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+book_file_resolver = BookFileResolver([os.getcwd(), os.path.dirname(os.getcwd()), PROJECT_ROOT])
+pdf_page_service = PdfPageService(os.path.join(PROJECT_ROOT, "Data", "Cache", "Pages"))
+
+def lookup_book_file(book_id: int) -> Optional[tuple]:
+    """(title, FilePath) for a book - only called when the path cache misses"""
+    db_gen = get_database()
+    db = next(db_gen)
+    try:
+        row = db.execute("SELECT title, FilePath FROM books WHERE id = ?", (book_id,)).fetchone()
+        return (row['title'], row['FilePath']) if row else None
+    finally:
+        db_gen.close()
+
+preview_pipeline = None
+
+def get_preview_pipeline() -> Optional[PreviewPipeline]:
+    """Return the preview pipeline (created on first use), or None without PyMuPDF"""
+    global preview_pipeline
+    if preview_pipeline is None:
+        pipeline = PreviewPipeline(
+            PreviewCache(os.path.join(PROJECT_ROOT, "Data", "Cache", "Previews"),
+                         max_bytes=int(os.getenv("ANDYLIBRARY_PREVIEW_CACHE_MB", "256")) * 1024 * 1024),
+            max_workers=int(os.getenv("ANDYLIBRARY_PREVIEW_WORKERS", "2"))
+        ) if PreviewPipeline.IsAvailable() else None
+        preview_pipeline = pipeline
+    return preview_pipeline
+
+def list_local_book_ids() -> List[int]:
+    """Ids of catalogue books stored as PDFs"""
+    db_gen = get_database()
+    db = next(db_gen)
+    try:
+        return [row[0] for row in db.execute("SELECT id FROM books WHERE FilePath LIKE '%.pdf'")]
+    finally:
+        db_gen.close()
+
+def list_local_book_files() -> List[tuple]:
+    """(book_id, absolute path) for every book whose PDF is on this machine"""
+    entries = (book_file_resolver.Resolve(book_id, lookup_book_file) for book_id in list_local_book_ids())
+    return [(entry.book_id, entry.path) for entry in entries if entry]
+
+def queue_preview_warmup():
+    """Render previews for every local book whose current file has none, a few books at a time"""
+    pipeline = get_preview_pipeline()
+    try:
+        entries = (book_file_resolver.Resolve(book_id, lookup_book_file) for book_id in list_local_book_ids())
+        queued = pipeline.QueueMissing(entries)
+        if queued:
+            print(f"🖼️ Submitted preview renders for {queued} books")
+    except Exception as e:
+        logging.warning(f"⚠️ Preview warmup failed: {e}")
+
+content_indexer = None
+
+def get_content_indexer():
+    """Return the content indexer (created on first use), or None without PyMuPDF"""
+    global content_indexer
+    if content_indexer is None and ContentIndexer and ContentIndexer.IsAvailable():
+        content_indexer = ContentIndexer(
+            os.path.join(PROJECT_ROOT, "Data", "Local", "content_index.db"),
+            max_workers=int(os.getenv("ANDYLIBRARY_INDEX_WORKERS", "2")),
+            ocr_engine=os.getenv("ANDYLIBRARY_OCR_ENGINE", "auto")
+        )
+    return content_indexer
+
+def resolve_remote_book_pdf(title: str) -> Optional[str]:
+    """Google Drive download URL for a book without a local file, when Drive is connected"""
+    source = resolve_book_download_source(0, title)
+    return source["download_url"] if source else None
+
+@app.api_route("/api/books/{book_id}/pdf", methods=["GET", "HEAD"])
+async def get_book_pdf(request: Request, book_id: int):
+    """Serve a book PDF with byte-range and conditional request support"""
     log_api_usage(request, "pdf_view", f"book_id={book_id}")
     
     try:
-        # Get book file path
-        cursor = db.execute("SELECT title, author, FilePath FROM books WHERE id = ?", (book_id,))
-        row = cursor.fetchone()
+        entry = await run_in_threadpool(book_file_resolver.Resolve, book_id, lookup_book_file)
+        if entry:
+            return BuildFileResponse(entry, request.headers, request.method)
         
+        # No local file - the book may still live in Google Drive
+        row = await run_in_threadpool(lookup_book_file, book_id)
         if not row:
             raise HTTPException(status_code=404, detail="Book not found")
         
-        file_path = row['FilePath']
-        if not file_path or not file_path.lower().endswith('.pdf'):
-            raise HTTPException(status_code=404, detail="PDF file not available for this book")
-        
-        # Build full path - try multiple possible locations
-        full_paths = [
-            os.path.join(os.getcwd(), file_path),
-            os.path.join(os.getcwd(), "Data", "Books", os.path.basename(file_path)),
-            os.path.join(os.path.dirname(os.getcwd()), file_path),
-            file_path  # Try as absolute path
-        ]
-        
-        pdf_file = None
-        for path in full_paths:
-            if os.path.exists(path):
-                pdf_file = path
-                break
-        
-        if not pdf_file:
-            raise HTTPException(status_code=404, detail=f"PDF file not found: {file_path}")
-        
-        # Return PDF file with proper headers for streaming
-        from fastapi.responses import FileResponse
-        return FileResponse(
-            pdf_file, 
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"inline; filename=\"{row['title']}.pdf\"",
-                "Cache-Control": "public, max-age=3600"  # Cache for 1 hour
-            }
-        )
+        # A LAN peer (this machine in caching mode, or a configured upstream) beats the internet
+        peer_url = await run_in_threadpool(peer_book_url, book_id)
+        if peer_url:
+            return RedirectResponse(url=peer_url)
+        
+        remote_url = await run_in_threadpool(resolve_remote_book_pdf, row[0])
+        if remote_url:
+            return RedirectResponse(url=remote_url)
         
+        raise HTTPException(status_code=404, detail=f"PDF file not found: {row[1]}")
+        
+    except HTTPException:
+        raise
     except Exception as e:
-        if isinstance(e, HTTPException):
-            raise e
         logging.error(f"Error serving PDF for book {book_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to serve PDF file")
 
+@app.get("/api/books/{book_id}/pages/index")
+async def get_book_page_index(request: Request, book_id: int, background_tasks: BackgroundTasks):
+    """Page count, page sizes and bundle layout for progressive (page-level) reading"""
+    log_api_usage(request, "pdf_page_index", f"book_id={book_id}")
+    
+    if not pdf_page_service.IsAvailable():
+        raise HTTPException(status_code=503, detail="Page delivery unavailable - use /pdf byte ranges")
+    
+    entry = await run_in_threadpool(book_file_resolver.Resolve, book_id, lookup_book_file)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Book file not found")
+    
+    try:
+        index = await run_in_threadpool(pdf_page_service.GetPageIndex, entry)
+    except Exception as e:
+        logging.error(f"Error indexing pages for book {book_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to index book pages")
+    
+    # Have the opening bundles ready before the reader asks for them
+    background_tasks.add_task(pdf_page_service.Precompute, entry)
+    return JSONResponse(index, headers={"ETag": entry.etag, "Cache-Control": "no-cache"})
+
+@app.api_route("/api/books/{book_id}/pages", methods=["GET", "HEAD"])
+async def get_book_pages(
+    request: Request,
+    book_id: int,
+    from_page: Optional[int] = Query(None, alias="from", ge=1),
+    to_page: Optional[int] = Query(None, alias="to", ge=1)
+):
+    """
+    The cached page bundle holding page from (1-based) of a book
+    
+    Bundles follow the layout in /pages/index; X-Page-Range names the pages sent.
+    """
+    log_api_usage(request, "pdf_pages", f"book_id={book_id} pages={from_page}-{to_page}")
+    
+    if not pdf_page_service.IsAvailable():
+        raise HTTPException(status_code=503, detail="Page delivery unavailable - use /pdf byte ranges")
+    
+    entry = await run_in_threadpool(book_file_resolver.Resolve, book_id, lookup_book_file)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Book file not found")
+    
+    try:
+        bundle_path, start, end = await run_in_threadpool(
+            pdf_page_service.GetBundlePath, entry, from_page, to_page
+        )
+    except PageRangeError as e:
+        raise HTTPException(status_code=416, detail=str(e))
+    except Exception as e:
+        logging.error(f"Error building pages for book {book_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to build book pages")
+    
+    stat = os.stat(bundle_path)
+    bundle = BookFileEntry(book_id, f"{entry.title} (pages {start}-{end})", bundle_path,
+                           stat.st_size, stat.st_mtime_ns, entry.resolved_at)
+    response = BuildFileResponse(bundle, request.headers, request.method)
+    response.headers["X-Page-Range"] = f"{start}-{end}"
+    return response
+
+@app.get("/api/books/{book_id}/preview/{page}")
+async def get_book_preview(request: Request, book_id: int, page: int, v: Optional[str] = None):
+    """
+    Low-resolution JPEG of one of a book's first pages
+    
+    URLs carrying the file version (?v=, from the ETag of /pdf) are cached as immutable.
+    """
+    log_api_usage(request, "book_preview", f"book_id={book_id} page={page}")
+    
+    pipeline = get_preview_pipeline()
+    if not pipeline:
+        raise HTTPException(status_code=503, detail="Page previews unavailable")
+    
+    entry = await run_in_threadpool(book_file_resolver.Resolve, book_id, lookup_book_file)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Book file not found")
+    
+    try:
+        path = await run_in_threadpool(pipeline.GetPreview, entry, page)
+    except TimeoutError:
+        return JSONResponse({"detail": "Preview is being rendered"}, status_code=503, headers={"Retry-After": "5"})
+    except Exception as e:
+        logging.error(f"Error rendering preview for book {book_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to render preview")
+    
+    if not path:
+        raise HTTPException(status_code=404, detail=f"No preview for page {page}")
+    
+    etag = f'"{os.path.splitext(os.path.basename(path))[0]}"'
+    if v == pipeline.Version(entry):
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = "public, max-age=86400"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="image/jpeg", headers=headers)
+
 @app.post("/api/progress/reading")
-async def save_reading_progress(request: Request, progress_data: dict):
-    """Save reading progress for offline sync"""
+async def save_reading_progress(
+    request: Request,
+    progress_data: dict,
+    current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
+):
+    """Save reading progress (single event; offline clients use /api/progress/sync)"""
     log_api_usage(request, "reading_progress", f"book_id={progress_data.get('bookId')}")
     
     try:
-        # This could be enhanced to save to database
-        # For now, just acknowledge the request
+        if current_user and UserProgressManager and progress_data.get('bookId'):
+            progress_manager = UserProgressManager(get_progress_database_path(), current_user["id"])
+            progress_manager.SyncProgressEvents(current_user["id"], "web-direct", [{
+                "book_id": progress_data.get('bookId'),
+                "page": progress_data.get('page'),
+                "total_pages": progress_data.get('totalPages'),
+                "timestamp": progress_data.get('timestamp')
+            }])
+        
         return {
             "status": "success",
             "message": "Reading progress saved",
@@ -1433,6 +1772,56 @@ async def intelligent_search(
             detail=f"Intelligent search failed: {str(e)}"
         )
 
+@app.get("/api/search/content")
+async def search_book_content(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find inside books"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """Page-level full-text hits across the text of local books"""
+    log_api_usage(request, "content_search", f"query='{q}'")
+    
+    indexer = get_content_indexer()
+    if not indexer:
+        raise HTTPException(status_code=503, detail="Content search not available")
+    
+    try:
+        hits = await run_in_threadpool(indexer.Search, q, limit, offset)
+        
+        titles = {}
+        book_ids = sorted({hit["book_id"] for hit in hits})
+        if book_ids:
+            db_gen = get_database()
+            db = next(db_gen)
+            try:
+                placeholders = ",".join("?" * len(book_ids))
+                titles = {row["id"]: (row["title"], row["author"]) for row in db.execute(
+                    f"SELECT id, title, author FROM books WHERE id IN ({placeholders})", book_ids
+                )}
+            finally:
+                db_gen.close()
+        
+        results = []
+        for hit in hits:
+            title, author = titles.get(hit["book_id"], (None, None))
+            results.append({**hit, "title": title, "author": author,
+                            "reader_url": f"/pdf-reader.html?id={hit['book_id']}&page={hit['page']}"})
+        
+        return {"query": q, "results": results, "index": await run_in_threadpool(indexer.GetStatus)}
+    
+    except Exception as e:
+        logging.error(f"Content search failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Content search failed: {str(e)}")
+
+@app.get("/api/search/content/status")
+async def get_content_index_status():
+    """Progress and size of the full-text content index"""
+    indexer = get_content_indexer()
+    if not indexer:
+        return {"available": False}
+    return {"available": True, **await run_in_threadpool(indexer.GetStatus)}
+
 @app.get("/api/search/suggestions")
 async def get_search_suggestions(
     request: Request,
@@ -2354,16 +2743,15 @@ async def get_user_profile(current_user: Dict[str, Any] = Depends(require_auth))
 async def get_performance_assessment():
     """Get user's system performance assessment and recommendations"""
     try:
-        # Quick network test
-        start_time = time.time()
-        try:
-            response = requests.get("https://www.google.com/favicon.ico", timeout=5)
-            network_time = time.time() - start_time
-            network_speed = (len(response.content) * 8) / (network_time * 1000000) if network_time > 0 else 1
-        except:
+        # Network speed from throughput measured by real book downloads (no probe request)
+        network_estimate = GetNetworkEstimator().GetEstimate() if GetNetworkEstimator else {"measured": False}
+        if network_estimate["measured"]:
+            network_speed = network_estimate["throughput_bytes_per_second"] * 8 / 1000000
+        else:
             network_speed = 1  # Conservative estimate
         
         # Hardware detection
+        import psutil
         cpu_count = psutil.cpu_count()
         memory = psutil.virtual_memory()
         memory_gb = memory.total / (1024**3)
@@ -2457,6 +2845,12 @@ async def get_performance_assessment():
                 "memory_available_gb": round(memory_available_gb, 1),
                 "platform": platform.system()
             },
+            "network_measurement": {
+                "source": "download_measurements" if network_estimate["measured"] else "default_estimate",
+                "rtt_ms": network_estimate.get("rtt_ms"),
+                "samples": network_estimate.get("samples", 0),
+                "age_seconds": network_estimate.get("age_seconds")
+            },
             "performance_prediction": {
                 "download_time_seconds": round(download_time, 1),
                 "processing_time_seconds": round(processing_time, 3),
@@ -2572,6 +2966,94 @@ if CreateAdvancedSearchAPI:
     except Exception as e:
         print(f"⚠️ Failed to integrate Advanced Search API: {e}")
 
+# LAN peer distribution: /api/peer/* serves local books and the database to other devices.
+# ANDYLIBRARY_PEER_CACHE=1 makes this machine a caching peer that fetches missing books
+# once (from ANDYLIBRARY_PEER_UPSTREAM if set, else Google Drive) and keeps them.
+def is_caching_peer() -> bool:
+    return os.getenv("ANDYLIBRARY_PEER_CACHE", "0").lower() in ("1", "true", "yes")
+
+# Caching peer found on the LAN after startup (ANDYLIBRARY_PEER_DISCOVERY=1, no upstream configured)
+discovered_peer_upstream: Optional[str] = None
+
+def get_peer_upstream() -> Optional[str]:
+    """Base URL of the upstream peer: the configured one, else the one discovered on the LAN"""
+    upstream = os.getenv("ANDYLIBRARY_PEER_UPSTREAM") or discovered_peer_upstream
+    return upstream.rstrip('/') if upstream else None
+
+async def discover_peer_upstream():
+    """Look for a caching peer on the LAN while the server is already serving"""
+    global discovered_peer_upstream
+    try:
+        from Utils.LanDiscovery import DiscoverServerAsync, PEER_CACHE_ROLE
+        discovered_peer_upstream = await DiscoverServerAsync(role=PEER_CACHE_ROLE)
+    except Exception as e:
+        print(f"⚠️ Peer discovery failed: {e}")
+        return
+    if discovered_peer_upstream:
+        print(f"📦 Missing books come from LAN peer {discovered_peer_upstream}")
+
+def resolve_peer_upstream(book_id: int) -> Optional[Dict[str, Any]]:
+    """Where a caching peer fetches a book it does not have yet"""
+    row = lookup_book_file(book_id)
+    if not row:
+        return None
+    upstream = get_peer_upstream()
+    if upstream:
+        return {"url": f"{upstream}/api/peer/books/{book_id}", "title": row[0]}
+    source = resolve_book_download_source(book_id, row[0])
+    if not source:
+        return None
+    return {"url": source["download_url"], "title": row[0], "size_bytes": source.get("size_bytes")}
+
+PEER_UPSTREAM_CHECK_SECONDS = 30
+PEER_UPSTREAM_TIMEOUT_SECONDS = 2
+peer_upstream_status: Dict[str, tuple] = {}  # upstream -> (checked at, reachable)
+
+def peer_upstream_alive(upstream: str) -> bool:
+    """Whether the configured upstream peer answers its health check (remembered briefly)"""
+    now = time.monotonic()
+    checked = peer_upstream_status.get(upstream)
+    if checked and now - checked[0] < PEER_UPSTREAM_CHECK_SECONDS:
+        return checked[1]
+    
+    import urllib.request
+    try:
+        with urllib.request.urlopen(f"{upstream}/api/health", timeout=PEER_UPSTREAM_TIMEOUT_SECONDS) as response:
+            alive = response.status == 200
+    except (OSError, ValueError):
+        alive = False
+    if not alive and (not checked or checked[1]):
+        logging.warning(f"⚠️ Peer upstream {upstream} unreachable - using Google Drive")
+    peer_upstream_status[upstream] = (now, alive)
+    return alive
+
+def peer_book_url(book_id: int) -> Optional[str]:
+    """LAN location of a book this server does not hold locally, if a peer can supply it"""
+    if peer_cache_api and is_caching_peer():
+        return f"/api/peer/books/{book_id}"
+    upstream = get_peer_upstream()
+    if not upstream or not peer_upstream_alive(upstream):
+        return None
+    return f"{upstream}/api/peer/books/{book_id}"
+
+peer_cache_api = None
+if PeerCacheAPI:
+    try:
+        peer_cache_api = PeerCacheAPI(
+            PeerCache(os.path.join(PROJECT_ROOT, "Data", "Cache", "Peer"),
+                      max_bytes=int(os.getenv("ANDYLIBRARY_PEER_CACHE_MB", "0")) * 1024 * 1024),
+            ResolveLocalBook=lambda book_id: book_file_resolver.Resolve(book_id, lookup_book_file),
+            ListLocalBooks=lambda: [entry for entry in (book_file_resolver.Resolve(book_id, lookup_book_file)
+                                                        for book_id in list_local_book_ids()) if entry],
+            DatabasePath=current_database_path,
+            ResolveUpstream=resolve_peer_upstream if is_caching_peer() else None
+        )
+        app.include_router(peer_cache_api.Router, prefix="/api", tags=["peer"])
+        if is_caching_peer():
+            print("✅ LAN caching peer enabled")
+    except Exception as e:
+        print(f"⚠️ Failed to integrate peer API: {e}")
+
 # Progress tracking endpoints
 @app.post("/api/progress/session/start")
 async def start_reading_session(
@@ -2741,24 +3223,135 @@ async def toggle_bookmark(
         logging.error(f"Failed to toggle bookmark: {e}")
         raise HTTPException(status_code=500, detail=f"Bookmark toggle failed: {str(e)}")
 
-# Static file serving
-app.mount("/static", StaticFiles(directory="WebPages/static"), name="static")
+@app.get("/api/progress/bookmarks")
+async def get_bookmarks(
+    request: Request,
+    current_user: Dict[str, Any] = Depends(require_auth)
+):
+    """Bookmarked books; the service worker keeps these pinned in its offline cache"""
+    if not UserProgressManager:
+        raise HTTPException(status_code=503, detail="Progress tracking not available")
+    
+    try:
+        progress_manager = UserProgressManager(get_progress_database_path(), current_user["id"])
+        bookmarks = progress_manager.GetBookmarks(current_user["id"])
+    except Exception as e:
+        logging.error(f"Failed to get bookmarks: {e}")
+        raise HTTPException(status_code=500, detail=f"Bookmark retrieval failed: {str(e)}")
+    
+    log_api_usage(request, "bookmarks_list", f"count={len(bookmarks)}")
+    return {
+        "success": True,
+        "book_ids": [bookmark["book_id"] for bookmark in bookmarks],
+        "bookmarks": bookmarks
+    }
+
+# Largest decompressed progress batch accepted from a device
+MAX_SYNC_PAYLOAD_BYTES = 2 * 1024 * 1024
+
+def get_progress_database_path() -> str:
+    """Database that holds reading progress"""
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.join(base_dir, "Data", "Databases", "MyLibrary.db")
+
+def decode_sync_payload(body: bytes, content_encoding: str) -> Dict[str, Any]:
+    """Decode a (optionally gzip/deflate compressed) JSON sync batch with a size cap"""
+    encoding = (content_encoding or "").lower()
+    if encoding in ("gzip", "deflate"):
+        wbits = 16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS
+        decompressor = zlib.decompressobj(wbits)
+        body = decompressor.decompress(body, MAX_SYNC_PAYLOAD_BYTES)
+        if decompressor.unconsumed_tail:
+            raise HTTPException(status_code=413, detail="Sync batch too large")
+    elif len(body) > MAX_SYNC_PAYLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Sync batch too large")
+    
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync batch")
+    if not isinstance(payload, dict) or not isinstance(payload.get("events"), list):
+        raise HTTPException(status_code=400, detail="Sync batch must contain an events list")
+    return payload
+
+@app.post("/api/progress/sync")
+async def sync_reading_progress(
+    request: Request,
+    current_user: Dict[str, Any] = Depends(require_auth)
+):
+    """
+    Batched offline progress sync
+    Body: {"device_id": str, "events": [{seq, book_id, page, total_pages, timestamp, ...}]},
+    optionally sent with Content-Encoding: gzip. Returns the device's sync cursor.
+    """
+    try:
+        if not UserProgressManager:
+            raise HTTPException(status_code=503, detail="Progress tracking not available")
+        
+        payload = decode_sync_payload(await request.body(), request.headers.get("content-encoding"))
+        device_id = payload.get("device_id")
+        if not device_id:
+            raise HTTPException(status_code=400, detail="Device ID is required")
+        
+        progress_manager = UserProgressManager(get_progress_database_path(), current_user["id"])
+        result = progress_manager.SyncProgressEvents(current_user["id"], device_id, payload["events"])
+        
+        log_api_usage(request, "progress_sync", f"events={len(payload['events'])}")
+        
+        return {"success": True, **result}
+        
+    except HTTPException:
+        raise
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid sync batch: {str(e)}")
+    except Exception as e:
+        logging.error(f"Failed to sync reading progress: {e}")
+        raise HTTPException(status_code=500, detail=f"Progress sync failed: {str(e)}")
+
+@app.get("/api/progress/sync/cursor")
+async def get_progress_sync_cursor(
+    device_id: str,
+    current_user: Dict[str, Any] = Depends(require_auth)
+):
+    """Last event sequence the server has applied for a device"""
+    if not UserProgressManager:
+        raise HTTPException(status_code=503, detail="Progress tracking not available")
+    
+    progress_manager = UserProgressManager(get_progress_database_path(), current_user["id"])
+    return {"success": True, "device_id": device_id,
+            "cursor": progress_manager.GetSyncCursor(current_user["id"], device_id)}
+
+# Static file serving - minified, precompressed and fingerprinted copies from memory once built
+web_assets = StaticAssetPipeline("WebPages", os.path.join(PROJECT_ROOT, "Data", "Cache", "Assets"))
+app.mount("/static", PipelineStaticFiles(web_assets, directory="WebPages/static"), name="static")
+
+def serve_web_page(request: Request, file_name: str, media_type: str = None) -> Response:
+    """A WebPages file from the asset pipeline, or straight from disk until the pipeline is built"""
+    response = web_assets.BuildResponse(file_name, request.headers, request.method)
+    return response or FileResponse(os.path.join("WebPages", file_name), media_type=media_type)
 
 # PWA Support - Progressive Web App endpoints
 @app.get("/manifest.json")
-async def serve_manifest():
+async def serve_manifest(request: Request):
     """Serve PWA manifest for tablet installation"""
-    return FileResponse("WebPages/manifest.json", media_type="application/json")
+    return serve_web_page(request, "manifest.json", media_type="application/json")
 
 @app.get("/service-worker.js")
-async def serve_service_worker():
+async def serve_service_worker(request: Request):
     """Serve PWA service worker for offline functionality"""
-    return FileResponse("WebPages/service-worker.js", media_type="application/javascript")
+    return serve_web_page(request, "service-worker.js", media_type="application/javascript")
+
+@app.get("/asset-manifest.json")
+async def serve_asset_manifest():
+    """Logical -> fingerprinted asset URLs and the service worker's core files"""
+    if not web_assets.IsBuilt():
+        raise HTTPException(status_code=503, detail="Web assets are still being prepared")
+    return web_assets.Manifest
 
 @app.get("/pdf-reader.html")
-async def serve_pdf_reader():
+async def serve_pdf_reader(request: Request):
     """Serve tablet-optimized PDF reader"""
-    return FileResponse("WebPages/pdf-reader.html")
+    return serve_web_page(request, "pdf-reader.html")
 
 # Serve main web interface - redirect to BowersWorld promotional page
 @app.get("/")
@@ -2770,22 +3363,22 @@ async def serve_main_page(code: str = None, state: str = None, error: str = None
         return await oauth_simple_callback(code, state, error, request)
     
     # Normal landing page request
-    return FileResponse("WebPages/bowersworld.html")
+    return serve_web_page(request, "bowersworld.html")
 
 @app.get("/library")
-async def serve_library_page():
+async def serve_library_page(request: Request):
     """Serve the main AndyLibrary interface (after authentication)"""
-    return FileResponse("WebPages/desktop-library.html")
+    return serve_web_page(request, "desktop-library.html")
 
 @app.get("/auth.html")
-async def serve_auth_page():
+async def serve_auth_page(request: Request):
     """Serve the authentication page with enhanced registration"""
-    return FileResponse("WebPages/auth.html")
+    return serve_web_page(request, "auth.html")
 
 @app.get("/bowersworld.html")
-async def serve_bowersworld_page():
+async def serve_bowersworld_page(request: Request):
     """Serve the BowersWorld.com promotional page with Project Himalaya content"""
-    return FileResponse("WebPages/bowersworld.html")
+    return serve_web_page(request, "bowersworld.html")
 
 @app.get("/bowersworld")
 async def serve_bowersworld_redirect():
@@ -2793,29 +3386,29 @@ async def serve_bowersworld_redirect():
     return RedirectResponse(url="/bowersworld.html")
 
 @app.get("/favicon.ico")
-async def serve_favicon():
+async def serve_favicon(request: Request):
     """Serve the favicon"""
-    return FileResponse("WebPages/favicon.ico")
+    return serve_web_page(request, "favicon.ico")
 
 @app.get("/setup.html")
-async def serve_setup_page():
+async def serve_setup_page(request: Request):
     """Serve the AndyLibrary setup/installation page"""
-    return FileResponse("WebPages/setup.html")
+    return serve_web_page(request, "setup.html")
 
 @app.get("/simple-register.html")
-async def serve_simple_register_page():
+async def serve_simple_register_page(request: Request):
     """Serve the simple registration test page"""
-    return FileResponse("WebPages/simple-register.html")
+    return serve_web_page(request, "simple-register.html")
 
 @app.get("/direct-register.html")
-async def serve_direct_register_page():
+async def serve_direct_register_page(request: Request):
     """Serve the direct registration test page (no service worker)"""
-    return FileResponse("WebPages/direct-register.html")
+    return serve_web_page(request, "direct-register.html")
 
 @app.get("/verification-success.html")
-async def serve_verification_success_page():
+async def serve_verification_success_page(request: Request):
     """Serve the email verification success page"""
-    return FileResponse("WebPages/verification-success.html")
+    return serve_web_page(request, "verification-success.html")
 
 # Error handlers
 @app.exception_handler(HTTPException)
@@ -2850,6 +3443,26 @@ async def general_exception_handler(request: Request, exc: Exception):
     )
 
 # Student Book Download Endpoints
+@app.post("/api/books/cost", response_model=BookCostBatchResponse)
+async def get_books_cost(batch: BookCostBatchRequest):
+    """Price a whole shelf or results page in one request"""
+    if not StudentBookDownloader:
+        raise HTTPException(status_code=500, detail="Book downloader not available")
+    
+    try:
+        student_region = StudentRegion(batch.region.lower())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid region. Use: developing, emerging, or developed")
+    
+    try:
+        downloader = StudentBookDownloader()
+        summary = downloader.GetMultipleBooksCost(batch.book_ids, student_region)
+        summary['books'] = [asdict(cost_info) for cost_info in summary['books']]
+        return BookCostBatchResponse(**summary)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Cost calculation error: {str(e)}")
+
 @app.get("/api/books/{book_id}/cost", response_model=BookCostResponse)
 async def get_book_cost(book_id: int, region: str = "developing"):
     """Get cost estimate for downloading a book"""
@@ -2902,91 +3515,6 @@ async def get_download_options(book_id: int, region: str = "developing"):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Options error: {str(e)}")
 
-@app.get("/api/books/{book_id}/pdf")
-async def get_book_pdf(request: Request, book_id: int, db: sqlite3.Connection = Depends(get_database)):
-    """Get PDF file for a book - integrates with Google Drive or local storage"""
-    log_api_usage(request, "pdf_access", f"book_id={book_id}")
-    
-    # First get book info from database
-    cursor = db.execute("SELECT id, title, FilePath FROM books WHERE id = ?", (book_id,))
-    book = cursor.fetchone()
-    
-    if not book:
-        raise HTTPException(status_code=404, detail="Book not found")
-    
-    try:
-        # Try Google Drive integration first
-        from Core.StudentGoogleDriveAPI import StudentGoogleDriveAPI, GOOGLE_AVAILABLE
-        
-        if GOOGLE_AVAILABLE:
-            print(f"🔍 Attempting Google Drive access for book: {book['title']}")
-            
-            try:
-                # Initialize Google Drive API
-                gdrive_api = StudentGoogleDriveAPI()
-                
-                # Check if we have a valid token (simplified check)
-                token_path = "Config/google_token.json"
-                if os.path.exists(token_path):
-                    print("✅ Google token found, attempting book access")
-                    
-                    # Get file info from Google Drive
-                    file_info = gdrive_api.GetBookFileInfo(book['title'])
-                    
-                    if file_info:
-                        print(f"✅ Found book in Google Drive: {file_info.name}")
-                        
-                        # For now, redirect to Google Drive download URL
-                        # In production, you might want to proxy the download
-                        from fastapi.responses import RedirectResponse
-                        return RedirectResponse(url=file_info.download_url)
-                    else:
-                        print(f"⚠️ Book '{book['title']}' not found in Google Drive")
-                
-                else:
-                    print("⚠️ No Google authentication token found")
-                    
-            except Exception as e:
-                print(f"⚠️ Google Drive access failed: {e}")
-        
-        # Fallback to local file system
-        if book['FilePath']:
-            local_path = book['FilePath']
-            
-            # Convert relative path to absolute
-            if not os.path.isabs(local_path):
-                base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                local_path = os.path.join(base_dir, local_path)
-            
-            if os.path.exists(local_path):
-                print(f"✅ Serving PDF from local file: {local_path}")
-                from fastapi import Response
-                
-                # Read PDF file and serve with inline viewing headers
-                with open(local_path, 'rb') as pdf_file:
-                    pdf_content = pdf_file.read()
-                
-                return Response(
-                    content=pdf_content,
-                    media_type="application/pdf",
-                    headers={
-                        "Content-Disposition": f"inline; filename=\"{book['title']}.pdf\"",
-                        "Cache-Control": "no-cache, no-store, must-revalidate",
-                        "Pragma": "no-cache",
-                        "Expires": "0"
-                    }
-                )
-        
-        # If we get here, no PDF source is available
-        raise HTTPException(
-            status_code=404, 
-            detail="PDF not available. Book may need to be downloaded from Google Drive first."
-        )
-        
-    except Exception as e:
-        print(f"❌ PDF access error: {e}")
-        raise HTTPException(status_code=500, detail=f"Error accessing PDF: {str(e)}")
-
 @app.get("/api/student/budget-summary", response_model=BudgetSummaryResponse)
 async def get_budget_summary():
     """Get student's monthly spending summary"""
@@ -3002,15 +3530,52 @@ async def get_budget_summary():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Budget summary error: {str(e)}")
 
+# Book download queue (created on first use, shared by all requests in this worker)
+download_scheduler = None
+download_scheduler_lock = threading.Lock()
+
+def resolve_book_download_source(book_id: int, title: str) -> Optional[Dict[str, Any]]:
+    """Find a download URL and size for a queued book (Google Drive when connected)"""
+    try:
+        from Core.StudentGoogleDriveAPI import StudentGoogleDriveAPI, GOOGLE_AVAILABLE
+    except ImportError:
+        return None
+    
+    if not GOOGLE_AVAILABLE or not os.path.exists("Config/google_token.json"):
+        return None
+    
+    file_info = StudentGoogleDriveAPI().GetBookFileInfo(title)
+    if not file_info:
+        return None
+    return {"download_url": file_info.download_url, "size_bytes": file_info.size_bytes}
+
+def get_download_scheduler():
+    """
+    Return the download scheduler, creating it on first use
+    Every worker queues and cancels jobs in the shared queue database, but
+    only the background worker recovers interrupted jobs and dispatches.
+    """
+    global download_scheduler
+    with download_scheduler_lock:
+        if download_scheduler is None and DownloadScheduler and StudentBookDownloader:
+            from Utils.ServerLauncher import AcquireBackgroundRole
+            dispatcher = AcquireBackgroundRole()
+            download_scheduler = DownloadScheduler(
+                budget=StudentBookDownloader(),
+                bytes_per_second=float(os.getenv("ANDYLIBRARY_DOWNLOAD_BYTES_PER_SECOND", "0")),
+                source_resolver=resolve_book_download_source,
+                recover_interrupted=dispatcher
+            )
+            if dispatcher:
+                download_scheduler.Start()
+    return download_scheduler
+
 @app.post("/api/books/{book_id}/download")
-async def initiate_book_download(book_id: int, download_method: str = "download_now"):
-    """Initiate book download (placeholder for actual Google Drive integration)"""
+async def initiate_book_download(book_id: int, download_method: str = "download_now", priority: int = 0):
+    """Queue a book download (now, or in the off-peak window) within the student's data budget"""
     if not StudentBookDownloader:
         raise HTTPException(status_code=500, detail="Book downloader not available")
     
-    # For now, just return download initiation info
-    # TODO: Implement actual Google Drive download with chunking
-    
     try:
         downloader = StudentBookDownloader()
         cost_info = downloader.GetBookCostEstimate(book_id)
@@ -3018,8 +3583,31 @@ async def initiate_book_download(book_id: int, download_method: str = "download_
         if not cost_info:
             raise HTTPException(status_code=404, detail="Book not found")
         
-        # Simulate download cost recording
         actual_cost = cost_info.estimated_cost_usd if download_method == "download_now" else 0.0
+        
+        scheduler = await run_in_threadpool(get_download_scheduler) if DownloadScheduler and \
+            download_method in DownloadScheduler.SCHEDULABLE_METHODS else None
+        if scheduler:
+            # Cost is recorded by the scheduler when the transfer completes
+            job = await run_in_threadpool(
+                scheduler.Enqueue,
+                book_id,
+                cost_info.title,
+                size_bytes=int(cost_info.file_size_mb * 1024 * 1024),
+                priority=priority,
+                method=download_method
+            )
+            return {
+                "status": "download_queued",
+                "book_id": book_id,
+                "method": download_method,
+                "estimated_cost": actual_cost,
+                "job_id": job["job_id"],
+                "scheduled_for": job["not_before"],
+                "message": f"Download queued for: {cost_info.title}"
+            }
+        
+        # Free options (preview, wishlist) are only recorded
         downloader.RecordDownload(book_id, actual_cost, download_method)
         
         return {
@@ -3030,9 +3618,32 @@ async def initiate_book_download(book_id: int, download_method: str = "download_
             "message": f"Download started for: {cost_info.title}"
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Download error: {str(e)}")
 
+@app.get("/api/downloads/queue")
+async def get_download_queue(include_finished: bool = False):
+    """Queued and running book downloads in dispatch order"""
+    scheduler = await run_in_threadpool(get_download_scheduler)
+    if not scheduler:
+        raise HTTPException(status_code=503, detail="Download scheduler not available")
+    
+    jobs = await run_in_threadpool(scheduler.GetQueue, include_finished)
+    return {"jobs": jobs, "stats": await run_in_threadpool(scheduler.GetStats)}
+
+@app.delete("/api/downloads/{job_id}")
+async def cancel_download_job(job_id: int):
+    """Cancel a queued or running book download"""
+    scheduler = await run_in_threadpool(get_download_scheduler)
+    if not scheduler:
+        raise HTTPException(status_code=503, detail="Download scheduler not available")
+    
+    if not await run_in_threadpool(scheduler.Cancel, job_id):
+        raise HTTPException(status_code=404, detail="Download job not found or already finished")
+    return {"status": "cancelled", "job_id": job_id}
+
 def main():
     """Run the AndyGoogle API server"""
     print("🚀 Starting AndyGoogle API Server")
@@ -3059,14 +3670,9 @@ def main():
     print(f"🔧 API Documentation: http://{host}:{port}/docs")
     print("=" * 40)
     
-    # Start server
-    uvicorn.run(
-        app,
-        host=host,
-        port=port,
-        log_level="info",
-        access_log=True
-    )
+    # Start server - ANDYLIBRARY_WORKERS > 1 (or "auto") preforks workers with shared state
+    from Utils.ServerLauncher import RunServer
+    RunServer(host, port, workers=os.getenv("ANDYLIBRARY_WORKERS", "1"), app=app)
 
 if __name__ == "__main__":
     main()
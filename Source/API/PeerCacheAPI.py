@@ -0,0 +1,197 @@
+# File: PeerCacheAPI.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/API/PeerCacheAPI.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 09:45PM
+
+"""
+Peer API for AndyLibrary
+Lets other devices on the LAN pull books and the library database from
+this machine instead of the internet. Books come from the local library
+first, then from the peer cache, and - on a caching peer - from the
+upstream (Google Drive or another peer), fetched once and kept. Every
+response carries the SHA-256 of its body as ETag and X-Content-SHA256 and
+honours Range and If-None-Match; /peer/manifest lists what is on offer.
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Utils.BookFileServer import BookFileEntry, BuildFileResponse
+from Utils.PeerCache import (
+    BookKey, ContentFileEntry, PeerCache, MANIFEST_VERSION, SHA256_HEADER
+)
+
+class PeerCacheAPI:
+    """
+    LAN distribution endpoints backed by a PeerCache
+
+    ResolveUpstream(book_id) -> {"url", "title", "size_bytes"?, "sha256"?}
+    enables caching-peer mode; without it only content already on this
+    machine is served and nothing is fetched from the internet.
+    """
+
+    def __init__(self, Cache: PeerCache,
+                 ResolveLocalBook: Callable[[int], Optional[BookFileEntry]],
+                 ListLocalBooks: Callable[[], List[BookFileEntry]],
+                 DatabasePath: Callable[[], Optional[str]],
+                 ResolveUpstream: Callable[[int], Optional[Dict[str, Any]]] = None):
+        self.Logger = logging.getLogger(self.__class__.__name__)
+        self.Cache = Cache
+        self.ResolveLocalBook = ResolveLocalBook
+        self.ListLocalBooks = ListLocalBooks
+        self.DatabasePath = DatabasePath
+        self.ResolveUpstream = ResolveUpstream
+        self.HashThread: Optional[threading.Thread] = None
+        self.Router = APIRouter()
+        self.SetupRoutes()
+
+    @property
+    def IsCachingPeer(self) -> bool:
+        return self.ResolveUpstream is not None
+
+    def ResolveBook(self, BookId: int) -> Optional[ContentFileEntry]:
+        """Local library file, cached copy, or (caching peer only) a fresh upstream fetch"""
+        Local = self.ResolveLocalBook(BookId)
+        if Local:
+            return self.Cache.LocalEntry(Local)
+
+        Key = BookKey(BookId)
+        Cached = self.Cache.Get(Key)
+        if Cached or not self.IsCachingPeer:
+            return Cached
+
+        Source = self.ResolveUpstream(BookId)
+        if not Source:
+            return None
+        return self.Cache.Fetch(Key, Source["url"], Source.get("title") or f"book_{BookId}", BookId,
+                                expected_size=Source.get("size_bytes"), expected_sha256=Source.get("sha256"))
+
+    def ResolveDatabase(self) -> Optional[ContentFileEntry]:
+        Path = self.DatabasePath()
+        if not Path or not os.path.exists(Path):
+            return None
+        Stat = os.stat(Path)
+        return self.Cache.LocalEntry(BookFileEntry(0, "MyLibrary", Path, Stat.st_size, Stat.st_mtime_ns, time.monotonic()))
+
+    def BuildManifest(self) -> Dict[str, Any]:
+        """Everything this peer can serve right now, with content hashes where known"""
+        Books: Dict[int, Dict[str, Any]] = {}
+        Unhashed: List[BookFileEntry] = []
+
+        for Entry in self.ListLocalBooks():
+            Sha256 = self.Cache.KnownHash(Entry.path, Entry.size, Entry.mtime_ns)
+            if not Sha256:
+                Unhashed.append(Entry)
+            Books[Entry.book_id] = {"book_id": Entry.book_id, "title": Entry.title, "size": Entry.size,
+                                    "sha256": Sha256, "source": "local"}
+
+        for Item in self.Cache.ListItems():
+            if Item.get("book_id") and Item["book_id"] not in Books:
+                Books[Item["book_id"]] = {"book_id": Item["book_id"], "title": Item["title"], "size": Item["size"],
+                                          "sha256": Item["sha256"], "source": "cache"}
+
+        for Book in Books.values():
+            Book["url"] = f"/api/peer/books/{Book['book_id']}"
+
+        # Hashing a whole library takes a while - do it off the request and report it next time
+        if Unhashed:
+            self.HashInBackground(Unhashed)
+
+        Database = self.ResolveDatabase()
+        return {
+            "service": "AndyLibrary",
+            "version": MANIFEST_VERSION,
+            "generated_at": datetime.now().isoformat(),
+            "caching_peer": self.IsCachingPeer,
+            "database": {"url": "/api/peer/database", "size": Database.size, "sha256": Database.sha256,
+                         "etag": Database.etag} if Database else None,
+            "books": sorted(Books.values(), key=lambda Book: Book["book_id"]),
+            "stats": self.Cache.GetStats()
+        }
+
+    def HashInBackground(self, Entries: List[BookFileEntry]):
+        if self.HashThread and self.HashThread.is_alive():
+            return
+
+        def HashAll():
+            for Entry in Entries:
+                try:
+                    self.Cache.HashOf(Entry.path, Entry.size, Entry.mtime_ns)
+                except OSError as e:
+                    self.Logger.warning(f"⚠️ Could not hash {Entry.path}: {e}")
+            self.Cache.SaveManifest()
+
+        self.HashThread = threading.Thread(target=HashAll, name="PeerCacheHasher", daemon=True)
+        self.HashThread.start()
+
+    @staticmethod
+    def Respond(Entry: ContentFileEntry, request: Request, Extension: str, CacheControl: str,
+                Disposition: str = "inline"):
+        Response = BuildFileResponse(Entry, request.headers, request.method,
+                                     cache_control=CacheControl, extension=Extension)
+        Response.headers[SHA256_HEADER] = Entry.sha256
+        if Disposition != "inline" and "Content-Disposition" in Response.headers:
+            Response.headers["Content-Disposition"] = Response.headers["Content-Disposition"].replace("inline", Disposition, 1)
+        return Response
+
+    def SetupRoutes(self):
+        """Register the peer endpoints"""
+
+        @self.Router.get("/peer/manifest")
+        async def GetPeerManifest():
+            """Books and database available from this peer"""
+            try:
+                return await run_in_threadpool(self.BuildManifest)
+            except Exception as e:
+                self.Logger.error(f"Peer manifest failed: {e}")
+                raise HTTPException(status_code=500, detail=f"Manifest failed: {str(e)}")
+
+        @self.Router.api_route("/peer/books/{book_id}", methods=["GET", "HEAD"])
+        async def GetPeerBook(request: Request, book_id: int):
+            """A book PDF from this peer, fetched from upstream once when caching"""
+            Entry = await run_in_threadpool(self.ResolveBook, book_id)
+            if not Entry:
+                raise HTTPException(status_code=404, detail="Book not available from this peer")
+            # Content-addressed, so a cached copy never goes stale - the ETag changes instead
+            return self.Respond(Entry, request, ".pdf", "public, max-age=86400")
+
+        @self.Router.api_route("/peer/database", methods=["GET", "HEAD"])
+        async def GetPeerDatabase(request: Request):
+            """The library database, revalidated by content hash"""
+            Entry = await run_in_threadpool(self.ResolveDatabase)
+            if not Entry:
+                raise HTTPException(status_code=404, detail="Database file not found")
+            return self.Respond(Entry, request, ".db", "no-cache", Disposition="attachment")
+
+# Create router instance for inclusion in main API
+def CreatePeerCacheAPI(Cache: PeerCache,
+                       ResolveLocalBook: Callable[[int], Optional[BookFileEntry]],
+                       ListLocalBooks: Callable[[], List[BookFileEntry]],
+                       DatabasePath: Callable[[], Optional[str]],
+                       ResolveUpstream: Callable[[int], Optional[Dict[str, Any]]] = None) -> APIRouter:
+    """
+    Factory function to create the peer API router
+
+    Args:
+        Cache: Content store for fetched items and file hashes
+        ResolveLocalBook: book_id -> BookFileEntry for files already on this machine
+        ListLocalBooks: Every local book file, for the manifest
+        DatabasePath: Current library database path
+        ResolveUpstream: Enables caching-peer mode (see PeerCacheAPI)
+
+    Returns:
+        FastAPI router with the peer endpoints
+    """
+    return PeerCacheAPI(Cache, ResolveLocalBook, ListLocalBooks, DatabasePath, ResolveUpstream).Router
@@ -2,27 +2,58 @@
 # Path: /home/herb/Desktop/AndyLibrary/Source/Core/ChunkedDownloader.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-24
-# Last Modified: 2025-07-24 01:24PM
+# Last Modified: 2026-10-19 10:35PM
 
 """
 Chunked Book Downloader - Student-Friendly Downloads
 Handles large book downloads in small chunks for slow/unreliable connections
+
+Each book is fetched with HTTP Range requests over several keep-alive
+connections at once. Chunks are written straight to their offset in a
+preallocated .part file, completed chunks are tracked in a compact bitmap
+that is persisted at a throttled interval, and a process-wide scheduler
+caps the number of transfers in flight across all books.
+
+Request size and per-file parallelism are not fixed: an adaptive controller
+tracks per-request RTT and throughput with an EWMA and grows or shrinks
+both within bounds (AIMD), and the process-wide NetworkEstimator exposes
+the measured bandwidth to the rest of the app.
 """
 
 import os
 import sys
 import time
-import hashlib
 import json
+import queue
+import base64
+import threading
+from collections import deque
 from typing import Dict, List, Optional, Callable, Any
 from dataclasses import dataclass
 from enum import Enum
-import threading
 from datetime import datetime
 
+import requests
+from requests.adapters import HTTPAdapter
+
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+DEFAULT_CONNECTIONS_PER_FILE = 4
+DEFAULT_MAX_CONCURRENT_TRANSFERS = 8
+DEFAULT_RESUME_SAVE_INTERVAL = 2.0
+DEFAULT_CHUNK_RETRIES = 3
+REQUEST_TIMEOUT_SECONDS = (10, 60)
+STREAM_BLOCK_SIZE = 64 * 1024
+
+# Adaptive transfer control
+DEFAULT_MAX_CONNECTIONS_PER_FILE = 8
+MIN_REQUEST_BYTES = 8 * 1024
+MAX_REQUEST_BYTES = 4 * 1024 * 1024
+TARGET_REQUEST_SECONDS = 1.0
+EWMA_ALPHA = 0.3
+ESTIMATE_MAX_AGE_SECONDS = 3600
+
 @dataclass
 class DownloadProgress:
     """Track download progress for student feedback"""
@@ -56,14 +87,410 @@ class NetworkCondition(Enum):
     FAST_3G = "fast_3g"    # 3G+ - 128KB chunks
     WIFI = "wifi"          # WiFi - 256KB chunks
 
+# Upper throughput bound (bytes/sec) for each condition, slowest first
+NETWORK_CONDITION_THRESHOLDS = [
+    (NetworkCondition.DIALUP, 10 * 1024),
+    (NetworkCondition.SLOW_2G, 30 * 1024),
+    (NetworkCondition.FAST_2G, 75 * 1024),
+    (NetworkCondition.SLOW_3G, 200 * 1024),
+    (NetworkCondition.FAST_3G, 600 * 1024),
+]
+
+def ClassifyNetworkCondition(bytes_per_second: float) -> NetworkCondition:
+    """Map a measured throughput onto the chunk-size table's network conditions"""
+    for condition, upper_bound in NETWORK_CONDITION_THRESHOLDS:
+        if bytes_per_second < upper_bound:
+            return condition
+    return NetworkCondition.WIFI
+
+def _Ewma(previous: Optional[float], sample: float, alpha: float) -> float:
+    return sample if previous is None else alpha * sample + (1 - alpha) * previous
+
+class NetworkEstimator:
+    """
+    Process-wide bandwidth/RTT estimate fed by real chunk transfers
+
+    Lets callers such as the performance assessment endpoint report the
+    connection quality without making an outbound request of their own.
+    """
+
+    def __init__(self, alpha: float = EWMA_ALPHA):
+        self.Alpha = alpha
+        self.Lock = threading.Lock()
+        self.ThroughputBps: Optional[float] = None
+        self.RttSeconds: Optional[float] = None
+        self.Samples = 0
+        self.LastUpdated = 0.0
+
+    def Record(self, throughput_bps: float, rtt_seconds: Optional[float] = None):
+        with self.Lock:
+            self.ThroughputBps = _Ewma(self.ThroughputBps, throughput_bps, self.Alpha)
+            if rtt_seconds is not None:
+                self.RttSeconds = _Ewma(self.RttSeconds, rtt_seconds, self.Alpha)
+            self.Samples += 1
+            self.LastUpdated = time.time()
+
+    def GetEstimate(self, max_age_seconds: float = ESTIMATE_MAX_AGE_SECONDS) -> Dict[str, Any]:
+        """Current estimate; 'measured' is False when there are no recent samples"""
+        with self.Lock:
+            age = time.time() - self.LastUpdated if self.Samples else None
+            measured = self.Samples > 0 and age <= max_age_seconds
+            return {
+                'measured': measured,
+                'throughput_bytes_per_second': self.ThroughputBps if measured else None,
+                'rtt_ms': round(self.RttSeconds * 1000, 1) if measured and self.RttSeconds is not None else None,
+                'samples': self.Samples,
+                'age_seconds': round(age, 1) if age is not None else None
+            }
+
+class AdaptiveTransferController:
+    """
+    AIMD control of request size and parallelism for one download
+
+    Request size is a whole number of resume-bitmap blocks. It doubles while
+    requests finish well under the target time (slow start), then grows one
+    block at a time; a slow request or a failure halves it. Connections grow
+    by one after each clean round of requests as long as the aggregate
+    throughput keeps improving, and halve on failure.
+    """
+
+    def __init__(self, block_size: int, initial_connections: int = DEFAULT_CONNECTIONS_PER_FILE,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS_PER_FILE,
+                 min_request_bytes: int = MIN_REQUEST_BYTES, max_request_bytes: int = MAX_REQUEST_BYTES,
+                 target_request_seconds: float = TARGET_REQUEST_SECONDS, alpha: float = EWMA_ALPHA,
+                 estimator: NetworkEstimator = None):
+        self.BlockSize = max(1, block_size)
+        self.MinBlocks = max(1, -(-min_request_bytes // self.BlockSize))
+        self.MaxBlocks = max(self.MinBlocks, max_request_bytes // self.BlockSize)
+        self.MaxConnections = max(1, int(max_connections))
+        self.TargetSeconds = target_request_seconds
+        self.Alpha = alpha
+        self.Estimator = estimator
+        self.Lock = threading.Lock()
+
+        self.RequestBlocks = self.MinBlocks
+        self.Connections = min(max(1, int(initial_connections)), self.MaxConnections)
+        self.SlowStart = True
+        self.ThroughputEwma: Optional[float] = None  # per connection, bytes/sec
+        self.RttEwma: Optional[float] = None
+        self.Samples = 0
+        self.Failures = 0
+        self.CleanStreak = 0
+        self.RoundBytes = 0
+        self.RoundSeconds = 0.0
+        self.BandwidthAtLastIncrease: Optional[float] = None
+
+    def GetRequestBlocks(self) -> int:
+        with self.Lock:
+            return self.RequestBlocks
+
+    def GetConnections(self) -> int:
+        with self.Lock:
+            return self.Connections
+
+    def OnSuccess(self, size_bytes: int, duration_seconds: float, rtt_seconds: Optional[float] = None):
+        """Feed one completed request into the EWMAs and adjust the window"""
+        duration_seconds = max(duration_seconds, 1e-6)
+        with self.Lock:
+            self.ThroughputEwma = _Ewma(self.ThroughputEwma, size_bytes / duration_seconds, self.Alpha)
+            if rtt_seconds is not None:
+                self.RttEwma = _Ewma(self.RttEwma, rtt_seconds, self.Alpha)
+            self.Samples += 1
+
+            if duration_seconds > 2 * self.TargetSeconds:
+                self.RequestBlocks = max(self.MinBlocks, self.RequestBlocks // 2)
+                self.SlowStart = False
+            elif self.SlowStart and duration_seconds < self.TargetSeconds / 2:
+                self.RequestBlocks = min(self.MaxBlocks, self.RequestBlocks * 2)
+            elif duration_seconds < self.TargetSeconds:
+                self.SlowStart = False
+                self.RequestBlocks = min(self.MaxBlocks, self.RequestBlocks + 1)
+
+            # A round is one request per open connection; compare its aggregate to the last increase
+            self.CleanStreak += 1
+            self.RoundBytes += size_bytes
+            self.RoundSeconds += duration_seconds
+            if self.CleanStreak >= self.Connections:
+                round_bandwidth = self.RoundBytes / self.RoundSeconds * self.Connections
+                if self.Connections < self.MaxConnections and (
+                        self.BandwidthAtLastIncrease is None or
+                        round_bandwidth > self.BandwidthAtLastIncrease * 1.05):
+                    self.Connections += 1
+                    self.BandwidthAtLastIncrease = round_bandwidth
+                self.CleanStreak = 0
+                self.RoundBytes = 0
+                self.RoundSeconds = 0.0
+
+            bandwidth = self.ThroughputEwma * self.Connections
+
+        if self.Estimator:
+            self.Estimator.Record(bandwidth, rtt_seconds)
+
+    def OnFailure(self):
+        """Multiplicative decrease after a failed or throttled request"""
+        with self.Lock:
+            self.Failures += 1
+            self.CleanStreak = 0
+            self.RoundBytes = 0
+            self.RoundSeconds = 0.0
+            self.SlowStart = False
+            self.RequestBlocks = max(self.MinBlocks, self.RequestBlocks // 2)
+            self.Connections = max(1, self.Connections // 2)
+            self.BandwidthAtLastIncrease = None
+
+    def GetSnapshot(self) -> Dict[str, Any]:
+        """Live estimate for progress displays"""
+        with self.Lock:
+            per_connection = self.ThroughputEwma or 0.0
+            return {
+                'request_size_bytes': self.RequestBlocks * self.BlockSize,
+                'connections': self.Connections,
+                'estimated_bytes_per_second': per_connection * self.Connections,
+                'rtt_ms': round(self.RttEwma * 1000, 1) if self.RttEwma is not None else None,
+                'samples': self.Samples,
+                'failures': self.Failures
+            }
+
+class RangeNotSupportedError(Exception):
+    """Server ignored the Range header and sent the whole file"""
+
+class TransferScheduler:
+    """
+    Process-wide cap on concurrent HTTP transfers
+
+    Every chunk request holds a slot for the duration of the request, so
+    the total number of connections stays bounded no matter how many
+    books are downloading at once.
+    """
+
+    def __init__(self, max_concurrent_transfers: int = DEFAULT_MAX_CONCURRENT_TRANSFERS):
+        self.MaxConcurrentTransfers = max(1, int(max_concurrent_transfers))
+        self.Semaphore = threading.BoundedSemaphore(self.MaxConcurrentTransfers)
+        self.Lock = threading.Lock()
+        self.ActiveTransfers = 0
+        self.PeakTransfers = 0
+        self.CompletedTransfers = 0
+
+    def Acquire(self, cancelled: threading.Event = None) -> bool:
+        """Wait for a transfer slot; gives up if cancelled is set"""
+        while not self.Semaphore.acquire(timeout=0.25):
+            if cancelled is not None and cancelled.is_set():
+                return False
+        with self.Lock:
+            self.ActiveTransfers += 1
+            self.PeakTransfers = max(self.PeakTransfers, self.ActiveTransfers)
+        return True
+
+    def Release(self):
+        with self.Lock:
+            self.ActiveTransfers -= 1
+            self.CompletedTransfers += 1
+        self.Semaphore.release()
+
+    def GetStats(self) -> Dict[str, int]:
+        with self.Lock:
+            return {
+                'max_concurrent_transfers': self.MaxConcurrentTransfers,
+                'active_transfers': self.ActiveTransfers,
+                'peak_transfers': self.PeakTransfers,
+                'completed_transfers': self.CompletedTransfers
+            }
+
+class TokenBucket:
+    """
+    Global bytes/sec limit shared by every transfer that holds a reference
+
+    Consumers take tokens up front and may drive the bucket into debt for a
+    request larger than the burst size; the next consumer waits the debt
+    off, so the long-run rate is exact without splitting requests.
+    """
+
+    def __init__(self, bytes_per_second: float, burst_bytes: int = None):
+        self.Rate = float(bytes_per_second)
+        self.Capacity = float(burst_bytes if burst_bytes is not None else bytes_per_second)
+        self.Tokens = self.Capacity
+        self.LastRefill = time.monotonic()
+        self.Lock = threading.Lock()
+
+    def _RefillLocked(self, now: float):
+        self.Tokens = min(self.Capacity, self.Tokens + (now - self.LastRefill) * self.Rate)
+        self.LastRefill = now
+
+    def Consume(self, size_bytes: int, cancelled: threading.Event = None) -> bool:
+        """Block until size_bytes may be sent; False if cancelled while waiting"""
+        with self.Lock:
+            now = time.monotonic()
+            self._RefillLocked(now)
+            self.Tokens -= size_bytes
+            wait_seconds = -self.Tokens / self.Rate if self.Tokens < 0 else 0.0
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            if cancelled is not None and cancelled.wait(min(remaining, 0.25)):
+                return False
+            if cancelled is None:
+                time.sleep(min(remaining, 0.25))
+
+    def SetRate(self, bytes_per_second: float):
+        with self.Lock:
+            self._RefillLocked(time.monotonic())
+            self.Rate = float(bytes_per_second)
+
+class SessionPool:
+    """Keep-alive HTTP sessions shared by all download workers"""
+
+    def __init__(self, size: int = DEFAULT_MAX_CONCURRENT_TRANSFERS):
+        self.Size = max(1, int(size))
+        self.Sessions = queue.LifoQueue()
+        for _ in range(self.Size):
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.Size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update({'User-Agent': 'AndyLibrary-Downloader/1.0'})
+            self.Sessions.put(session)
+
+    def Borrow(self) -> requests.Session:
+        return self.Sessions.get()
+
+    def Return(self, session: requests.Session):
+        self.Sessions.put(session)
+
+    def Close(self):
+        while not self.Sessions.empty():
+            self.Sessions.get_nowait().close()
+
+_SchedulerLock = threading.Lock()
+_GlobalScheduler: Optional[TransferScheduler] = None
+_GlobalSessionPool: Optional[SessionPool] = None
+_GlobalEstimator = NetworkEstimator()
+
+def GetTransferScheduler(max_concurrent_transfers: int = DEFAULT_MAX_CONCURRENT_TRANSFERS) -> TransferScheduler:
+    """Return the process-wide transfer scheduler (created on first use)"""
+    global _GlobalScheduler
+    with _SchedulerLock:
+        if _GlobalScheduler is None:
+            _GlobalScheduler = TransferScheduler(max_concurrent_transfers)
+        return _GlobalScheduler
+
+def GetSessionPool(size: int = DEFAULT_MAX_CONCURRENT_TRANSFERS) -> SessionPool:
+    """Return the process-wide keep-alive session pool (created on first use)"""
+    global _GlobalSessionPool
+    with _SchedulerLock:
+        if _GlobalSessionPool is None:
+            _GlobalSessionPool = SessionPool(size)
+        return _GlobalSessionPool
+
+def GetNetworkEstimator() -> NetworkEstimator:
+    """Return the process-wide bandwidth estimate fed by every download"""
+    return _GlobalEstimator
+
+def _WriteAt(fd: int, data: bytes, offset: int, lock: threading.Lock):
+    """Positional write; platforms without pwrite serialize seek+write"""
+    if hasattr(os, 'pwrite'):
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+        return
+    with lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+
+class _TransferState:
+    """Per-book engine state shared by that book's connection workers"""
+
+    def __init__(self, book_id: int, download_url: str, part_file: str, resume_file: str,
+                 total_chunks: int, progress_callback: Optional[Callable[[DownloadProgress], None]],
+                 controller: AdaptiveTransferController):
+        self.BookId = book_id
+        self.DownloadUrl = download_url
+        self.PartFile = part_file
+        self.ResumeFile = resume_file
+        self.ProgressCallback = progress_callback
+        self.Controller = controller
+        self.Bitmap = bytearray((total_chunks + 7) // 8)
+        self.DoneCount = 0
+        self.PendingChunks: "deque[int]" = deque()
+        self.Lock = threading.Lock()
+        self.WriteLock = threading.Lock()
+        self.Running = threading.Event()
+        self.Running.set()
+        self.Cancelled = threading.Event()
+        self.Failure: Optional[str] = None
+        self.RangeSupported = True
+        self.FileDescriptor: Optional[int] = None
+        self.LastResumeSave = 0.0
+        self.SessionBytes = 0
+        self.SessionStart = time.time()
+
+    def IsChunkDone(self, index: int) -> bool:
+        return bool(self.Bitmap[index >> 3] & (1 << (index & 7)))
+
+    def MarkChunkDone(self, index: int):
+        if not self.IsChunkDone(index):
+            self.Bitmap[index >> 3] |= 1 << (index & 7)
+            self.DoneCount += 1
+
+    def LoadBitmap(self, bitmap: bytes):
+        self.Bitmap[:] = bitmap
+        self.DoneCount = sum(bin(byte).count('1') for byte in self.Bitmap)
+
+    def CompletedChunks(self) -> int:
+        return self.DoneCount
+
+    def ClaimRun(self, max_blocks: int) -> List[int]:
+        """Take up to max_blocks contiguous pending chunk indexes"""
+        with self.Lock:
+            if not self.PendingChunks:
+                return []
+            run = [self.PendingChunks.popleft()]
+            while (len(run) < max_blocks and self.PendingChunks
+                   and self.PendingChunks[0] == run[-1] + 1):
+                run.append(self.PendingChunks.popleft())
+            return run
+
+    def ReturnRun(self, run: List[int]):
+        with self.Lock:
+            self.PendingChunks.extendleft(reversed(run))
+
 class ChunkedDownloader:
     """Handles chunked downloads optimized for student network conditions"""
     
-    def __init__(self, downloads_dir: str = "Downloads/Books"):
+    def __init__(
+        self,
+        downloads_dir: str = "Downloads/Books",
+        connections_per_file: int = DEFAULT_CONNECTIONS_PER_FILE,
+        max_connections_per_file: int = DEFAULT_MAX_CONNECTIONS_PER_FILE,
+        max_concurrent_transfers: int = DEFAULT_MAX_CONCURRENT_TRANSFERS,
+        resume_save_interval: float = DEFAULT_RESUME_SAVE_INTERVAL,
+        resume_info_dir: str = "Downloads/Resume",
+        scheduler: TransferScheduler = None,
+        session_pool: SessionPool = None,
+        estimator: NetworkEstimator = None,
+        rate_limiter: TokenBucket = None
+    ):
         self.downloads_dir = downloads_dir
         self.active_downloads = {}  # book_id -> DownloadProgress
         self.download_threads = {}  # book_id -> threading.Thread
-        self.resume_info_dir = "Downloads/Resume"
+        self.transfers = {}  # book_id -> _TransferState
+        self.controllers = {}  # book_id -> AdaptiveTransferController
+        self.resume_info_dir = resume_info_dir
+        self.connections_per_file = max(1, int(connections_per_file))
+        self.max_connections_per_file = max(self.connections_per_file, int(max_connections_per_file))
+        self.resume_save_interval = resume_save_interval
+        self.chunk_retries = DEFAULT_CHUNK_RETRIES
+        
+        # Connections are pooled and capped across every downloader in the process
+        self.scheduler = scheduler or GetTransferScheduler(max_concurrent_transfers)
+        self.session_pool = session_pool or GetSessionPool(max_concurrent_transfers)
+        self.estimator = estimator or GetNetworkEstimator()
+        self.rate_limiter = rate_limiter  # optional bytes/sec cap shared with other downloaders
         
         # Create directories
         os.makedirs(self.downloads_dir, exist_ok=True)
@@ -81,10 +508,12 @@ class ChunkedDownloader:
     
     def DetectNetworkCondition(self) -> NetworkCondition:
         """Detect network condition for adaptive chunk sizing"""
-        # Simple heuristic: measure small download speed
-        # In real implementation, this would test actual connection speed
+        # Use throughput measured by recent downloads when there is any
+        estimate = self.estimator.GetEstimate()
+        if estimate['measured']:
+            return ClassifyNetworkCondition(estimate['throughput_bytes_per_second'])
         
-        # For now, default to slow connection (conservative for students)
+        # No measurements yet - default to slow connection (conservative for students)
         return NetworkCondition.SLOW_3G
     
     def GetOptimalChunkSize(self, network_condition: NetworkCondition = None) -> int:
@@ -94,6 +523,12 @@ class ChunkedDownloader:
         
         return self.chunk_sizes[network_condition]
     
+    def _OutputFile(self, book_id: int) -> str:
+        return os.path.join(self.downloads_dir, f"book_{book_id}.pdf")
+    
+    def _ResumeFile(self, book_id: int) -> str:
+        return os.path.join(self.resume_info_dir, f"book_{book_id}.json")
+    
     def StartChunkedDownload(
         self,
         book_id: int,
@@ -127,9 +562,22 @@ class ChunkedDownloader:
             status=DownloadStatus.PENDING.value
         )
         
+        # The chunk size is the resume-bitmap block; requests span several blocks
+        controller = AdaptiveTransferController(
+            chunk_size,
+            initial_connections=self.connections_per_file,
+            max_connections=self.max_connections_per_file,
+            estimator=self.estimator
+        )
+        
         self.active_downloads[book_id] = progress
+        self.controllers[book_id] = controller
+        self.transfers[book_id] = _TransferState(
+            book_id, download_url, self._OutputFile(book_id) + ".part",
+            self._ResumeFile(book_id), total_chunks, progress_callback, controller
+        )
         
-        # Start download in background thread
+        # Coordinator thread prepares the file and runs the connection workers
         download_thread = threading.Thread(
             target=self._DownloadWorker,
             args=(book_id, download_url, progress_callback),
@@ -147,134 +595,301 @@ class ChunkedDownloader:
         download_url: str,
         progress_callback: Callable[[DownloadProgress], None] = None
     ):
-        """Worker thread for downloading book in chunks"""
+        """Coordinator for one book: preallocate, fan out range workers, finalize"""
         
         progress = self.active_downloads[book_id]
-        output_file = os.path.join(self.downloads_dir, f"book_{book_id}.pdf")
-        resume_file = os.path.join(self.resume_info_dir, f"book_{book_id}.json")
+        state = self.transfers[book_id]
         
         try:
             progress.status = DownloadStatus.DOWNLOADING.value
             
-            # Check for existing partial download
-            start_byte = 0
-            if os.path.exists(resume_file):
-                with open(resume_file, 'r') as f:
-                    resume_data = json.load(f)
-                    start_byte = resume_data.get('downloaded_bytes', 0)
-                    progress.downloaded_bytes = start_byte
-                    progress.current_chunk = start_byte // progress.chunk_size_bytes
+            self._LoadResumeInfo(progress, state)
+            state.FileDescriptor = self._OpenPartFile(state.PartFile, progress.total_size_bytes)
             
-            # Simulate chunked download (replace with actual Google Drive API calls)
-            with open(output_file, 'ab' if start_byte > 0 else 'wb') as f:
-                current_byte = start_byte
-                
-                while current_byte < progress.total_size_bytes:
-                    # Check if download was cancelled
-                    if progress.status == DownloadStatus.CANCELLED.value:
-                        break
-                    
-                    # Calculate chunk size for this iteration
-                    remaining_bytes = progress.total_size_bytes - current_byte
-                    chunk_size = min(progress.chunk_size_bytes, remaining_bytes)
-                    
-                    # Simulate network delay and chunk download
-                    chunk_start_time = time.time()
-                    
-                    # TODO: Replace with actual Google Drive API call
-                    # chunk_data = download_chunk_from_gdrive(download_url, current_byte, chunk_size)
-                    chunk_data = b'0' * chunk_size  # Simulated data
-                    
-                    # Simulate network conditions (add delay for slow connections)
-                    network_delay = self._SimulateNetworkDelay(chunk_size)
-                    time.sleep(network_delay)
-                    
-                    # Write chunk to file
-                    f.write(chunk_data)
-                    f.flush()  # Ensure data is written
-                    
-                    # Update progress
-                    current_byte += chunk_size
-                    progress.downloaded_bytes = current_byte
-                    progress.current_chunk += 1
-                    
-                    # Calculate speed and ETA
-                    elapsed_time = time.time() - progress.start_time
-                    if elapsed_time > 0:
-                        progress.speed_bytes_per_second = current_byte / elapsed_time
-                        remaining_bytes = progress.total_size_bytes - current_byte
-                        progress.estimated_time_remaining = remaining_bytes / progress.speed_bytes_per_second
-                    
-                    # Save resume information
-                    self._SaveResumeInfo(book_id, progress)
-                    
-                    # Call progress callback for UI updates
-                    if progress_callback:
-                        progress_callback(progress)
-                    
-                    # Student-friendly: yield CPU to avoid blocking
-                    time.sleep(0.001)
+            state.PendingChunks.extend(
+                index for index in range(progress.total_chunks) if not state.IsChunkDone(index)
+            )
+            
+            # Start enough workers for the connection ceiling; the controller decides how many run
+            connections = min(self.max_connections_per_file, max(1, len(state.PendingChunks)))
+            workers = [
+                threading.Thread(target=self._ConnectionWorker, args=(progress, state, slot), daemon=True)
+                for slot in range(connections)
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            
+            if state.Cancelled.is_set():
+                return
+            
+            if not state.RangeSupported and state.Failure is None:
+                self._DownloadWholeFile(progress, state)
+            
+            if state.Failure is not None:
+                raise RuntimeError(state.Failure)
             
             # Mark as completed
-            if current_byte >= progress.total_size_bytes:
+            if state.CompletedChunks() >= progress.total_chunks:
+                os.fsync(state.FileDescriptor)
+                os.close(state.FileDescriptor)
+                state.FileDescriptor = None
+                os.replace(state.PartFile, self._OutputFile(book_id))
+                
                 progress.status = DownloadStatus.COMPLETED.value
                 progress.downloaded_bytes = progress.total_size_bytes
+                progress.current_chunk = progress.total_chunks
+                progress.estimated_time_remaining = 0.0
                 
                 # Clean up resume file
-                if os.path.exists(resume_file):
-                    os.remove(resume_file)
+                if os.path.exists(state.ResumeFile):
+                    os.remove(state.ResumeFile)
                 
                 if progress_callback:
                     progress_callback(progress)
         
         except Exception as e:
             progress.status = DownloadStatus.ERROR.value
-            print(f"Download error for book {book_id}: {e}")
+            self._SaveResumeInfo(book_id, progress)
+            print(f"❌ Download error for book {book_id}: {e}")
             if progress_callback:
                 progress_callback(progress)
         
         finally:
-            # Clean up
-            if book_id in self.download_threads:
-                del self.download_threads[book_id]
+            if state.FileDescriptor is not None:
+                os.close(state.FileDescriptor)
+                state.FileDescriptor = None
+            # Clean up, leaving anything a newer transfer of the book has registered
+            if self.transfers.get(book_id) is state:
+                self.transfers.pop(book_id, None)
+            if self.download_threads.get(book_id) is threading.current_thread():
+                self.download_threads.pop(book_id, None)
+            if state.Cancelled.is_set():
+                self._RemoveDownloadFiles(book_id)
+                # Only now may the book be started again
+                if self.active_downloads.get(book_id) is progress:
+                    self.active_downloads.pop(book_id, None)
+                    self.controllers.pop(book_id, None)
     
-    def _SimulateNetworkDelay(self, chunk_size: int) -> float:
-        """Simulate network delay based on chunk size (for testing)"""
-        # Simulate different connection speeds
-        bytes_per_second = {
-            NetworkCondition.DIALUP: 7 * 1024,      # 56k = ~7KB/s
-            NetworkCondition.SLOW_2G: 20 * 1024,    # Slow 2G = ~20KB/s
-            NetworkCondition.FAST_2G: 50 * 1024,    # Fast 2G = ~50KB/s
-            NetworkCondition.SLOW_3G: 100 * 1024,   # Slow 3G = ~100KB/s
-            NetworkCondition.FAST_3G: 300 * 1024,   # Fast 3G = ~300KB/s
-            NetworkCondition.WIFI: 1000 * 1024      # WiFi = ~1MB/s
-        }
+    def _OpenPartFile(self, part_file: str, total_size: int) -> int:
+        """Open (or create) the .part file at its final size so chunks can land anywhere"""
+        fd = os.open(part_file, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        if os.fstat(fd).st_size != total_size:
+            os.ftruncate(fd, total_size)
+        return fd
+    
+    def _ConnectionWorker(self, progress: DownloadProgress, state: _TransferState, slot: int):
+        """One keep-alive connection pulling runs of chunks until none are left"""
+        while True:
+            state.Running.wait()
+            if state.Cancelled.is_set() or state.Failure is not None or not state.RangeSupported:
+                return
+            if progress.status == DownloadStatus.PAUSED.value:
+                continue
+            if slot >= state.Controller.GetConnections():
+                # Parked until the controller opens this connection again
+                if not state.PendingChunks:
+                    return
+                time.sleep(0.05)
+                continue
+            
+            run = state.ClaimRun(state.Controller.GetRequestBlocks())
+            if not run:
+                return
+            
+            start = run[0] * progress.chunk_size_bytes
+            end = min((run[-1] + 1) * progress.chunk_size_bytes, progress.total_size_bytes) - 1
+            
+            try:
+                data = self._FetchRangeWithRetry(state, start, end)
+            except RangeNotSupportedError:
+                state.RangeSupported = False
+                return
+            except Exception as e:
+                state.Failure = f"chunks {run[0]}-{run[-1]}: {e}"
+                return
+            
+            if data is None:
+                # Cancelled while waiting for a slot; put the work back for a resume
+                state.ReturnRun(run)
+                return
+            
+            _WriteAt(state.FileDescriptor, data, start, state.WriteLock)
+            for index in run:
+                block_end = min((index + 1) * progress.chunk_size_bytes, progress.total_size_bytes)
+                self._RecordChunk(progress, state, index, block_end - index * progress.chunk_size_bytes)
+    
+    def _FetchRangeWithRetry(self, state: _TransferState, start: int, end: int) -> Optional[bytes]:
+        """GET bytes start..end (inclusive), retrying transient failures with backoff"""
+        last_error = None
+        for attempt in range(self.chunk_retries):
+            if self.rate_limiter and not self.rate_limiter.Consume(end - start + 1, state.Cancelled):
+                return None
+            if not self.scheduler.Acquire(state.Cancelled):
+                return None
+            session = self.session_pool.Borrow()
+            request_start = time.time()
+            try:
+                response = session.get(
+                    state.DownloadUrl,
+                    headers={'Range': f'bytes={start}-{end}'},
+                    timeout=REQUEST_TIMEOUT_SECONDS
+                )
+                if response.status_code == 200:
+                    response.close()
+                    raise RangeNotSupportedError(state.DownloadUrl)
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise requests.HTTPError(f"unexpected status {response.status_code}")
+                data = response.content
+                if len(data) != end - start + 1:
+                    raise requests.HTTPError(f"short range response ({len(data)} of {end - start + 1} bytes)")
+                # response.elapsed runs until the headers arrived - a good RTT proxy
+                state.Controller.OnSuccess(len(data), time.time() - request_start,
+                                           response.elapsed.total_seconds())
+                return data
+            except RangeNotSupportedError:
+                raise
+            except requests.RequestException as e:
+                last_error = e
+                state.Controller.OnFailure()
+            finally:
+                self.session_pool.Return(session)
+                self.scheduler.Release()
+            time.sleep(min(0.5 * (2 ** attempt), 5.0))
+        raise last_error
+    
+    def _DownloadWholeFile(self, progress: DownloadProgress, state: _TransferState):
+        """Fallback for servers without Range support: one streamed GET from byte 0"""
+        if not self.scheduler.Acquire(state.Cancelled):
+            return
+        session = self.session_pool.Borrow()
+        request_start = time.time()
+        try:
+            with session.get(state.DownloadUrl, stream=True, timeout=REQUEST_TIMEOUT_SECONDS) as response:
+                response.raise_for_status()
+                offset = 0
+                next_chunk = 0
+                for block in response.iter_content(STREAM_BLOCK_SIZE):
+                    if state.Cancelled.is_set():
+                        return
+                    if self.rate_limiter and not self.rate_limiter.Consume(len(block), state.Cancelled):
+                        return
+                    _WriteAt(state.FileDescriptor, block, offset, state.WriteLock)
+                    offset += len(block)
+                    # Whole chunks received so far count as done
+                    completed = min(offset // progress.chunk_size_bytes, progress.total_chunks)
+                    while next_chunk < completed:
+                        self._RecordChunk(progress, state, next_chunk, progress.chunk_size_bytes)
+                        next_chunk += 1
+            if offset != progress.total_size_bytes:
+                state.Failure = f"expected {progress.total_size_bytes} bytes, received {offset}"
+                return
+            state.Controller.OnSuccess(offset, time.time() - request_start, response.elapsed.total_seconds())
+            for index in range(progress.total_chunks):
+                if not state.IsChunkDone(index):
+                    self._RecordChunk(progress, state, index, 0)
+        except requests.RequestException as e:
+            state.Failure = str(e)
+        finally:
+            self.session_pool.Return(session)
+            self.scheduler.Release()
+    
+    def _RecordChunk(self, progress: DownloadProgress, state: _TransferState, index: int, size: int):
+        """Mark a chunk complete, refresh speed/ETA and persist the bitmap at most every interval"""
+        with state.Lock:
+            state.MarkChunkDone(index)
+            state.SessionBytes += size
+            progress.current_chunk = state.CompletedChunks()
+            progress.downloaded_bytes = min(progress.current_chunk * progress.chunk_size_bytes,
+                                            progress.total_size_bytes)
+            
+            # Calculate speed and ETA from bytes moved in this session
+            elapsed_time = time.time() - state.SessionStart
+            if elapsed_time > 0 and state.SessionBytes:
+                progress.speed_bytes_per_second = state.SessionBytes / elapsed_time
+                remaining_bytes = progress.total_size_bytes - progress.downloaded_bytes
+                progress.estimated_time_remaining = remaining_bytes / progress.speed_bytes_per_second
+            
+            now = time.time()
+            save_due = now - state.LastResumeSave >= self.resume_save_interval
+            if save_due:
+                state.LastResumeSave = now
         
-        current_condition = self.DetectNetworkCondition()
-        speed = bytes_per_second[current_condition]
+        if save_due:
+            self._SaveResumeInfo(progress.book_id, progress)
         
-        return chunk_size / speed  # Time to download this chunk
+        # Call progress callback for UI updates
+        if state.ProgressCallback:
+            state.ProgressCallback(progress)
+    
+    def _LoadResumeInfo(self, progress: DownloadProgress, state: _TransferState):
+        """Restore the completed-chunk bitmap if it matches this download's layout"""
+        if not os.path.exists(state.ResumeFile) or not os.path.exists(state.PartFile):
+            return
+        try:
+            with open(state.ResumeFile, 'r') as f:
+                resume_data = json.load(f)
+            if (resume_data.get('total_size_bytes') != progress.total_size_bytes or
+                    resume_data.get('chunk_size_bytes') != progress.chunk_size_bytes or
+                    'chunk_bitmap' not in resume_data):
+                return
+            bitmap = base64.b64decode(resume_data['chunk_bitmap'])
+            if len(bitmap) != len(state.Bitmap):
+                return
+            state.LoadBitmap(bitmap)
+            progress.current_chunk = state.CompletedChunks()
+            progress.downloaded_bytes = min(progress.current_chunk * progress.chunk_size_bytes,
+                                            progress.total_size_bytes)
+            print(f"🔄 Resuming book {progress.book_id} at {progress.current_chunk}/{progress.total_chunks} chunks")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable resume info for book {progress.book_id}: {e}")
     
     def _SaveResumeInfo(self, book_id: int, progress: DownloadProgress):
         """Save resume information for interrupted downloads"""
-        resume_file = os.path.join(self.resume_info_dir, f"book_{book_id}.json")
+        state = self.transfers.get(book_id)
+        if state is None:
+            return
+        resume_file = self._ResumeFile(book_id)
+        
+        with state.Lock:
+            bitmap = bytes(state.Bitmap)
         
         resume_data = {
             'book_id': book_id,
             'title': progress.title,
             'total_size_bytes': progress.total_size_bytes,
+            'chunk_size_bytes': progress.chunk_size_bytes,
             'downloaded_bytes': progress.downloaded_bytes,
             'current_chunk': progress.current_chunk,
+            'chunk_bitmap': base64.b64encode(bitmap).decode('ascii'),
             'timestamp': datetime.now().isoformat()
         }
         
-        with open(resume_file, 'w') as f:
+        # Write-then-rename so a crash never leaves a truncated resume file
+        temp_file = f"{resume_file}.{threading.get_ident()}.tmp"
+        with open(temp_file, 'w') as f:
             json.dump(resume_data, f)
+        os.replace(temp_file, resume_file)
+    
+    def _RemoveDownloadFiles(self, book_id: int):
+        for file_path in [self._OutputFile(book_id) + ".part", self._ResumeFile(book_id)]:
+            try:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            except OSError:
+                pass
     
     def PauseDownload(self, book_id: int) -> bool:
         """Pause an active download"""
         if book_id in self.active_downloads:
             self.active_downloads[book_id].status = DownloadStatus.PAUSED.value
+            state = self.transfers.get(book_id)
+            if state:
+                # Workers finish their in-flight chunk, then wait
+                state.Running.clear()
+                self._SaveResumeInfo(book_id, self.active_downloads[book_id])
             return True
         return False
     
@@ -284,27 +899,44 @@ class ChunkedDownloader:
             progress = self.active_downloads[book_id]
             if progress.status == DownloadStatus.PAUSED.value:
                 progress.status = DownloadStatus.DOWNLOADING.value
+                state = self.transfers.get(book_id)
+                if state:
+                    state.SessionStart = time.time()
+                    state.SessionBytes = 0
+                    state.Running.set()
                 return True
         return False
     
     def CancelDownload(self, book_id: int) -> bool:
         """Cancel an active download"""
-        if book_id in self.active_downloads:
-            self.active_downloads[book_id].status = DownloadStatus.CANCELLED.value
-            
-            # Clean up files
-            output_file = os.path.join(self.downloads_dir, f"book_{book_id}.pdf")
-            resume_file = os.path.join(self.resume_info_dir, f"book_{book_id}.json")
-            
-            for file_path in [output_file, resume_file]:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-            
-            # Remove from active downloads
-            del self.active_downloads[book_id]
-            
+        progress = self.active_downloads.get(book_id)
+        if progress is None or progress.status == DownloadStatus.CANCELLED.value:
+            return False
+        progress.status = DownloadStatus.CANCELLED.value
+        
+        state = self.transfers.get(book_id)
+        if state and book_id in self.download_threads:
+            # The coordinator removes the files and the book once its workers have
+            # stopped; until then a new download of the book is refused
+            state.Cancelled.set()
+            state.Running.set()
             return True
-        return False
+        
+        self._RemoveDownloadFiles(book_id)
+        del self.active_downloads[book_id]
+        self.controllers.pop(book_id, None)
+        return True
+    
+    def ClearFinishedDownload(self, book_id: int) -> bool:
+        """Forget a completed or failed download so the book can be fetched again"""
+        progress = self.active_downloads.get(book_id)
+        if not progress or book_id in self.download_threads:
+            return False
+        if progress.status not in (DownloadStatus.COMPLETED.value, DownloadStatus.ERROR.value):
+            return False
+        del self.active_downloads[book_id]
+        self.controllers.pop(book_id, None)
+        return True
     
     def GetDownloadProgress(self, book_id: int) -> Optional[DownloadProgress]:
         """Get current download progress for a book"""
@@ -314,6 +946,17 @@ class ChunkedDownloader:
         """Get all active downloads"""
         return self.active_downloads.copy()
     
+    def GetSchedulerStats(self) -> Dict[str, int]:
+        """Connection usage across all downloads in this process"""
+        return self.scheduler.GetStats()
+    
+    def GetTransferEstimate(self, book_id: int = None) -> Dict[str, Any]:
+        """Live controller state for one download, or the process-wide estimate"""
+        controller = self.controllers.get(book_id) if book_id is not None else None
+        if controller:
+            return controller.GetSnapshot()
+        return self.estimator.GetEstimate()
+    
     def GetStudentFriendlyProgress(self, book_id: int) -> Optional[Dict[str, Any]]:
         """Get student-friendly progress information"""
         progress = self.GetDownloadProgress(book_id)
@@ -329,6 +972,10 @@ class ChunkedDownloader:
         # Format speed
         speed_kbps = progress.speed_bytes_per_second / 1024 if progress.speed_bytes_per_second > 0 else 0
         
+        # Live estimate from the adaptive controller
+        transfer = self.controllers[book_id].GetSnapshot() if book_id in self.controllers else {}
+        estimated_bps = transfer.get('estimated_bytes_per_second', 0.0)
+        
         return {
             'book_title': progress.title,
             'status': progress.status,
@@ -339,6 +986,11 @@ class ChunkedDownloader:
             'total_chunks': progress.total_chunks,
             'speed_kbps': round(speed_kbps, 1),
             'eta_minutes': round(eta_minutes, 1),
+            'estimated_speed_kbps': round(estimated_bps / 1024, 1),
+            'rtt_ms': transfer.get('rtt_ms'),
+            'request_size_kb': round(transfer.get('request_size_bytes', progress.chunk_size_bytes) / 1024, 1),
+            'connections': transfer.get('connections', 0),
+            'network_condition': ClassifyNetworkCondition(estimated_bps).value if estimated_bps else None,
             'student_message': self._GenerateStudentMessage(progress)
         }
     
@@ -397,4 +1049,4 @@ if __name__ == "__main__":
             print(f"📱 {progress_info['student_message']} ({progress_info['percentage_complete']}%)")
             if progress_info['status'] in ['completed', 'error', 'cancelled']:
                 break
-        time.sleep(2)
\ No newline at end of file
+        time.sleep(2)
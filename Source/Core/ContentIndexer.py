@@ -0,0 +1,420 @@
+# File: ContentIndexer.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Core/ContentIndexer.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 11:15PM
+
+"""
+Full-text content index for the book library
+Extracts the text of every local PDF on a process pool and stores it in a
+SQLite FTS5 table one chunk at a time, with page numbers, so search can
+return "page 112 of Algebra I". Scanned books with no text layer fall back
+to CPU-only OCR using the engines from Scripts/Common/Tools/GPUOCRSpeedTest.py
+(Tesseract, EasyOCR, PaddleOCR - whichever is installed).
+
+Indexing is incremental and resumable:
+- a book is skipped when its size and mtime match the last run;
+- a changed mtime with an unchanged SHA-256 only refreshes the stored mtime;
+- each book is committed in its own transaction, so an interrupted run
+  restarts with the first book that was not finished.
+
+The work runs on a background thread that feeds worker processes, and the
+index lives in its own WAL database, so API requests are never blocked.
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import sqlite3
+import hashlib
+import logging
+import threading
+import importlib.util
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Utils.PdfSupport import PyMuPDFImport
+
+PyMuPDF = PyMuPDFImport("⚠️ PyMuPDF not available - content indexing disabled")
+fitz = PyMuPDF.Symbol("fitz")
+
+DEFAULT_INDEX_PATH = "Data/Local/content_index.db"
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_CHUNK_CHARS = 1200
+DEFAULT_MIN_PAGE_CHARS = 40
+DEFAULT_OCR_DPI = 200
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# CPU OCR engines in preference order (fastest on CPU first)
+OCR_ENGINES = ("tesseract", "easyocr", "paddleocr")
+
+_OcrReaders: Dict[str, Any] = {}
+
+def DetectOcrEngine(preferred: str = "auto") -> Optional[str]:
+    """Name of an installed OCR engine, or None when OCR fallback is unavailable"""
+    if preferred in (None, "", "none"):
+        return None
+    candidates = OCR_ENGINES if preferred == "auto" else (preferred,)
+    for engine in candidates:
+        if engine == "tesseract":
+            if importlib.util.find_spec("pytesseract") and shutil.which("tesseract"):
+                return engine
+        elif importlib.util.find_spec(engine):
+            return engine
+    return None
+
+def _OcrPage(page, engine: str, dpi: int) -> str:
+    """OCR one rendered PDF page on the CPU"""
+    pixmap = page.get_pixmap(dpi=dpi, alpha=False)
+
+    if engine == "tesseract":
+        import pytesseract
+        from PIL import Image
+        image = Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+        return pytesseract.image_to_string(image)
+
+    import numpy
+    array = numpy.frombuffer(pixmap.samples, dtype=numpy.uint8).reshape(pixmap.height, pixmap.width, pixmap.n)
+
+    if engine == "easyocr":
+        if engine not in _OcrReaders:
+            import easyocr
+            _OcrReaders[engine] = easyocr.Reader(["en"], gpu=False)
+        return " ".join(result[1] for result in _OcrReaders[engine].readtext(array))
+
+    if engine == "paddleocr":
+        if engine not in _OcrReaders:
+            from paddleocr import PaddleOCR
+            _OcrReaders[engine] = PaddleOCR(use_angle_cls=True, lang="en", use_gpu=False, show_log=False)
+        results = _OcrReaders[engine].ocr(array, cls=True)
+        return " ".join(line[1][0] for line in results[0]) if results and results[0] else ""
+
+    raise ValueError(f"Unknown OCR engine: {engine}")
+
+def HashFile(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def ExtractBookText(path: str, known_sha256: Optional[str], ocr_engine: Optional[str],
+                    min_page_chars: int = DEFAULT_MIN_PAGE_CHARS,
+                    ocr_dpi: int = DEFAULT_OCR_DPI) -> Dict[str, Any]:
+    """
+    Hash a book and, if its content changed, extract the text of every page (worker process)
+
+    Returns {"sha256", "pages": [(page_number, text, used_ocr), ...] or None
+    when the hash matches known_sha256}.
+    """
+    sha256 = HashFile(path)
+    if sha256 == known_sha256:
+        return {"sha256": sha256, "pages": None}
+
+    pages = []
+    with fitz.open(path) as document:
+        for index, page in enumerate(document):
+            text = page.get_text("text")
+            used_ocr = False
+            if len(text.strip()) < min_page_chars and ocr_engine:
+                try:
+                    text = _OcrPage(page, ocr_engine, ocr_dpi)
+                    used_ocr = True
+                except Exception:
+                    pass
+            pages.append((index + 1, text, used_ocr))
+    return {"sha256": sha256, "pages": pages}
+
+def ChunkText(text: str, max_chars: int = DEFAULT_CHUNK_CHARS) -> List[str]:
+    """Split page text into chunks of at most max_chars, breaking at paragraphs, then words"""
+    chunks, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        while len(paragraph) > max_chars:
+            cut = paragraph.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:cut])
+            paragraph = paragraph[cut:].lstrip()
+        if not paragraph:
+            continue
+        if current and len(current) + 1 + len(paragraph) > max_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current} {paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+def BuildMatchQuery(query: str) -> Optional[str]:
+    """FTS5 MATCH expression for free text: every word must appear, the last may be a prefix"""
+    words = re.findall(r"\w+", query.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words[:-1]]
+    terms.append(f'"{words[-1]}"*')
+    return " ".join(terms)
+
+class ContentIndexer:
+    """
+    Incremental FTS5 index of book text with page-level search
+
+    books: iterable of (book_id, absolute_pdf_path). IndexBooks() does one
+    pass; Start() runs passes on a background thread.
+    """
+
+    def __init__(self, index_path: str = DEFAULT_INDEX_PATH, max_workers: int = DEFAULT_MAX_WORKERS,
+                 ocr_engine: str = "auto", chunk_chars: int = DEFAULT_CHUNK_CHARS,
+                 extractor: Callable[..., Dict[str, Any]] = ExtractBookText):
+        self.Logger = logging.getLogger(__name__)
+        self.IndexPath = index_path
+        self.MaxWorkers = max_workers
+        self.OcrEngine = DetectOcrEngine(ocr_engine)
+        self.ChunkChars = chunk_chars
+        self.Extractor = extractor
+
+        self.Thread: Optional[threading.Thread] = None
+        self.StopEvent = threading.Event()
+        self.Lock = threading.Lock()
+        self.Progress = {"running": False, "queued": 0, "done": 0, "last_run": None}
+
+        directory = os.path.dirname(index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._InitializeDatabase()
+
+    @staticmethod
+    def IsAvailable() -> bool:
+        return PyMuPDF.IsAvailable()
+
+    def _Connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.IndexPath, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _InitializeDatabase(self):
+        with self._Connect() as conn:
+            conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS content_files (
+                    book_id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    sha256 TEXT,
+                    page_count INTEGER DEFAULT 0,
+                    ocr_pages INTEGER DEFAULT 0,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    indexed_at TEXT
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS content_chunks USING fts5(
+                    text,
+                    book_id UNINDEXED,
+                    page UNINDEXED,
+                    tokenize = 'porter unicode61'
+                );
+                -- book_id is UNINDEXED in FTS5, so a book's chunks are found by rowid range
+                CREATE TABLE IF NOT EXISTS content_chunk_ranges (
+                    book_id INTEGER PRIMARY KEY,
+                    first_rowid INTEGER NOT NULL,
+                    last_rowid INTEGER NOT NULL
+                );
+            """)
+
+    def _KnownFiles(self, conn) -> Dict[int, sqlite3.Row]:
+        return {row["book_id"]: row for row in conn.execute(
+            "SELECT book_id, size_bytes, mtime_ns, sha256, status FROM content_files"
+        )}
+
+    def PlanBooks(self, books: Iterable[Tuple[int, str]]) -> List[Tuple[int, str, os.stat_result, Optional[str]]]:
+        """Books whose file changed (or never indexed): [(book_id, path, stat, known_sha256)]"""
+        with self._Connect() as conn:
+            known = self._KnownFiles(conn)
+        plan = []
+        for book_id, path in books:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            row = known.get(book_id)
+            if row and row["size_bytes"] == stat.st_size and row["mtime_ns"] == stat.st_mtime_ns \
+                    and row["status"] in ("indexed", "failed"):
+                continue
+            known_sha = row["sha256"] if row and row["status"] == "indexed" else None
+            plan.append((book_id, path, stat, known_sha))
+        return plan
+
+    @staticmethod
+    def _DeleteChunks(conn: sqlite3.Connection, book_id: int):
+        """Remove one book's chunks by rowid range instead of scanning the FTS table"""
+        row = conn.execute("SELECT first_rowid, last_rowid FROM content_chunk_ranges WHERE book_id = ?",
+                           (book_id,)).fetchone()
+        if row:
+            conn.execute("DELETE FROM content_chunks WHERE rowid BETWEEN ? AND ?", (row[0], row[1]))
+            conn.execute("DELETE FROM content_chunk_ranges WHERE book_id = ?", (book_id,))
+        elif conn.execute("SELECT 1 FROM content_files WHERE book_id = ?", (book_id,)).fetchone():
+            # Indexed before chunk ranges were recorded - one last full scan
+            conn.execute("DELETE FROM content_chunks WHERE book_id = ?", (book_id,))
+
+    def StoreBookText(self, book_id: int, path: str, stat: os.stat_result, result: Dict[str, Any]):
+        """Replace one book's chunks and file record in a single transaction"""
+        with self._Connect() as conn:
+            if result["pages"] is None:
+                # Touched but unchanged content - only the validators move
+                conn.execute("UPDATE content_files SET path = ?, size_bytes = ?, mtime_ns = ? WHERE book_id = ?",
+                             (path, stat.st_size, stat.st_mtime_ns, book_id))
+                return
+
+            # Take the write lock first so the rowids allocated below stay ours
+            conn.execute("BEGIN IMMEDIATE")
+            self._DeleteChunks(conn, book_id)
+            last = conn.execute("SELECT rowid FROM content_chunks ORDER BY rowid DESC LIMIT 1").fetchone()
+            first_rowid = (last[0] if last else 0) + 1
+            chunks = [(page, chunk)
+                      for page, text, _ in result["pages"]
+                      for chunk in ChunkText(text, self.ChunkChars)]
+            rows = [(first_rowid + offset, chunk, book_id, page) for offset, (page, chunk) in enumerate(chunks)]
+            conn.executemany("INSERT INTO content_chunks (rowid, text, book_id, page) VALUES (?, ?, ?, ?)", rows)
+            if rows:
+                conn.execute("INSERT INTO content_chunk_ranges (book_id, first_rowid, last_rowid) VALUES (?, ?, ?)",
+                             (book_id, first_rowid, rows[-1][0]))
+            conn.execute("""
+                INSERT OR REPLACE INTO content_files
+                (book_id, path, size_bytes, mtime_ns, sha256, page_count, ocr_pages, status, error, indexed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 'indexed', NULL, ?)
+            """, (book_id, path, stat.st_size, stat.st_mtime_ns, result["sha256"], len(result["pages"]),
+                  sum(1 for page in result["pages"] if page[2]), time.strftime("%Y-%m-%dT%H:%M:%S")))
+
+    def _RecordFailure(self, book_id: int, path: str, stat: os.stat_result, error: Exception):
+        with self._Connect() as conn:
+            # Pages of the previous file version must not keep turning up in search
+            self._DeleteChunks(conn, book_id)
+            conn.execute("""
+                INSERT INTO content_files (book_id, path, size_bytes, mtime_ns, status, error)
+                VALUES (?, ?, ?, ?, 'failed', ?)
+                ON CONFLICT(book_id) DO UPDATE SET path = excluded.path, size_bytes = excluded.size_bytes,
+                    mtime_ns = excluded.mtime_ns, status = 'failed', error = excluded.error
+            """, (book_id, path, stat.st_size, stat.st_mtime_ns, str(error)[:500]))
+
+    def RemoveMissing(self, book_ids: Iterable[int]) -> int:
+        """Drop index entries for books that are no longer in the library"""
+        keep = set(book_ids)
+        with self._Connect() as conn:
+            stale = [row[0] for row in conn.execute("SELECT book_id FROM content_files") if row[0] not in keep]
+            for book_id in stale:
+                self._DeleteChunks(conn, book_id)
+                conn.execute("DELETE FROM content_files WHERE book_id = ?", (book_id,))
+        return len(stale)
+
+    def IndexBooks(self, books: Iterable[Tuple[int, str]]) -> Dict[str, int]:
+        """
+        One incremental pass over the library
+
+        Extraction runs on up to MaxWorkers processes with at most two jobs
+        per worker outstanding; results are written here, one book per
+        transaction, so the single writer never contends with itself.
+        """
+        books = list(books)
+        removed = self.RemoveMissing(book_id for book_id, _ in books)
+        plan = self.PlanBooks(books)
+        stats = {"planned": len(plan), "indexed": 0, "unchanged": 0, "failed": 0, "removed": removed}
+        with self.Lock:
+            self.Progress.update({"running": True, "queued": len(plan), "done": 0})
+
+        if plan:
+            self.Logger.info(f"📚 Content indexing {len(plan)} books ({self.MaxWorkers} workers, OCR: {self.OcrEngine})")
+            pending = iter(plan)
+            futures = {}
+            with ProcessPoolExecutor(max_workers=self.MaxWorkers) as executor:
+                while True:
+                    while not self.StopEvent.is_set() and len(futures) < self.MaxWorkers * 2:
+                        item = next(pending, None)
+                        if item is None:
+                            break
+                        book_id, path, stat, known_sha = item
+                        futures[executor.submit(self.Extractor, path, known_sha, self.OcrEngine)] = item
+                    if not futures:
+                        break
+
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        book_id, path, stat, _ = futures.pop(future)
+                        try:
+                            result = future.result()
+                            self.StoreBookText(book_id, path, stat, result)
+                            stats["unchanged" if result["pages"] is None else "indexed"] += 1
+                        except Exception as e:
+                            self.Logger.warning(f"⚠️ Content indexing failed for book {book_id}: {e}")
+                            self._RecordFailure(book_id, path, stat, e)
+                            stats["failed"] += 1
+                        with self.Lock:
+                            self.Progress["done"] += 1
+
+        with self.Lock:
+            self.Progress.update({"running": False, "last_run": time.strftime("%Y-%m-%dT%H:%M:%S")})
+        self.Logger.info(f"✅ Content index pass complete: {stats}")
+        return stats
+
+    def Start(self, books_provider: Callable[[], Iterable[Tuple[int, str]]]) -> bool:
+        """Run an indexing pass on a background thread; False if one is already running"""
+        with self.Lock:
+            if self.Thread and self.Thread.is_alive():
+                return False
+            self.StopEvent.clear()
+
+            def run():
+                try:
+                    self.IndexBooks(books_provider())
+                except Exception as e:
+                    self.Logger.error(f"❌ Content indexing pass failed: {e}")
+                    with self.Lock:
+                        self.Progress["running"] = False
+
+            self.Thread = threading.Thread(target=run, name="content-indexer", daemon=True)
+            self.Thread.start()
+            return True
+
+    def Stop(self, timeout: float = None):
+        """Stop submitting new books; books already extracting are still stored"""
+        self.StopEvent.set()
+        if self.Thread:
+            self.Thread.join(timeout)
+
+    def Search(self, query: str, limit: int = 20, offset: int = 0,
+               book_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """Page-level hits ranked by BM25: [{book_id, page, snippet, score}]"""
+        match = BuildMatchQuery(query)
+        if not match:
+            return []
+        sql = """
+            SELECT book_id, page, snippet(content_chunks, 0, '[', ']', '…', 16) AS snippet,
+                   bm25(content_chunks) AS score
+            FROM content_chunks WHERE content_chunks MATCH ?
+        """
+        params: List[Any] = [match]
+        if book_ids:
+            sql += f" AND book_id IN ({','.join('?' * len(book_ids))})"
+            params.extend(book_ids)
+        sql += " ORDER BY score LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        with self._Connect() as conn:
+            return [{"book_id": row["book_id"], "page": row["page"], "snippet": row["snippet"],
+                     "score": round(-row["score"], 4)} for row in conn.execute(sql, params)]
+
+    def GetStatus(self) -> Dict[str, Any]:
+        with self._Connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM content_files GROUP BY status").fetchall())
+            ocr_pages = conn.execute("SELECT COALESCE(SUM(ocr_pages), 0) FROM content_files").fetchone()[0]
+        with self.Lock:
+            progress = dict(self.Progress)
+        return {**progress, "indexed_books": counts.get("indexed", 0), "failed_books": counts.get("failed", 0),
+                "ocr_pages": ocr_pages, "ocr_engine": self.OcrEngine, "max_workers": self.MaxWorkers}
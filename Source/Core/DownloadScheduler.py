@@ -0,0 +1,470 @@
+# File: DownloadScheduler.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Core/DownloadScheduler.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 10:05PM
+
+"""
+Download Scheduler - Budget-Aware Book Download Queue
+Persists queued book downloads in SQLite and feeds them to ChunkedDownloader:
+- priority order (highest first, then oldest)
+- one global bytes/sec token bucket shared by every transfer
+- metered downloads held back once the month's data budget is used up
+- "download later" / WiFi jobs wait for the off-peak window
+Jobs survive restarts; interrupted transfers resume from the chunk bitmap.
+With several server workers only one scheduler dispatches; the others
+only queue and cancel jobs in the shared database.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.ChunkedDownloader import ChunkedDownloader, DownloadStatus, TokenBucket
+
+DEFAULT_QUEUE_PATH = "Data/Local/download_queue.db"
+DEFAULT_MAX_ACTIVE_DOWNLOADS = 2
+DEFAULT_OFF_PEAK_HOURS = (23, 6)
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 60
+
+class DownloadScheduler:
+    """Persistent priority queue that drives ChunkedDownloader within budget and rate limits"""
+
+    IMMEDIATE_METHODS = {"download_now"}
+    OFF_PEAK_METHODS = {"download_later", "download_wifi", "off_peak"}
+    SCHEDULABLE_METHODS = IMMEDIATE_METHODS | OFF_PEAK_METHODS
+
+    # Jobs in these states still need work
+    OPEN_STATUSES = ("queued", "downloading")
+
+    def __init__(
+        self,
+        queue_path: str = DEFAULT_QUEUE_PATH,
+        downloader: ChunkedDownloader = None,
+        budget=None,
+        bytes_per_second: float = 0,
+        burst_bytes: int = None,
+        max_active_downloads: int = DEFAULT_MAX_ACTIVE_DOWNLOADS,
+        off_peak_hours: Tuple[int, int] = DEFAULT_OFF_PEAK_HOURS,
+        source_resolver: Callable[[int, str], Optional[Dict[str, Any]]] = None,
+        poll_interval: float = 2.0,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        recover_interrupted: bool = True
+    ):
+        self.Logger = logging.getLogger(__name__)
+        self.QueuePath = queue_path
+        self.Budget = budget  # StudentBookDownloader - monthly spending and byte budget
+        self.MaxActiveDownloads = max(1, int(max_active_downloads))
+        self.OffPeakHours = off_peak_hours
+        self.SourceResolver = source_resolver
+        self.PollInterval = poll_interval
+        self.MaxAttempts = max_attempts
+
+        # One bucket for every transfer this scheduler starts
+        self.RateLimiter = TokenBucket(bytes_per_second, burst_bytes) if bytes_per_second else None
+        self.Downloader = downloader or ChunkedDownloader(rate_limiter=self.RateLimiter)
+        if self.RateLimiter:
+            self.Downloader.rate_limiter = self.RateLimiter
+
+        self.Lock = threading.RLock()
+        # Serialises scheduling passes; held while sources resolve, unlike Lock
+        self.DispatchLock = threading.Lock()
+        self.StopEvent = threading.Event()
+        self.Thread: Optional[threading.Thread] = None
+
+        self._InitializeDatabase(recover_interrupted)
+
+    # Persistence
+
+    def _Connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.QueuePath, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _InitializeDatabase(self, recover_interrupted: bool = True):
+        queue_dir = os.path.dirname(self.QueuePath)
+        if queue_dir:
+            os.makedirs(queue_dir, exist_ok=True)
+
+        with self._Connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS download_jobs (
+                    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    book_id INTEGER NOT NULL,
+                    title TEXT NOT NULL,
+                    download_url TEXT,
+                    size_bytes INTEGER NOT NULL DEFAULT 0,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    method TEXT NOT NULL,
+                    metered INTEGER NOT NULL DEFAULT 1,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    not_before REAL NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    bytes_downloaded INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_download_jobs_ready
+                ON download_jobs(status, priority DESC, job_id)
+            """)
+            # At most one open job per book
+            conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_download_jobs_open_book
+                ON download_jobs(book_id) WHERE status IN ('queued', 'downloading')
+            """)
+
+            # Transfers interrupted by a restart go back to the queue and resume from their bitmap.
+            # Only the dispatching scheduler may do this - another worker's transfers are still running.
+            recovered = 0
+            if recover_interrupted:
+                recovered = conn.execute("""
+                    UPDATE download_jobs SET status = 'queued', updated_at = ?
+                    WHERE status = 'downloading'
+                """, (time.time(),)).rowcount
+        if recovered:
+            print(f"🔄 Requeued {recovered} interrupted download(s)")
+
+    def _UpdateJob(self, conn: sqlite3.Connection, job_id: int, **fields):
+        fields['updated_at'] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        conn.execute(f"UPDATE download_jobs SET {assignments} WHERE job_id = ?",
+                     (*fields.values(), job_id))
+
+    # Time windows
+
+    def IsOffPeak(self, when: datetime) -> bool:
+        """True inside the off-peak window (which may wrap past midnight)"""
+        start_hour, end_hour = self.OffPeakHours
+        if start_hour <= end_hour:
+            return start_hour <= when.hour < end_hour
+        return when.hour >= start_hour or when.hour < end_hour
+
+    def NextOffPeakStart(self, when: datetime) -> datetime:
+        """when itself if already off-peak, otherwise the next window start"""
+        if self.IsOffPeak(when):
+            return when
+        start = when.replace(hour=self.OffPeakHours[0], minute=0, second=0, microsecond=0)
+        return start if start > when else start + timedelta(days=1)
+
+    @staticmethod
+    def _NextMonthStart(when: datetime) -> datetime:
+        first = when.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        return (first + timedelta(days=32)).replace(day=1)
+
+    # Queue API
+
+    def Enqueue(
+        self,
+        book_id: int,
+        title: str,
+        size_bytes: int,
+        download_url: str = None,
+        priority: int = 0,
+        method: str = "download_now",
+        not_before: datetime = None
+    ) -> Dict[str, Any]:
+        """Queue a book download; an existing open job for the book is updated instead"""
+        if method not in self.SCHEDULABLE_METHODS:
+            raise ValueError(f"Download method '{method}' cannot be scheduled")
+
+        now = datetime.now()
+        if not_before is None:
+            not_before = self.NextOffPeakStart(now) if method in self.OFF_PEAK_METHODS else now
+        metered = 1 if method in self.IMMEDIATE_METHODS else 0
+
+        with self.Lock, self._Connect() as conn:
+            existing = conn.execute("""
+                SELECT job_id FROM download_jobs
+                WHERE book_id = ? AND status IN ('queued', 'downloading')
+            """, (book_id,)).fetchone()
+
+            if existing:
+                job_id = existing['job_id']
+                conn.execute("""
+                    UPDATE download_jobs
+                    SET priority = MAX(priority, ?), updated_at = ?
+                    WHERE job_id = ?
+                """, (priority, time.time(), job_id))
+            else:
+                job_id = conn.execute("""
+                    INSERT INTO download_jobs
+                        (book_id, title, download_url, size_bytes, priority, method, metered,
+                         status, not_before, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?)
+                """, (book_id, title, download_url, int(size_bytes), priority, method, metered,
+                      not_before.timestamp(), time.time(), time.time())).lastrowid
+
+        self.Logger.info(f"📥 Queued download job {job_id} for book {book_id} ({method})")
+        return self.GetJob(job_id)
+
+    def GetJob(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._Connect() as conn:
+            row = conn.execute("SELECT * FROM download_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._JobToDict(row) if row else None
+
+    def GetQueue(self, include_finished: bool = False) -> List[Dict[str, Any]]:
+        """Jobs in dispatch order"""
+        query = "SELECT * FROM download_jobs"
+        if not include_finished:
+            query += " WHERE status IN ('queued', 'downloading')"
+        query += " ORDER BY status = 'downloading' DESC, priority DESC, job_id"
+        with self._Connect() as conn:
+            return [self._JobToDict(row) for row in conn.execute(query)]
+
+    def SetPriority(self, job_id: int, priority: int) -> bool:
+        with self.Lock, self._Connect() as conn:
+            return conn.execute("""
+                UPDATE download_jobs SET priority = ?, updated_at = ?
+                WHERE job_id = ? AND status = 'queued'
+            """, (priority, time.time(), job_id)).rowcount > 0
+
+    def Cancel(self, job_id: int) -> bool:
+        """Cancel a queued or running job"""
+        with self.Lock, self._Connect() as conn:
+            row = conn.execute("""
+                SELECT book_id, status FROM download_jobs
+                WHERE job_id = ? AND status IN ('queued', 'downloading')
+            """, (job_id,)).fetchone()
+            if not row:
+                return False
+            if row['status'] == 'downloading':
+                self.Downloader.CancelDownload(row['book_id'])
+            self._UpdateJob(conn, job_id, status='cancelled')
+        return True
+
+    def _JobToDict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job['metered'] = bool(job['metered'])
+        job['not_before'] = datetime.fromtimestamp(job['not_before']).isoformat()
+        if job['status'] == 'downloading':
+            progress = self.Downloader.GetStudentFriendlyProgress(job['book_id'])
+            if progress:
+                job['progress'] = progress
+        return job
+
+    # Budget
+
+    def _RemainingMeteredBytes(self) -> Optional[int]:
+        """Bytes still allowed on metered data this month (None = no budget configured)"""
+        if self.Budget is None:
+            return None
+        summary = self.Budget.GetMonthlySpendingSummary()
+        cost_per_mb = self.Budget.cost_per_mb[self.Budget.default_region]
+        # Spending recorded without byte counts still uses up the money budget
+        affordable_bytes = max(0.0, summary['remaining_budget']) / cost_per_mb * 1024 * 1024
+        return int(min(summary['remaining_bytes'], affordable_bytes))
+
+    def _JobCost(self, job: sqlite3.Row) -> float:
+        if not job['metered'] or self.Budget is None:
+            return 0.0
+        cost_per_mb = self.Budget.cost_per_mb[self.Budget.default_region]
+        return round(job['size_bytes'] / (1024 * 1024) * cost_per_mb, 2)
+
+    # Dispatch
+
+    def RunPending(self, now: datetime = None) -> Dict[str, List[int]]:
+        """
+        One scheduling pass: settle finished transfers, then start ready jobs
+
+        Sources are resolved (a network call) without holding the queue lock,
+        so Enqueue and Cancel never wait on Drive.
+        """
+        now = now or datetime.now()
+        result = {'started': [], 'completed': [], 'failed': [], 'deferred': []}
+
+        with self.DispatchLock:
+            with self.Lock, self._Connect() as conn:
+                self._SettleActive(conn, result)
+                ready = self._SelectReady(conn, now, result)
+
+            sources = {}
+            for job in ready:
+                try:
+                    sources[job['job_id']] = self._ResolveSource(job)
+                except Exception as e:
+                    self.Logger.error(f"❌ Source lookup failed for job {job['job_id']}: {e}")
+                    sources[job['job_id']] = e
+
+            with self.Lock, self._Connect() as conn:
+                for job in ready:
+                    started = self._StartJob(conn, job, sources[job['job_id']])
+                    if started is not None:
+                        result['started' if started else 'failed'].append(job['job_id'])
+
+        return result
+
+    def _SelectReady(self, conn: sqlite3.Connection, now: datetime,
+                     result: Dict[str, List[int]]) -> List[sqlite3.Row]:
+        """Queued jobs that fit the free transfer slots and the metered budget"""
+        active = conn.execute("""
+            SELECT COUNT(*), COALESCE(SUM(CASE WHEN metered THEN size_bytes ELSE 0 END), 0)
+            FROM download_jobs WHERE status = 'downloading'
+        """).fetchone()
+        active_count, reserved_bytes = active[0], active[1]
+        if active_count >= self.MaxActiveDownloads:
+            return []
+
+        remaining_bytes = self._RemainingMeteredBytes()
+        candidates = conn.execute("""
+            SELECT * FROM download_jobs
+            WHERE status = 'queued' AND not_before <= ?
+            ORDER BY priority DESC, job_id
+        """, (now.timestamp(),)).fetchall()
+
+        ready = []
+        for job in candidates:
+            if active_count >= self.MaxActiveDownloads:
+                break
+
+            if job['method'] in self.OFF_PEAK_METHODS and not self.IsOffPeak(now):
+                self._UpdateJob(conn, job['job_id'], not_before=self.NextOffPeakStart(now).timestamp())
+                continue
+
+            if job['metered'] and remaining_bytes is not None and \
+                    job['size_bytes'] > remaining_bytes - reserved_bytes:
+                # Held until next month; the student can still choose an off-peak download
+                self._UpdateJob(conn, job['job_id'],
+                                not_before=self._NextMonthStart(now).timestamp(),
+                                last_error="Monthly data budget reached")
+                result['deferred'].append(job['job_id'])
+                continue
+
+            ready.append(job)
+            active_count += 1
+            if job['metered']:
+                reserved_bytes += job['size_bytes']
+
+        return ready
+
+    def _ResolveSource(self, job: sqlite3.Row) -> Tuple[Optional[str], int]:
+        """Download URL and size for a job, asking the resolver when the job has no URL"""
+        download_url, size_bytes = job['download_url'], job['size_bytes']
+        if not download_url and self.SourceResolver:
+            source = self.SourceResolver(job['book_id'], job['title'])
+            if source:
+                download_url = source.get('download_url')
+                size_bytes = source.get('size_bytes') or size_bytes
+        return download_url, size_bytes
+
+    def _StartJob(self, conn: sqlite3.Connection, job: sqlite3.Row, source) -> Optional[bool]:
+        """Start a resolved job; False if it failed, None if it left the queue meanwhile"""
+        # Cancelled while its source was being resolved
+        current = conn.execute("SELECT status FROM download_jobs WHERE job_id = ?", (job['job_id'],)).fetchone()
+        if not current or current['status'] != 'queued':
+            return None
+
+        if isinstance(source, Exception):
+            self._UpdateJob(conn, job['job_id'], status='error', last_error=f"Source lookup failed: {source}")
+            return False
+        download_url, size_bytes = source
+        if not download_url:
+            self._UpdateJob(conn, job['job_id'], status='error', last_error="No download source available")
+            return False
+
+        # A finished transfer for this book from an earlier job must not block the new one
+        self.Downloader.ClearFinishedDownload(job['book_id'])
+        self.Downloader.StartChunkedDownload(
+            book_id=job['book_id'],
+            title=job['title'],
+            file_size_bytes=size_bytes,
+            download_url=download_url
+        )
+        self._UpdateJob(conn, job['job_id'], status='downloading', download_url=download_url,
+                        size_bytes=size_bytes, last_error=None)
+        print(f"🚀 Started download job {job['job_id']}: {job['title']}")
+        return True
+
+    def _SettleActive(self, conn: sqlite3.Connection, result: Dict[str, List[int]]):
+        """Move finished transfers out of 'downloading' and record their cost"""
+        # Jobs cancelled through another worker's scheduler are still running here
+        running = set(self.Downloader.download_threads)
+        if running:
+            open_books = {row[0] for row in conn.execute(
+                "SELECT book_id FROM download_jobs WHERE status = 'downloading'")}
+            for book_id in running - open_books:
+                self.Downloader.CancelDownload(book_id)
+
+        for job in conn.execute("SELECT * FROM download_jobs WHERE status = 'downloading'").fetchall():
+            book_id = job['book_id']
+            progress = self.Downloader.GetDownloadProgress(book_id)
+
+            if progress is None:
+                # Not running in this process (restart or external cancel) - run it again
+                self._UpdateJob(conn, job['job_id'], status='queued')
+                continue
+
+            if book_id in self.Downloader.download_threads:
+                self._UpdateJob(conn, job['job_id'], bytes_downloaded=progress.downloaded_bytes)
+                continue
+
+            if progress.status == DownloadStatus.COMPLETED.value:
+                self._UpdateJob(conn, job['job_id'], status='completed',
+                                bytes_downloaded=progress.total_size_bytes)
+                if self.Budget is not None:
+                    self.Budget.RecordDownload(book_id, self._JobCost(job), job['method'],
+                                               progress.total_size_bytes)
+                result['completed'].append(job['job_id'])
+
+            elif progress.status == DownloadStatus.ERROR.value:
+                attempts = job['attempts'] + 1
+                if attempts < self.MaxAttempts:
+                    self._UpdateJob(conn, job['job_id'], status='queued', attempts=attempts,
+                                    not_before=time.time() + RETRY_BACKOFF_SECONDS * attempts,
+                                    last_error="Transfer failed - will retry")
+                else:
+                    self._UpdateJob(conn, job['job_id'], status='error', attempts=attempts,
+                                    last_error="Transfer failed")
+                    result['failed'].append(job['job_id'])
+            else:
+                continue
+
+            self.Downloader.ClearFinishedDownload(book_id)
+
+    # Background loop
+
+    def Start(self):
+        """Run RunPending every poll interval on a daemon thread"""
+        if self.Thread and self.Thread.is_alive():
+            return
+        self.StopEvent.clear()
+        self.Thread = threading.Thread(target=self._Loop, name="DownloadScheduler", daemon=True)
+        self.Thread.start()
+
+    def Stop(self, timeout: float = 5.0):
+        self.StopEvent.set()
+        if self.Thread:
+            self.Thread.join(timeout)
+            self.Thread = None
+
+    def _Loop(self):
+        while not self.StopEvent.is_set():
+            try:
+                self.RunPending()
+            except Exception as e:
+                self.Logger.error(f"❌ Download scheduler pass failed: {e}")
+            self.StopEvent.wait(self.PollInterval)
+
+    def GetStats(self) -> Dict[str, Any]:
+        with self._Connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM download_jobs GROUP BY status").fetchall())
+        return {
+            'jobs': counts,
+            'max_active_downloads': self.MaxActiveDownloads,
+            'bytes_per_second': self.RateLimiter.Rate if self.RateLimiter else None,
+            'off_peak_hours': list(self.OffPeakHours),
+            'remaining_metered_bytes': self._RemainingMeteredBytes(),
+            'transfers': self.Downloader.GetSchedulerStats()
+        }
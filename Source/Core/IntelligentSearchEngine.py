@@ -2,7 +2,7 @@
 # Path: /home/herb/Desktop/AndyLibrary/Source/Core/IntelligentSearchEngine.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-28
-# Last Modified: 2025-07-28 07:40AM
+# Last Modified: 2026-10-19 10:15AM
 
 """
 Intelligent Search Engine for AndyLibrary - Project Himalaya Benchmark Implementation
@@ -11,6 +11,7 @@ Demonstrates how to understand learning intent and optimize educational search
 """
 
 import os
+import sys
 import json
 import logging
 import sqlite3
@@ -22,6 +23,14 @@ from enum import Enum
 import re
 import math
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from Utils.StateBackend import GetStateBackend
+except ImportError:
+    GetStateBackend = None
+    print("⚠️ StateBackend not available - search cache is per process")
+
 # Natural language processing for educational search
 try:
     import nltk
@@ -149,6 +158,10 @@ class IntelligentSearchEngine:
         self.SearchCache = {}
         self.CacheExpiry = timedelta(minutes=15)
         
+        # Second-level cache shared by all workers (only when the backend is process-shared)
+        backend = GetStateBackend() if GetStateBackend else None
+        self.SharedCache = backend if backend and backend.IsShared else None
+        
         # Analytics (privacy-respecting)
         self.SearchAnalytics = []
         self.PerformanceMetrics = {}
@@ -913,6 +926,17 @@ class IntelligentSearchEngine:
                 return cached_entry['result']
             else:
                 del self.SearchCache[cache_key]
+        
+        if self.SharedCache:
+            try:
+                result = self.SharedCache.Get("search_cache", cache_key)
+            except Exception as e:
+                self.Logger.warning(f"Shared search cache read failed: {e}")
+                result = None
+            if result:
+                self.SearchCache[cache_key] = {'result': result, 'timestamp': datetime.utcnow()}
+                result['search_metadata']['cache_used'] = True
+                return result
         return None
     
     def _CacheResult(self, cache_key: str, result: Dict[str, Any]):
@@ -926,6 +950,13 @@ class IntelligentSearchEngine:
         if len(self.SearchCache) > 100:
             oldest_key = min(self.SearchCache, key=lambda k: self.SearchCache[k]['timestamp'])
             del self.SearchCache[oldest_key]
+        
+        if self.SharedCache:
+            try:
+                self.SharedCache.Set("search_cache", cache_key, result,
+                                     ttl_seconds=self.CacheExpiry.total_seconds())
+            except Exception as e:
+                self.Logger.warning(f"Shared search cache write failed: {e}")
     
     def _RecordSearchAnalytics(self, query: SearchQuery, response: Dict[str, Any]):
         """Record privacy-respecting search analytics"""
@@ -2,7 +2,7 @@
 # Path: /home/herb/Desktop/AndyLibrary/Source/Core/ModernSocialAuthManager.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-28
-# Last Modified: 2025-07-28 06:35AM
+# Last Modified: 2026-10-19 09:30PM
 
 """
 Modern Social Authentication Manager for AndyLibrary
@@ -31,6 +31,14 @@ except ImportError:
     GetSecretManager = None
     print("⚠️ SecretManager not available - using environment variables only")
 
+try:
+    from Utils.StateBackend import GetStateBackend
+    from Utils.OAuthStateStore import OAuthStateStore
+except ImportError:
+    GetStateBackend = None
+    OAuthStateStore = None
+    print("⚠️ StateBackend not available - OAuth sessions kept in process memory")
+
 # Official Google OAuth libraries (2025 standards)
 from google_auth_oauthlib.flow import Flow
 from google.auth.transport.requests import Request
@@ -67,6 +75,9 @@ class ModernSocialAuthManager:
         # Initialize secret manager
         self._InitializeSecretManager()
         
+        # Shared state backend (process memory, SQLite WAL or Redis)
+        self.StateBackend = GetStateBackend() if GetStateBackend else None
+        
         # Load configurations
         self._LoadServerConfig()
         self._LoadSecurityConfig()
@@ -77,8 +88,16 @@ class ModernSocialAuthManager:
         # Initialize OAuth providers
         self._InitializeProviders()
         
-        # Session store for PKCE and state management
-        self.ActiveSessions = {}
+        # Session store for PKCE and state management - indexed by state, shared across workers
+        if OAuthStateStore:
+            session_config = self.SecurityConfig.get("oauth_security", {}).get("sessions", {})
+            self.ActiveSessions = OAuthStateStore(
+                self.StateBackend,
+                ttl_seconds=session_config.get("ttl_seconds", 15 * 60),
+                max_sessions=session_config.get("max_sessions", 10000)
+            )
+        else:
+            self.ActiveSessions = {}
         
         self.Logger.info("🔐 Modern OAuth 2.0 Manager initialized with 2025 security standards")
     
@@ -378,6 +397,7 @@ class ModernSocialAuthManager:
             # Configure flow with additional security parameters
             self.GoogleFlow.code_challenge = code_challenge
             self.GoogleFlow.code_challenge_method = 'S256'
+            self.GoogleFlow.code_verifier = code_verifier
             
             authorization_url, flow_state = self.GoogleFlow.authorization_url(
                 access_type='offline',
@@ -471,15 +491,25 @@ class ModernSocialAuthManager:
         Handle OAuth callback with comprehensive security validation
         """
         try:
-            # Find session by state if session_id not provided
+            # Claim the session atomically - each OAuth state is single use
             session_data = None
-            if session_id and session_id in self.ActiveSessions:
-                session_data = self.ActiveSessions[session_id]
+            if session_id:
+                # A forged state must not burn the real login - check before claiming
+                pending = self.ActiveSessions.get(session_id)
+                if pending and pending.get("state") != state:
+                    return {"success": False, "error": "State validation failed"}
+                if pending:
+                    session_data = self.ActiveSessions.pop(session_id, None)
+            elif hasattr(self.ActiveSessions, "ConsumeByState"):
+                # O(1) lookup through the state index
+                match = self.ActiveSessions.ConsumeByState(state)
+                if match:
+                    session_id, session_data = match
             else:
-                # Find by state (fallback)
-                for sid, data in self.ActiveSessions.items():
+                # Find by state (fallback for plain dict store)
+                for sid, data in list(self.ActiveSessions.items()):
                     if data.get("state") == state:
-                        session_data = data
+                        session_data = self.ActiveSessions.pop(sid, None)
                         session_id = sid
                         break
             
@@ -493,7 +523,6 @@ class ModernSocialAuthManager:
             # Check session expiry (15 minutes max)
             session_age = datetime.utcnow() - session_data["created_at"]
             if session_age > timedelta(minutes=15):
-                self.ActiveSessions.pop(session_id, None)
                 return {"success": False, "error": "Session expired"}
             
             provider = session_data["provider"]
@@ -503,9 +532,6 @@ class ModernSocialAuthManager:
             else:
                 result = self._HandleAuthLibCallback(provider, code, session_data)
             
-            # Clean up session
-            self.ActiveSessions.pop(session_id, None)
-            
             return result
             
         except Exception as e:
@@ -515,6 +541,9 @@ class ModernSocialAuthManager:
     def _HandleGoogleCallback(self, code: str, session_data: Dict) -> Dict[str, Any]:
         """Handle Google OAuth callback using official library"""
         try:
+            # Restore PKCE verifier - the callback may land on a different worker
+            self.GoogleFlow.code_verifier = session_data.get("code_verifier")
+            
             # Exchange code for token
             self.GoogleFlow.fetch_token(code=code)
             credentials = self.GoogleFlow.credentials
@@ -694,6 +723,17 @@ class ModernSocialAuthManager:
             return True
         
         key = f"{user_ip}:{action}"
+        
+        # Check if within rate limit
+        rate_limit = self.SecurityConfig.get("oauth_security", {}).get("rate_limiting", {})
+        max_attempts = rate_limit.get("oauth_attempts_per_minute", 10)
+        
+        if self.StateBackend and self.StateBackend.IsShared:
+            # Fixed one-minute window counted atomically in the shared backend
+            window = int(datetime.utcnow().timestamp() // 60)
+            count = self.StateBackend.Increment("oauth_rate_limit", f"{key}:{window}", ttl_seconds=120)
+            return count <= max_attempts
+        
         now = datetime.utcnow()
         
         # Clean old entries
@@ -708,10 +748,6 @@ class ModernSocialAuthManager:
         
         entry = self.RateLimitStore[key]
         
-        # Check if within rate limit
-        rate_limit = self.SecurityConfig.get("oauth_security", {}).get("rate_limiting", {})
-        max_attempts = rate_limit.get("oauth_attempts_per_minute", 10)
-        
         if entry["count"] >= max_attempts:
             return False
         
@@ -2,11 +2,12 @@
 # Path: /home/herb/Desktop/AndyLibrary/Source/Core/StudentBookDownloader.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-24
-# Last Modified: 2025-07-24 01:24PM
+# Last Modified: 2026-10-19 04:20PM
 
 """
 Student Book Downloader - Educational Mission Focused
 Provides cost-conscious book download with full transparency for students
+Download history is persisted in SQLite so monthly budgets survive restarts.
 """
 
 import os
@@ -22,6 +23,10 @@ from enum import Enum
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Ids per IN (...) query - stays well under SQLite's bound-parameter limit
+COST_QUERY_BATCH_SIZE = 500
+DEFAULT_FILE_SIZE_BYTES = 5000000
+
 @dataclass
 class BookCostInfo:
     """Information about book download costs for students"""
@@ -48,8 +53,10 @@ class StudentRegion(Enum):
 class StudentBookDownloader:
     """Handles book downloads with student cost protection"""
     
-    def __init__(self, database_path: str = "Data/Databases/MyLibrary.db"):
+    def __init__(self, database_path: str = "Data/Databases/MyLibrary.db",
+                 history_path: str = "Data/Local/download_history.db"):
         self.database_path = database_path
+        self.history_path = history_path
         self.monthly_budget_usd = 5.00  # Student monthly data budget
         self.cost_per_mb = {
             StudentRegion.DEVELOPING: 0.10,
@@ -60,8 +67,87 @@ class StudentBookDownloader:
         # Student download preferences
         self.default_region = StudentRegion.DEVELOPING  # Most conservative
         self.download_history = []
-        self.monthly_spending = 0.0
         
+        # Metered bytes allowed per month at the default region's data price
+        self.monthly_byte_budget = int(
+            self.monthly_budget_usd / self.cost_per_mb[self.default_region] * 1024 * 1024
+        )
+        
+        self._InitializeHistory()
+        self.monthly_spending = self._GetMonthTotals(datetime.now().strftime('%Y-%m'))['total_spent']
+    
+    def _ConnectHistory(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.history_path, timeout=30)
+    
+    def _InitializeHistory(self):
+        """Create the persistent download history table"""
+        history_dir = os.path.dirname(self.history_path)
+        if history_dir:
+            os.makedirs(history_dir, exist_ok=True)
+        
+        with self._ConnectHistory() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS download_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    book_id INTEGER NOT NULL,
+                    cost_usd REAL NOT NULL DEFAULT 0,
+                    method TEXT NOT NULL,
+                    bytes_downloaded INTEGER NOT NULL DEFAULT 0,
+                    month TEXT NOT NULL,
+                    timestamp TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_download_history_month
+                ON download_history(month, cost_usd, bytes_downloaded)
+            """)
+    
+    def _GetMonthTotals(self, month: str) -> Dict[str, Any]:
+        """Spending, download count and metered bytes for one month"""
+        conn = self._ConnectHistory()
+        try:
+            total_spent, downloads_count, metered_bytes = conn.execute("""
+                SELECT COALESCE(SUM(cost_usd), 0), COUNT(*),
+                       COALESCE(SUM(CASE WHEN cost_usd > 0 THEN bytes_downloaded ELSE 0 END), 0)
+                FROM download_history
+                WHERE month = ?
+            """, (month,)).fetchone()
+        finally:
+            conn.close()
+        
+        return {
+            'total_spent': total_spent,
+            'downloads_count': downloads_count,
+            'metered_bytes': metered_bytes
+        }
+        
+    def _BuildCostInfo(self, book_id: int, title: str, file_size_bytes: Optional[int],
+                       cost_per_mb_rate: float) -> BookCostInfo:
+        """Cost and warning level for one book row"""
+        # Calculate costs
+        file_size_mb = (file_size_bytes or DEFAULT_FILE_SIZE_BYTES) / (1024 * 1024)  # Default 5MB if unknown
+        estimated_cost = file_size_mb * cost_per_mb_rate
+        budget_percentage = (estimated_cost / self.monthly_budget_usd) * 100
+        
+        # Determine warning level
+        if estimated_cost < 0.50:
+            warning_level = CostWarningLevel.LOW.value
+        elif estimated_cost < 1.50:
+            warning_level = CostWarningLevel.MEDIUM.value
+        elif estimated_cost < 3.00:
+            warning_level = CostWarningLevel.HIGH.value
+        else:
+            warning_level = CostWarningLevel.EXTREME.value
+        
+        return BookCostInfo(
+            book_id=book_id,
+            title=title,
+            file_size_mb=round(file_size_mb, 1),
+            estimated_cost_usd=round(estimated_cost, 2),
+            warning_level=warning_level,
+            budget_percentage=round(budget_percentage, 1)
+        )
+    
     def GetBookCostEstimate(self, book_id: int, region: StudentRegion = None) -> Optional[BookCostInfo]:
         """Get cost estimate for downloading a book"""
         region = region or self.default_region
@@ -80,48 +166,56 @@ class StudentBookDownloader:
             if not book:
                 return None
             
-            # Calculate costs
-            file_size_mb = (book['FileSize'] or 5000000) / (1024 * 1024)  # Default 5MB if unknown
-            cost_per_mb_rate = self.cost_per_mb[region]
-            estimated_cost = file_size_mb * cost_per_mb_rate
-            budget_percentage = (estimated_cost / self.monthly_budget_usd) * 100
-            
-            # Determine warning level
-            if estimated_cost < 0.50:
-                warning_level = CostWarningLevel.LOW.value
-            elif estimated_cost < 1.50:
-                warning_level = CostWarningLevel.MEDIUM.value
-            elif estimated_cost < 3.00:
-                warning_level = CostWarningLevel.HIGH.value
-            else:
-                warning_level = CostWarningLevel.EXTREME.value
-            
-            return BookCostInfo(
-                book_id=book_id,
-                title=book['title'],
-                file_size_mb=round(file_size_mb, 1),
-                estimated_cost_usd=round(estimated_cost, 2),
-                warning_level=warning_level,
-                budget_percentage=round(budget_percentage, 1)
-            )
+            return self._BuildCostInfo(book_id, book['title'], book['FileSize'], self.cost_per_mb[region])
             
         finally:
             conn.close()
     
+    def GetBookCostEstimates(self, book_ids: List[int], region: StudentRegion = None) -> Dict[int, BookCostInfo]:
+        """Cost estimates for many books with one connection and batched IN (...) queries"""
+        region = region or self.default_region
+        cost_per_mb_rate = self.cost_per_mb[region]
+        unique_ids = list(dict.fromkeys(book_ids))
+        estimates = {}
+        
+        if not unique_ids:
+            return estimates
+        
+        conn = sqlite3.connect(self.database_path)
+        
+        try:
+            for offset in range(0, len(unique_ids), COST_QUERY_BATCH_SIZE):
+                batch = unique_ids[offset:offset + COST_QUERY_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT id, title, FileSize FROM books WHERE id IN ({placeholders})", batch
+                )
+                for book_id, title, file_size in rows:
+                    estimates[book_id] = self._BuildCostInfo(book_id, title, file_size, cost_per_mb_rate)
+        finally:
+            conn.close()
+        
+        return estimates
+    
     def GetMultipleBooksCost(self, book_ids: List[int], region: StudentRegion = None) -> Dict[str, Any]:
         """Get cost estimate for downloading multiple books"""
         region = region or self.default_region
         
+        estimates = self.GetBookCostEstimates(book_ids, region)
+        
         book_costs = []
         total_cost = 0.0
         total_size_mb = 0.0
+        missing_ids = []
         
         for book_id in book_ids:
-            cost_info = self.GetBookCostEstimate(book_id, region)
+            cost_info = estimates.get(book_id)
             if cost_info:
                 book_costs.append(cost_info)
                 total_cost += cost_info.estimated_cost_usd
                 total_size_mb += cost_info.file_size_mb
+            else:
+                missing_ids.append(book_id)
         
         # Determine overall warning level
         total_budget_percentage = (total_cost / self.monthly_budget_usd) * 100
@@ -142,7 +236,8 @@ class StudentBookDownloader:
             'budget_percentage': round(total_budget_percentage, 1),
             'warning_level': overall_warning,
             'region': region.value,
-            'remaining_budget': round(self.monthly_budget_usd - self.monthly_spending - total_cost, 2)
+            'remaining_budget': round(self.monthly_budget_usd - self.monthly_spending - total_cost, 2),
+            'missing_book_ids': missing_ids
         }
     
     def GetDownloadOptions(self, book_id: int, region: StudentRegion = None) -> Dict[str, Any]:
@@ -247,35 +342,36 @@ class StudentBookDownloader:
                 'tip': 'Save your mobile data for urgent downloads and smaller resources.'
             }
     
-    def RecordDownload(self, book_id: int, actual_cost: float, download_method: str) -> None:
+    def RecordDownload(self, book_id: int, actual_cost: float, download_method: str,
+                       bytes_downloaded: int = 0) -> None:
         """Record a download for budget tracking"""
         download_record = {
             'book_id': book_id,
             'cost': actual_cost,
             'method': download_method,
+            'bytes': bytes_downloaded,
             'timestamp': datetime.now().isoformat(),
             'month': datetime.now().strftime('%Y-%m')
         }
         
+        with self._ConnectHistory() as conn:
+            conn.execute("""
+                INSERT INTO download_history (book_id, cost_usd, method, bytes_downloaded, month, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (book_id, actual_cost, download_method, bytes_downloaded,
+                  download_record['month'], download_record['timestamp']))
+        
         self.download_history.append(download_record)
         
         # Update monthly spending if it's the current month
-        current_month = datetime.now().strftime('%Y-%m')
-        self.monthly_spending = sum(
-            record['cost'] for record in self.download_history 
-            if record['month'] == current_month
-        )
+        self.monthly_spending = self._GetMonthTotals(download_record['month'])['total_spent']
     
     def GetMonthlySpendingSummary(self) -> Dict[str, Any]:
         """Get summary of student's monthly spending"""
         current_month = datetime.now().strftime('%Y-%m')
+        totals = self._GetMonthTotals(current_month)
         
-        month_downloads = [
-            record for record in self.download_history 
-            if record['month'] == current_month
-        ]
-        
-        total_spent = sum(record['cost'] for record in month_downloads)
+        total_spent = totals['total_spent']
         remaining_budget = self.monthly_budget_usd - total_spent
         
         return {
@@ -283,8 +379,11 @@ class StudentBookDownloader:
             'total_spent': round(total_spent, 2),
             'remaining_budget': round(remaining_budget, 2),
             'budget_used_percentage': round((total_spent / self.monthly_budget_usd) * 100, 1),
-            'downloads_count': len(month_downloads),
-            'budget_status': 'good' if remaining_budget > 2.0 else 'caution' if remaining_budget > 0.5 else 'critical'
+            'downloads_count': totals['downloads_count'],
+            'budget_status': 'good' if remaining_budget > 2.0 else 'caution' if remaining_budget > 0.5 else 'critical',
+            'bytes_used': totals['metered_bytes'],
+            'byte_budget': self.monthly_byte_budget,
+            'remaining_bytes': max(0, self.monthly_byte_budget - totals['metered_bytes'])
         }
 
 # Example usage for testing
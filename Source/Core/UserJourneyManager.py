@@ -2,7 +2,7 @@
 # Path: /home/herb/Desktop/AndyLibrary/Source/Core/UserJourneyManager.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-28
-# Last Modified: 2025-07-28 07:20AM
+# Last Modified: 2026-10-19 12:00PM
 
 """
 User Journey Manager for AndyLibrary - Project Himalaya Benchmark Implementation
@@ -11,6 +11,7 @@ Defines the gold standard for educational platform user workflows
 """
 
 import os
+import sys
 import json
 import logging
 from typing import Dict, Any, Optional, List
@@ -19,6 +20,16 @@ from pathlib import Path
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from Utils.StateBackend import GetStateBackend
+    from Utils.JourneyStore import JourneyStore
+except ImportError:
+    GetStateBackend = None
+    JourneyStore = None
+    print("⚠️ StateBackend not available - journeys kept in process memory")
+
 class JourneyStage(Enum):
     """User journey stages with emotional and functional progression"""
     DISCOVERY = "discovery"          # Landing page - inspiration and mission connection
@@ -35,7 +46,7 @@ class UserIntent(Enum):
     PARENT = "parent"              # Guardian supporting child's education
     ADMINISTRATOR = "administrator" # Institution managing educational access
 
-@dataclass
+@dataclass(slots=True)
 class JourneyMetrics:
     """User journey performance and engagement metrics"""
     stage: str
@@ -47,7 +58,7 @@ class JourneyMetrics:
     satisfaction_score: Optional[float] = None
     conversion_successful: bool = False
 
-@dataclass
+@dataclass(slots=True)
 class UserContext:
     """Comprehensive user context for personalized journey orchestration"""
     user_id: Optional[str] = None
@@ -60,6 +71,7 @@ class UserContext:
     feature_discovery_level: int = 0
     accessibility_requirements: Dict[str, bool] = None
     device_capabilities: Dict[str, Any] = None
+    metrics_rollup: Dict[str, Any] = None  # Totals for stages trimmed from journey_metrics
     
     def __post_init__(self):
         if self.preferences is None:
@@ -70,6 +82,26 @@ class UserContext:
             self.accessibility_requirements = {}
         if self.device_capabilities is None:
             self.device_capabilities = {}
+        if self.metrics_rollup is None:
+            self.metrics_rollup = {
+                "stages": 0, "interactions": 0, "errors_encountered": 0,
+                "help_requests": 0, "satisfaction_total": 0.0
+            }
+
+def _EncodeContext(context: UserContext) -> Dict[str, Any]:
+    """Flatten a UserContext into plain values for a shared state backend"""
+    data = asdict(context)
+    data["current_stage"] = context.current_stage.value
+    data["user_intent"] = context.user_intent.value if context.user_intent else None
+    return data
+
+def _DecodeContext(data: Dict[str, Any]) -> UserContext:
+    """Rebuild a UserContext stored by _EncodeContext"""
+    data = dict(data)
+    data["current_stage"] = JourneyStage(data["current_stage"])
+    data["user_intent"] = UserIntent(data["user_intent"]) if data.get("user_intent") else None
+    data["journey_metrics"] = [JourneyMetrics(**m) for m in data.get("journey_metrics") or []]
+    return UserContext(**data)
 
 class UserJourneyManager:
     """
@@ -87,8 +119,17 @@ class UserJourneyManager:
         self.Logger = logging.getLogger(__name__)
         self.Config = config or {}
         
-        # Journey orchestration state
-        self.ActiveJourneys: Dict[str, UserContext] = {}
+        # Journey orchestration state - bounded, idle-expiring, shared across workers when configured
+        self.MaxMetricsHistory = self.Config.get("max_metrics_history", 10)
+        if JourneyStore:
+            self.ActiveJourneys = JourneyStore(
+                GetStateBackend(),
+                idle_ttl_seconds=self.Config.get("journey_idle_ttl_seconds", 30 * 60),
+                max_entries=self.Config.get("max_active_journeys", 10000),
+                encoder=_EncodeContext, decoder=_DecodeContext
+            )
+        else:
+            self.ActiveJourneys: Dict[str, UserContext] = {}
         
         # Performance and analytics
         self.JourneyAnalytics = {}
@@ -127,7 +168,7 @@ class UserJourneyManager:
                 stage=JourneyStage.DISCOVERY.value,
                 entry_time=datetime.utcnow()
             )
-            context.journey_metrics.append(discovery_metrics)
+            self._AppendStageMetrics(context, discovery_metrics)
             
             # Store in active journeys
             self.ActiveJourneys[session_id] = context
@@ -165,7 +206,8 @@ class UserJourneyManager:
                 stage=target_stage.value,
                 entry_time=datetime.utcnow()
             )
-            context.journey_metrics.append(new_metrics)
+            self._AppendStageMetrics(context, new_metrics)
+            self.ActiveJourneys[session_id] = context
             
             # Generate personalized recommendations
             recommendations = self._GenerateJourneyRecommendations(context, previous_stage)
@@ -176,7 +218,7 @@ class UserJourneyManager:
                 "success": True,
                 "current_stage": target_stage.value,
                 "recommendations": recommendations,
-                "context": asdict(context)
+                "context": self._GetContextSnapshot(context, previous_stage)
             }
             
         except Exception as e:
@@ -202,6 +244,8 @@ class UserJourneyManager:
             if preferences:
                 context.preferences.update(preferences)
             
+            self.ActiveJourneys[session_id] = context
+            
             # Generate personalized experience configuration
             experience_config = {
                 "content_emphasis": self._GetContentEmphasis(context.user_intent),
@@ -243,6 +287,8 @@ class UserJourneyManager:
                     current_metrics.errors_encountered += 1
                 elif interaction_type == "help_request":
                     current_metrics.help_requests += 1
+                
+                self.ActiveJourneys[session_id] = context
             
             # Update journey analytics (aggregated, anonymized)
             self._UpdateJourneyAnalytics(context.current_stage, interaction_type, interaction_data)
@@ -469,6 +515,33 @@ class UserJourneyManager:
             if "satisfaction" in interaction_data:
                 current_metrics.satisfaction_score = interaction_data["satisfaction"]
     
+    def _AppendStageMetrics(self, context: UserContext, metrics: JourneyMetrics):
+        """Append stage metrics, rolling the oldest stages into totals past the history cap"""
+        context.journey_metrics.append(metrics)
+        
+        while len(context.journey_metrics) > self.MaxMetricsHistory:
+            oldest = context.journey_metrics.pop(0)
+            rollup = context.metrics_rollup
+            rollup["stages"] += 1
+            rollup["interactions"] += oldest.interactions
+            rollup["errors_encountered"] += oldest.errors_encountered
+            rollup["help_requests"] += oldest.help_requests
+            rollup["satisfaction_total"] += oldest.satisfaction_score or 0
+    
+    def _GetContextSnapshot(self, context: UserContext, previous_stage: JourneyStage) -> Dict[str, Any]:
+        """Compact view of what changed in this step (instead of serializing the full history)"""
+        current_metrics = context.journey_metrics[-1] if context.journey_metrics else None
+        return {
+            "session_id": context.session_id,
+            "previous_stage": previous_stage.value,
+            "current_stage": context.current_stage.value,
+            "user_intent": context.user_intent.value if context.user_intent else None,
+            "completed_onboarding": context.completed_onboarding,
+            "feature_discovery_level": context.feature_discovery_level,
+            "stage_entry_time": current_metrics.entry_time.isoformat() if current_metrics else None,
+            "stages_visited": len(context.journey_metrics) + context.metrics_rollup["stages"]
+        }
+    
     def _GenerateJourneyRecommendations(self, context: UserContext, previous_stage: JourneyStage) -> Dict[str, Any]:
         """Generate personalized recommendations for journey progression"""
         recommendations = {
@@ -630,10 +703,13 @@ class UserJourneyManager:
     
     def _GenerateJourneySummary(self, context: UserContext) -> Dict[str, Any]:
         """Generate comprehensive journey summary"""
+        rollup = context.metrics_rollup
+        total_stages = len(context.journey_metrics) + rollup["stages"]
+        satisfaction_total = rollup["satisfaction_total"] + sum(m.satisfaction_score or 0 for m in context.journey_metrics)
         return {
-            "total_stages": len(context.journey_metrics),
-            "total_interactions": sum(m.interactions for m in context.journey_metrics),
-            "avg_satisfaction": sum(m.satisfaction_score or 0 for m in context.journey_metrics) / len(context.journey_metrics) if context.journey_metrics else 0,
+            "total_stages": total_stages,
+            "total_interactions": rollup["interactions"] + sum(m.interactions for m in context.journey_metrics),
+            "avg_satisfaction": satisfaction_total / total_stages if total_stages else 0,
             "feature_discovery_level": context.feature_discovery_level,
             "completion_successful": True
         }
@@ -657,4 +733,10 @@ class UserJourneyManager:
     
     def GetActiveJourneyCount(self) -> int:
         """Get count of currently active user journeys"""
-        return len(self.ActiveJourneys)
\ No newline at end of file
+        return len(self.ActiveJourneys)
+    
+    def PurgeIdleJourneys(self) -> int:
+        """Evict journeys idle past the configured TTL"""
+        if hasattr(self.ActiveJourneys, "PurgeExpired"):
+            return self.ActiveJourneys.PurgeExpired()
+        return 0
\ No newline at end of file
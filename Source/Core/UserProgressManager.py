@@ -2,7 +2,7 @@
 # Path: /home/herb/Desktop/AndyLibrary/Source/Core/UserProgressManager.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-26
-# Last Modified: 2025-07-26 05:30AM
+# Last Modified: 2026-10-19 09:15PM
 
 """
 User Progress Manager for AndyLibrary
@@ -65,12 +65,18 @@ class LearningStatistics:
     AverageSessionTime: int
     PreferredReadingTimes: List[int]  # hours of day
 
+# Upper bound on events accepted in one offline sync batch
+MAX_SYNC_BATCH_EVENTS = 1000
+
 class UserProgressManager:
     """
     Manages user progress tracking for AndyLibrary
     Provides offline-first learning analytics and progress tracking
     """
     
+    # Databases whose progress schema has already been created in this process
+    _InitializedDatabases: Set[str] = set()
+    
     def __init__(self, DatabasePath: str = None, UserId: int = None):
         """
         Initialize User Progress Manager
@@ -83,8 +89,19 @@ class UserProgressManager:
         self.UserId = UserId
         self.Logger = logging.getLogger(self.__class__.__name__)
         
-        # Initialize progress tracking tables
-        self.InitializeProgressTables()
+        # Initialize progress tracking tables (once per database file per process)
+        SchemaKey = self._GetSchemaKey()
+        if SchemaKey not in UserProgressManager._InitializedDatabases:
+            self.InitializeProgressTables()
+            UserProgressManager._InitializedDatabases.add(self._GetSchemaKey())
+    
+    def _GetSchemaKey(self) -> Optional[str]:
+        """Identify the database file so a replaced file gets its schema re-created"""
+        try:
+            Stat = os.stat(self.DatabasePath)
+            return f"{os.path.abspath(self.DatabasePath)}:{Stat.st_dev}:{Stat.st_ino}"
+        except OSError:
+            return None
     
     def InitializeProgressTables(self) -> None:
         """Initialize database tables for progress tracking"""
@@ -156,11 +173,41 @@ class UserProgressManager:
                     )
                 """)
                 
+                # Per-category reading time, maintained incrementally for favorite_category
+                Cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS learning_category_time (
+                        user_id INTEGER NOT NULL,
+                        category TEXT NOT NULL,
+                        time_spent INTEGER DEFAULT 0,
+                        PRIMARY KEY (user_id, category)
+                    ) WITHOUT ROWID
+                """)
+                
+                # Per-device high-water mark for offline progress sync
+                Cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS progress_sync_cursors (
+                        user_id INTEGER NOT NULL,
+                        device_id TEXT NOT NULL,
+                        last_sequence INTEGER DEFAULT 0,
+                        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (user_id, device_id)
+                    ) WITHOUT ROWID
+                """)
+                
+                # Reading position (added after the original schema)
+                Cursor.execute("PRAGMA table_info(book_progress)")
+                if "last_page" not in {Row[1] for Row in Cursor.fetchall()}:
+                    Cursor.execute("ALTER TABLE book_progress ADD COLUMN last_page INTEGER")
+                
                 # Create indexes for performance
                 Cursor.execute("CREATE INDEX IF NOT EXISTS idx_reading_sessions_user_book ON reading_sessions(user_id, book_id)")
                 Cursor.execute("CREATE INDEX IF NOT EXISTS idx_book_progress_user ON book_progress(user_id)")
                 Cursor.execute("CREATE INDEX IF NOT EXISTS idx_book_progress_last_accessed ON book_progress(last_accessed)")
                 
+                # Covering indexes for the progress page (recent books, 30-day activity)
+                Cursor.execute("CREATE INDEX IF NOT EXISTS idx_book_progress_user_last_accessed ON book_progress(user_id, last_accessed)")
+                Cursor.execute("CREATE INDEX IF NOT EXISTS idx_reading_sessions_user_start ON reading_sessions(user_id, start_time, time_spent)")
+                
                 Conn.commit()
                 self.Logger.info("Progress tracking tables initialized successfully")
                 
@@ -198,6 +245,12 @@ class UserProgressManager:
                     VALUES (?, ?, ?, ?, ?)
                 """, (BookId, self.UserId, SessionId, CurrentTime, DeviceType))
                 
+                Cursor.execute(
+                    "SELECT 1 FROM book_progress WHERE book_id = ? AND user_id = ?",
+                    (BookId, self.UserId)
+                )
+                IsNewBook = Cursor.fetchone() is None
+                
                 # Update or create book progress
                 Cursor.execute("""
                     INSERT INTO book_progress 
@@ -209,6 +262,15 @@ class UserProgressManager:
                         updated_at = CURRENT_TIMESTAMP
                 """, (BookId, self.UserId, BookTitle, BookCategory, CurrentTime, CurrentTime, CurrentTime))
                 
+                # First access of this book - count it (rows are created lazily by EndReadingSession)
+                if IsNewBook:
+                    Cursor.execute("""
+                        UPDATE learning_statistics
+                        SET total_books_accessed = total_books_accessed + 1,
+                            updated_at = CURRENT_TIMESTAMP
+                        WHERE user_id = ?
+                    """, (self.UserId,))
+                
                 Conn.commit()
                 
                 self.Logger.info(f"Started reading session {SessionId} for book {BookId}")
@@ -252,6 +314,15 @@ class UserProgressManager:
                 EndTime = datetime.now()
                 TimeSpent = int((EndTime - StartTime).total_seconds())
                 
+                # Book state before this session, for statistics deltas
+                Cursor.execute("""
+                    SELECT category, completion_percentage FROM book_progress
+                    WHERE book_id = ? AND user_id = ?
+                """, (BookId, UserId))
+                BookRow = Cursor.fetchone()
+                Category = BookRow[0] if BookRow else "General"
+                PreviousCompletion = BookRow[1] if BookRow else 0.0
+                
                 # Update reading session
                 Cursor.execute("""
                     UPDATE reading_sessions 
@@ -269,10 +340,14 @@ class UserProgressManager:
                     WHERE book_id = ? AND user_id = ?
                 """, (CurrentTime, TimeSpent, CompletionPercentage, BookId, UserId))
                 
-                Conn.commit()
+                # Update learning statistics in the same transaction
+                self._ApplySessionDeltas(
+                    Cursor, UserId, Category, TimeSpent,
+                    BookCompleted=(PreviousCompletion < 100.0 <= CompletionPercentage),
+                    ActiveDate=EndTime
+                )
                 
-                # Update learning statistics
-                self.UpdateLearningStatistics(UserId)
+                Conn.commit()
                 
                 SessionStats = {
                     "session_id": SessionId,
@@ -290,82 +365,178 @@ class UserProgressManager:
             self.Logger.error(f"Failed to end reading session: {e}")
             raise
     
+    def _ApplySessionDeltas(self, Cursor: sqlite3.Cursor, UserId: int, Category: str, TimeSpent: int,
+                            BookCompleted: bool, ActiveDate: datetime) -> None:
+        """
+        Apply one finished session to learning_statistics without rescanning history
+        
+        Runs inside the caller's transaction. Every statement is a primary-key lookup.
+        """
+        Cursor.execute("""
+            SELECT total_reading_time, total_sessions, favorite_category,
+                   reading_streak, last_active_date
+            FROM learning_statistics WHERE user_id = ?
+        """, (UserId,))
+        StatsRow = Cursor.fetchone()
+        
+        if not StatsRow:
+            # First session for this user (or statistics predating incremental tracking)
+            self._RebuildLearningStatistics(Cursor, UserId, ActiveDate)
+            return
+        
+        TotalTime, TotalSessions, FavoriteCategory, ReadingStreak, LastActiveStr = StatsRow
+        TotalTime = (TotalTime or 0) + TimeSpent
+        TotalSessions = (TotalSessions or 0) + 1
+        
+        # Per-category time; favorite changes only if this category overtakes it
+        Cursor.execute("""
+            INSERT INTO learning_category_time (user_id, category, time_spent)
+            VALUES (?, ?, ?)
+            ON CONFLICT(user_id, category) DO UPDATE SET time_spent = time_spent + excluded.time_spent
+        """, (UserId, Category, TimeSpent))
+        
+        if FavoriteCategory != Category:
+            Cursor.execute("""
+                SELECT category, time_spent FROM learning_category_time
+                WHERE user_id = ? AND category IN (?, ?)
+            """, (UserId, Category, FavoriteCategory or ""))
+            CategoryTimes = dict(Cursor.fetchall())
+            if CategoryTimes.get(Category, 0) > CategoryTimes.get(FavoriteCategory, -1):
+                FavoriteCategory = Category
+        
+        # Streak: consecutive days, tracked from the last active date
+        Today = ActiveDate.date()
+        LastActive = datetime.fromisoformat(LastActiveStr).date() if LastActiveStr else None
+        if LastActive == Today:
+            ReadingStreak = max(ReadingStreak or 0, 1)
+        elif LastActive == Today - timedelta(days=1):
+            ReadingStreak = (ReadingStreak or 0) + 1
+        else:
+            ReadingStreak = 1
+        
+        Cursor.execute("""
+            UPDATE learning_statistics
+            SET total_reading_time = ?,
+                total_sessions = ?,
+                favorite_category = ?,
+                reading_streak = ?,
+                last_active_date = ?,
+                books_completed = books_completed + ?,
+                average_session_time = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE user_id = ?
+        """, (
+            TotalTime, TotalSessions, FavoriteCategory, ReadingStreak,
+            ActiveDate.isoformat(), 1 if BookCompleted else 0,
+            int(TotalTime / TotalSessions), UserId
+        ))
+    
+    def _ApplyBookDeltas(self, Cursor: sqlite3.Cursor, UserId: int, BooksAccessed: int, BooksCompleted: int) -> None:
+        """
+        Count newly accessed and newly completed books in learning_statistics
+        
+        Runs inside the caller's transaction, after book_progress was written.
+        """
+        Cursor.execute("""
+            UPDATE learning_statistics
+            SET total_books_accessed = total_books_accessed + ?,
+                books_completed = books_completed + ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE user_id = ?
+        """, (BooksAccessed, BooksCompleted, UserId))
+        
+        if Cursor.rowcount == 0:
+            # No statistics yet for this user - book_progress already holds the new rows
+            self._RebuildLearningStatistics(Cursor, UserId)
+    
+    def _RebuildLearningStatistics(self, Cursor: sqlite3.Cursor, UserId: int, ActiveDate: datetime = None) -> None:
+        """Recompute a user's statistics and category totals from full history"""
+        Cursor.execute("""
+            SELECT COUNT(*) as total_books,
+                   COUNT(CASE WHEN completion_percentage >= 100.0 THEN 1 END) as completed_books
+            FROM book_progress
+            WHERE user_id = ?
+        """, (UserId,))
+        TotalBooks, CompletedBooks = Cursor.fetchone()
+        
+        Cursor.execute("""
+            SELECT COUNT(*), SUM(time_spent) FROM reading_sessions
+            WHERE user_id = ? AND end_time IS NOT NULL
+        """, (UserId,))
+        TotalSessions, TotalTime = Cursor.fetchone()
+        TotalTime = TotalTime or 0
+        
+        # Rebuild per-category totals
+        Cursor.execute("DELETE FROM learning_category_time WHERE user_id = ?", (UserId,))
+        Cursor.execute("""
+            INSERT INTO learning_category_time (user_id, category, time_spent)
+            SELECT user_id, category, SUM(total_time_spent)
+            FROM book_progress
+            WHERE user_id = ?
+            GROUP BY category
+        """, (UserId,))
+        Cursor.execute("""
+            SELECT category FROM learning_category_time
+            WHERE user_id = ?
+            ORDER BY time_spent DESC
+            LIMIT 1
+        """, (UserId,))
+        FavoriteCategoryResult = Cursor.fetchone()
+        FavoriteCategory = FavoriteCategoryResult[0] if FavoriteCategoryResult else "General"
+        
+        # Streak: consecutive active days ending at the most recent one
+        Cursor.execute("""
+            SELECT DISTINCT DATE(start_time) FROM reading_sessions
+            WHERE user_id = ?
+            ORDER BY 1 DESC
+        """, (UserId,))
+        ReadingStreak = 0
+        LastActive = ActiveDate
+        ExpectedDay = None
+        for (DayStr,) in Cursor.fetchall():
+            Day = datetime.fromisoformat(DayStr).date()
+            if ExpectedDay is None:
+                LastActive = LastActive or datetime.combine(Day, datetime.min.time())
+            elif Day != ExpectedDay:
+                break
+            ReadingStreak += 1
+            ExpectedDay = Day - timedelta(days=1)
+        LastActiveStr = (LastActive or datetime.now()).isoformat()
+        
+        AvgSessionTime = int(TotalTime / TotalSessions) if TotalSessions else 0
+        
+        Cursor.execute("""
+            INSERT INTO learning_statistics 
+            (user_id, total_books_accessed, total_reading_time, total_sessions, 
+             favorite_category, reading_streak, last_active_date, books_completed, average_session_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                total_books_accessed = excluded.total_books_accessed,
+                total_reading_time = excluded.total_reading_time,
+                total_sessions = excluded.total_sessions,
+                favorite_category = excluded.favorite_category,
+                reading_streak = excluded.reading_streak,
+                last_active_date = excluded.last_active_date,
+                books_completed = excluded.books_completed,
+                average_session_time = excluded.average_session_time,
+                updated_at = CURRENT_TIMESTAMP
+        """, (
+            UserId, TotalBooks, TotalTime, TotalSessions, FavoriteCategory,
+            ReadingStreak, LastActiveStr, CompletedBooks, AvgSessionTime
+        ))
+    
     def UpdateLearningStatistics(self, UserId: int) -> None:
-        """Update overall learning statistics for a user"""
+        """
+        Rebuild overall learning statistics for a user from full history
+        
+        EndReadingSession keeps statistics current incrementally; this is for
+        backfills and repairs only.
+        """
         try:
             with sqlite3.connect(self.DatabasePath) as Conn:
-                Cursor = Conn.cursor()
-                
-                # Calculate statistics from progress data
-                Cursor.execute("""
-                    SELECT 
-                        COUNT(DISTINCT book_id) as total_books,
-                        SUM(total_time_spent) as total_time,
-                        SUM(total_sessions) as total_sessions,
-                        COUNT(CASE WHEN completion_percentage >= 100.0 THEN 1 END) as completed_books
-                    FROM book_progress 
-                    WHERE user_id = ?
-                """, (UserId,))
-                
-                Stats = Cursor.fetchone()
-                if not Stats:
-                    return
-                
-                TotalBooks, TotalTime, TotalSessions, CompletedBooks = Stats
-                TotalTime = TotalTime or 0
-                TotalSessions = TotalSessions or 0
-                
-                # Find favorite category
-                Cursor.execute("""
-                    SELECT category, SUM(total_time_spent) as time_in_category
-                    FROM book_progress 
-                    WHERE user_id = ?
-                    GROUP BY category
-                    ORDER BY time_in_category DESC
-                    LIMIT 1
-                """, (UserId,))
-                
-                FavoriteCategoryResult = Cursor.fetchone()
-                FavoriteCategory = FavoriteCategoryResult[0] if FavoriteCategoryResult else "General"
-                
-                # Calculate average session time
-                AvgSessionTime = int(TotalTime / TotalSessions) if TotalSessions > 0 else 0
-                
-                # Calculate reading streak (simplified - days with activity)
-                Cursor.execute("""
-                    SELECT COUNT(DISTINCT DATE(last_accessed)) as active_days
-                    FROM book_progress 
-                    WHERE user_id = ? AND last_accessed >= date('now', '-30 days')
-                """, (UserId,))
-                
-                ReadingStreak = Cursor.fetchone()[0] or 0
-                CurrentTime = datetime.now().isoformat()
-                
-                # Update or insert statistics
-                Cursor.execute("""
-                    INSERT INTO learning_statistics 
-                    (user_id, total_books_accessed, total_reading_time, total_sessions, 
-                     favorite_category, reading_streak, last_active_date, books_completed, average_session_time)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(user_id) DO UPDATE SET
-                        total_books_accessed = ?,
-                        total_reading_time = ?,
-                        total_sessions = ?,
-                        favorite_category = ?,
-                        reading_streak = ?,
-                        last_active_date = ?,
-                        books_completed = ?,
-                        average_session_time = ?,
-                        updated_at = CURRENT_TIMESTAMP
-                """, (
-                    UserId, TotalBooks, TotalTime, TotalSessions, FavoriteCategory, 
-                    ReadingStreak, CurrentTime, CompletedBooks, AvgSessionTime,
-                    TotalBooks, TotalTime, TotalSessions, FavoriteCategory,
-                    ReadingStreak, CurrentTime, CompletedBooks, AvgSessionTime
-                ))
-                
+                self._RebuildLearningStatistics(Conn.cursor(), UserId)
                 Conn.commit()
-                self.Logger.info(f"Updated learning statistics for user {UserId}")
+                self.Logger.info(f"Rebuilt learning statistics for user {UserId}")
                 
         except Exception as e:
             self.Logger.error(f"Failed to update learning statistics: {e}")
@@ -394,6 +565,13 @@ class UserProgressManager:
                 if StatsRow:
                     StatsColumns = [desc[0] for desc in Cursor.description]
                     Statistics = dict(zip(StatsColumns, StatsRow))
+                    
+                    # A streak lapses once a full day passes without reading
+                    LastActiveStr = Statistics.get("last_active_date")
+                    if LastActiveStr:
+                        LastActive = datetime.fromisoformat(LastActiveStr).date()
+                        if LastActive < datetime.now().date() - timedelta(days=1):
+                            Statistics["reading_streak"] = 0
                 else:
                     Statistics = {
                         "total_books_accessed": 0,
@@ -419,17 +597,7 @@ class UserProgressManager:
                     BookProgress = dict(zip(Columns, Row))
                     RecentBooks.append(BookProgress)
                 
-                # Get bookmarks
-                Cursor.execute("""
-                    SELECT book_id, title, category FROM book_progress 
-                    WHERE user_id = ? AND is_bookmarked = 1
-                    ORDER BY updated_at DESC
-                """, (UserId,))
-                
-                Bookmarks = [
-                    {"book_id": Row[0], "title": Row[1], "category": Row[2]}
-                    for Row in Cursor.fetchall()
-                ]
+                Bookmarks = self.GetBookmarks(UserId)
                 
                 # Get reading activity for the last 30 days
                 Cursor.execute("""
@@ -464,6 +632,178 @@ class UserProgressManager:
             self.Logger.error(f"Failed to get user progress: {e}")
             raise
     
+    def SyncProgressEvents(self, UserId: int, DeviceId: str, Events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Apply a batch of offline reading-progress events
+        
+        Events carry a per-device increasing "seq"; anything at or below the
+        device's stored cursor was already applied and is skipped, so clients
+        can safely retry a batch. Remaining events are coalesced per book and
+        written with a single executemany in one transaction.
+        
+        Args:
+            UserId: User ID
+            DeviceId: Stable identifier of the uploading device
+            Events: Dicts with seq, book_id, page, total_pages, completion_percentage,
+                    title, category, timestamp (all but book_id optional)
+            
+        Returns:
+            Dict with the new sync cursor and counts
+        """
+        if not DeviceId:
+            raise ValueError("Device ID is required for progress sync")
+        if len(Events) > MAX_SYNC_BATCH_EVENTS:
+            raise ValueError(f"Batch too large (max {MAX_SYNC_BATCH_EVENTS} events)")
+        
+        try:
+            with sqlite3.connect(self.DatabasePath) as Conn:
+                Cursor = Conn.cursor()
+                Cursor.execute("BEGIN IMMEDIATE")
+                
+                Cursor.execute("""
+                    SELECT last_sequence FROM progress_sync_cursors
+                    WHERE user_id = ? AND device_id = ?
+                """, (UserId, DeviceId))
+                Row = Cursor.fetchone()
+                LastSequence = Row[0] if Row else 0
+                
+                # Dedupe by sequence, then coalesce by book
+                SeenSequences: Set[int] = set()
+                Coalesced: Dict[int, Dict[str, Any]] = {}
+                NewCursor = LastSequence
+                Duplicates = 0
+                
+                for Event in Events:
+                    Sequence = Event.get("seq")
+                    if Sequence is not None:
+                        Sequence = int(Sequence)
+                        if Sequence <= LastSequence or Sequence in SeenSequences:
+                            Duplicates += 1
+                            continue
+                        SeenSequences.add(Sequence)
+                        NewCursor = max(NewCursor, Sequence)
+                    
+                    BookId = int(Event["book_id"])
+                    Timestamp = self._ParseEventTime(Event.get("timestamp"))
+                    Completion = self._EventCompletion(Event)
+                    
+                    Current = Coalesced.get(BookId)
+                    if Current is None:
+                        Coalesced[BookId] = {
+                            "timestamp": Timestamp,
+                            "page": Event.get("page"),
+                            "completion": Completion,
+                            "title": Event.get("title") or "Unknown Book",
+                            "category": Event.get("category") or "General"
+                        }
+                        continue
+                    
+                    # Latest event wins for position; completion only moves forward
+                    if Timestamp >= Current["timestamp"]:
+                        Current["timestamp"] = Timestamp
+                        Current["page"] = Event.get("page", Current["page"])
+                    Current["completion"] = max(Current["completion"], Completion)
+                
+                # Book state before this batch, for statistics deltas
+                PreviousCompletion: Dict[int, float] = {}
+                BookIds = list(Coalesced)
+                for Start in range(0, len(BookIds), 500):
+                    Chunk = BookIds[Start:Start + 500]
+                    Cursor.execute(f"""
+                        SELECT book_id, completion_percentage FROM book_progress
+                        WHERE user_id = ? AND book_id IN ({",".join("?" * len(Chunk))})
+                    """, (UserId, *Chunk))
+                    PreviousCompletion.update(Cursor.fetchall())
+                
+                BooksAccessed = sum(1 for BookId in Coalesced if BookId not in PreviousCompletion)
+                BooksCompleted = sum(
+                    1 for BookId, Update in Coalesced.items()
+                    if (PreviousCompletion.get(BookId) or 0.0) < 100.0 <= Update["completion"]
+                )
+                
+                Rows = [
+                    (
+                        BookId, UserId, Update["title"], Update["category"],
+                        Update["timestamp"], Update["timestamp"], Update["completion"], Update["page"]
+                    )
+                    for BookId, Update in Coalesced.items()
+                ]
+                
+                Cursor.executemany("""
+                    INSERT INTO book_progress
+                    (book_id, user_id, title, category, first_accessed, last_accessed,
+                     completion_percentage, last_page)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(book_id, user_id) DO UPDATE SET
+                        last_page = CASE WHEN excluded.last_accessed >= last_accessed
+                                         THEN COALESCE(excluded.last_page, last_page) ELSE last_page END,
+                        last_accessed = MAX(last_accessed, excluded.last_accessed),
+                        completion_percentage = MAX(completion_percentage, excluded.completion_percentage),
+                        updated_at = CURRENT_TIMESTAMP
+                """, Rows)
+                
+                # Update learning statistics in the same transaction
+                if BooksAccessed or BooksCompleted:
+                    self._ApplyBookDeltas(Cursor, UserId, BooksAccessed, BooksCompleted)
+                
+                Cursor.execute("""
+                    INSERT INTO progress_sync_cursors (user_id, device_id, last_sequence, updated_at)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(user_id, device_id) DO UPDATE SET
+                        last_sequence = MAX(last_sequence, excluded.last_sequence),
+                        updated_at = CURRENT_TIMESTAMP
+                """, (UserId, DeviceId, NewCursor))
+                
+                Conn.commit()
+                
+                self.Logger.info(
+                    f"Synced {len(Events) - Duplicates} progress events for user {UserId} "
+                    f"({len(Rows)} books, {Duplicates} duplicates)"
+                )
+                return {
+                    "cursor": NewCursor,
+                    "accepted": len(Events) - Duplicates,
+                    "duplicates": Duplicates,
+                    "books_updated": len(Rows)
+                }
+                
+        except Exception as e:
+            self.Logger.error(f"Failed to sync progress events: {e}")
+            raise
+    
+    def GetSyncCursor(self, UserId: int, DeviceId: str) -> int:
+        """Highest event sequence already applied for a device"""
+        with sqlite3.connect(self.DatabasePath) as Conn:
+            Row = Conn.execute("""
+                SELECT last_sequence FROM progress_sync_cursors
+                WHERE user_id = ? AND device_id = ?
+            """, (UserId, DeviceId)).fetchone()
+            return Row[0] if Row else 0
+    
+    @staticmethod
+    def _ParseEventTime(Value: Optional[str]) -> str:
+        """Client timestamps (often UTC 'Z') to local ISO strings, never in the future"""
+        Now = datetime.now()
+        if not Value:
+            return Now.isoformat()
+        try:
+            Parsed = datetime.fromisoformat(str(Value).replace("Z", "+00:00"))
+        except ValueError:
+            return Now.isoformat()
+        if Parsed.tzinfo is not None:
+            Parsed = Parsed.astimezone().replace(tzinfo=None)
+        return min(Parsed, Now).isoformat()
+    
+    @staticmethod
+    def _EventCompletion(Event: Dict[str, Any]) -> float:
+        """Completion percentage from an event, derived from page position if needed"""
+        if Event.get("completion_percentage") is not None:
+            return max(0.0, min(100.0, float(Event["completion_percentage"])))
+        Page, TotalPages = Event.get("page"), Event.get("total_pages")
+        if Page and TotalPages:
+            return round(max(0.0, min(100.0, 100.0 * int(Page) / int(TotalPages))), 1)
+        return 0.0
+    
     def ToggleBookmark(self, UserId: int, BookId: int) -> Dict[str, Any]:
         """Toggle bookmark status for a book"""
         try:
@@ -502,6 +842,30 @@ class UserProgressManager:
             self.Logger.error(f"Failed to toggle bookmark: {e}")
             raise
     
+    def GetBookmarks(self, UserId: int) -> List[Dict[str, Any]]:
+        """
+        Books the user has bookmarked, most recently changed first
+        
+        The web service worker keeps these books pinned in its offline cache.
+        """
+        try:
+            with sqlite3.connect(self.DatabasePath) as Conn:
+                Cursor = Conn.cursor()
+                Cursor.execute("""
+                    SELECT book_id, title, category FROM book_progress 
+                    WHERE user_id = ? AND is_bookmarked = 1
+                    ORDER BY updated_at DESC
+                """, (UserId,))
+                
+                return [
+                    {"book_id": Row[0], "title": Row[1], "category": Row[2]}
+                    for Row in Cursor.fetchall()
+                ]
+                
+        except Exception as e:
+            self.Logger.error(f"Failed to get bookmarks: {e}")
+            raise
+    
     def SetBookRating(self, UserId: int, BookId: int, Rating: int, Notes: str = None) -> Dict[str, Any]:
         """
         Set user rating and notes for a book
@@ -2,7 +2,7 @@
 # Path: /home/herb/Desktop/AndyLibrary/Source/Core/UserSetupManager.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-25
-# Last Modified: 2025-07-25 10:18AM
+# Last Modified: 2026-10-19 08:10PM
 
 """
 User Setup Manager for AndyLibrary
@@ -22,7 +22,6 @@ import zipfile
 from pathlib import Path
 from typing import Dict, Any, Optional
 from datetime import datetime
-import requests
 
 class UserSetupManager:
     """
@@ -2,13 +2,15 @@
 # Path: /home/herb/Desktop/AndyLibrary/Source/Middleware/SecurityMiddleware.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-28
-# Last Modified: 2025-07-28 06:45AM
+# Last Modified: 2026-10-19 10:45PM
 
 """
 Security Middleware for AndyLibrary with 2025 standards
 Implements comprehensive security headers, CSRF protection, rate limiting
 """
 
+import os
+import sys
 import time
 import json
 import logging
@@ -19,9 +21,19 @@ from datetime import datetime, timedelta
 
 from fastapi import Request, Response, HTTPException
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from Utils.StateBackend import GetStateBackend, SharedStateMapping
+except ImportError:
+    GetStateBackend = None
+    SharedStateMapping = None
+    print("⚠️ StateBackend not available - security state kept in process memory")
+
 class SecurityMiddleware(BaseHTTPMiddleware):
     """
     Comprehensive security middleware implementing 2025 best practices
@@ -35,7 +47,9 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         self.Config = config or {}
         self.Environment = self.Config.get("environment", "development")
         
-        # Rate limiting storage (use Redis in production)
+        # Rate limiting storage - moved to the shared backend when running several workers
+        backend = GetStateBackend() if GetStateBackend else None
+        self.StateBackend = backend if backend and backend.IsShared else None
         self.RateLimitStore = defaultdict(list)
         self.CSRFTokens = {}
         
@@ -44,7 +58,10 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         self.RateLimits = self._GetRateLimits()
         
         # Blocked IPs and suspicious patterns
-        self.BlockedIPs: Set[str] = set()
+        if self.StateBackend:
+            self.BlockedIPs = SharedStateMapping(self.StateBackend, "blocked_ips", ttl_seconds=24 * 3600)
+        else:
+            self.BlockedIPs: Set[str] = set()
         self.SuspiciousPatterns = [
             'admin', 'wp-admin', 'phpmyadmin', 'sql', 'inject', 
             'script', 'eval', 'exec', '<script', 'javascript:'
@@ -124,6 +141,13 @@ class SecurityMiddleware(BaseHTTPMiddleware):
     
     async def _PerformSecurityChecks(self, request: Request) -> Optional[Response]:
         """Perform comprehensive security checks"""
+        if self.StateBackend:
+            # Shared state is a SQLite or Redis round-trip per check - keep it off the event loop
+            return await run_in_threadpool(self._RunSecurityChecks, request)
+        return self._RunSecurityChecks(request)
+    
+    def _RunSecurityChecks(self, request: Request) -> Optional[Response]:
+        """Blocked IPs, rate limits, malicious patterns and OAuth checks; None if the request may proceed"""
         client_ip = self._GetClientIP(request)
         
         # 1. Blocked IP check
@@ -188,6 +212,9 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         limit_config = self.RateLimits[limit_type]
         key = f"{client_ip}:{limit_type}"
         
+        if self.StateBackend:
+            return self._CheckSharedRateLimit(client_ip, limit_type, limit_config)
+        
         # Clean old entries
         self.RateLimitStore[key] = [
             timestamp for timestamp in self.RateLimitStore[key]
@@ -215,6 +242,32 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         self.RateLimitStore[key].append(now)
         return None
     
+    def _CheckSharedRateLimit(self, client_ip: str, limit_type: str, limit_config: Dict) -> Optional[Response]:
+        """Fixed-window rate limit counted atomically in the shared state backend"""
+        window = limit_config["window"]
+        bucket = int(time.time() // window)
+        count = self.StateBackend.Increment(
+            "rate_limits", f"{client_ip}:{limit_type}:{bucket}", ttl_seconds=window * 2
+        )
+        
+        if count <= limit_config["requests"]:
+            return None
+        
+        self.Logger.warning(f"⚡ Rate limit exceeded for {client_ip} on {limit_type}")
+        
+        # Progressive penalties
+        if count > limit_config["requests"] * 2:
+            self._AddSuspiciousIP(client_ip)
+        
+        return JSONResponse(
+            status_code=429,
+            content={
+                "error": "Rate limit exceeded",
+                "retry_after": window
+            },
+            headers={"Retry-After": str(window)}
+        )
+    
     def _DetectMaliciousPatterns(self, request: Request) -> bool:
         """Detect malicious patterns in request"""
         # Check URL path
@@ -262,7 +315,11 @@ class SecurityMiddleware(BaseHTTPMiddleware):
     
     def _IsReplayAttack(self, state: str) -> bool:
         """Check for OAuth replay attacks"""
-        # Simple replay prevention (use Redis for production)
+        if self.StateBackend:
+            # Atomic set-if-absent: the first worker to see a state wins
+            return not self.StateBackend.Add("oauth_states_seen", state, True, ttl_seconds=15 * 60)
+        
+        # Simple replay prevention for a single process
         now = datetime.utcnow()
         
         # Clean old states
@@ -282,6 +339,13 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         # In production, implement proper threat intelligence
         suspicious_key = f"suspicious:{ip}"
         
+        if self.StateBackend:
+            count = self.StateBackend.Increment("suspicious_ips", ip, ttl_seconds=3600)
+            if count >= 5:
+                self.BlockedIPs[ip] = datetime.utcnow()
+                self.Logger.warning(f"🚫 IP blocked due to suspicious activity: {ip}")
+            return
+        
         if suspicious_key not in self.RateLimitStore:
             self.RateLimitStore[suspicious_key] = []
         
@@ -332,14 +396,21 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         """Get security statistics"""
         now = datetime.utcnow()
         
+        if self.StateBackend:
+            active_sessions = self.StateBackend.Count("oauth_states_seen")
+            rate_limit_entries = self.StateBackend.Count("rate_limits")
+        else:
+            active_sessions = len([
+                token for token, timestamp in self.CSRFTokens.items()
+                if now - timestamp < timedelta(minutes=15)
+            ])
+            rate_limit_entries = len(self.RateLimitStore)
+        
         # Count recent requests by type
         stats = {
             "blocked_ips": len(self.BlockedIPs),
-            "active_sessions": len([
-                token for token, timestamp in self.CSRFTokens.items()
-                if now - timestamp < timedelta(minutes=15)
-            ]),
-            "rate_limit_entries": len(self.RateLimitStore),
+            "active_sessions": active_sessions,
+            "rate_limit_entries": rate_limit_entries,
             "security_version": "2025.1",
             "environment": self.Environment,
             "uptime": (now - datetime.utcnow()).total_seconds()  # This would be start time in production
@@ -0,0 +1,299 @@
+# File: BookFileServer.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Utils/BookFileServer.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 06:40PM
+
+"""
+Book file serving for /api/books/{id}/pdf
+Resolved book id -> absolute path/size/mtime entries are cached (LRU with a
+re-query TTL), so a request costs one os.stat instead of a database query
+and a walk over candidate paths. Responses carry a strong ETag and honour
+Range, If-Range and If-None-Match, so a reader on a slow link only pulls the
+byte ranges it renders. File bodies go out through the ASGI zero-copy
+(sendfile) extension when the server offers it, otherwise via positional
+reads on a worker thread.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from email.utils import formatdate
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import quote
+
+import anyio
+from starlette.responses import Response
+
+DEFAULT_RESOLVE_TTL_SECONDS = 300
+DEFAULT_MAX_ENTRIES = 4096
+READ_BLOCK_SIZE = 64 * 1024
+ZEROCOPY_EXTENSION = "http.response.zerocopy"
+
+# ParseByteRange result for a Range the file cannot satisfy
+UNSATISFIABLE = "unsatisfiable"
+
+@dataclass(slots=True)
+class BookFileEntry:
+    """Resolved location and validators for one book file"""
+    book_id: int
+    title: str
+    path: str
+    size: int
+    mtime_ns: int
+    resolved_at: float
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.size:x}-{self.mtime_ns:x}"'
+
+    @property
+    def last_modified(self) -> str:
+        return formatdate(self.mtime_ns / 1e9, usegmt=True)
+
+class BookFileResolver:
+    """
+    book_id -> BookFileEntry cache
+
+    Cached entries are revalidated with a single os.stat per request; the
+    database lookup and candidate-path probing only run on a miss or once
+    the entry is older than the TTL.
+    """
+
+    def __init__(self, search_roots: List[str], ttl_seconds: float = DEFAULT_RESOLVE_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, extensions: Tuple[str, ...] = (".pdf",)):
+        self.Logger = logging.getLogger(__name__)
+        self.SearchRoots = list(dict.fromkeys(os.path.abspath(root) for root in search_roots))
+        self.TTLSeconds = ttl_seconds
+        self.MaxEntries = max_entries
+        self.Extensions = extensions
+        self.Entries: "OrderedDict[int, BookFileEntry]" = OrderedDict()
+        self.Lock = threading.Lock()
+        self.Hits = 0
+        self.Misses = 0
+
+    def CandidatePaths(self, file_path: str) -> List[str]:
+        """Locations a catalogue FilePath may refer to, in probe order"""
+        candidates = []
+        for root in self.SearchRoots:
+            candidates.append(os.path.join(root, file_path))
+            candidates.append(os.path.join(root, "Data", "Books", os.path.basename(file_path)))
+        candidates.append(file_path)
+        return list(dict.fromkeys(os.path.abspath(path) for path in candidates))
+
+    def _Locate(self, file_path: str) -> Optional[Tuple[str, os.stat_result]]:
+        for path in self.CandidatePaths(file_path):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if os.path.isfile(path):
+                return path, stat
+        return None
+
+    def Resolve(self, book_id: int,
+                lookup: Callable[[int], Optional[Tuple[str, str]]]) -> Optional[BookFileEntry]:
+        """
+        Return the entry for book_id, or None when the book or its file is missing
+
+        lookup(book_id) -> (title, FilePath) is only called on a cache miss.
+        """
+        now = time.monotonic()
+        with self.Lock:
+            entry = self.Entries.get(book_id)
+            if entry is not None:
+                self.Entries.move_to_end(book_id)
+
+        if entry is not None and now - entry.resolved_at < self.TTLSeconds:
+            try:
+                stat = os.stat(entry.path)
+            except OSError:
+                self.Invalidate(book_id)
+            else:
+                if stat.st_size != entry.size or stat.st_mtime_ns != entry.mtime_ns:
+                    # File replaced in place - same path, new validators
+                    entry = replace(entry, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                    self._Store(entry)
+                with self.Lock:
+                    self.Hits += 1
+                return entry
+
+        with self.Lock:
+            self.Misses += 1
+
+        row = lookup(book_id)
+        if not row:
+            self.Invalidate(book_id)
+            return None
+
+        title, file_path = row
+        if not file_path or not file_path.lower().endswith(self.Extensions):
+            return None
+
+        located = self._Locate(file_path)
+        if located is None:
+            self.Invalidate(book_id)
+            return None
+
+        path, stat = located
+        entry = BookFileEntry(book_id, title or f"book_{book_id}", path,
+                              stat.st_size, stat.st_mtime_ns, now)
+        self._Store(entry)
+        return entry
+
+    def _Store(self, entry: BookFileEntry):
+        with self.Lock:
+            self.Entries[entry.book_id] = entry
+            self.Entries.move_to_end(entry.book_id)
+            while len(self.Entries) > self.MaxEntries:
+                self.Entries.popitem(last=False)
+
+    def Invalidate(self, book_id: int = None):
+        """Forget one book (or everything) - e.g. after the library database is replaced"""
+        with self.Lock:
+            if book_id is None:
+                self.Entries.clear()
+            else:
+                self.Entries.pop(book_id, None)
+
+    def GetStats(self) -> Dict[str, int]:
+        with self.Lock:
+            return {"entries": len(self.Entries), "hits": self.Hits, "misses": self.Misses}
+
+def ParseByteRange(header: Optional[str], size: int) -> Union[None, str, Tuple[int, int]]:
+    """
+    Parse a single-range Range header into an inclusive (start, end)
+
+    Returns None when the header is absent, malformed or asks for several
+    ranges (the full body is served), and UNSATISFIABLE for a range that
+    starts past the end of the file.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if first == "":
+            suffix = int(last)
+            if suffix <= 0:
+                return UNSATISFIABLE
+            return (max(0, size - suffix), size - 1) if size else UNSATISFIABLE
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return UNSATISFIABLE
+    if start < 0 or end < start:
+        return None
+    return start, min(end, size - 1)
+
+def _ETagMatches(header: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires"""
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def _IfRangeAllows(header: Optional[str], entry: BookFileEntry) -> bool:
+    """If-Range uses strong comparison for ETags and exact match for dates"""
+    if not header:
+        return True
+    header = header.strip()
+    if header.startswith('"') or header.startswith("W/"):
+        return header == entry.etag
+    return header == entry.last_modified
+
+def ContentDisposition(title: str, extension: str = ".pdf") -> str:
+    """inline disposition that survives non-Latin-1 titles"""
+    filename = f"{title}{extension}"
+    fallback = filename.encode("ascii", "replace").decode("ascii").replace('"', "'")
+    return f"inline; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+class FileRangeResponse(Response):
+    """Streams [offset, offset + length) of a file, zero-copy when the server supports it"""
+
+    def __init__(self, path: str, offset: int, length: int, status_code: int = 200,
+                 headers: Dict[str, str] = None, media_type: str = "application/pdf",
+                 send_body: bool = True):
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.send_body = send_body
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        with open(self.path, "rb") as file:
+            if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+                await send({"type": ZEROCOPY_EXTENSION, "file": file, "offset": self.offset,
+                            "count": self.length, "more_body": False})
+                return
+
+            position, remaining = self.offset, self.length
+            while remaining > 0:
+                block = await anyio.to_thread.run_sync(
+                    _ReadAt, file, min(READ_BLOCK_SIZE, remaining), position
+                )
+                if not block:
+                    break
+                position += len(block)
+                remaining -= len(block)
+                await send({"type": "http.response.body", "body": block, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank underneath us - close the body rather than hang the client
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+def _ReadAt(file, size: int, offset: int) -> bytes:
+    if hasattr(os, "pread"):
+        return os.pread(file.fileno(), size, offset)
+    file.seek(offset)
+    return file.read(size)
+
+def BuildFileResponse(entry: BookFileEntry, headers, method: str = "GET",
+                      cache_control: str = "public, max-age=3600", extension: str = ".pdf") -> Response:
+    """Full, partial (206), not-modified (304) or unsatisfiable (416) response for entry"""
+    common = {
+        "ETag": entry.etag,
+        "Last-Modified": entry.last_modified,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": cache_control
+    }
+
+    if_none_match = headers.get("if-none-match")
+    if if_none_match and _ETagMatches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=common)
+
+    byte_range = None
+    if _IfRangeAllows(headers.get("if-range"), entry):
+        byte_range = ParseByteRange(headers.get("range"), entry.size)
+
+    if byte_range == UNSATISFIABLE:
+        return Response(status_code=416, headers={**common, "Content-Range": f"bytes */{entry.size}"})
+
+    response_headers = {**common, "Content-Disposition": ContentDisposition(entry.title, extension)}
+    send_body = method.upper() != "HEAD"
+
+    if byte_range is None:
+        response_headers["Content-Length"] = str(entry.size)
+        return FileRangeResponse(entry.path, 0, entry.size, 200, response_headers, send_body=send_body)
+
+    start, end = byte_range
+    response_headers["Content-Range"] = f"bytes {start}-{end}/{entry.size}"
+    response_headers["Content-Length"] = str(end - start + 1)
+    return FileRangeResponse(entry.path, start, end - start + 1, 206, response_headers, send_body=send_body)
@@ -0,0 +1,219 @@
+# File: CatalogIndex.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Utils/CatalogIndex.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 08:55PM
+
+"""
+Compact catalog index for the web UI's offline catalog
+Every search and filter used to be a server round-trip, yet the browser
+only ever shows four columns of the catalog: id, title, category and
+subject. This module publishes those columns for the whole library as
+one columnar JSON document. Categories and subjects are stored once and
+books refer to them by id. The browser keeps the index in IndexedDB and
+searches and filters it locally.
+
+The version is a hash of the catalog content, so touching the database
+file without changing a book does not make clients download anything.
+The last few versions are kept in memory. A client that already has one
+of them gets only the changed and deleted books (?since=<version>).
+"""
+
+import os
+import json
+import gzip
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.responses import Response
+
+CATALOG_FORMAT = 1
+CATALOG_HISTORY = 8
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+
+# book id -> (title, category_id, subject_id)
+CatalogRows = Dict[int, Tuple[str, Optional[int], Optional[int]]]
+
+def DatabaseSignature(db_path: str) -> Tuple[int, ...]:
+    """Size and mtime of the database and its WAL file; changes whenever SQLite writes"""
+    stat = os.stat(db_path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    try:
+        wal = os.stat(db_path + "-wal")
+        signature += (wal.st_size, wal.st_mtime_ns)
+    except OSError:
+        pass
+    return signature
+
+def _ETagMatches(header: str, etag: str) -> bool:
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def _AcceptsGzip(header: Optional[str]) -> bool:
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = params.strip()
+            try:
+                return not quality.startswith("q=") or float(quality[2:]) > 0
+            except ValueError:
+                return False
+    return False
+
+@dataclass
+class CatalogSnapshot:
+    """One version of the catalog and its encoded full index"""
+    version: str
+    signature: Tuple[int, ...]
+    rows: CatalogRows
+    categories: List[Tuple[int, str]]
+    subjects: List[Tuple[int, str, Optional[int]]]
+    body: bytes
+    gzip: Optional[bytes]
+    built_at: float
+
+    @property
+    def etag(self) -> str:
+        return f'"catalog-{self.version}"'
+
+def ReadCatalog(db_path: str) -> Tuple[CatalogRows, List[Tuple[int, str]], List[Tuple[int, str, Optional[int]]]]:
+    """Books, categories and subjects, books in the same title order as /api/books"""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = {
+            row[0]: (row[1] or "", row[2], row[3])
+            for row in conn.execute("SELECT id, title, category_id, subject_id FROM books ORDER BY title")
+        }
+        categories = [(row[0], row[1]) for row in conn.execute("SELECT id, category FROM categories ORDER BY category")]
+        subjects = [(row[0], row[1], row[2])
+                    for row in conn.execute("SELECT id, subject, category_id FROM subjects ORDER BY subject")]
+    finally:
+        conn.close()
+    return rows, categories, subjects
+
+def _Columns(categories, subjects) -> Dict[str, Any]:
+    return {
+        "categories": {"id": [c[0] for c in categories], "name": [c[1] for c in categories]},
+        "subjects": {"id": [s[0] for s in subjects], "name": [s[1] for s in subjects],
+                     "category_id": [s[2] for s in subjects]},
+    }
+
+def _BookColumns(rows: CatalogRows, ids: List[int]) -> Dict[str, List[Any]]:
+    return {
+        "id": ids,
+        "title": [rows[book_id][0] for book_id in ids],
+        "category_id": [rows[book_id][1] for book_id in ids],
+        "subject_id": [rows[book_id][2] for book_id in ids],
+    }
+
+def _Encode(document: Dict[str, Any]) -> bytes:
+    return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class CatalogIndex:
+    """Builds the catalog index when the database changes and answers full or incremental requests"""
+
+    def __init__(self, history: int = CATALOG_HISTORY):
+        self.Logger = logging.getLogger(__name__)
+        self.HistorySize = history
+        self.History: "OrderedDict[str, CatalogSnapshot]" = OrderedDict()
+        self.Latest: Optional[CatalogSnapshot] = None
+        self.LatestPath: Optional[str] = None
+        self.Lock = threading.Lock()
+
+    def _Build(self, db_path: str, signature: Tuple[int, ...]) -> CatalogSnapshot:
+        started = time.monotonic()
+        rows, categories, subjects = ReadCatalog(db_path)
+        content = _Encode({"books": list(rows.items()), "categories": categories, "subjects": subjects})
+        version = hashlib.sha256(content).hexdigest()[:16]
+
+        previous = self.History.get(version)
+        if previous:
+            previous.signature = signature  # same catalog, the file was only touched
+            return previous
+
+        document = {"format": CATALOG_FORMAT, "version": version, "generated_at": datetime.now().isoformat(),
+                    **_Columns(categories, subjects), "books": _BookColumns(rows, list(rows))}
+        body = _Encode(document)
+        compressed = gzip.compress(body, GZIP_LEVEL, mtime=0) if len(body) >= MIN_COMPRESS_BYTES else None
+        snapshot = CatalogSnapshot(version, signature, rows, categories, subjects, body, compressed, time.time())
+        self.Logger.info(f"Catalog index {version}: {len(rows)} books, {len(body):,} bytes "
+                         f"({len(compressed or body):,} gzip) in {time.monotonic() - started:.2f}s")
+        return snapshot
+
+    def Current(self, db_path: str) -> CatalogSnapshot:
+        """Snapshot of the database as it is now, rebuilt only when the file has changed"""
+        signature = DatabaseSignature(db_path)
+        with self.Lock:
+            latest = self.Latest
+            if latest and self.LatestPath == db_path and latest.signature == signature:
+                return latest
+            if db_path != self.LatestPath:
+                self.History.clear()  # versions of another database cannot be diffed against
+            snapshot = self._Build(db_path, signature)
+            self.History[snapshot.version] = snapshot
+            self.History.move_to_end(snapshot.version)
+            while len(self.History) > self.HistorySize:
+                self.History.popitem(last=False)
+            self.Latest, self.LatestPath = snapshot, db_path
+            return snapshot
+
+    def Delta(self, since: str, current: CatalogSnapshot) -> Optional[Dict[str, Any]]:
+        """Changes from version since to current, or None when since is unknown here"""
+        with self.Lock:
+            base = self.History.get(since)
+        if base is None:
+            return None
+        changed = [book_id for book_id, row in current.rows.items() if base.rows.get(book_id) != row]
+        return {
+            "format": CATALOG_FORMAT,
+            "version": current.version,
+            "base": since,
+            "generated_at": datetime.now().isoformat(),
+            **_Columns(current.categories, current.subjects),
+            "books": _BookColumns(current.rows, changed),
+            "deleted": [book_id for book_id in base.rows if book_id not in current.rows],
+        }
+
+    def BuildResponse(self, db_path: str, headers, since: Optional[str] = None, method: str = "GET") -> Response:
+        """Full index (304 when the client has it) or, for ?since=, only the changes"""
+        current = self.Current(db_path)
+        response_headers = {"ETag": current.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and _ETagMatches(if_none_match, current.etag):
+            return Response(status_code=304, headers=response_headers)
+
+        delta = self.Delta(since, current) if since else None
+        if delta is not None:
+            body = _Encode(delta)
+            compressed = gzip.compress(body, GZIP_LEVEL, mtime=0) if len(body) >= MIN_COMPRESS_BYTES else None
+        else:
+            body, compressed = current.body, current.gzip
+
+        if compressed is not None and _AcceptsGzip(headers.get("accept-encoding")):
+            body = compressed
+            response_headers["Content-Encoding"] = "gzip"
+        response_headers["Content-Length"] = str(len(body))
+        if method.upper() == "HEAD":
+            body = b""
+        return Response(body, media_type="application/json", headers=response_headers)
+
+    def GetStats(self) -> Dict[str, Any]:
+        latest = self.Latest
+        return {
+            "version": latest.version if latest else None,
+            "books": len(latest.rows) if latest else 0,
+            "index_bytes": len(latest.body) if latest else 0,
+            "gzip_bytes": len(latest.gzip or latest.body) if latest else 0,
+            "history": list(self.History),
+        }
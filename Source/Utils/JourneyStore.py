@@ -0,0 +1,185 @@
+# File: JourneyStore.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Utils/JourneyStore.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 09:35PM
+
+"""
+Bounded, expiring journey store for UserJourneyManager
+Every anonymous visitor gets a journey, so the store evicts journeys that have
+been idle longer than the TTL and caps the total number of entries (least
+recently used first). Memory stays flat no matter how much traffic arrives.
+With a process-shared StateBackend the same API is served from SQLite/Redis.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+DEFAULT_IDLE_TTL_SECONDS = 30 * 60
+DEFAULT_MAX_ENTRIES = 10000
+# Shared stores trim to capacity every N writes per worker instead of counting on each one
+SHARED_TRIM_INTERVAL = 64
+
+class JourneyStore(MutableMapping):
+    """
+    session_id -> journey context with idle-TTL expiry and an LRU entry cap
+
+    Entries are kept in last-access order, so both expiry and capacity
+    eviction only ever look at the front of the OrderedDict.
+    """
+
+    NAMESPACE = "journeys"
+
+    def __init__(self, backend=None, idle_ttl_seconds: float = DEFAULT_IDLE_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 encoder: Callable[[Any], Any] = None, decoder: Callable[[Any], Any] = None):
+        self.Logger = logging.getLogger(__name__)
+        self.IdleTTLSeconds = idle_ttl_seconds
+        self.MaxEntries = max_entries
+
+        # Shared backends serialize contexts; local mode keeps live objects
+        self.Backend = backend if backend is not None and backend.IsShared else None
+        self.Encoder = encoder
+        self.Decoder = decoder
+
+        self.Entries: "OrderedDict[str, list]" = OrderedDict()
+        self.Lock = threading.RLock()
+        self.Evictions = 0
+        self.Expirations = 0
+        self.TrimInterval = max(1, min(SHARED_TRIM_INTERVAL, max_entries // 100))
+        self.WritesSinceTrim = 0
+
+    # Local (single process) implementation
+
+    def _PurgeLocked(self, now: float) -> int:
+        removed = 0
+        cutoff = now - self.IdleTTLSeconds
+        while self.Entries:
+            session_id, entry = next(iter(self.Entries.items()))
+            if entry[1] > cutoff:
+                break
+            del self.Entries[session_id]
+            removed += 1
+        self.Expirations += removed
+        return removed
+
+    def _TouchLocked(self, session_id: str, now: float) -> Optional[list]:
+        entry = self.Entries.get(session_id)
+        if entry is None:
+            return None
+        if entry[1] <= now - self.IdleTTLSeconds:
+            del self.Entries[session_id]
+            self.Expirations += 1
+            return None
+        entry[1] = now
+        self.Entries.move_to_end(session_id)
+        return entry
+
+    def _TrimShared(self):
+        """Evict the least recently written journeys once the shared store is over capacity"""
+        with self.Lock:
+            self.WritesSinceTrim += 1
+            if self.WritesSinceTrim < self.TrimInterval:
+                return
+            self.WritesSinceTrim = 0
+        # Every write renews the TTL, so soonest-to-expire is least recently written
+        evicted = self.Backend.Trim(self.NAMESPACE, self.MaxEntries)
+        with self.Lock:
+            self.Evictions += evicted
+
+    # Mapping API
+
+    def __setitem__(self, session_id: str, context: Any):
+        if self.Backend:
+            self.Backend.Set(self.NAMESPACE, session_id,
+                             self.Encoder(context) if self.Encoder else context,
+                             self.IdleTTLSeconds)
+            self._TrimShared()
+            return
+
+        now = time.time()
+        with self.Lock:
+            self._PurgeLocked(now)
+            if session_id in self.Entries:
+                self.Entries[session_id] = [context, now]
+                self.Entries.move_to_end(session_id)
+                return
+            while len(self.Entries) >= self.MaxEntries:
+                self.Entries.popitem(last=False)
+                self.Evictions += 1
+            self.Entries[session_id] = [context, now]
+
+    def __getitem__(self, session_id: str) -> Any:
+        if self.Backend:
+            missing = object()
+            value = self.Backend.Get(self.NAMESPACE, session_id, missing)
+            if value is missing:
+                raise KeyError(session_id)
+            return self.Decoder(value) if self.Decoder else value
+
+        with self.Lock:
+            entry = self._TouchLocked(session_id, time.time())
+        if entry is None:
+            raise KeyError(session_id)
+        return entry[0]
+
+    def __delitem__(self, session_id: str):
+        if self.Backend:
+            if not self.Backend.Delete(self.NAMESPACE, session_id):
+                raise KeyError(session_id)
+            return
+        with self.Lock:
+            del self.Entries[session_id]
+
+    def __contains__(self, session_id) -> bool:
+        if self.Backend:
+            missing = object()
+            return self.Backend.Get(self.NAMESPACE, session_id, missing) is not missing
+        with self.Lock:
+            entry = self.Entries.get(session_id)
+            return entry is not None and entry[1] > time.time() - self.IdleTTLSeconds
+
+    def __iter__(self) -> Iterator[str]:
+        if self.Backend:
+            return iter(self.Backend.Keys(self.NAMESPACE))
+        with self.Lock:
+            self._PurgeLocked(time.time())
+            return iter(list(self.Entries))
+
+    def __len__(self) -> int:
+        if self.Backend:
+            return self.Backend.Count(self.NAMESPACE)
+        with self.Lock:
+            self._PurgeLocked(time.time())
+            return len(self.Entries)
+
+    def clear(self):
+        if self.Backend:
+            self.Backend.Clear(self.NAMESPACE)
+            return
+        with self.Lock:
+            self.Entries.clear()
+
+    def PurgeExpired(self) -> int:
+        """Drop journeys idle longer than the TTL"""
+        if self.Backend:
+            return self.Backend.PurgeExpired()
+        with self.Lock:
+            return self._PurgeLocked(time.time())
+
+    def GetStats(self) -> Dict[str, Any]:
+        """Store statistics for analytics endpoints"""
+        stats = {
+            "backend": self.Backend.Name if self.Backend else "memory",
+            "active_journeys": len(self),
+            "max_entries": self.MaxEntries,
+            "idle_ttl_seconds": self.IdleTTLSeconds
+        }
+        stats["evictions"] = self.Evictions
+        if not self.Backend:
+            stats["expirations"] = self.Expirations
+        return stats
@@ -0,0 +1,309 @@
+# File: LanDiscovery.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Utils/LanDiscovery.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 07:10PM
+
+"""
+LAN discovery for AndyLibrary desktop servers
+The server announces itself on a UDP multicast group and a broadcast address,
+and answers probes sent to the discovery port. A client sends one probe,
+listens for replies, and at the same time opens short concurrent HTTP
+health checks against the last-known server and any fixed candidates. The
+first server whose /api/health answers wins, typically within a few
+milliseconds on a LAN instead of minutes of sequential 3-second timeouts.
+
+Servers advertise roles (e.g. "peer-cache" for a machine that caches Drive
+content for the LAN); a client can ask for a server with a given role.
+
+Standard library only, so the standalone clients can use it unchanged.
+"""
+
+import os
+import json
+import time
+import socket
+import struct
+import asyncio
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DISCOVERY_GROUP = "239.255.77.77"
+DISCOVERY_PORT = 47700
+SERVICE_NAME = "andylibrary"
+PROTOCOL_VERSION = 1
+DEFAULT_ANNOUNCE_INTERVAL = 5.0
+DEFAULT_DISCOVERY_TIMEOUT = 0.8
+DEFAULT_CONNECT_TIMEOUT = 0.3
+MAX_DATAGRAM = 2048
+MAX_HEALTH_RESPONSE = 64 * 1024
+PEER_CACHE_ROLE = "peer-cache"
+
+def BuildMessage(message_type: str, **fields) -> bytes:
+    return json.dumps({"service": SERVICE_NAME, "v": PROTOCOL_VERSION, "type": message_type, **fields}).encode("utf-8")
+
+def ParseMessage(data: bytes) -> Optional[Dict]:
+    """Decoded discovery message, or None for anything that is not ours"""
+    try:
+        message = json.loads(data.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(message, dict) or message.get("service") != SERVICE_NAME:
+        return None
+    return message
+
+def IsLibraryHealth(status: int, body: bytes, role: Optional[str] = None) -> bool:
+    """Same acceptance rule the standalone client always used for /api/health, plus an optional role"""
+    if status != 200:
+        return False
+    text = body.decode("utf-8", "replace")
+    if not ("AndyLibrary" in text or "library" in text.lower()):
+        return False
+    if role is None:
+        return True
+    try:
+        roles = json.loads(text).get("roles") or []
+    except (ValueError, AttributeError):
+        return False
+    return role in roles
+
+class LanAnnouncer:
+    """
+    Announces a running server and answers discovery probes
+
+    Runs on a daemon thread next to uvicorn. Announcements go to the
+    multicast group and the broadcast address every interval seconds;
+    probes are answered immediately by unicast to the sender.
+    """
+
+    def __init__(self, http_port: int, name: Optional[str] = None,
+                 interval: float = DEFAULT_ANNOUNCE_INTERVAL, discovery_port: int = DISCOVERY_PORT,
+                 group: str = DISCOVERY_GROUP, roles: Iterable[str] = ("library",)):
+        self.Logger = logging.getLogger(__name__)
+        self.HttpPort = http_port
+        self.Name = name or socket.gethostname()
+        self.Roles = list(roles)
+        self.Interval = interval
+        self.DiscoveryPort = discovery_port
+        self.Group = group
+        self.StopEvent = threading.Event()
+        self.Thread: Optional[threading.Thread] = None
+        self.Socket: Optional[socket.socket] = None
+        self.ProbesAnswered = 0
+
+    def Announcement(self) -> bytes:
+        return BuildMessage("announce", name=self.Name, port=self.HttpPort, scheme="http", roles=self.Roles)
+
+    def _OpenSocket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            # Several servers on one machine can all listen for probes
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        sock.bind(("", self.DiscoveryPort))
+        try:
+            membership = struct.pack("4s4s", socket.inet_aton(self.Group), socket.inet_aton("0.0.0.0"))
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        except OSError as e:
+            # No multicast route (e.g. offline laptop) - broadcast and direct probes still work
+            self.Logger.info(f"ℹ️ Multicast unavailable for discovery: {e}")
+        sock.settimeout(0.5)
+        return sock
+
+    def _Announce(self):
+        payload = self.Announcement()
+        for address in (self.Group, "255.255.255.255"):
+            try:
+                self.Socket.sendto(payload, (address, self.DiscoveryPort))
+            except OSError:
+                pass
+
+    def _Run(self):
+        next_announce = 0.0
+        while not self.StopEvent.is_set():
+            now = time.monotonic()
+            if now >= next_announce:
+                self._Announce()
+                next_announce = now + self.Interval
+            try:
+                data, sender = self.Socket.recvfrom(MAX_DATAGRAM)
+            except socket.timeout:
+                continue
+            except OSError:
+                if self.StopEvent.is_set():
+                    break
+                continue
+            message = ParseMessage(data)
+            if message and message.get("type") == "probe":
+                try:
+                    self.Socket.sendto(self.Announcement(), sender)
+                    self.ProbesAnswered += 1
+                except OSError:
+                    pass
+
+    def Start(self) -> bool:
+        try:
+            self.Socket = self._OpenSocket()
+        except OSError as e:
+            self.Logger.warning(f"⚠️ LAN discovery disabled: {e}")
+            return False
+        self.Thread = threading.Thread(target=self._Run, name="LanAnnouncer", daemon=True)
+        self.Thread.start()
+        self.Logger.info(f"📡 Announcing AndyLibrary on UDP {self.DiscoveryPort} (HTTP port {self.HttpPort})")
+        return True
+
+    def Stop(self):
+        self.StopEvent.set()
+        if self.Thread:
+            self.Thread.join(timeout=2)
+        if self.Socket:
+            self.Socket.close()
+            self.Socket = None
+
+class _DiscoveryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, on_announce):
+        self.OnAnnounce = on_announce
+
+    def datagram_received(self, data, addr):
+        message = ParseMessage(data)
+        if message and message.get("type") == "announce" and isinstance(message.get("port"), int):
+            self.OnAnnounce(addr[0], message["port"])
+
+    def error_received(self, exc):
+        pass
+
+async def _ReadResponse(reader: asyncio.StreamReader, limit: int = MAX_HEALTH_RESPONSE) -> bytes:
+    """Read until the server closes (HTTP/1.0) - headers and body may arrive in separate packets"""
+    chunks = []
+    received = 0
+    while received < limit:
+        chunk = await reader.read(limit - received)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        received += len(chunk)
+    return b"".join(chunks)
+
+async def CheckServer(host: str, port: int, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                      read_timeout: float = 1.0, role: Optional[str] = None) -> Optional[str]:
+    """Base URL if host:port answers /api/health like an AndyLibrary server (with role, if given), else None"""
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), connect_timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    try:
+        writer.write(f"GET /api/health HTTP/1.0\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode("ascii"))
+        await writer.drain()
+        response = await asyncio.wait_for(_ReadResponse(reader), read_timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    finally:
+        writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    try:
+        status = int(head.split(b" ", 2)[1])
+    except (IndexError, ValueError):
+        return None
+    return f"http://{host}:{port}" if IsLibraryHealth(status, body, role) else None
+
+class LastServerCache:
+    """Remembers the last server that answered, so the next start tries it first"""
+
+    def __init__(self, path: str):
+        self.Path = path
+
+    def Load(self) -> Optional[Tuple[str, int]]:
+        try:
+            with open(self.Path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["host"], int(data["port"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def Save(self, host: str, port: int):
+        try:
+            os.makedirs(os.path.dirname(self.Path) or ".", exist_ok=True)
+            temp_path = f"{self.Path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"host": host, "port": port, "seen_at": time.time()}, f)
+            os.replace(temp_path, self.Path)
+        except OSError:
+            pass
+
+async def DiscoverServerAsync(candidates: Iterable[Tuple[str, int]] = (),
+                              cache: Optional[LastServerCache] = None,
+                              timeout: float = DEFAULT_DISCOVERY_TIMEOUT,
+                              connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                              discovery_port: int = DISCOVERY_PORT,
+                              group: str = DISCOVERY_GROUP,
+                              role: Optional[str] = None) -> Optional[str]:
+    """
+    Base URL of the first AndyLibrary server found, or None after timeout seconds
+
+    The cached server and the fixed candidates are health-checked at once
+    while a UDP probe collects announcements; every announced address is
+    health-checked as soon as it arrives. With role, only servers whose
+    /api/health lists that role are accepted.
+    """
+    loop = asyncio.get_running_loop()
+    found: asyncio.Future = loop.create_future()
+    checking = set()
+    tasks: List[asyncio.Task] = []
+
+    async def check(host: str, port: int):
+        url = await CheckServer(host, port, connect_timeout, role=role)
+        if url and not found.done():
+            found.set_result((host, port, url))
+
+    def consider(host: str, port: int):
+        if (host, port) not in checking and not found.done():
+            checking.add((host, port))
+            tasks.append(loop.create_task(check(host, port)))
+
+    # Last-known server first - on an unchanged network it answers before anything else
+    last_known = cache.Load() if cache else None
+    if last_known:
+        consider(*last_known)
+
+    transport = None
+    try:
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DiscoveryProtocol(consider), local_addr=("0.0.0.0", 0), allow_broadcast=True)
+        sock = transport.get_extra_info("socket")
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+        probe = BuildMessage("probe")
+        for address in (group, "255.255.255.255", "127.0.0.1"):
+            try:
+                transport.sendto(probe, (address, discovery_port))
+            except OSError:
+                pass
+    except OSError:
+        transport = None
+
+    for host, port in candidates:
+        consider(host, port)
+
+    try:
+        host, port, url = await asyncio.wait_for(asyncio.shield(found), timeout)
+    except asyncio.TimeoutError:
+        return None
+    finally:
+        if transport:
+            transport.close()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if cache:
+        cache.Save(host, port)
+    return url
+
+def DiscoverServer(candidates: Iterable[Tuple[str, int]] = (), cache_path: Optional[str] = None,
+                   timeout: float = DEFAULT_DISCOVERY_TIMEOUT, **kwargs) -> Optional[str]:
+    """Blocking wrapper around DiscoverServerAsync for synchronous callers"""
+    cache = LastServerCache(cache_path) if cache_path else None
+    return asyncio.run(DiscoverServerAsync(list(candidates), cache, timeout, **kwargs))
@@ -0,0 +1,114 @@
+# File: LazyImport.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Utils/LazyImport.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 08:10PM
+
+"""
+Optional dependencies imported on first use
+Importing googleapiclient, authlib/passlib or PyMuPDF costs tens to hundreds
+of milliseconds each. On a low-end tablet that is a large share of
+startup, and in local mode most of it is never needed. A LazyImport runs
+its import the first time one of its names is used.
+
+The loader is a plain function that holds the real import statements, so
+PyInstaller still finds and bundles the modules.
+"""
+
+import threading
+import importlib.util
+from typing import Any, Callable, Dict, Optional
+
+def ModuleAvailable(name: str) -> bool:
+    """True when a module can be imported, found without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+class LazyImport:
+    """
+    An optional dependency, imported the first time it is used
+
+    loader() imports the modules and returns the names it provides (usually
+    locals()). If it raises ImportError the dependency is unavailable and
+    warning is printed once. When probe names a module, IsAvailable only
+    looks for that module and does not import anything.
+    """
+
+    def __init__(self, loader: Callable[[], Dict[str, Any]], warning: Optional[str] = None,
+                 probe: Optional[str] = None):
+        self.Loader = loader
+        self.Warning = warning
+        self.Probe = probe
+        self.Names: Optional[Dict[str, Any]] = None
+        self.Error: Optional[ImportError] = None
+        self.Lock = threading.Lock()
+
+    def _Unavailable(self, error: ImportError):
+        if self.Error is None and self.Warning:
+            print(self.Warning)
+        self.Error = error
+
+    def Load(self) -> Optional[Dict[str, Any]]:
+        """The imported names, or None when the dependency is unavailable"""
+        if self.Names is None and self.Error is None:
+            with self.Lock:
+                if self.Names is None and self.Error is None:
+                    try:
+                        self.Names = dict(self.Loader())
+                    except ImportError as e:
+                        self._Unavailable(e)
+        return self.Names
+
+    def IsLoaded(self) -> bool:
+        return self.Names is not None
+
+    def IsAvailable(self) -> bool:
+        if self.Names is not None or self.Error is not None or not self.Probe:
+            return self.Load() is not None
+        if ModuleAvailable(self.Probe):
+            return True
+        self._Unavailable(ImportError(f"No module named '{self.Probe}'"))
+        return False
+
+    def Get(self, name: str) -> Any:
+        """One imported name; raises ImportError when the dependency is unavailable"""
+        names = self.Load()
+        if names is None:
+            raise ImportError(str(self.Error))
+        return names[name]
+
+    def Symbol(self, name: str) -> "LazySymbol":
+        return LazySymbol(self, name)
+
+class LazySymbol:
+    """
+    Stands in for one name of a LazyImport
+
+    Calling it or reading an attribute imports the dependency. The proxy is
+    truthy only when the dependency is available, so the usual
+    `if Component:` checks keep working.
+    """
+
+    def __init__(self, source: LazyImport, name: str):
+        self._Source = source
+        self._Name = name
+
+    def Resolve(self) -> Any:
+        return self._Source.Get(self._Name)
+
+    def __call__(self, *args, **kwargs):
+        return self.Resolve()(*args, **kwargs)
+
+    def __getattr__(self, attribute: str) -> Any:
+        if attribute.startswith("__"):
+            raise AttributeError(attribute)
+        return getattr(self.Resolve(), attribute)
+
+    def __bool__(self) -> bool:
+        return self._Source.IsAvailable()
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._Source.IsLoaded() else "not loaded"
+        return f"<lazy {self._Name} ({state})>"
@@ -0,0 +1,276 @@
+# File: OAuthStateStore.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Utils/OAuthStateStore.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 09:30PM
+
+"""
+Indexed OAuth state store for ModernSocialAuthManager
+Sessions are indexed by session id and by a hash of the OAuth state, so a
+callback is validated with one lookup. Expiry runs off a TTL min-heap and the
+store is capacity bounded, so abandoned logins cannot grow it without limit.
+With a process-shared StateBackend the same API is served from SQLite/Redis.
+"""
+
+import time
+import heapq
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Iterator, Optional, Tuple
+from collections.abc import MutableMapping
+from datetime import datetime
+
+DEFAULT_SESSION_TTL_SECONDS = 15 * 60
+DEFAULT_MAX_SESSIONS = 10000
+# Shared stores trim to capacity every N writes per worker instead of counting on each one
+SHARED_TRIM_INTERVAL = 64
+
+def HashState(state: str) -> str:
+    """Index key for an OAuth state value (raw states are never used as keys)"""
+    return hashlib.sha256(state.encode("utf-8")).hexdigest()
+
+class OAuthStateStore(MutableMapping):
+    """
+    session_id -> session data, with an O(1) state -> session_id index
+
+    Behaves like the ActiveSessions dict it replaces; FindByState and
+    ConsumeByState are the callback fast paths.
+    """
+
+    SESSION_NAMESPACE = "oauth_sessions"
+    STATE_NAMESPACE = "oauth_state_index"
+
+    def __init__(self, backend=None, ttl_seconds: float = DEFAULT_SESSION_TTL_SECONDS,
+                 max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.Logger = logging.getLogger(__name__)
+        self.TTLSeconds = ttl_seconds
+        self.MaxSessions = max_sessions
+
+        # Shared backends own expiry themselves; local mode keeps the indexes here
+        self.Backend = backend if backend is not None and backend.IsShared else None
+
+        self.Sessions: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self.StateIndex: Dict[str, str] = {}
+        self.ExpiryHeap = []
+        self.Lock = threading.RLock()
+        self.Evictions = 0
+        self.TrimInterval = max(1, min(SHARED_TRIM_INTERVAL, max_sessions // 100))
+        self.WritesSinceTrim = 0
+
+    def _ExpiresAt(self, session_data: Dict[str, Any]) -> float:
+        """Expiry is anchored to created_at so a restored session keeps its original deadline"""
+        created_at = session_data.get("created_at")
+        if isinstance(created_at, datetime):
+            age = (datetime.utcnow() - created_at).total_seconds()
+            return time.time() + self.TTLSeconds - max(0.0, age)
+        return time.time() + self.TTLSeconds
+
+    # Local (single process) implementation
+
+    def _PurgeLocked(self, now: float) -> int:
+        removed = 0
+        while self.ExpiryHeap and self.ExpiryHeap[0][0] <= now:
+            expires_at, session_id = heapq.heappop(self.ExpiryHeap)
+            entry = self.Sessions.get(session_id)
+            # Skip heap entries left behind by overwritten or removed sessions
+            if entry and entry[1] == expires_at:
+                self._RemoveLocked(session_id)
+                removed += 1
+        return removed
+
+    def _RemoveLocked(self, session_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.Sessions.pop(session_id, None)
+        if entry is None:
+            return None
+        state = entry[0].get("state")
+        if state:
+            state_key = HashState(state)
+            if self.StateIndex.get(state_key) == session_id:
+                del self.StateIndex[state_key]
+        return entry[0]
+
+    def _EvictForCapacityLocked(self):
+        """Drop the sessions closest to expiry until there is room for one more"""
+        while len(self.Sessions) >= self.MaxSessions and self.ExpiryHeap:
+            expires_at, session_id = heapq.heappop(self.ExpiryHeap)
+            entry = self.Sessions.get(session_id)
+            if entry and entry[1] == expires_at:
+                self._RemoveLocked(session_id)
+                self.Evictions += 1
+
+    def _LiveLocked(self, session_id: str, now: float) -> Optional[Dict[str, Any]]:
+        entry = self.Sessions.get(session_id)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            self._RemoveLocked(session_id)
+            return None
+        return entry[0]
+
+    def _TrimShared(self):
+        """Evict the sessions closest to expiry once the shared store is over capacity"""
+        with self.Lock:
+            self.WritesSinceTrim += 1
+            if self.WritesSinceTrim < self.TrimInterval:
+                return
+            self.WritesSinceTrim = 0
+        evicted = self.Backend.Trim(self.SESSION_NAMESPACE, self.MaxSessions)
+        if evicted:
+            # Index entries of evicted sessions resolve to nothing; drop them too
+            self.Backend.Trim(self.STATE_NAMESPACE, self.MaxSessions)
+            with self.Lock:
+                self.Evictions += evicted
+            self.Logger.warning(f"⚠️ OAuth session store at capacity ({self.MaxSessions}) - evicted {evicted}")
+
+    # Mapping API
+
+    def __setitem__(self, session_id: str, session_data: Dict[str, Any]):
+        expires_at = self._ExpiresAt(session_data)
+        state = session_data.get("state")
+
+        if self.Backend:
+            ttl = expires_at - time.time()
+            if ttl <= 0:
+                return
+            self.Backend.Set(self.SESSION_NAMESPACE, session_id, session_data, ttl)
+            if state:
+                self.Backend.Set(self.STATE_NAMESPACE, HashState(state), session_id, ttl)
+            self._TrimShared()
+            return
+
+        now = time.time()
+        with self.Lock:
+            self._PurgeLocked(now)
+            if session_id in self.Sessions:
+                self._RemoveLocked(session_id)
+            if expires_at <= now:
+                return
+            self._EvictForCapacityLocked()
+
+            self.Sessions[session_id] = (session_data, expires_at)
+            heapq.heappush(self.ExpiryHeap, (expires_at, session_id))
+            if state:
+                self.StateIndex[HashState(state)] = session_id
+
+    def __getitem__(self, session_id: str) -> Dict[str, Any]:
+        if self.Backend:
+            session_data = self.Backend.Get(self.SESSION_NAMESPACE, session_id)
+        else:
+            with self.Lock:
+                session_data = self._LiveLocked(session_id, time.time())
+        if session_data is None:
+            raise KeyError(session_id)
+        return session_data
+
+    def __delitem__(self, session_id: str):
+        if self.pop(session_id, None) is None:
+            raise KeyError(session_id)
+
+    def __contains__(self, session_id) -> bool:
+        try:
+            self[session_id]
+            return True
+        except KeyError:
+            return False
+
+    def __iter__(self) -> Iterator[str]:
+        if self.Backend:
+            return iter(self.Backend.Keys(self.SESSION_NAMESPACE))
+        with self.Lock:
+            self._PurgeLocked(time.time())
+            return iter(list(self.Sessions))
+
+    def __len__(self) -> int:
+        if self.Backend:
+            return self.Backend.Count(self.SESSION_NAMESPACE)
+        with self.Lock:
+            self._PurgeLocked(time.time())
+            return len(self.Sessions)
+
+    def pop(self, session_id: str, *default):
+        """Atomically remove a session (single use across workers)"""
+        if self.Backend:
+            session_data = self.Backend.Pop(self.SESSION_NAMESPACE, session_id)
+            if session_data and session_data.get("state"):
+                self.Backend.Delete(self.STATE_NAMESPACE, HashState(session_data["state"]))
+        else:
+            with self.Lock:
+                session_data = self._LiveLocked(session_id, time.time())
+                if session_data is not None:
+                    self._RemoveLocked(session_id)
+
+        if session_data is None:
+            if default:
+                return default[0]
+            raise KeyError(session_id)
+        return session_data
+
+    def clear(self):
+        if self.Backend:
+            self.Backend.Clear(self.SESSION_NAMESPACE)
+            self.Backend.Clear(self.STATE_NAMESPACE)
+            return
+        with self.Lock:
+            self.Sessions.clear()
+            self.StateIndex.clear()
+            self.ExpiryHeap.clear()
+
+    # Callback fast paths
+
+    def FindSessionId(self, state: str) -> Optional[str]:
+        """O(1) state -> session_id lookup"""
+        if not state:
+            return None
+        if self.Backend:
+            return self.Backend.Get(self.STATE_NAMESPACE, HashState(state))
+        with self.Lock:
+            session_id = self.StateIndex.get(HashState(state))
+            if session_id and self._LiveLocked(session_id, time.time()) is not None:
+                return session_id
+            return None
+
+    def FindByState(self, state: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return (session_id, session_data) for a state without removing it"""
+        session_id = self.FindSessionId(state)
+        if not session_id:
+            return None
+        session_data = self.get(session_id)
+        return (session_id, session_data) if session_data is not None else None
+
+    def ConsumeByState(self, state: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Atomically claim the session that issued state"""
+        session_id = self.FindSessionId(state)
+        if not session_id:
+            return None
+        session_data = self.pop(session_id, None)
+        return (session_id, session_data) if session_data is not None else None
+
+    def PurgeExpired(self) -> int:
+        """Expiry sweep - O(k log n) for k expired sessions"""
+        if self.Backend:
+            return self.Backend.PurgeExpired()
+        with self.Lock:
+            return self._PurgeLocked(time.time())
+
+    def GetStats(self) -> Dict[str, Any]:
+        """Store statistics for health/security endpoints"""
+        if self.Backend:
+            return {
+                "backend": self.Backend.Name,
+                "active_sessions": len(self),
+                "max_sessions": self.MaxSessions,
+                "ttl_seconds": self.TTLSeconds,
+                "evictions": self.Evictions
+            }
+        with self.Lock:
+            self._PurgeLocked(time.time())
+            return {
+                "backend": "memory",
+                "active_sessions": len(self.Sessions),
+                "indexed_states": len(self.StateIndex),
+                "heap_entries": len(self.ExpiryHeap),
+                "max_sessions": self.MaxSessions,
+                "ttl_seconds": self.TTLSeconds,
+                "evictions": self.Evictions
+            }
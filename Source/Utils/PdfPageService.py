@@ -0,0 +1,226 @@
+# File: PdfPageService.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Utils/PdfPageService.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 11:15PM
+
+"""
+Page-level PDF delivery for /api/books/{id}/pages
+On a 2G-class link a whole textbook takes minutes to arrive, and even with
+range requests pdf.js has to walk the cross-reference table before it can
+draw page 1. This service splits each book into small self-contained page
+bundles (a few pages per PDF) with PyMuPDF and keeps them on disk next to a
+per-book page index, so the reader can render the first bundle straight
+away and prefetch the next ones while the student reads.
+
+Bundles are keyed by the source file's ETag - replacing a book on disk
+discards its old bundles automatically.
+"""
+
+import os
+import json
+import shutil
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from .PdfSupport import PyMuPDFImport
+
+PyMuPDF = PyMuPDFImport("⚠️ PyMuPDF not available - page bundles disabled, readers fall back to byte ranges")
+fitz = PyMuPDF.Symbol("fitz")
+
+DEFAULT_PAGES_PER_BUNDLE = 8
+MAX_PAGES_PER_REQUEST = 64
+INDEX_FILENAME = "index.json"
+
+class PageRangeError(ValueError):
+    """Requested pages fall outside the document"""
+
+def ClampPageRange(from_page: Optional[int], to_page: Optional[int], page_count: int,
+                   max_pages: int = MAX_PAGES_PER_REQUEST) -> Tuple[int, int]:
+    """
+    Normalise a 1-based inclusive page range
+
+    A missing from_page starts at page 1, a missing to_page runs to the end;
+    the span is capped at max_pages. Raises PageRangeError for ranges that
+    cannot be served.
+    """
+    start = 1 if from_page is None else from_page
+    end = page_count if to_page is None else min(to_page, page_count)
+    if start < 1 or start > page_count or end < start:
+        raise PageRangeError(f"pages {from_page}-{to_page} not in 1-{page_count}")
+    return start, min(end, start + max_pages - 1)
+
+class PdfPageService:
+    """
+    Page index and cached page bundles per book file
+
+    Works with BookFileEntry objects from BookFileServer, so the caller's
+    path cache decides which file is current and its ETag names the cache
+    directory.
+    """
+
+    def __init__(self, cache_dir: str, pages_per_bundle: int = DEFAULT_PAGES_PER_BUNDLE):
+        self.Logger = logging.getLogger(__name__)
+        self.CacheDir = cache_dir
+        self.PagesPerBundle = pages_per_bundle
+        self.Indexes: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        self.Lock = threading.Lock()
+        self.BuildLocks: Dict[str, Tuple[threading.Lock, int]] = {}  # path -> (lock, waiters)
+        self.BundlesBuilt = 0
+
+    def IsAvailable(self) -> bool:
+        return PyMuPDF.IsAvailable()
+
+    def _BookDir(self, entry) -> str:
+        return os.path.join(self.CacheDir, str(entry.book_id), entry.etag.strip('"'))
+
+    @contextmanager
+    def _Building(self, key: str):
+        """
+        Hold the build lock for one output file
+
+        The entry is dropped once nobody else is waiting on it; callers
+        re-check the file on disk inside the lock, so a late arrival with a
+        fresh lock sees the finished build.
+        """
+        with self.Lock:
+            lock, waiters = self.BuildLocks.get(key, (threading.Lock(), 0))
+            self.BuildLocks[key] = (lock, waiters + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self.Lock:
+                lock, waiters = self.BuildLocks[key]
+                if waiters > 1:
+                    self.BuildLocks[key] = (lock, waiters - 1)
+                else:
+                    del self.BuildLocks[key]
+
+    def _DiscardStaleVersions(self, entry):
+        """Remove bundles built from earlier versions of this book's file"""
+        book_root = os.path.join(self.CacheDir, str(entry.book_id))
+        current = entry.etag.strip('"')
+        try:
+            versions = os.listdir(book_root)
+        except OSError:
+            return
+        for version in versions:
+            if version != current:
+                shutil.rmtree(os.path.join(book_root, version), ignore_errors=True)
+                self.Logger.info(f"🧹 Discarded stale page bundles for book {entry.book_id} ({version})")
+
+    def BundleRanges(self, page_count: int) -> List[Tuple[int, int]]:
+        """Aligned (from, to) ranges the reader requests - these are the cached bundles"""
+        return [(start, min(start + self.PagesPerBundle - 1, page_count))
+                for start in range(1, page_count + 1, self.PagesPerBundle)]
+
+    def BundleFor(self, page: int, page_count: int) -> Tuple[int, int]:
+        """The aligned bundle holding page"""
+        start = (page - 1) // self.PagesPerBundle * self.PagesPerBundle + 1
+        return start, min(start + self.PagesPerBundle - 1, page_count)
+
+    def GetPageIndex(self, entry) -> Dict[str, Any]:
+        """
+        Page count, page sizes and bundle layout for a book
+
+        Built once per file version and persisted as index.json, so later
+        workers and restarts read it instead of opening the PDF.
+        """
+        if not self.IsAvailable():
+            raise RuntimeError("PyMuPDF is not installed")
+
+        key = (entry.book_id, entry.etag)
+        with self.Lock:
+            index = self.Indexes.get(key)
+        if index is not None:
+            return index
+
+        book_dir = self._BookDir(entry)
+        index_path = os.path.join(book_dir, INDEX_FILENAME)
+        with self._Building(index_path):
+            try:
+                with open(index_path, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = None
+
+            if index is None or index.get("bundle_pages") != self.PagesPerBundle:
+                self._DiscardStaleVersions(entry)
+                with fitz.open(entry.path) as document:
+                    page_sizes = [[round(page.rect.width, 2), round(page.rect.height, 2)]
+                                  for page in document]
+                page_count = len(page_sizes)
+                index = {
+                    "book_id": entry.book_id,
+                    "etag": entry.etag,
+                    "page_count": page_count,
+                    "bundle_pages": self.PagesPerBundle,
+                    "bundles": [[start, end] for start, end in self.BundleRanges(page_count)],
+                    "page_sizes": page_sizes
+                }
+                os.makedirs(book_dir, exist_ok=True)
+                temp_path = f"{index_path}.{threading.get_ident()}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(index, f)
+                os.replace(temp_path, index_path)
+                self.Logger.info(f"📑 Indexed {page_count} pages for book {entry.book_id}")
+
+        with self.Lock:
+            self.Indexes[key] = index
+        return index
+
+    def GetBundlePath(self, entry, from_page: Optional[int], to_page: Optional[int]) -> Tuple[str, int, int]:
+        """
+        Path of the cached bundle holding from_page (1-based)
+
+        Only the aligned BundleRanges are ever built, so the cache holds at
+        most one file per bundle. A range that does not match a bundle is
+        answered with the bundle containing its first page; the returned
+        (path, from, to) says which pages that is. Bundles are built on first
+        request and served from disk afterwards; concurrent requests for the
+        same bundle wait for a single build.
+        """
+        index = self.GetPageIndex(entry)
+        start, _ = ClampPageRange(from_page, to_page, index["page_count"])
+        start, end = self.BundleFor(start, index["page_count"])
+
+        bundle_path = os.path.join(self._BookDir(entry), f"pages_{start}-{end}.pdf")
+        if os.path.exists(bundle_path):
+            return bundle_path, start, end
+
+        with self._Building(bundle_path):
+            if not os.path.exists(bundle_path):
+                temp_path = f"{bundle_path}.{threading.get_ident()}.tmp"
+                with fitz.open(entry.path) as source, fitz.open() as bundle:
+                    bundle.insert_pdf(source, from_page=start - 1, to_page=end - 1)
+                    bundle.save(temp_path, garbage=3, deflate=True)
+                os.replace(temp_path, bundle_path)
+                with self.Lock:
+                    self.BundlesBuilt += 1
+                self.Logger.info(f"📄 Built pages {start}-{end} for book {entry.book_id}")
+
+        return bundle_path, start, end
+
+    def Precompute(self, entry, bundle_count: int = 2) -> int:
+        """Build the index and the first bundles so the next reader starts instantly"""
+        try:
+            index = self.GetPageIndex(entry)
+            ranges = index["bundles"][:bundle_count]
+            for start, end in ranges:
+                self.GetBundlePath(entry, start, end)
+            return len(ranges)
+        except Exception as e:
+            self.Logger.warning(f"⚠️ Page precompute failed for book {entry.book_id}: {e}")
+            return 0
+
+    def GetStats(self) -> Dict[str, Any]:
+        with self.Lock:
+            return {
+                "available": self.IsAvailable(),
+                "indexed_books": len(self.Indexes),
+                "bundles_built": self.BundlesBuilt,
+                "bundle_pages": self.PagesPerBundle
+            }
@@ -0,0 +1,22 @@
+# File: PdfSupport.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Utils/PdfSupport.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 11:15PM
+
+"""
+PyMuPDF as an optional, lazily imported dependency
+Page bundles, previews and content indexing all render or read PDFs with
+PyMuPDF. Importing it adds ~100 ms to server startup, so each of them gets
+it through PyMuPDFImport and it is imported the first time a PDF is opened.
+"""
+
+from .LazyImport import LazyImport
+
+def _ImportPyMuPDF():
+    import fitz  # PyMuPDF
+    return locals()
+
+def PyMuPDFImport(warning: str) -> LazyImport:
+    """PyMuPDF imported on first use; warning is printed once if it is missing"""
+    return LazyImport(_ImportPyMuPDF, warning, probe="fitz")
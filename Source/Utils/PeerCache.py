@@ -0,0 +1,345 @@
+# File: PeerCache.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Utils/PeerCache.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 09:45PM
+
+"""
+Content store for LAN caching-peer mode
+One machine on a shared uplink fetches each book from Google Drive (or from
+another peer) once and keeps it here; every other device on the LAN is then
+served from this copy. Every stored file is addressed by its SHA-256,
+which doubles as a strong ETag, so copies held by different peers validate
+against each other. Concurrent requests for the same missing item share one
+upstream transfer, interrupted transfers resume from the .part file with a
+Range request, and the store is trimmed least-recently-used first when it
+grows past its byte budget.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .BookFileServer import BookFileEntry
+from .LazyImport import LazyImport
+
+def _ImportRequests():
+    import requests
+    return locals()
+
+# Only a caching peer fetches upstream, so plain peers never load the HTTP client
+requests = LazyImport(_ImportRequests).Symbol("requests")
+
+HASH_BLOCK_SIZE = 1024 * 1024
+STREAM_BLOCK_SIZE = 256 * 1024
+REQUEST_TIMEOUT_SECONDS = (10, 60)
+DEFAULT_FETCH_WAIT_SECONDS = 600
+MANIFEST_VERSION = 1
+MANIFEST_SAVE_INTERVAL = 32  # new hashes per manifest write
+SHA256_HEADER = "X-Content-SHA256"
+
+@dataclass(slots=True)
+class ContentFileEntry(BookFileEntry):
+    """BookFileEntry whose ETag is its content hash - identical on every peer"""
+    sha256: str = ""
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.sha256}"'
+
+def BookKey(book_id: int) -> str:
+    return f"book/{book_id}"
+
+def HashFile(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class PeerCache:
+    """
+    Verified, content-hashed copies of upstream files plus a hash memo for local files
+
+    Items and memoised hashes live in manifest.json next to the cached files,
+    so a restart neither re-downloads nor re-hashes anything that is unchanged.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 0, session: Optional["requests.Session"] = None,
+                 fetch_wait_seconds: float = DEFAULT_FETCH_WAIT_SECONDS):
+        self.Logger = logging.getLogger(__name__)
+        self.CacheDir = os.path.abspath(cache_dir)
+        self.ManifestPath = os.path.join(self.CacheDir, "manifest.json")
+        self.MaxBytes = max_bytes
+        self._Session = session
+        self.FetchWaitSeconds = fetch_wait_seconds
+        self.Lock = threading.Lock()
+        self.SaveLock = threading.Lock()
+        self.UnsavedHashes = 0
+        self.Items: Dict[str, Dict[str, Any]] = {}
+        self.Hashes: Dict[str, Dict[str, Any]] = {}
+        self.InFlight: Dict[str, threading.Event] = {}
+        self.Hits = 0
+        self.Fetches = 0
+        self.FailedFetches = 0
+        self.UpstreamBytes = 0
+
+        os.makedirs(self.CacheDir, exist_ok=True)
+        self._LoadManifest()
+
+    # ---- persistence -----------------------------------------------------
+
+    def _LoadManifest(self):
+        try:
+            with open(self.ManifestPath, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        self.Items = data.get("items", {})
+        self.Hashes = data.get("hashes", {})
+
+    def _SaveManifest(self):
+        # One writer at a time, so an older snapshot never replaces a newer one
+        with self.SaveLock:
+            with self.Lock:
+                data = {"version": MANIFEST_VERSION, "items": dict(self.Items), "hashes": dict(self.Hashes)}
+                self.UnsavedHashes = 0
+            temp_path = f"{self.ManifestPath}.{os.getpid()}.tmp"
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.ManifestPath)
+            except OSError as e:
+                self.Logger.warning(f"⚠️ Could not save peer cache manifest: {e}")
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def SaveManifest(self):
+        """Write out hashes memoised since the last save (end of a hashing pass, shutdown)"""
+        with self.Lock:
+            pending = self.UnsavedHashes
+        if pending:
+            self._SaveManifest()
+
+    def PathFor(self, key: str) -> str:
+        return os.path.join(self.CacheDir, key.replace("/", "_"))
+
+    # ---- hashes ----------------------------------------------------------
+
+    def KnownHash(self, path: str, size: int, mtime_ns: int) -> Optional[str]:
+        """Memoised SHA-256 of a file, or None if it was never hashed at this size/mtime"""
+        with self.Lock:
+            known = self.Hashes.get(path)
+        if known and known["size"] == size and known["mtime_ns"] == mtime_ns:
+            return known["sha256"]
+        return None
+
+    def HashOf(self, path: str, size: int, mtime_ns: int) -> str:
+        """SHA-256 of a local file, hashed at most once per version of the file"""
+        sha256 = self.KnownHash(path, size, mtime_ns)
+        if sha256:
+            return sha256
+        sha256 = HashFile(path)
+        with self.Lock:
+            self.Hashes[path] = {"size": size, "mtime_ns": mtime_ns, "sha256": sha256}
+            self.UnsavedHashes += 1
+            save = self.UnsavedHashes >= MANIFEST_SAVE_INTERVAL
+        if save:
+            self._SaveManifest()
+        return sha256
+
+    def LocalEntry(self, entry: BookFileEntry) -> ContentFileEntry:
+        """Content-addressed view of a file this machine already has (library book or database)"""
+        sha256 = self.HashOf(entry.path, entry.size, entry.mtime_ns)
+        return ContentFileEntry(entry.book_id, entry.title, entry.path, entry.size,
+                                entry.mtime_ns, entry.resolved_at, sha256)
+
+    # ---- cached items ----------------------------------------------------
+
+    def Get(self, key: str) -> Optional[ContentFileEntry]:
+        """Cached copy of key, or None if it was never fetched or has gone missing"""
+        with self.Lock:
+            item = self.Items.get(key)
+        if not item:
+            return None
+        path = self.PathFor(key)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stat = None
+        if stat is None or stat.st_size != item["size"]:
+            with self.Lock:
+                self.Items.pop(key, None)
+            return None
+        with self.Lock:
+            item["last_used"] = time.time()
+            self.Hits += 1
+        return ContentFileEntry(item.get("book_id", 0), item["title"], path, item["size"],
+                                stat.st_mtime_ns, time.monotonic(), item["sha256"])
+
+    def Fetch(self, key: str, url: str, title: str, book_id: int = 0,
+              expected_size: Optional[int] = None, expected_sha256: Optional[str] = None) -> Optional[ContentFileEntry]:
+        """
+        Cached copy of key, downloading it from url first if needed
+
+        Only one transfer per key runs at a time; other callers wait for it
+        and then read the cached result. Returns None when the upstream
+        fails or the download does not match its expected size or hash.
+        """
+        entry = self.Get(key)
+        if entry:
+            return entry
+
+        with self.Lock:
+            event = self.InFlight.get(key)
+            leader = event is None
+            if leader:
+                event = self.InFlight[key] = threading.Event()
+
+        if not leader:
+            event.wait(self.FetchWaitSeconds)
+            return self.Get(key)
+
+        try:
+            # The previous leader may have finished between our miss and taking the lead
+            return self.Get(key) or self._Download(key, url, title, book_id, expected_size, expected_sha256)
+        except (requests.RequestException, OSError) as e:
+            self.Logger.warning(f"⚠️ Peer cache fetch failed for {key}: {e}")
+            with self.Lock:
+                self.FailedFetches += 1
+            return None
+        finally:
+            with self.Lock:
+                self.InFlight.pop(key, None)
+            event.set()
+
+    @property
+    def Session(self):
+        """HTTP session for upstream fetches, created by the first one"""
+        if self._Session is None:
+            self._Session = requests.Session()
+        return self._Session
+
+    def _Download(self, key: str, url: str, title: str, book_id: int,
+                  expected_size: Optional[int], expected_sha256: Optional[str]) -> Optional[ContentFileEntry]:
+        target = self.PathFor(key)
+        part_path = f"{target}.part"
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        response = self.Session.get(url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT_SECONDS)
+        with response:
+            if response.status_code == 416 and offset:
+                # Upstream file changed since the partial copy - start over next time
+                self._RemovePart(part_path)
+                return None
+            if response.status_code == 206 and response.headers.get("Content-Range", "").startswith(f"bytes {offset}-"):
+                digest = self._HashPrefix(part_path)
+                mode = "ab"
+            elif response.status_code == 200:
+                digest, offset, mode = hashlib.sha256(), 0, "wb"
+            else:
+                if offset:
+                    self._RemovePart(part_path)
+                self.Logger.warning(f"⚠️ Upstream returned HTTP {response.status_code} for {key}")
+                with self.Lock:
+                    self.FailedFetches += 1
+                return None
+
+            # Another peer tells us what the bytes should hash to
+            expected_sha256 = expected_sha256 or response.headers.get(SHA256_HEADER)
+            received = 0
+            with open(part_path, mode) as f:
+                for block in response.iter_content(chunk_size=STREAM_BLOCK_SIZE):
+                    if block:
+                        f.write(block)
+                        digest.update(block)
+                        received += len(block)
+            with self.Lock:
+                self.UpstreamBytes += received
+
+        size = offset + received
+        sha256 = digest.hexdigest()
+        if (expected_size is not None and size != expected_size) or (expected_sha256 and sha256 != expected_sha256):
+            self.Logger.warning(f"⚠️ Peer cache rejected {key}: {size} bytes, sha256 {sha256[:12]}…")
+            self._RemovePart(part_path)
+            with self.Lock:
+                self.FailedFetches += 1
+            return None
+
+        os.replace(part_path, target)
+        with self.Lock:
+            self.Items[key] = {"book_id": book_id, "title": title, "size": size, "sha256": sha256,
+                               "fetched_at": datetime.now().isoformat(), "last_used": time.time()}
+            self.Fetches += 1
+        self._Evict(keep=key)
+        self._SaveManifest()
+        self.Logger.info(f"📦 Cached {key} for the LAN ({size:,} bytes)")
+        return ContentFileEntry(book_id, title, target, size, os.stat(target).st_mtime_ns, time.monotonic(), sha256)
+
+    @staticmethod
+    def _HashPrefix(part_path: str):
+        digest = hashlib.sha256()
+        with open(part_path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest
+
+    @staticmethod
+    def _RemovePart(part_path: str):
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
+
+    def _Evict(self, keep: str = None):
+        """Drop least-recently-used items until the store fits its byte budget"""
+        if not self.MaxBytes:
+            return
+        with self.Lock:
+            total = sum(item["size"] for item in self.Items.values())
+            victims = []
+            for key, item in sorted(self.Items.items(), key=lambda pair: pair[1].get("last_used", 0)):
+                if total <= self.MaxBytes:
+                    break
+                if key == keep:
+                    continue
+                victims.append(key)
+                total -= item["size"]
+            for key in victims:
+                self.Items.pop(key, None)
+        for key in victims:
+            try:
+                os.remove(self.PathFor(key))
+            except OSError:
+                pass
+
+    # ---- manifest --------------------------------------------------------
+
+    def ListItems(self) -> List[Dict[str, Any]]:
+        with self.Lock:
+            return [dict(item, key=key) for key, item in self.Items.items()]
+
+    def GetStats(self) -> Dict[str, Any]:
+        with self.Lock:
+            return {
+                "items": len(self.Items),
+                "bytes": sum(item["size"] for item in self.Items.values()),
+                "max_bytes": self.MaxBytes,
+                "hits": self.Hits,
+                "fetches": self.Fetches,
+                "failed_fetches": self.FailedFetches,
+                "upstream_bytes": self.UpstreamBytes
+            }
@@ -0,0 +1,305 @@
+# File: PreviewPipeline.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Utils/PreviewPipeline.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 11:15PM
+
+"""
+Low-resolution page previews for /api/books/{id}/preview/{page}
+Students can look at the first pages of a book before spending data on the
+download. Rendering runs in a fixed-size process pool (PyMuPDF rasterising
+is CPU bound and would stall the event loop or the GIL). The small JPEGs
+go into a content-addressed cache on disk. That cache is bounded by total
+bytes and evicts the least recently served images first.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .PdfSupport import PyMuPDFImport
+
+PyMuPDF = PyMuPDFImport("⚠️ PyMuPDF not available - page previews disabled")
+fitz = PyMuPDF.Symbol("fitz")
+
+DEFAULT_PREVIEW_PAGES = 3
+DEFAULT_PREVIEW_WIDTH = 360
+DEFAULT_JPEG_QUALITY = 55
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+def RenderPreviewPages(pdf_path: str, page_limit: int, width: int,
+                       quality: int) -> List[Tuple[int, bytes]]:
+    """
+    Rasterise the first page_limit pages of a PDF to JPEG (runs in a worker process)
+
+    Returns [(page_number, jpeg_bytes), ...] with 1-based page numbers.
+    """
+    rendered = []
+    with fitz.open(pdf_path) as document:
+        for index in range(min(page_limit, document.page_count)):
+            page = document[index]
+            zoom = width / page.rect.width if page.rect.width else 1.0
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            rendered.append((index + 1, pixmap.tobytes(output="jpeg", jpg_quality=quality)))
+    return rendered
+
+class PreviewCache:
+    """
+    Content-addressed preview images with an LRU byte bound
+
+    Image bytes live in objects/<aa>/<sha256>.jpg; a small SQLite manifest
+    maps (book, file version, page) to a digest and tracks when each blob
+    was last served. Identical pages (blank pages, shared covers) are stored
+    once.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+        self.Logger = logging.getLogger(__name__)
+        self.CacheDir = cache_dir
+        self.MaxBytes = max_bytes
+        self.Lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.Connection = sqlite3.connect(os.path.join(cache_dir, "previews.db"), check_same_thread=False)
+        self.Connection.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS preview_blobs (
+                digest TEXT PRIMARY KEY,
+                size_bytes INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_preview_blobs_last_access ON preview_blobs(last_access);
+            CREATE TABLE IF NOT EXISTS preview_pages (
+                book_id INTEGER NOT NULL,
+                version TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                PRIMARY KEY (book_id, version, page)
+            );
+            CREATE INDEX IF NOT EXISTS idx_preview_pages_digest ON preview_pages(digest);
+        """)
+        self.TotalBytes = self.Connection.execute(
+            "SELECT COALESCE(SUM(size_bytes), 0) FROM preview_blobs"
+        ).fetchone()[0]
+        self.Evictions = 0
+
+    def BlobPath(self, digest: str) -> str:
+        return os.path.join(self.CacheDir, "objects", digest[:2], f"{digest}.jpg")
+
+    def Lookup(self, book_id: int, version: str, page: int) -> Optional[str]:
+        """Digest of a cached preview, refreshing its LRU position"""
+        with self.Lock:
+            row = self.Connection.execute(
+                "SELECT digest FROM preview_pages WHERE book_id = ? AND version = ? AND page = ?",
+                (book_id, version, page)
+            ).fetchone()
+            if not row:
+                return None
+            if not os.path.exists(self.BlobPath(row[0])):
+                self._DropBlobLocked(row[0])
+                self.Connection.commit()
+                return None
+            self.Connection.execute("UPDATE preview_blobs SET last_access = ? WHERE digest = ?",
+                                    (time.time(), row[0]))
+            self.Connection.commit()
+            return row[0]
+
+    def HasBook(self, book_id: int, version: str) -> bool:
+        with self.Lock:
+            return self.Connection.execute(
+                "SELECT 1 FROM preview_pages WHERE book_id = ? AND version = ? LIMIT 1", (book_id, version)
+            ).fetchone() is not None
+
+    def Store(self, book_id: int, version: str, pages: Iterable[Tuple[int, bytes]]) -> Dict[int, str]:
+        """Store rendered pages for one file version, replacing older versions of the book"""
+        stored = {}
+        now = time.time()
+        with self.Lock:
+            self.Connection.execute("DELETE FROM preview_pages WHERE book_id = ? AND version != ?",
+                                    (book_id, version))
+            for page, image in pages:
+                digest = hashlib.sha256(image).hexdigest()
+                path = self.BlobPath(digest)
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    temp_path = f"{path}.{threading.get_ident()}.tmp"
+                    with open(temp_path, "wb") as f:
+                        f.write(image)
+                    os.replace(temp_path, path)
+                inserted = self.Connection.execute(
+                    "INSERT OR IGNORE INTO preview_blobs (digest, size_bytes, last_access) VALUES (?, ?, ?)",
+                    (digest, len(image), now)
+                ).rowcount
+                if inserted:
+                    self.TotalBytes += len(image)
+                self.Connection.execute(
+                    "INSERT OR REPLACE INTO preview_pages (book_id, version, page, digest) VALUES (?, ?, ?, ?)",
+                    (book_id, version, page, digest)
+                )
+                stored[page] = digest
+            self._CollectOrphansLocked()
+            self._EvictLocked()
+            self.Connection.commit()
+        return stored
+
+    def _DropBlobLocked(self, digest: str):
+        size = self.Connection.execute("SELECT size_bytes FROM preview_blobs WHERE digest = ?",
+                                       (digest,)).fetchone()
+        self.Connection.execute("DELETE FROM preview_blobs WHERE digest = ?", (digest,))
+        # A book with a missing page is forgotten as a whole so it renders again
+        self.Connection.execute("""
+            DELETE FROM preview_pages WHERE (book_id, version) IN
+                (SELECT book_id, version FROM preview_pages WHERE digest = ?)
+        """, (digest,))
+        if size:
+            self.TotalBytes -= size[0]
+        try:
+            os.remove(self.BlobPath(digest))
+        except OSError:
+            pass
+
+    def _CollectOrphansLocked(self):
+        orphans = self.Connection.execute(
+            "SELECT digest FROM preview_blobs WHERE digest NOT IN (SELECT digest FROM preview_pages)"
+        ).fetchall()
+        for (digest,) in orphans:
+            self._DropBlobLocked(digest)
+
+    def _EvictLocked(self):
+        while self.TotalBytes > self.MaxBytes:
+            row = self.Connection.execute(
+                "SELECT digest FROM preview_blobs ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if not row:
+                break
+            self._DropBlobLocked(row[0])
+            self.Evictions += 1
+
+    def GetStats(self) -> Dict[str, int]:
+        with self.Lock:
+            blobs = self.Connection.execute("SELECT COUNT(*) FROM preview_blobs").fetchone()[0]
+            return {"blobs": blobs, "total_bytes": self.TotalBytes,
+                    "max_bytes": self.MaxBytes, "evictions": self.Evictions}
+
+class PreviewPipeline:
+    """
+    Renders previews on a process pool and serves them from PreviewCache
+
+    At most max_workers books render at once; a book already being rendered
+    is never submitted twice. Warmup keeps at most max_workers renders
+    outstanding, so an interactive request never queues behind the library.
+    """
+
+    def __init__(self, cache: PreviewCache, page_limit: int = DEFAULT_PREVIEW_PAGES,
+                 width: int = DEFAULT_PREVIEW_WIDTH, quality: int = DEFAULT_JPEG_QUALITY,
+                 max_workers: int = DEFAULT_MAX_WORKERS):
+        self.Logger = logging.getLogger(__name__)
+        self.Cache = cache
+        self.PageLimit = page_limit
+        self.Width = width
+        self.Quality = quality
+        self.MaxWorkers = max_workers
+        self.Executor: Optional[ProcessPoolExecutor] = None
+        self.InFlight: Dict[Tuple[int, str], Future] = {}
+        self.Lock = threading.Lock()
+        self.StopEvent = threading.Event()
+        self.Rendered = 0
+        self.Failed = 0
+
+    @staticmethod
+    def IsAvailable() -> bool:
+        return PyMuPDF.IsAvailable()
+
+    @staticmethod
+    def Version(entry) -> str:
+        return entry.etag.strip('"')
+
+    def _GetExecutor(self) -> ProcessPoolExecutor:
+        if self.Executor is None:
+            self.Executor = ProcessPoolExecutor(max_workers=self.MaxWorkers)
+        return self.Executor
+
+    def Submit(self, entry) -> Future:
+        """Queue a render of the book's preview pages; returns the shared future"""
+        key = (entry.book_id, self.Version(entry))
+        with self.Lock:
+            future = self.InFlight.get(key)
+            if future is not None:
+                return future
+
+            future = Future()
+            self.InFlight[key] = future
+            render = self._GetExecutor().submit(RenderPreviewPages, entry.path, self.PageLimit,
+                                                self.Width, self.Quality)
+
+        def finish(done: Future):
+            try:
+                stored = self.Cache.Store(entry.book_id, key[1], done.result())
+                self.Rendered += 1
+                future.set_result(stored)
+            except Exception as e:
+                self.Failed += 1
+                self.Logger.warning(f"⚠️ Preview render failed for book {entry.book_id}: {e}")
+                future.set_exception(e)
+            finally:
+                with self.Lock:
+                    self.InFlight.pop(key, None)
+
+        render.add_done_callback(finish)
+        return future
+
+    def GetPreview(self, entry, page: int, timeout: float = 30.0) -> Optional[str]:
+        """
+        Blob path of a preview page, rendering the book first if needed
+
+        Returns None for pages beyond the preview limit or the document.
+        """
+        if page < 1 or page > self.PageLimit:
+            return None
+        version = self.Version(entry)
+        digest = self.Cache.Lookup(entry.book_id, version, page)
+        if digest is None and not self.Cache.HasBook(entry.book_id, version):
+            digest = self.Submit(entry).result(timeout=timeout).get(page)
+        if not digest:
+            return None
+        path = self.Cache.BlobPath(digest)
+        return path if os.path.exists(path) else None
+
+    def QueueMissing(self, entries: Iterable) -> int:
+        """
+        Render every book whose current file version has no previews yet
+
+        Blocks the calling thread until the last book is submitted, keeping
+        at most MaxWorkers warmup renders in the pool at a time.
+        """
+        slots = threading.Semaphore(self.MaxWorkers)
+        queued = 0
+        for entry in entries:
+            if entry is None or self.Cache.HasBook(entry.book_id, self.Version(entry)):
+                continue
+            slots.acquire()
+            if self.StopEvent.is_set():
+                break
+            self.Submit(entry).add_done_callback(lambda _: slots.release())
+            queued += 1
+        return queued
+
+    def Shutdown(self):
+        self.StopEvent.set()
+        with self.Lock:
+            executor, self.Executor = self.Executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def GetStats(self) -> Dict[str, int]:
+        with self.Lock:
+            in_flight = len(self.InFlight)
+        return {"available": self.IsAvailable(), "rendered": self.Rendered, "failed": self.Failed,
+                "in_flight": in_flight, "max_workers": self.MaxWorkers, "page_limit": self.PageLimit,
+                **self.Cache.GetStats()}
@@ -0,0 +1,117 @@
+# File: ServerLauncher.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Utils/ServerLauncher.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 09:50PM
+
+"""
+Multi-worker launcher for the AndyLibrary API
+uvicorn's supervisor binds the socket once and preforks N worker processes;
+per-user state moves to the shared StateBackend so any worker can serve any request.
+"""
+
+import os
+import logging
+from typing import Any, Dict, Union
+
+import uvicorn
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from .StateBackend import STATE_BACKEND_ENV, STATE_PATH_ENV, DEFAULT_STATE_PATH
+
+WORKERS_ENV = "ANDYLIBRARY_WORKERS"
+DEFAULT_APP_PATH = "Source.API.MainAPI:app"
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_BACKGROUND_LOCK = os.path.join("Data", "Local", "background_jobs.lock")
+
+# Lock files held for the life of this process, by path
+_held_locks: Dict[str, int] = {}
+
+def ResolveWorkerCount(requested: Union[int, str, None] = None) -> int:
+    """
+    Turn a --workers value into a process count
+    0, None or "auto" means one worker per logical CPU.
+    """
+    if requested is None:
+        requested = os.getenv(WORKERS_ENV, "1")
+
+    if isinstance(requested, str):
+        requested = requested.strip().lower()
+        requested = 0 if requested in ("", "auto") else int(requested)
+
+    if requested > 0:
+        return requested
+
+    cpu_count = psutil.cpu_count(logical=True) if psutil else None
+    return max(1, cpu_count or os.cpu_count() or 1)
+
+def ConfigureSharedState(workers: int, base_dir: str = None) -> str:
+    """
+    Select a process-shared state backend before workers fork
+    Workers inherit the environment, so they all open the same store.
+    """
+    backend = os.getenv(STATE_BACKEND_ENV, "memory").lower()
+
+    if workers > 1 and backend == "memory":
+        backend = "sqlite"
+        os.environ[STATE_BACKEND_ENV] = backend
+
+    if backend == "sqlite" and not os.getenv(STATE_PATH_ENV):
+        os.environ[STATE_PATH_ENV] = os.path.abspath(os.path.join(base_dir or os.getcwd(), DEFAULT_STATE_PATH))
+
+    return backend
+
+def AcquireBackgroundRole(lock_path: str = None) -> bool:
+    """
+    Elect the one worker that runs machine-wide background jobs
+    (content indexing, preview warmup). The first worker to lock the file
+    keeps it until it exits; the others serve requests only. Always True
+    with a single worker.
+    """
+    lock_path = os.path.abspath(lock_path or os.path.join(PROJECT_ROOT, DEFAULT_BACKGROUND_LOCK))
+    if lock_path in _held_locks:
+        return True
+
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd)
+        return False
+
+    _held_locks[lock_path] = fd
+    return True
+
+def RunServer(host: str, port: int, workers: int = 1, app: Any = None,
+              app_path: str = DEFAULT_APP_PATH, log_level: str = "info", access_log: bool = True):
+    """
+    Start uvicorn with one or many workers
+    A single worker runs the already-imported app object; multiple workers
+    need the import string so each child process builds its own app.
+    """
+    logger = logging.getLogger(__name__)
+    workers = ResolveWorkerCount(workers)
+    backend = ConfigureSharedState(workers, PROJECT_ROOT)
+
+    if workers > 1:
+        logger.info(f"🚀 Starting {workers} workers (shared state: {backend})")
+        print(f"👥 Workers: {workers} (shared state: {backend})")
+        uvicorn.run(app_path, host=host, port=port, workers=workers, app_dir=PROJECT_ROOT,
+                    log_level=log_level, access_log=access_log)
+    else:
+        uvicorn.run(app if app is not None else app_path, host=host, port=port, app_dir=PROJECT_ROOT,
+                    log_level=log_level, access_log=access_log)
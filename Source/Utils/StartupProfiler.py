@@ -0,0 +1,162 @@
+# File: StartupProfiler.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Utils/StartupProfiler.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 08:10PM
+
+"""
+Import-time profile of the API server, for `StartAndyGoogle.py --profile-startup`
+Imports Source.API.MainAPI in a fresh interpreter with `python -X importtime`,
+parses the report into per-module self and cumulative times, and prints
+the slowest ones. The same profile backs a budget check for CI. The check
+fails when the module load gets slower than the budget, or when a
+subsystem that should load on first use (Drive, OAuth, PyMuPDF...) is
+imported at startup again.
+"""
+
+import os
+import sys
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_TARGET = "Source.API.MainAPI"
+DEFAULT_RUNS = 3
+IMPORT_BUDGET_ENV = "ANDYLIBRARY_IMPORT_BUDGET_MS"
+
+# Loaded by a startup stage or the first request that needs them, never at module load
+DEFERRED_MODULES = (
+    "googleapiclient", "google_auth_oauthlib", "authlib", "passlib",
+    "fitz", "requests", "uvicorn", "nltk", "numpy"
+)
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+    parent: Optional[str] = None
+
+@dataclass
+class ImportProfile:
+    target: str
+    mode: str
+    records: List[ImportRecord] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def total_ms(self) -> float:
+        """Cumulative import time of the target module"""
+        for record in self.records:
+            if record.module == self.target:
+                return record.cumulative_us / 1000
+        return sum(record.self_us for record in self.records) / 1000
+
+    def Imported(self, package: str) -> List[ImportRecord]:
+        return [record for record in self.records
+                if record.module == package or record.module.startswith(package + ".")]
+
+    def DirectImports(self) -> List[ImportRecord]:
+        return [record for record in self.records if record.parent == self.target]
+
+    def ImportChain(self, record: ImportRecord) -> List[str]:
+        """Modules that pulled record in, innermost first"""
+        by_name = {record.module: record for record in self.records}
+        chain = []
+        while record.parent:
+            chain.append(record.parent)
+            record = by_name[record.parent]
+        return chain
+
+def ParseImportTime(report: str) -> List[ImportRecord]:
+    """Records from `-X importtime` output (stderr), in the order Python printed them"""
+    records = []
+    for line in report.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        columns = line[len("import time:"):].split("|")
+        if len(columns) != 3 or not columns[0].strip().isdigit():
+            continue  # the header line
+        name = columns[2].rstrip()
+        records.append(ImportRecord(
+            module=name.strip(),
+            self_us=int(columns[0]),
+            cumulative_us=int(columns[1]),
+            depth=(len(name) - len(name.lstrip())) // 2
+        ))
+
+    # A module is printed after everything it imported, so walk backwards to find parents
+    enclosing: Dict[int, str] = {}
+    for record in reversed(records):
+        record.parent = enclosing.get(record.depth - 1) if record.depth else None
+        enclosing[record.depth] = record.module
+    return records
+
+def ProfileImports(target: str = DEFAULT_TARGET, mode: str = "local", runs: int = DEFAULT_RUNS,
+                   timeout: float = 120.0) -> ImportProfile:
+    """Import target in fresh interpreters and keep the fastest run (the least disturbed by the OS)"""
+    # UTF-8 so the server's emoji messages cannot fail the import on a Windows console
+    env = dict(os.environ, ANDYGOOGLE_MODE=mode, PYTHONPATH=PROJECT_ROOT, PYTHONIOENCODING="utf-8")
+    best = ImportProfile(target, mode, error="no runs")
+    for _ in range(max(1, runs)):
+        try:
+            completed = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+                cwd=PROJECT_ROOT, env=env, capture_output=True, text=True,
+                encoding="utf-8", errors="replace", timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            return ImportProfile(target, mode, error=f"import took longer than {timeout:.0f}s")
+        profile = ImportProfile(target, mode, ParseImportTime(completed.stderr))
+        if completed.returncode != 0:
+            profile.error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "import failed"
+            return profile
+        if best.error or profile.total_ms < best.total_ms:
+            best = profile
+    return best
+
+def FormatImportTable(profile: ImportProfile, limit: int = 15) -> str:
+    """The target's direct imports and the heaviest packages, slowest first"""
+    lines = [f"📦 Import profile of {profile.target} ({profile.mode} mode): {profile.total_ms:.0f} ms"]
+    if profile.error:
+        lines.append(f"❌ {profile.error}")
+        return "\n".join(lines)
+
+    direct = sorted(profile.DirectImports(),
+                    key=lambda record: record.cumulative_us, reverse=True)[:limit]
+    lines += ["", f"{'Imported by the server module':<44}{'Self ms':>10}{'Total ms':>10}"]
+    lines += [f"{record.module:<44}{record.self_us / 1000:>10.1f}{record.cumulative_us / 1000:>10.1f}"
+              for record in direct]
+
+    packages: Dict[str, int] = {}
+    for record in profile.records:
+        package = record.module.split(".")[0]
+        packages[package] = packages.get(package, 0) + record.self_us
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:limit]
+    lines += ["", f"{'Package (own code only)':<44}{'Self ms':>10}"]
+    lines += [f"{package:<44}{self_us / 1000:>10.1f}" for package, self_us in heaviest]
+    return "\n".join(lines)
+
+def ResolveImportBudget(budget_ms: Optional[float] = None) -> Optional[float]:
+    if budget_ms is not None:
+        return budget_ms
+    value = os.getenv(IMPORT_BUDGET_ENV)
+    return float(value) if value else None
+
+def CheckStartupBudget(profile: ImportProfile, budget_ms: Optional[float] = None,
+                       deferred: Sequence[str] = DEFERRED_MODULES) -> List[str]:
+    """Regressions found in the profile; an empty list means the check passed"""
+    if profile.error:
+        return [f"{profile.target} failed to import: {profile.error}"]
+    problems = []
+    budget_ms = ResolveImportBudget(budget_ms)
+    if budget_ms is not None and profile.total_ms > budget_ms:
+        problems.append(f"{profile.target} took {profile.total_ms:.0f} ms to import (budget {budget_ms:.0f} ms)")
+    for package in deferred:
+        imported = profile.Imported(package)
+        if imported:
+            chain = " <- ".join(profile.ImportChain(imported[0]))
+            problems.append(f"{package} is imported at startup (via {chain or 'the interpreter'})")
+    return problems
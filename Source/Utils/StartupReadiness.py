@@ -0,0 +1,130 @@
+# File: StartupReadiness.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Utils/StartupReadiness.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 08:10PM
+
+"""
+Staged startup with readiness flags
+The server starts taking requests as soon as it has a database to serve: the
+last-good or bundled copy. Drive sync, Sheets logging, OAuth providers and
+the other managers start as background stages. Startup waits for them only
+up to a fixed budget. Each stage records its state and duration, and
+/api/health reports them together with the cold-start time: seconds from
+process launch to serving.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+LAUNCH_TIME_ENV = "ANDYLIBRARY_LAUNCH_TIME"
+FAST_START_ENV = "ANDYLIBRARY_FAST_START"
+STARTUP_BUDGET_ENV = "ANDYLIBRARY_STARTUP_BUDGET"
+DEFAULT_STARTUP_BUDGET_SECONDS = 1.0
+
+PENDING = "pending"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+DISABLED = "disabled"
+SETTLED_STATES = (READY, FAILED, DISABLED)
+
+def ProcessLaunchTime() -> float:
+    """When this process was launched: the launcher's mark, else the OS process start time"""
+    if os.getenv(LAUNCH_TIME_ENV):
+        return float(os.environ[LAUNCH_TIME_ENV])
+    try:
+        import psutil  # only needed when no launcher marked the time
+    except ImportError:
+        return time.time()
+    try:
+        return psutil.Process().create_time()
+    except psutil.Error:
+        return time.time()
+
+def MarkLaunchTime() -> float:
+    """Record when the process was launched; worker processes inherit it through the environment"""
+    os.environ.setdefault(LAUNCH_TIME_ENV, repr(time.time()))
+    return float(os.environ[LAUNCH_TIME_ENV])
+
+def ResolveStartupBudget() -> Optional[float]:
+    """Seconds startup may wait for background stages; None waits for all of them (fast start off)"""
+    if os.getenv(FAST_START_ENV, "1") == "0":
+        return None
+    try:
+        return max(0.0, float(os.getenv(STARTUP_BUDGET_ENV, DEFAULT_STARTUP_BUDGET_SECONDS)))
+    except ValueError:
+        return DEFAULT_STARTUP_BUDGET_SECONDS
+
+class StartupReadiness:
+    """Readiness flags and timings for the startup stages"""
+
+    def __init__(self, launch_time: Optional[float] = None):
+        self.Logger = logging.getLogger(__name__)
+        self.LaunchTime = launch_time if launch_time is not None else ProcessLaunchTime()
+        self.ServingAt: Optional[float] = None
+        self.Stages: Dict[str, Dict[str, Any]] = {}
+        self.Lock = threading.Lock()
+
+    def _Update(self, name: str, **fields):
+        with self.Lock:
+            self.Stages.setdefault(name, {"state": PENDING, "seconds": None, "error": None}).update(fields)
+
+    def Register(self, name: str):
+        self._Update(name, state=PENDING)
+
+    def Disable(self, name: str, reason: str):
+        self._Update(name, state=DISABLED, error=reason)
+
+    def Run(self, name: str, func: Callable[[], Any]) -> Any:
+        """
+        Run one stage and record the outcome; never raises
+
+        The stage is ready when func returns without raising. A return value
+        of False marks it failed, which lets stages that only degrade (no
+        Drive connection, for example) say so. Optional subsystems are
+        imported by their stage, so an ImportError marks it disabled.
+        """
+        self._Update(name, state=RUNNING)
+        started = time.monotonic()
+        try:
+            result = func()
+        except ImportError as e:
+            self._Update(name, state=DISABLED, seconds=round(time.monotonic() - started, 3),
+                         error=f"module not available: {e}")
+            return None
+        except Exception as e:
+            self.Logger.warning(f"⚠️ Startup stage {name} failed: {e}")
+            self._Update(name, state=FAILED, seconds=round(time.monotonic() - started, 3), error=str(e))
+            return None
+        self._Update(name, state=FAILED if result is False else READY,
+                     seconds=round(time.monotonic() - started, 3))
+        return result
+
+    async def RunInBackground(self, name: str, func: Callable[[], Any]) -> Any:
+        """Run a blocking stage in a worker thread so the event loop keeps serving"""
+        return await asyncio.to_thread(self.Run, name, func)
+
+    def MarkServing(self):
+        self.ServingAt = time.time()
+
+    def IsReady(self) -> bool:
+        with self.Lock:
+            return all(stage["state"] in SETTLED_STATES for stage in self.Stages.values())
+
+    def Snapshot(self) -> Dict[str, Any]:
+        """Readiness flags for /api/health"""
+        with self.Lock:
+            stages = {name: dict(stage) for name, stage in self.Stages.items()}
+        ready = all(stage["state"] in SETTLED_STATES for stage in stages.values())
+        return {
+            "serving": self.ServingAt is not None,
+            "ready": ready,
+            "cold_start_seconds": round(self.ServingAt - self.LaunchTime, 3) if self.ServingAt else None,
+            "uptime_seconds": round(time.time() - self.LaunchTime, 3),
+            "stages": stages
+        }
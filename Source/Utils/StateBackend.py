@@ -0,0 +1,608 @@
+# File: StateBackend.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Utils/StateBackend.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 09:30PM
+
+"""
+Pluggable shared-state backend for AndyLibrary
+Holds OAuth sessions, journey contexts, rate limits and caches outside the
+worker process so several uvicorn workers can serve the same users.
+Backends: memory (single process), sqlite (WAL file, default for workers), redis (optional)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from collections.abc import MutableMapping
+from datetime import datetime
+from pathlib import Path
+
+# Optional Redis client for deployments that already run a local Redis
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+# Environment switches shared by the launcher and every worker
+STATE_BACKEND_ENV = "ANDYLIBRARY_STATE_BACKEND"
+STATE_PATH_ENV = "ANDYLIBRARY_STATE_PATH"
+REDIS_URL_ENV = "ANDYLIBRARY_REDIS_URL"
+
+DEFAULT_STATE_PATH = os.path.join("Data", "Local", "shared_state.db")
+DEFAULT_REDIS_URL = "redis://127.0.0.1:6379/0"
+
+def EncodeValue(value: Any) -> str:
+    """Serialize a state value to JSON, preserving datetimes"""
+    def _Default(obj):
+        if isinstance(obj, datetime):
+            return {"__datetime__": obj.isoformat()}
+        raise TypeError(f"Unsupported state value type: {type(obj).__name__}")
+
+    return json.dumps(value, default=_Default, separators=(",", ":"))
+
+def DecodeValue(payload: Any) -> Any:
+    """Deserialize a JSON state value produced by EncodeValue"""
+    def _Hook(obj):
+        if len(obj) == 1 and "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        return obj
+
+    if isinstance(payload, bytes):
+        payload = payload.decode("utf-8")
+    return json.loads(payload, object_hook=_Hook)
+
+class StateBackend:
+    """
+    Namespaced key/value store with per-entry TTL
+    Every method is safe to call from FastAPI's thread pool
+    """
+
+    # True when state is visible to other worker processes
+    IsShared = False
+    Name = "base"
+
+    def Get(self, namespace: str, key: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    def Set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        raise NotImplementedError
+
+    def Add(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None) -> bool:
+        """Store value only if key is absent (or expired); returns True when stored"""
+        raise NotImplementedError
+
+    def Pop(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Atomically read and delete a key"""
+        raise NotImplementedError
+
+    def Delete(self, namespace: str, key: str) -> bool:
+        raise NotImplementedError
+
+    def Increment(self, namespace: str, key: str, amount: int = 1,
+                  ttl_seconds: Optional[float] = None) -> int:
+        """Atomically add to a counter; TTL is applied when the counter is created"""
+        raise NotImplementedError
+
+    def Keys(self, namespace: str) -> List[str]:
+        raise NotImplementedError
+
+    def Count(self, namespace: str) -> int:
+        return len(self.Keys(namespace))
+
+    def PurgeExpired(self) -> int:
+        """Remove expired entries; returns number removed"""
+        return 0
+
+    def Trim(self, namespace: str, max_entries: int) -> int:
+        """Evict the entries closest to expiry until at most max_entries remain; returns number evicted"""
+        raise NotImplementedError
+
+    def Clear(self, namespace: str = None):
+        raise NotImplementedError
+
+    def GetStats(self) -> Dict[str, Any]:
+        return {"backend": self.Name, "shared": self.IsShared}
+
+class MemoryStateBackend(StateBackend):
+    """Process-local backend - the behaviour of the original per-manager dicts"""
+
+    IsShared = False
+    Name = "memory"
+
+    def __init__(self, purge_interval_seconds: float = 60.0):
+        self.Data: Dict[str, Dict[str, tuple]] = {}
+        self.Lock = threading.RLock()
+        self.PurgeInterval = purge_interval_seconds
+        self.LastPurge = time.time()
+
+    def _Live(self, namespace: str, key: str, now: float) -> Optional[tuple]:
+        entry = self.Data.get(namespace, {}).get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= now:
+            del self.Data[namespace][key]
+            return None
+        return entry
+
+    def _MaybePurge(self, now: float):
+        if now - self.LastPurge >= self.PurgeInterval:
+            self.PurgeExpired()
+
+    def Get(self, namespace, key, default=None):
+        with self.Lock:
+            entry = self._Live(namespace, key, time.time())
+            return entry[0] if entry else default
+
+    def Set(self, namespace, key, value, ttl_seconds=None):
+        now = time.time()
+        with self.Lock:
+            expires_at = now + ttl_seconds if ttl_seconds else None
+            self.Data.setdefault(namespace, {})[key] = (value, expires_at)
+            self._MaybePurge(now)
+
+    def Add(self, namespace, key, value, ttl_seconds=None):
+        now = time.time()
+        with self.Lock:
+            if self._Live(namespace, key, now):
+                return False
+            self.Set(namespace, key, value, ttl_seconds)
+            return True
+
+    def Pop(self, namespace, key, default=None):
+        with self.Lock:
+            entry = self._Live(namespace, key, time.time())
+            if not entry:
+                return default
+            del self.Data[namespace][key]
+            return entry[0]
+
+    def Delete(self, namespace, key):
+        with self.Lock:
+            return self.Data.get(namespace, {}).pop(key, None) is not None
+
+    def Increment(self, namespace, key, amount=1, ttl_seconds=None):
+        now = time.time()
+        with self.Lock:
+            entry = self._Live(namespace, key, now)
+            if entry:
+                value = entry[0] + amount
+                self.Data[namespace][key] = (value, entry[1])
+            else:
+                value = amount
+                self.Set(namespace, key, value, ttl_seconds)
+            return value
+
+    def Keys(self, namespace):
+        now = time.time()
+        with self.Lock:
+            entries = self.Data.get(namespace, {})
+            return [k for k, (_, exp) in entries.items() if exp is None or exp > now]
+
+    def Trim(self, namespace, max_entries):
+        with self.Lock:
+            entries = self.Data.get(namespace, {})
+            excess = len(entries) - max_entries
+            if excess <= 0:
+                return 0
+            # Entries without a TTL sort last and are evicted last
+            oldest = sorted(entries, key=lambda k: (entries[k][1] is None, entries[k][1] or 0))[:excess]
+            for key in oldest:
+                del entries[key]
+            return len(oldest)
+
+    def PurgeExpired(self):
+        now = time.time()
+        removed = 0
+        with self.Lock:
+            for entries in self.Data.values():
+                expired = [k for k, (_, exp) in entries.items() if exp is not None and exp <= now]
+                for key in expired:
+                    del entries[key]
+                removed += len(expired)
+            self.LastPurge = now
+        return removed
+
+    def Clear(self, namespace=None):
+        with self.Lock:
+            if namespace is None:
+                self.Data.clear()
+            else:
+                self.Data.pop(namespace, None)
+
+    def GetStats(self):
+        with self.Lock:
+            return {
+                "backend": self.Name,
+                "shared": self.IsShared,
+                "namespaces": {ns: len(entries) for ns, entries in self.Data.items()}
+            }
+
+class SQLiteStateBackend(StateBackend):
+    """
+    Shared backend on a single SQLite file in WAL mode
+    Readers never block the writer, so every worker can hit it concurrently
+    """
+
+    IsShared = True
+    Name = "sqlite"
+
+    def __init__(self, database_path: str = None, purge_interval_seconds: float = 60.0):
+        self.Logger = logging.getLogger(__name__)
+        self.DatabasePath = str(database_path or DEFAULT_STATE_PATH)
+        self.PurgeInterval = purge_interval_seconds
+        self.LastPurge = 0.0
+        self.Local = threading.local()
+
+        Path(self.DatabasePath).parent.mkdir(parents=True, exist_ok=True)
+        self._InitializeSchema()
+
+    def _GetConnection(self) -> sqlite3.Connection:
+        """One autocommit connection per thread"""
+        conn = getattr(self.Local, "connection", None)
+        if conn is None:
+            conn = sqlite3.connect(self.DatabasePath, timeout=10, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self.Local.connection = conn
+        return conn
+
+    def _InitializeSchema(self):
+        conn = self._GetConnection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS state_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_state_entries_expires
+            ON state_entries (expires_at) WHERE expires_at IS NOT NULL
+        """)
+        # Trim walks one namespace in expiry order
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_state_entries_namespace_expires
+            ON state_entries (namespace, expires_at)
+        """)
+
+    def _MaybePurge(self, now: float):
+        if now - self.LastPurge >= self.PurgeInterval:
+            self.PurgeExpired()
+
+    def _Transaction(self, work: Callable[[sqlite3.Connection, float], Any]) -> Any:
+        """Run a read-modify-write under BEGIN IMMEDIATE so workers serialize"""
+        conn = self._GetConnection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(conn, time.time())
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def Get(self, namespace, key, default=None):
+        row = self._GetConnection().execute(
+            "SELECT value FROM state_entries WHERE namespace = ? AND key = ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, key, time.time())
+        ).fetchone()
+        return DecodeValue(row[0]) if row else default
+
+    def Set(self, namespace, key, value, ttl_seconds=None):
+        now = time.time()
+        expires_at = now + ttl_seconds if ttl_seconds else None
+        self._GetConnection().execute(
+            "INSERT OR REPLACE INTO state_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, EncodeValue(value), expires_at)
+        )
+        self._MaybePurge(now)
+
+    def Add(self, namespace, key, value, ttl_seconds=None):
+        payload = EncodeValue(value)
+
+        def _Work(conn, now):
+            conn.execute(
+                "DELETE FROM state_entries WHERE namespace = ? AND key = ? AND expires_at <= ?",
+                (namespace, key, now)
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO state_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, payload, now + ttl_seconds if ttl_seconds else None)
+            )
+            return cursor.rowcount == 1
+
+        return self._Transaction(_Work)
+
+    def Pop(self, namespace, key, default=None):
+        def _Work(conn, now):
+            row = conn.execute(
+                "SELECT value, expires_at FROM state_entries WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if not row:
+                return default
+            conn.execute("DELETE FROM state_entries WHERE namespace = ? AND key = ?", (namespace, key))
+            if row[1] is not None and row[1] <= now:
+                return default
+            return DecodeValue(row[0])
+
+        return self._Transaction(_Work)
+
+    def Delete(self, namespace, key):
+        cursor = self._GetConnection().execute(
+            "DELETE FROM state_entries WHERE namespace = ? AND key = ?", (namespace, key)
+        )
+        return cursor.rowcount > 0
+
+    def Increment(self, namespace, key, amount=1, ttl_seconds=None):
+        def _Work(conn, now):
+            row = conn.execute(
+                "SELECT value, expires_at FROM state_entries WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row and (row[1] is None or row[1] > now):
+                value = int(DecodeValue(row[0])) + amount
+                conn.execute(
+                    "UPDATE state_entries SET value = ? WHERE namespace = ? AND key = ?",
+                    (EncodeValue(value), namespace, key)
+                )
+            else:
+                value = amount
+                conn.execute(
+                    "INSERT OR REPLACE INTO state_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (namespace, key, EncodeValue(value), now + ttl_seconds if ttl_seconds else None)
+                )
+            return value
+
+        return self._Transaction(_Work)
+
+    def Keys(self, namespace):
+        rows = self._GetConnection().execute(
+            "SELECT key FROM state_entries WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, time.time())
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def Count(self, namespace):
+        return self._GetConnection().execute(
+            "SELECT COUNT(*) FROM state_entries WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, time.time())
+        ).fetchone()[0]
+
+    def Trim(self, namespace, max_entries):
+        # Keep the max_entries latest-expiring rows (no TTL counts as latest), delete the rest oldest-first
+        cursor = self._GetConnection().execute("""
+            DELETE FROM state_entries WHERE namespace = ? AND key IN (
+                SELECT key FROM state_entries WHERE namespace = ?
+                ORDER BY expires_at IS NULL DESC, expires_at DESC
+                LIMIT -1 OFFSET ?
+            )
+        """, (namespace, namespace, max(0, int(max_entries))))
+        return cursor.rowcount
+
+    def PurgeExpired(self):
+        now = time.time()
+        self.LastPurge = now
+        try:
+            cursor = self._GetConnection().execute(
+                "DELETE FROM state_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+            )
+            return cursor.rowcount
+        except sqlite3.OperationalError as e:
+            # Another worker holds the write lock - it will purge instead
+            self.Logger.debug(f"State purge skipped: {e}")
+            return 0
+
+    def Clear(self, namespace=None):
+        conn = self._GetConnection()
+        if namespace is None:
+            conn.execute("DELETE FROM state_entries")
+        else:
+            conn.execute("DELETE FROM state_entries WHERE namespace = ?", (namespace,))
+
+    def GetStats(self):
+        rows = self._GetConnection().execute(
+            "SELECT namespace, COUNT(*) FROM state_entries GROUP BY namespace"
+        ).fetchall()
+        return {
+            "backend": self.Name,
+            "shared": self.IsShared,
+            "database_path": self.DatabasePath,
+            "namespaces": {row[0]: row[1] for row in rows}
+        }
+
+class RedisStateBackend(StateBackend):
+    """Shared backend on a local Redis server (optional dependency)"""
+
+    IsShared = True
+    Name = "redis"
+
+    def __init__(self, redis_url: str = None, prefix: str = "andylibrary"):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package not installed")
+
+        self.RedisUrl = redis_url or DEFAULT_REDIS_URL
+        self.Prefix = prefix
+        self.Client = redis.Redis.from_url(self.RedisUrl)
+        self.Client.ping()
+
+    def _Key(self, namespace: str, key: str) -> str:
+        return f"{self.Prefix}:{namespace}:{key}"
+
+    @staticmethod
+    def _TTL(ttl_seconds: Optional[float]) -> Optional[int]:
+        return max(1, int(round(ttl_seconds))) if ttl_seconds else None
+
+    def Get(self, namespace, key, default=None):
+        payload = self.Client.get(self._Key(namespace, key))
+        return DecodeValue(payload) if payload is not None else default
+
+    def Set(self, namespace, key, value, ttl_seconds=None):
+        self.Client.set(self._Key(namespace, key), EncodeValue(value), ex=self._TTL(ttl_seconds))
+
+    def Add(self, namespace, key, value, ttl_seconds=None):
+        return bool(self.Client.set(self._Key(namespace, key), EncodeValue(value),
+                                    ex=self._TTL(ttl_seconds), nx=True))
+
+    def Pop(self, namespace, key, default=None):
+        pipeline = self.Client.pipeline(transaction=True)
+        full_key = self._Key(namespace, key)
+        pipeline.get(full_key)
+        pipeline.delete(full_key)
+        payload, _ = pipeline.execute()
+        return DecodeValue(payload) if payload is not None else default
+
+    def Delete(self, namespace, key):
+        return self.Client.delete(self._Key(namespace, key)) > 0
+
+    def Increment(self, namespace, key, amount=1, ttl_seconds=None):
+        full_key = self._Key(namespace, key)
+        value = self.Client.incrby(full_key, amount)
+        if value == amount and ttl_seconds:
+            self.Client.expire(full_key, self._TTL(ttl_seconds))
+        return int(value)
+
+    def Keys(self, namespace):
+        prefix = self._Key(namespace, "")
+        return [
+            k.decode("utf-8")[len(prefix):] if isinstance(k, bytes) else k[len(prefix):]
+            for k in self.Client.scan_iter(match=f"{prefix}*")
+        ]
+
+    def Trim(self, namespace, max_entries):
+        full_keys = list(self.Client.scan_iter(match=f"{self._Key(namespace, '')}*"))
+        if len(full_keys) <= max_entries:
+            return 0
+        pipeline = self.Client.pipeline(transaction=False)
+        for full_key in full_keys:
+            pipeline.pttl(full_key)
+        # PTTL -1 means no expiry - those are evicted last
+        remaining = [(ttl if ttl >= 0 else float("inf"), full_key)
+                     for ttl, full_key in zip(pipeline.execute(), full_keys)]
+        remaining.sort(key=lambda item: item[0])
+        oldest = [full_key for _, full_key in remaining[:len(full_keys) - max_entries]]
+        return self.Client.delete(*oldest) if oldest else 0
+
+    def Clear(self, namespace=None):
+        pattern = f"{self.Prefix}:*" if namespace is None else f"{self._Key(namespace, '')}*"
+        for full_key in self.Client.scan_iter(match=pattern):
+            self.Client.delete(full_key)
+
+    def GetStats(self):
+        return {"backend": self.Name, "shared": self.IsShared, "redis_url": self.RedisUrl}
+
+class SharedStateMapping(MutableMapping):
+    """
+    Dict-style view over one backend namespace
+    Lets managers keep their existing ActiveSessions/ActiveJourneys code paths.
+    Values are passed through encoder/decoder only for shared backends.
+    """
+
+    def __init__(self, backend: StateBackend, namespace: str, ttl_seconds: Optional[float] = None,
+                 encoder: Callable[[Any], Any] = None, decoder: Callable[[Any], Any] = None):
+        self.Backend = backend
+        self.Namespace = namespace
+        self.TTLSeconds = ttl_seconds
+        self.Encoder = encoder if backend.IsShared else None
+        self.Decoder = decoder if backend.IsShared else None
+
+    def __getitem__(self, key):
+        missing = object()
+        value = self.Backend.Get(self.Namespace, key, missing)
+        if value is missing:
+            raise KeyError(key)
+        return self.Decoder(value) if self.Decoder else value
+
+    def __setitem__(self, key, value):
+        self.Backend.Set(self.Namespace, key, self.Encoder(value) if self.Encoder else value,
+                         self.TTLSeconds)
+
+    def __delitem__(self, key):
+        if not self.Backend.Delete(self.Namespace, key):
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        missing = object()
+        return self.Backend.Get(self.Namespace, key, missing) is not missing
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.Backend.Keys(self.Namespace))
+
+    def __len__(self):
+        return self.Backend.Count(self.Namespace)
+
+    def pop(self, key, *default):
+        missing = object()
+        value = self.Backend.Pop(self.Namespace, key, missing)
+        if value is missing:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        return self.Decoder(value) if self.Decoder else value
+
+    def clear(self):
+        self.Backend.Clear(self.Namespace)
+
+# Shared backends are cached per location so every manager in a worker reuses one connection pool
+_shared_backend_instances: Dict[str, StateBackend] = {}
+_shared_backend_lock = threading.Lock()
+
+def GetStateBackend(config: Dict[str, Any] = None) -> StateBackend:
+    """
+    Get the state backend selected by config or ANDYLIBRARY_STATE_BACKEND
+
+    memory backends are private to the caller, exactly like the dicts they replace;
+    sqlite/redis backends are shared per location. Falls back to memory if the
+    shared backend cannot be opened so a single-process server still starts.
+    """
+    config = config or {}
+    backend_name = (config.get("backend") or os.getenv(STATE_BACKEND_ENV, "memory")).lower()
+    logger = logging.getLogger(__name__)
+
+    if backend_name == "memory":
+        return MemoryStateBackend()
+
+    if backend_name == "redis":
+        location = config.get("redis_url") or os.getenv(REDIS_URL_ENV, DEFAULT_REDIS_URL)
+    else:
+        location = os.path.abspath(config.get("path") or os.getenv(STATE_PATH_ENV, DEFAULT_STATE_PATH))
+
+    cache_key = f"{backend_name}:{location}"
+    with _shared_backend_lock:
+        if cache_key in _shared_backend_instances:
+            return _shared_backend_instances[cache_key]
+
+        error = None
+        try:
+            if backend_name == "redis":
+                backend = RedisStateBackend(location)
+            elif backend_name == "sqlite":
+                backend = SQLiteStateBackend(location)
+            else:
+                logger.error(f"Unknown state backend: {backend_name}")
+                return MemoryStateBackend()
+        except Exception as e:
+            error = e
+        else:
+            _shared_backend_instances[cache_key] = backend
+            logger.info(f"🗄️ Shared state backend ready: {backend_name} ({location})")
+            return backend
+
+    # Fallbacks run after the lock is released - the SQLite one takes it again
+    if backend_name == "redis":
+        logger.warning(f"⚠️ Redis state backend unavailable ({error}) - using SQLite WAL file")
+        return GetStateBackend({**config, "backend": "sqlite"})
+    logger.error(f"⚠️ Shared state backend unavailable ({error}) - using process memory")
+    return MemoryStateBackend()
@@ -0,0 +1,651 @@
+# File: StaticAssetPipeline.py
+# Path: /home/herb/Desktop/AndyLibrary/Source/Utils/StaticAssetPipeline.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 09:55PM
+
+"""
+Static asset pipeline for the web UI (WebPages/)
+The HTML pages and scripts are large (desktop-library-enhanced.html and
+library-api-client.js are around 50 KB each) and used to go out raw on
+every visit. Build() prepares every asset once, at startup or build time:
+- HTML, CSS, JavaScript and JSON are minified. Comments and indentation
+  are removed, but line breaks are kept so semicolon insertion and
+  <pre> text behave as before.
+- Compressible assets are gzipped (and brotli-compressed when the brotli
+  package is installed). The compressed copies are kept in a disk cache
+  keyed by content hash, so a restart does not compress again.
+- Files under static/ get fingerprinted names (desktop-library.3f2a9c1b.css)
+  served as immutable. Pages refer to them by those names.
+- service-worker.js gets its CORE_FILES list and CACHE_CONFIG (cache
+  names and byte budgets) from the asset manifest, so the offline precache
+  always names files that exist and each build gets a fresh static cache.
+
+Assets are then served from memory with ETags. Pages and unfingerprinted
+files revalidate on every visit (a 304 costs a few hundred bytes).
+Fingerprinted files are cached for a year.
+"""
+
+import os
+import re
+import json
+import gzip
+import time
+import hashlib
+import logging
+import mimetypes
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+
+from .LazyImport import LazyImport
+
+def _ImportBrotli():
+    import brotli
+    return locals()
+
+Brotli = LazyImport(_ImportBrotli, "⚠️ brotli not available - web assets are precompressed with gzip only",
+                    probe="brotli")
+
+FINGERPRINT_LENGTH = 10
+MIN_COMPRESS_BYTES = 512
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+ASSET_MANIFEST_PATH = "asset-manifest.json"
+SERVICE_WORKER_PATH = "service-worker.js"
+
+# Pages the service worker precaches (plus the /static files they use);
+# URL path -> file under WebPages/
+CORE_PAGES = {
+    "/": "bowersworld.html",
+    "/pdf-reader.html": "pdf-reader.html",
+    "/manifest.json": "manifest.json",
+}
+
+# Runtime caches of the service worker: name, byte budget, and the largest share of
+# the device's storage quota the cache may take. Only the static cache is named after
+# the build; the data caches keep their names so downloaded books survive an update.
+SERVICE_WORKER_CACHES = {
+    "static": {"name": "andylibrary-static-{version}", "max_bytes": 16 * 1024 * 1024, "quota_share": 0.05},
+    "api": {"name": "andylibrary-api-v2", "max_bytes": 4 * 1024 * 1024, "quota_share": 0.02},
+    "thumbnails": {"name": "andylibrary-thumbnails-v1.0.0", "max_bytes": 32 * 1024 * 1024, "quota_share": 0.05},
+    "pdfs": {"name": "andylibrary-pdfs-v1.0.0", "max_bytes": 512 * 1024 * 1024, "quota_share": 0.5},
+}
+
+TEXT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".js": "application/javascript; charset=utf-8",
+    ".json": "application/json",
+    ".svg": "image/svg+xml",
+    ".txt": "text/plain; charset=utf-8",
+}
+COMPRESSIBLE_EXTENSIONS = set(TEXT_TYPES) | {".ico"}
+# Top-level WebPages files the server routes to; everything under static/ is included
+PAGE_EXTENSIONS = (".html", ".js", ".json", ".css", ".ico")
+
+STATIC_REFERENCE = re.compile(r"""(?P<quote>["'(])(?P<path>/static/[^"'()?#\s]+)(?P<query>\?[^"'()#\s]*)?""")
+CORE_FILES_ARRAY = re.compile(r"(const CORE_FILES = )\[[^\]]*\];")
+CACHE_CONFIG_OBJECT = re.compile(r"(const CACHE_CONFIG = )\{.*?\n\};", re.DOTALL)
+ENCODED_ETAG_SUFFIX = re.compile(r'-(?:gz|br)"$')
+CACHED_COPY_NAME = re.compile(r"^([0-9a-f]{64})\.(?:gz|br)$")
+
+# ---- minifiers -------------------------------------------------------------
+
+# After one of these characters a slash starts a regular expression, not a division
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete",
+                   "void", "throw", "yield", "await", "instanceof"}
+
+def _SkipQuoted(source: str, start: int) -> int:
+    """Index just past the string literal starting at start"""
+    quote, index = source[start], start + 1
+    while index < len(source):
+        char = source[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char == quote or char == "\n":
+            return index + 1
+        index += 1
+    return index
+
+def _SkipRegex(source: str, start: int) -> int:
+    """Index just past the regular expression literal starting at start"""
+    index, in_class = start + 1, False
+    while index < len(source):
+        char = source[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char == "\n":
+            return index
+        if char == "[":
+            in_class = True
+        elif char == "]":
+            in_class = False
+        elif char == "/" and not in_class:
+            index += 1
+            while index < len(source) and (source[index].isalnum() or source[index] == "_"):
+                index += 1  # flags
+            return index
+        index += 1
+    return index
+
+def _SkipTemplate(source: str, start: int) -> int:
+    """Index just past the template literal starting at start, ${...} included"""
+    index = start + 1
+    while index < len(source):
+        char = source[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char == "`":
+            return index + 1
+        if source.startswith("${", index):
+            index = _SkipCode(source, index + 2)
+            continue
+        index += 1
+    return index
+
+def _SkipCode(source: str, start: int) -> int:
+    """Index just past the } that closes the ${ substitution starting at start"""
+    index, depth = start, 1
+    while index < len(source):
+        char = source[index]
+        if char in "\"'":
+            index = _SkipQuoted(source, index)
+        elif char == "`":
+            index = _SkipTemplate(source, index)
+        elif source.startswith("//", index):
+            end = source.find("\n", index)
+            index = len(source) if end < 0 else end
+        elif source.startswith("/*", index):
+            end = source.find("*/", index + 2)
+            index = len(source) if end < 0 else end + 2
+        else:
+            if char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    return index + 1
+            index += 1
+    return index
+
+def _SlashStartsRegex(output: List[str]) -> bool:
+    text = "".join(output[-16:]).rstrip()
+    if not text:
+        return True
+    if text[-1] in _REGEX_PRECEDERS:
+        return True
+    word = re.search(r"[A-Za-z_$][\w$]*$", text)
+    return bool(word) and word.group(0) in _REGEX_KEYWORDS
+
+def MinifyJavaScript(source: str) -> str:
+    """
+    Strip comments, indentation and blank lines from JavaScript
+
+    Line breaks are kept, so automatic semicolon insertion works exactly
+    as in the source. Strings, template literals and regular expression
+    literals are copied unchanged.
+    """
+    output: List[str] = []
+    index, length = 0, len(source)
+
+    def newline():
+        while output and output[-1] in (" ", "\t"):
+            output.pop()
+        if output and output[-1] != "\n":
+            output.append("\n")
+
+    while index < length:
+        char = source[index]
+        if char in "\"'":
+            end = _SkipQuoted(source, index)
+            output.append(source[index:end])
+            index = end
+        elif char == "`":
+            end = _SkipTemplate(source, index)
+            output.append(source[index:end])
+            index = end
+        elif source.startswith("//", index):
+            end = source.find("\n", index)
+            index = length if end < 0 else end
+        elif source.startswith("/*", index):
+            end = source.find("*/", index + 2)
+            end = length if end < 0 else end + 2
+            if "\n" in source[index:end]:
+                newline()
+            elif output and output[-1] not in (" ", "\n"):
+                output.append(" ")
+            index = end
+        elif char == "/" and _SlashStartsRegex(output):
+            end = _SkipRegex(source, index)
+            output.append(source[index:end])
+            index = end
+        elif char in "\r\n":
+            newline()
+            index += 1
+        elif char in " \t":
+            if output and output[-1] not in (" ", "\n"):
+                output.append(" ")
+            index += 1
+        else:
+            output.append(char)
+            index += 1
+    newline()
+    return "".join(output).lstrip("\n")
+
+def MinifyCss(source: str) -> str:
+    """Strip comments and whitespace from CSS (strings are copied unchanged)"""
+    output: List[str] = []
+    index, length = 0, len(source)
+    while index < length:
+        char = source[index]
+        if char in "\"'":
+            end = _SkipQuoted(source, index)
+            output.append(source[index:end])
+            index = end
+        elif source.startswith("/*", index):
+            end = source.find("*/", index + 2)
+            index = length if end < 0 else end + 2
+        elif char.isspace():
+            if output and output[-1] not in " {};,>":
+                output.append(" ")
+            index += 1
+        elif char in "{};,>":
+            while output and output[-1] == " ":
+                output.pop()
+            if char == "}" and output and output[-1] == ";":
+                output.pop()
+            output.append(char)
+            index += 1
+            while index < length and source[index].isspace():
+                index += 1
+        else:
+            output.append(char)
+            index += 1
+    return "".join(output).strip()
+
+_HTML_RAW_BLOCK = re.compile(r"<(script|style|pre|textarea)\b([^>]*)>(.*?)</\1\s*>|<!--(.*?)-->",
+                             re.IGNORECASE | re.DOTALL)
+
+def _MinifyHtmlText(text: str) -> str:
+    text = re.sub(r"[ \t]*\r?\n[ \t\r\n]*", "\n", text)
+    return re.sub(r"[ \t]{2,}", " ", text)
+
+def MinifyHtml(source: str) -> str:
+    """
+    Minify an HTML page and its inline scripts and styles
+
+    Comments and indentation go; a line break stays a line break, and
+    <pre>/<textarea> content and non-JavaScript scripts are kept as is.
+    """
+    output, position = [], 0
+
+    def append_text(text):
+        text = _MinifyHtmlText(text)
+        if text.startswith("\n") and output and output[-1].endswith("\n"):
+            text = text[1:]  # the line held only a dropped comment
+        output.append(text)
+
+    for match in _HTML_RAW_BLOCK.finditer(source):
+        append_text(source[position:match.start()])
+        position = match.end()
+        tag, attributes, body, comment = match.groups()
+        if comment is not None:
+            if comment.startswith("[if") or comment.startswith("!"):
+                output.append(match.group(0))  # conditional or preserved comment
+            continue
+        tag_name = tag.lower()
+        script_type = re.search(r"""\btype\s*=\s*["']?([^"'\s>]+)""", attributes or "", re.IGNORECASE)
+        if tag_name == "script" and (not script_type or script_type.group(1).lower() in
+                                     ("text/javascript", "application/javascript", "module")):
+            body = MinifyJavaScript(body)
+            body = f"\n{body}" if body else body
+        elif tag_name == "style":
+            body = MinifyCss(body)
+        output.append(f"<{tag}{attributes}>{body}</{tag}>")
+    append_text(source[position:])
+    return "".join(output).strip() + "\n"
+
+def MinifyJson(source: str) -> str:
+    return json.dumps(json.loads(source), separators=(",", ":"), ensure_ascii=False)
+
+MINIFIERS = {".html": MinifyHtml, ".css": MinifyCss, ".js": MinifyJavaScript, ".json": MinifyJson}
+
+# ---- assets ----------------------------------------------------------------
+
+@dataclass
+class StaticAsset:
+    """One prepared asset, held in memory"""
+    path: str                  # relative to the web root, "/" separated
+    media_type: str
+    body: bytes
+    digest: str                # SHA-256 of body
+    source_bytes: int
+    gzip: Optional[bytes] = None
+    brotli: Optional[bytes] = None
+    fingerprinted_path: Optional[str] = None
+    references: List[str] = field(default_factory=list)
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest[:32]}"'
+
+    @property
+    def url(self) -> str:
+        return "/" + (self.fingerprinted_path or self.path)
+
+def _ETagMatches(header: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires; any encoding of the same content matches"""
+    for candidate in header.split(","):
+        candidate = ENCODED_ETAG_SUFFIX.sub('"', candidate.strip().removeprefix("W/"))
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+def _AcceptedEncodings(header: Optional[str]) -> Dict[str, float]:
+    accepted = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        match = re.search(r"q\s*=\s*([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+def FingerprintedName(path: str, digest: str) -> str:
+    stem, extension = os.path.splitext(path)
+    return f"{stem}.{digest[:FINGERPRINT_LENGTH]}{extension}"
+
+def ServiceWorkerCaches(version: str) -> Dict[str, Dict[str, Any]]:
+    """The service worker's runtime caches for one build"""
+    return {key: dict(cache, name=cache["name"].format(version=version))
+            for key, cache in SERVICE_WORKER_CACHES.items()}
+
+class StaticAssetPipeline:
+    """Minified, precompressed, fingerprinted web assets served from memory"""
+
+    def __init__(self, root: str, cache_dir: Optional[str] = None, core_pages: Optional[Dict[str, str]] = None,
+                 use_brotli: bool = True):
+        self.Logger = logging.getLogger(__name__)
+        self.Root = root
+        self.CacheDir = cache_dir
+        self.CorePages = dict(CORE_PAGES if core_pages is None else core_pages)
+        self.UseBrotli = use_brotli
+        self.Assets: Dict[str, StaticAsset] = {}
+        self.Fingerprinted: Dict[str, StaticAsset] = {}
+        self.Manifest: Dict[str, Any] = {}
+        self.BuiltAt: Optional[float] = None
+        self.Lock = threading.Lock()
+
+    # ---- build -----------------------------------------------------------
+
+    def _SourceFiles(self) -> Iterable[str]:
+        """Web-root-relative paths of the files to prepare: top-level pages plus everything under static/"""
+        for name in sorted(os.listdir(self.Root)):
+            if name.lower().endswith(PAGE_EXTENSIONS) and os.path.isfile(os.path.join(self.Root, name)):
+                yield name
+        static_root = os.path.join(self.Root, "static")
+        for directory, subdirectories, files in os.walk(static_root):
+            subdirectories.sort()
+            for name in sorted(files):
+                if not name.startswith("."):
+                    yield os.path.relpath(os.path.join(directory, name), self.Root).replace(os.sep, "/")
+
+    def _Compress(self, body: bytes, digest: str, encoding: str) -> Optional[bytes]:
+        """gzip/brotli copy of body, from the disk cache when this content was compressed before"""
+        cache_path = os.path.join(self.CacheDir, f"{digest}.{encoding}") if self.CacheDir else None
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, "rb") as f:
+                return f.read()
+        if encoding == "gz":
+            compressed = gzip.compress(body, GZIP_LEVEL, mtime=0)
+        else:
+            compressed = Brotli.Get("brotli").compress(body, quality=BROTLI_QUALITY)
+        if cache_path:
+            os.makedirs(self.CacheDir, exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(compressed)
+            os.replace(temp_path, cache_path)
+        return compressed
+
+    def _PruneCache(self, digests: Iterable[str]) -> int:
+        """Delete compressed copies of content that is no longer part of the build"""
+        if not self.CacheDir:
+            return 0
+        keep = set(digests)
+        removed = 0
+        try:
+            names = os.listdir(self.CacheDir)
+        except OSError:
+            return 0
+        for name in names:
+            match = CACHED_COPY_NAME.match(name)
+            if match and match.group(1) not in keep:
+                try:
+                    os.remove(os.path.join(self.CacheDir, name))
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def _Prepare(self, path: str, text: Optional[str], raw: bytes) -> StaticAsset:
+        extension = os.path.splitext(path)[1].lower()
+        media_type = TEXT_TYPES.get(extension) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        body = raw
+        if text is not None and extension in MINIFIERS:
+            try:
+                body = MINIFIERS[extension](text).encode("utf-8")
+            except ValueError as e:
+                self.Logger.warning(f"⚠️ Could not minify {path}: {e} - serving it unminified")
+                body = text.encode("utf-8")
+        elif text is not None:
+            body = text.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        asset = StaticAsset(path, media_type, body, digest, len(raw))
+        if extension in COMPRESSIBLE_EXTENSIONS and len(body) >= MIN_COMPRESS_BYTES:
+            compressed = self._Compress(body, digest, "gz")
+            if len(compressed) < len(body) * 0.9:
+                asset.gzip = compressed
+                if self.UseBrotli and Brotli.IsAvailable():
+                    asset.brotli = self._Compress(body, digest, "br")
+        return asset
+
+    def _RewriteReferences(self, text: str, static_assets: Dict[str, StaticAsset], found: List[str]) -> str:
+        """Point /static/... references at fingerprinted names; found collects the static paths used"""
+        def replace(match):
+            asset = static_assets.get(match.group("path").lstrip("/"))
+            if not asset:
+                return match.group(0)  # not one of ours - leave it alone
+            found.append(asset.url)
+            return match.group("quote") + asset.url
+        return STATIC_REFERENCE.sub(replace, text)
+
+    def _CoreFiles(self, assets: Dict[str, StaticAsset]) -> List[str]:
+        """Core pages that exist, then the fingerprinted static files they use"""
+        core, used = [], []
+        for url, path in self.CorePages.items():
+            asset = assets.get(path)
+            if asset:
+                core.append(url)
+                for reference in asset.references:
+                    if reference not in used:
+                        used.append(reference)
+        return core + used
+
+    def Build(self) -> bool:
+        """Prepare every asset; the previous build keeps serving until this one is complete"""
+        started = time.monotonic()
+        if not os.path.isdir(self.Root):
+            self.Logger.warning(f"⚠️ Web root {self.Root} not found - static asset pipeline disabled")
+            return False
+
+        static_assets: Dict[str, StaticAsset] = {}
+        page_sources: List[Tuple[str, Optional[str], bytes]] = []
+        for path in self._SourceFiles():
+            with open(os.path.join(self.Root, path), "rb") as f:
+                raw = f.read()
+            try:
+                text = raw.decode("utf-8") if os.path.splitext(path)[1].lower() in TEXT_TYPES else None
+            except UnicodeDecodeError:
+                text = None
+            if path.startswith("static/"):
+                asset = self._Prepare(path, text, raw)
+                asset.fingerprinted_path = FingerprintedName(path, asset.digest)
+                static_assets[path] = asset
+            else:
+                page_sources.append((path, text, raw))
+
+        # Pages are prepared after static files, so they can name the fingerprinted versions
+        assets = dict(static_assets)
+        service_worker = None
+        for path, text, raw in page_sources:
+            if path == SERVICE_WORKER_PATH:
+                service_worker = (path, text, raw)
+                continue
+            references: List[str] = []
+            if text is not None:
+                text = self._RewriteReferences(text, static_assets, references)
+            assets[path] = self._Prepare(path, text, raw)
+            assets[path].references = references
+
+        core_files = self._CoreFiles(assets)
+        version = hashlib.sha256("".join(sorted(a.digest for a in assets.values())).encode()).hexdigest()[:16]
+        manifest = {
+            "version": version,
+            "files": {"/" + path: asset.url for path, asset in sorted(assets.items())},
+            "core": core_files,
+            "caches": ServiceWorkerCaches(version),
+        }
+        if service_worker and service_worker[1] is not None:
+            path, text, raw = service_worker
+            cache_config = json.dumps({"version": version, "caches": manifest["caches"]}, indent=2)
+            text = CORE_FILES_ARRAY.sub(lambda m: m.group(1) + json.dumps(core_files, indent=2) + ";", text, count=1)
+            text = CACHE_CONFIG_OBJECT.sub(lambda m: m.group(1) + cache_config + ";", text, count=1)
+            assets[path] = self._Prepare(path, text, raw)
+        manifest_body = json.dumps(manifest, separators=(",", ":"))
+        assets[ASSET_MANIFEST_PATH] = self._Prepare(ASSET_MANIFEST_PATH, manifest_body, manifest_body.encode())
+
+        with self.Lock:
+            self.Assets = assets
+            self.Fingerprinted = {asset.fingerprinted_path: asset for asset in assets.values()
+                                  if asset.fingerprinted_path}
+            self.Manifest = manifest
+            self.BuiltAt = time.time()
+        self._PruneCache(asset.digest for asset in assets.values())
+
+        stats = self.GetStats()
+        print(f"📦 Prepared {stats['assets']} web assets in {time.monotonic() - started:.2f}s: "
+              f"{stats['source_bytes']:,} bytes -> {stats['minified_bytes']:,} minified, "
+              f"{stats['gzip_bytes']:,} gzip" +
+              (f", {stats['brotli_bytes']:,} brotli" if stats["brotli_bytes"] else ""))
+        return True
+
+    # ---- serving -----------------------------------------------------------
+
+    def Find(self, path: str) -> Tuple[Optional[StaticAsset], bool]:
+        """(asset, is fingerprinted URL) for a web-root-relative path"""
+        path = path.replace(os.sep, "/").lstrip("/")
+        with self.Lock:
+            asset = self.Fingerprinted.get(path)
+            if asset:
+                return asset, True
+            return self.Assets.get(path), False
+
+    def IsBuilt(self) -> bool:
+        return self.BuiltAt is not None
+
+    def BuildResponse(self, path: str, headers, method: str = "GET") -> Optional[Response]:
+        """In-memory response for path (full or 304), or None when the pipeline does not have it"""
+        asset, fingerprinted = self.Find(path)
+        if not asset:
+            return None
+
+        accepted = _AcceptedEncodings(headers.get("accept-encoding"))
+        encoding, body, etag = None, asset.body, asset.etag
+        if asset.brotli is not None and accepted.get("br", 0) > 0:
+            encoding, body, etag = "br", asset.brotli, asset.etag[:-1] + '-br"'
+        elif asset.gzip is not None and accepted.get("gzip", 0) > 0:
+            encoding, body, etag = "gzip", asset.gzip, asset.etag[:-1] + '-gz"'
+
+        response_headers = {
+            "ETag": etag,
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if fingerprinted else REVALIDATE_CACHE_CONTROL,
+        }
+        if asset.gzip is not None:
+            response_headers["Vary"] = "Accept-Encoding"
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and _ETagMatches(if_none_match, asset.etag):
+            return Response(status_code=304, headers=response_headers)
+
+        if encoding:
+            response_headers["Content-Encoding"] = encoding
+        response_headers["Content-Length"] = str(len(body))
+        if method.upper() == "HEAD":
+            body = b""
+        return Response(body, media_type=asset.media_type, headers=response_headers)
+
+    def GetStats(self) -> Dict[str, Any]:
+        with self.Lock:
+            assets = list(self.Assets.values())
+        return {
+            "assets": len(assets),
+            "fingerprinted": sum(1 for asset in assets if asset.fingerprinted_path),
+            "source_bytes": sum(asset.source_bytes for asset in assets),
+            "minified_bytes": sum(len(asset.body) for asset in assets),
+            "gzip_bytes": sum(len(asset.gzip or asset.body) for asset in assets),
+            "brotli_bytes": sum(len(asset.brotli) for asset in assets if asset.brotli),
+            "built_at": self.BuiltAt,
+        }
+
+class PipelineStaticFiles(StaticFiles):
+    """StaticFiles that answers from the asset pipeline first, including fingerprinted names"""
+
+    def __init__(self, pipeline: StaticAssetPipeline, prefix: str = "static", **kwargs):
+        super().__init__(**kwargs)
+        self.Pipeline = pipeline
+        self.Prefix = prefix
+
+    async def get_response(self, path: str, scope) -> Response:
+        if scope["method"] in ("GET", "HEAD"):
+            response = self.Pipeline.BuildResponse(f"{self.Prefix}/{path}", Headers(scope=scope), scope["method"])
+            if response is not None:
+                return response
+        return await super().get_response(path, scope)
+
+def main():
+    """Build-time run: prepare WebPages/ and fill the compressed-asset cache"""
+    import argparse
+
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description="Minify, precompress and fingerprint the AndyLibrary web assets")
+    parser.add_argument('--root', default=os.path.join(project_root, "WebPages"))
+    parser.add_argument('--cache-dir', default=os.path.join(project_root, "Data", "Cache", "Assets"))
+    args = parser.parse_args()
+
+    pipeline = StaticAssetPipeline(args.root, args.cache_dir)
+    if not pipeline.Build():
+        raise SystemExit(1)
+    print(f"{'Asset':<56}{'Source':>10}{'Minified':>10}{'gzip':>10}{'brotli':>10}")
+    for path, asset in sorted(pipeline.Assets.items()):
+        print(f"{asset.url:<56}{asset.source_bytes:>10,}{len(asset.body):>10,}"
+              f"{len(asset.gzip or asset.body):>10,}{len(asset.brotli) if asset.brotli else '-':>10}")
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,18 @@
 # Path: Source/Utils/WindowsDatabaseInit.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-30
-# Last Modified: 2025-07-30 21:45PM
+# Last Modified: 2026-10-19 07:55PM
 """
 Windows-specific database initialization utilities.
 Handles database setup and Google Drive sync for Windows executables.
+A valid bundled or last-good database is used straight away; the Google
+Drive sync then runs in a background thread instead of delaying startup.
 """
 
 import os
 import sys
 import sqlite3
+import threading
 from pathlib import Path
 from typing import Optional, Dict, Any
 
@@ -21,17 +24,22 @@ class WindowsDatabaseInitializer:
         self.app_dir = app_directory or Path(sys.executable).parent
         self.data_dir = self.app_dir / "Data"
         self.config_dir = self.app_dir / "Config"
+        self.sync_thread: Optional[threading.Thread] = None
         
-    def InitializeDatabase(self) -> bool:
+    def InitializeDatabase(self, background_sync: bool = True) -> bool:
         """Initialize database with fallback options"""
         print("🔄 Windows Database Initialization")
         
-        # Step 1: Try Google Drive sync
-        if self.TryGoogleDriveSync():
+        # Step 1: Serve the bundled/last-good database now, sync from Google Drive behind it
+        if self.CheckBundledDatabase():
+            if background_sync:
+                self.StartBackgroundSync()
+            else:
+                self.TryGoogleDriveSync()
             return True
         
-        # Step 2: Check for bundled database
-        if self.CheckBundledDatabase():
+        # Step 2: Nothing local to serve - wait for Google Drive
+        if self.TryGoogleDriveSync():
             return True
         
         # Step 3: Create minimal database
@@ -65,6 +73,13 @@ class WindowsDatabaseInitializer:
             print(f"⚠️ Google Drive sync error: {e}")
             return False
     
+    def StartBackgroundSync(self) -> threading.Thread:
+        """Run TryGoogleDriveSync in a daemon thread; DriveManager swaps the file in when done"""
+        self.sync_thread = threading.Thread(target=self.TryGoogleDriveSync, name="drive-sync", daemon=True)
+        self.sync_thread.start()
+        print("🔄 Google Drive sync continues in the background")
+        return self.sync_thread
+    
     def CheckBundledDatabase(self) -> bool:
         """Check for bundled database files"""
         possible_paths = [
@@ -172,7 +187,7 @@ class WindowsDatabaseInitializer:
         except Exception:
             return False
 
-def InitializeWindowsDatabase(app_directory: Optional[Path] = None) -> bool:
+def InitializeWindowsDatabase(app_directory: Optional[Path] = None, background_sync: bool = True) -> bool:
     """Main function to initialize Windows database"""
     initializer = WindowsDatabaseInitializer(app_directory)
-    return initializer.InitializeDatabase()
+    return initializer.InitializeDatabase(background_sync)
@@ -3,7 +3,7 @@
 # Path: /home/herb/Desktop/AndyLibrary/Standalone/ClientStandalone.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-30
-# Last Modified: 2025-07-30 02:30PM
+# Last Modified: 2026-10-19 07:40PM
 
 """
 Client Standalone - Connects to desktop AndyLibrary server
@@ -20,6 +20,7 @@ import requests
 import threading
 import webbrowser
 import tempfile
+import time
 from pathlib import Path
 from datetime import datetime
 
@@ -28,6 +29,11 @@ from fastapi import FastAPI, Request, Response, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
 
+# Discovery protocol is shared with the desktop server
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from Source.Utils.LanDiscovery import DiscoverServer
+from StreamingDownloader import StreamingDownloader, print_progress
+
 class ClientStandalone:
     """Client that connects to desktop AndyLibrary server"""
     
@@ -39,6 +45,7 @@ class ClientStandalone:
         self.port = 8001  # Different port than desktop server
         self.app = None
         self.desktop_server_url = None
+        self.last_server_path = self.data_dir / "last_server.json"
         
         # Create data directory
         self.data_dir.mkdir(exist_ok=True)
@@ -50,11 +57,10 @@ class ClientStandalone:
             self.webpages_dir = self.app_dir / "WebPages"
     
     def find_desktop_server(self):
-        """Find the desktop AndyLibrary server"""
-        # Possible desktop server locations
+        """Find the desktop AndyLibrary server (LAN announcement, last-known server and fixed candidates at once)"""
+        # Fallback candidates for networks that drop multicast/broadcast
         possible_hosts = [
             "127.0.0.1",    # Same machine
-            "localhost",    # Same machine
             "192.168.1.100", # Common local IP - replace with your desktop IP
             "192.168.0.100"  # Common local IP - replace with your desktop IP
         ]
@@ -63,33 +69,27 @@ class ClientStandalone:
         possible_ports = [8080, 8081, 8082, 3000, 8000, 8010, 8090, 5000, 9000]
         
         print("🔍 Searching for desktop AndyLibrary server...")
+        started = time.monotonic()
+        
+        try:
+            url = DiscoverServer(
+                candidates=[(host, port) for host in possible_hosts for port in possible_ports],
+                cache_path=str(self.last_server_path)
+            )
+        except Exception as e:
+            print(f"⚠️ Discovery error: {e}")
+            url = None
         
-        for host in possible_hosts:
-            for port in possible_ports:
-                try:
-                    url = f"http://{host}:{port}"
-                    print(f"🔍 Trying {url}...")
-                    
-                    # Quick connection test
-                    response = requests.get(f"{url}/api/health", timeout=3)
-                    if response.status_code == 200:
-                        data = response.json()
-                        if "AndyLibrary" in str(data) or "library" in str(data).lower():
-                            print(f"✅ Found desktop server at {url}")
-                            self.desktop_server_url = url
-                            return True
-                            
-                except requests.exceptions.RequestException:
-                    continue
-                except Exception as e:
-                    print(f"⚠️ Error testing {host}:{port} - {e}")
-                    continue
+        if url:
+            print(f"✅ Found desktop server at {url} ({(time.monotonic() - started) * 1000:.0f} ms)")
+            self.desktop_server_url = url
+            return True
         
         print("❌ Desktop server not found!")
         print("\n🔧 SOLUTION:")
-        print("1. On your desktop, run: python StartAndyGoogle.py")
+        print("1. On your desktop, run: python StartAndyGoogle.py --host 0.0.0.0")
         print("2. Make sure desktop server starts successfully")
-        print("3. Note the port number (usually 8080 or 8000)")
+        print("3. Check that both devices are on the same network")
         print("4. Update the IP address in this client if needed")
         
         return False
@@ -102,43 +102,37 @@ class ClientStandalone:
         try:
             print(f"📥 Downloading database from {self.desktop_server_url}...")
             
-            # Try database download endpoint
+            # Streamed to a temp file and resumed if the link drops; the live copy is only
+            # replaced once the new one verifies
             db_url = f"{self.desktop_server_url}/api/database/download"
-            response = requests.get(db_url, timeout=30)
+            downloader = StreamingDownloader(progress=print_progress("Database"))
+            result = downloader.download(db_url, self.database_path, verify=self.verify_downloaded_database)
             
-            if response.status_code == 200:
-                # Save database
-                with open(self.database_path, 'wb') as f:
-                    f.write(response.content)
-                
-                # Verify database
-                if self.verify_downloaded_database():
-                    print("✅ Database downloaded and verified successfully")
-                    return True
-                else:
-                    print("❌ Downloaded database failed verification")
-                    return False
+            if result["success"]:
+                print("✅ Database downloaded and verified successfully")
+                return True
             else:
-                print(f"❌ Database download failed: HTTP {response.status_code}")
+                print(f"❌ Database download failed: {result['error']}")
                 return False
                 
         except Exception as e:
             print(f"❌ Database download error: {e}")
             return False
     
-    def verify_downloaded_database(self):
+    def verify_downloaded_database(self, path=None):
         """Verify the downloaded database is valid"""
+        path = Path(path or self.database_path)
         try:
-            if not self.database_path.exists():
+            if not path.exists():
                 return False
                 
             # Check file size
-            if self.database_path.stat().st_size < 100000:  # Less than 100KB
-                print(f"⚠️ Database too small: {self.database_path.stat().st_size} bytes")
+            if path.stat().st_size < 100000:  # Less than 100KB
+                print(f"⚠️ Database too small: {path.stat().st_size} bytes")
                 return False
             
             # Check SQLite integrity
-            conn = sqlite3.connect(str(self.database_path))
+            conn = sqlite3.connect(str(path))
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM books")
             count = cursor.fetchone()[0]
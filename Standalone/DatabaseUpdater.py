@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# File: DatabaseUpdater.py
+# Path: /home/herb/Desktop/AndyLibrary/Standalone/DatabaseUpdater.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 07:40PM
+
+"""
+Conditional database updates for the standalone apps
+Each launch asks Google Drive (a metadata-only files.list call) or the
+desktop server (a conditional GET) whether the library database changed.
+The validators from the last install (md5Checksum, modifiedTime, ETag) are
+kept next to the database. The full file is only downloaded when the
+remote copy is really different. StreamingDownloader streams it to a
+temporary file (resuming an interrupted transfer), checks it against the
+remote checksum and opens it with SQLite, then swaps it in with os.replace
+while the local server keeps serving the old copy.
+
+When a caching peer is on the LAN (StartAndyGoogle --peer-cache), it is
+asked first, so a classroom of clients spends the uplink only once.
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime
+
+import requests
+
+from StreamingDownloader import StreamingDownloader, print_progress
+
+# LAN discovery lives with the desktop server; bundles built without it just skip peers
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+try:
+    from Source.Utils.LanDiscovery import DiscoverServer, PEER_CACHE_ROLE
+except ImportError:
+    DiscoverServer = None
+    PEER_CACHE_ROLE = None
+
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files"
+DRIVE_DOWNLOAD_URL = "https://drive.google.com/uc?export=download&id={file_id}"
+DRIVE_METADATA_FIELDS = "id,name,size,md5Checksum,modifiedTime,version"
+SQLITE_HEADER = b"SQLite format 3\x00"
+CHUNK_SIZE = 256 * 1024
+
+class DatabaseUpdater:
+    """Revalidates a local library database against Google Drive or a desktop server"""
+
+    def __init__(self, database_path, folder_id=None, file_id=None, server_url=None,
+                 state_path=None, min_size=100000, api_key=None, session=None,
+                 peer_url=None, discover_peers=False, progress=None):
+        self.database_path = Path(database_path)
+        self.folder_id = folder_id
+        self.file_id = file_id
+        self.server_url = server_url
+        self.state_path = Path(state_path) if state_path else self.database_path.with_name("database_state.json")
+        self.temp_path = self.database_path.with_name(self.database_path.name + ".download")
+        self.min_size = min_size
+        self.api_key = api_key if api_key is not None else os.environ.get("ANDYLIBRARY_DRIVE_API_KEY")
+        self.session = session or requests.Session()
+        self.peer_url = peer_url
+        self.discover_peers = discover_peers
+        self.files_url = DRIVE_FILES_URL
+        self.download_url = DRIVE_DOWNLOAD_URL
+        self.downloader = StreamingDownloader(self.session, progress=progress or print_progress("Library"))
+        self.lock = threading.Lock()
+
+    # ---- validator state -------------------------------------------------
+
+    def load_state(self):
+        """Validators recorded for the installed database, or {} if unknown or stale"""
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+            stat = self.database_path.stat()
+            # Someone replaced the file behind our back - the validators no longer describe it
+            if state.get('local_size') != stat.st_size or state.get('local_mtime_ns') != stat.st_mtime_ns:
+                return {}
+            return state
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self, state):
+        stat = self.database_path.stat()
+        state = dict(state, local_size=stat.st_size, local_mtime_ns=stat.st_mtime_ns,
+                     checked_at=datetime.now().isoformat())
+        temp_state = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(temp_state, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_state, self.state_path)
+
+    @staticmethod
+    def file_md5(path):
+        digest = hashlib.md5()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    # ---- Google Drive ----------------------------------------------------
+
+    def fetch_drive_metadata(self):
+        """Metadata of the remote database file - a few hundred bytes, never the file itself"""
+        params = {'fields': DRIVE_METADATA_FIELDS}
+        if self.api_key:
+            params['key'] = self.api_key
+
+        if self.file_id:
+            response = self.session.get(f"{self.files_url}/{self.file_id}", params=params, timeout=10)
+            response.raise_for_status()
+            return response.json()
+
+        params.update({
+            'q': f"'{self.folder_id}' in parents and name contains '.db' and trashed = false",
+            'fields': f"files({DRIVE_METADATA_FIELDS})"
+        })
+        response = self.session.get(self.files_url, params=params, timeout=10)
+        response.raise_for_status()
+        files = response.json().get('files', [])
+        for file in files:
+            if 'MyLibrary.db' in file.get('name', ''):
+                return file
+        return files[0] if files else None
+
+    def drive_is_current(self, remote, state):
+        """True when the installed database already matches the remote Drive file"""
+        if not self.database_path.exists():
+            return False
+        remote_md5 = remote.get('md5Checksum')
+        if state:
+            if remote_md5 and state.get('md5Checksum'):
+                return remote_md5 == state['md5Checksum']
+            return (state.get('file_id') == remote.get('id')
+                    and state.get('modifiedTime') == remote.get('modifiedTime')
+                    and str(state.get('size')) == str(remote.get('size')))
+        # First check after a bundled copy or an older release - hashing locally is free, downloading is not
+        return bool(remote_md5) and self.file_md5(self.database_path) == remote_md5
+
+    def update_from_drive(self):
+        remote = self.fetch_drive_metadata()
+        if not remote:
+            return {"success": False, "updated": False, "status": "unavailable",
+                    "error": "No database file found in Google Drive folder"}
+
+        state = self.load_state()
+        validators = {
+            'source': 'drive',
+            'file_id': remote.get('id'),
+            'name': remote.get('name'),
+            'md5Checksum': remote.get('md5Checksum'),
+            'modifiedTime': remote.get('modifiedTime'),
+            'size': remote.get('size')
+        }
+        if self.drive_is_current(remote, state):
+            self.save_state(validators)
+            return {"success": True, "updated": False, "status": "current", "error": None}
+
+        print(f"📥 Library changed on Google Drive ({remote.get('modifiedTime', 'unknown time')}) - downloading...")
+        download = self.download(self.download_url.format(file_id=remote['id']),
+                                 expected_size=remote.get('size'), expected_md5=remote.get('md5Checksum'))
+        return self.installed(download, validators)
+
+    # ---- desktop server and LAN peers -----------------------------------
+
+    def find_peer(self):
+        """Base URL of a caching peer on the LAN, or None (costs under a second when there is none)"""
+        if self.peer_url or not self.discover_peers or DiscoverServer is None:
+            return self.peer_url
+        try:
+            self.peer_url = DiscoverServer(role=PEER_CACHE_ROLE,
+                                           cache_path=str(self.database_path.with_name("last_peer.json")))
+        except Exception as e:
+            print(f"⚠️ Peer discovery failed: {e}")
+        return self.peer_url
+
+    def update_from_peer(self, peer_url):
+        """Same conditional GET against a peer's /api/peer/database; never raises"""
+        try:
+            return self.update_from_server(f"{peer_url.rstrip('/')}/api/peer/database")
+        except (requests.RequestException, OSError, ValueError) as e:
+            return {"success": False, "updated": False, "status": "unavailable", "error": str(e)}
+
+    def update_from_server(self, url=None):
+        """Conditional GET: 304 costs a few hundred bytes, 200 streams the new database"""
+        url = url or self.server_url
+        state = self.load_state() if self.database_path.exists() else {}
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+
+        download = self.download(url, headers=headers)
+        if download["status"] == "not_modified":
+            self.save_state(state)
+            return {"success": True, "updated": False, "status": "current", "error": None}
+        validators = {
+            'source': 'server',
+            'url': url,
+            'etag': download["headers"].get('ETag'),
+            'last_modified': download["headers"].get('Last-Modified'),
+            'md5Checksum': download["md5"],
+            'size': download["bytes_downloaded"]
+        }
+        return self.installed(download, validators)
+
+    # ---- download and swap -----------------------------------------------
+
+    def download(self, url, **kwargs):
+        """Stream url over the live database; verify_file gates the swap"""
+        return self.downloader.download(url, self.database_path, temp_path=self.temp_path,
+                                        verify=self.verify_file, **kwargs)
+
+    def verify_file(self, path):
+        """Book count of a candidate database; raises ValueError if it is not a usable library"""
+        size = os.path.getsize(path)
+        if size < self.min_size:
+            raise ValueError(f"Database too small: {size} bytes")
+        with open(path, 'rb') as f:
+            if f.read(len(SQLITE_HEADER)) != SQLITE_HEADER:
+                raise ValueError("Not an SQLite database (Drive may have returned an HTML page)")
+        conn = sqlite3.connect(f"file:{Path(path).as_posix()}?mode=ro", uri=True)
+        try:
+            if conn.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+                raise ValueError("SQLite integrity check failed")
+            count = conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+        finally:
+            conn.close()
+        if count <= 0:
+            raise ValueError("Database has no books")
+        return count
+
+    def installed(self, download, validators):
+        """Turn a finished download into an update result, recording the new validators"""
+        if not download["success"]:
+            if download["status"] == "interrupted":
+                # The partial file stays; the next launch resumes it
+                return {"success": False, "updated": False, "status": "unavailable", "error": download["error"]}
+            print(f"⚠️ Database update rejected: {download['error']}")
+            return {"success": False, "updated": False, "status": "failed", "error": download["error"]}
+
+        self.save_state(validators)
+        downloaded = download["bytes_downloaded"]
+        print(f"✅ Library updated: {download['verified']} books ({downloaded:,} bytes)")
+        return {"success": True, "updated": True, "status": "updated", "book_count": download["verified"],
+                "bytes_downloaded": downloaded, "error": None}
+
+    # ---- entry point -----------------------------------------------------
+
+    def update(self):
+        """
+        Bring the local database up to date if the remote copy changed
+
+        Returns {"success", "updated", "status", "error"}; status is one of
+        current, updated, unavailable or failed. Never raises.
+        """
+        if not self.lock.acquire(blocking=False):
+            return {"success": False, "updated": False, "status": "failed", "error": "Update already running"}
+        try:
+            if self.server_url:
+                return self.update_from_server()
+            peer_url = self.find_peer()
+            if peer_url:
+                result = self.update_from_peer(peer_url)
+                if result["success"]:
+                    return result
+                # Peer went away - rediscover next time, use the internet now
+                print(f"⚠️ LAN peer {peer_url} unavailable ({result['error']}) - using Google Drive")
+                self.peer_url = None
+            if self.file_id or self.folder_id:
+                return self.update_from_drive()
+            return {"success": False, "updated": False, "status": "unavailable",
+                    "error": "No Google Drive folder or server configured"}
+        except (requests.RequestException, OSError, ValueError) as e:
+            return {"success": False, "updated": False, "status": "unavailable", "error": str(e)}
+        finally:
+            self.lock.release()
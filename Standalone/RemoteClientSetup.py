@@ -3,7 +3,7 @@
 # Path: /home/herb/Desktop/AndyLibrary/Standalone/RemoteClientSetup.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-30
-# Last Modified: 2025-07-30 02:45PM
+# Last Modified: 2026-10-19 07:40PM
 
 """
 Remote Client Setup for AndyLibrary
@@ -30,6 +30,8 @@ from fastapi import FastAPI, Request, Response, HTTPException, Form
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, RedirectResponse
 
+from StreamingDownloader import StreamingDownloader, print_progress
+
 class RemoteClientSetup:
     """Setup client for remote users accessing shared Google Drive"""
     
@@ -41,6 +43,7 @@ class RemoteClientSetup:
         self.database_path = self.data_dir / "MyLibrary.db"
         self.port = 8002
         self.app = None
+        self.download_progress = None
         
         # Create data directory
         self.data_dir.mkdir(exist_ok=True)
@@ -139,7 +142,7 @@ class RemoteClientSetup:
             api_url = "https://www.googleapis.com/drive/v3/files"
             params = {
                 'q': f"'{folder_id}' in parents and name contains '.db'",
-                'fields': 'files(id,name,size,mimeType,webContentLink,downloadUrl)'
+                'fields': 'files(id,name,size,md5Checksum,mimeType,webContentLink,downloadUrl)'
             }
             
             response = requests.get(api_url, params=params, timeout=10)
@@ -179,41 +182,44 @@ class RemoteClientSetup:
             file_id = file_info['id']
             download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
             
-            response = requests.get(download_url, timeout=60)
+            # Streamed to a temp file, resumed if the link drops and checked against
+            # Drive's size and md5 before it replaces anything
+            printer = print_progress(file_info['name'])
+            def progress(downloaded, total):
+                self.download_progress = {"downloaded": downloaded, "total": total}
+                printer(downloaded, total)
             
-            if response.status_code == 200:
-                # Save database
-                with open(self.database_path, 'wb') as f:
-                    f.write(response.content)
-                
-                # Verify database
-                if self.verify_database():
-                    print("✅ Database downloaded and verified successfully")
-                    return True
-                else:
-                    print("❌ Downloaded database failed verification")
-                    return False
+            downloader = StreamingDownloader(progress=progress)
+            result = downloader.download(download_url, self.database_path,
+                                         expected_size=file_info.get('size'),
+                                         expected_md5=file_info.get('md5Checksum'),
+                                         verify=self.verify_database)
+            
+            if result["success"]:
+                print("✅ Database downloaded and verified successfully")
+                return True
             else:
-                print(f"❌ Database download failed: HTTP {response.status_code}")
+                print(f"❌ Database download failed: {result['error']}")
                 return False
                 
         except Exception as e:
             print(f"❌ Database download error: {e}")
             return False
     
-    def verify_database(self):
+    def verify_database(self, path=None):
         """Verify the downloaded database is valid"""
+        path = Path(path or self.database_path)
         try:
-            if not self.database_path.exists():
+            if not path.exists():
                 return False
                 
             # Check file size
-            if self.database_path.stat().st_size < 100000:  # Less than 100KB
-                print(f"⚠️ Database too small: {self.database_path.stat().st_size} bytes")
+            if path.stat().st_size < 100000:  # Less than 100KB
+                print(f"⚠️ Database too small: {path.stat().st_size} bytes")
                 return False
             
             # Check SQLite integrity
-            conn = sqlite3.connect(str(self.database_path))
+            conn = sqlite3.connect(str(path))
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM books")
             count = cursor.fetchone()[0]
@@ -223,7 +229,7 @@ class RemoteClientSetup:
                 print(f"✅ Database verified: {count} books")
                 self.config["database_info"] = {
                     "books_count": count,
-                    "size_bytes": self.database_path.stat().st_size,
+                    "size_bytes": path.stat().st_size,
                     "last_verified": datetime.now().isoformat()
                 }
                 return True
@@ -251,8 +257,9 @@ class RemoteClientSetup:
             else:
                 return self.create_setup_page()
         
+        # Plain def: the download runs in the threadpool so /api/status can report progress
         @app.post("/setup")
-        async def process_setup(share_url: str = Form(...), owner_name: str = Form(...)):
+        def process_setup(share_url: str = Form(...), owner_name: str = Form(...)):
             """Process setup form"""
             try:
                 print(f"🔄 Processing setup with URL: {share_url}")
@@ -340,7 +347,8 @@ class RemoteClientSetup:
                 "library_owner": self.config.get("library_owner", ""),
                 "database_available": self.database_path.exists(),
                 "books_count": self.config.get("database_info", {}).get("books_count", 0),
-                "last_sync": self.config.get("last_sync")
+                "last_sync": self.config.get("last_sync"),
+                "download_progress": self.download_progress
             }
         
         # Add standard API endpoints if database is available
@@ -3,7 +3,7 @@
 # Path: /home/herb/Desktop/AndyLibrary/Standalone/GrandsonLibrary.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-30
-# Last Modified: 2025-07-30 03:00PM
+# Last Modified: 2026-10-19 07:10PM
 
 """
 Grandson's Educational Library - Standalone Google Drive Access
@@ -31,6 +31,8 @@ from fastapi import FastAPI, Request, Response, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
 
+from DatabaseUpdater import DatabaseUpdater
+
 class GrandsonLibrary:
     """Library for grandson - accesses Grandpa's Google Drive (no registration)"""
     
@@ -62,6 +64,10 @@ class GrandsonLibrary:
         
         # Load existing config if available
         self.load_config()
+        
+        # Remembers Drive's md5Checksum/modifiedTime so unchanged libraries are never re-downloaded
+        self.updater = DatabaseUpdater(self.database_path, folder_id=self.google_drive_folder_id,
+                                       discover_peers=True)
     
     def load_config(self):
         """Load configuration with Grandpa's Google Drive info"""
@@ -113,112 +119,28 @@ class GrandsonLibrary:
             return None
     
     def background_database_update(self):
-        """Update database in background without blocking startup"""
+        """Revalidate the database in background - downloads only when Drive has a different file"""
         try:
             print("🔄 Checking for database updates...")
+            result = self.updater.update()
             
-            # Create temporary database path
-            temp_db_path = self.data_dir / "MyLibrary_temp.db"
-            
-            # Download to temporary location
-            if self.download_database_to_path(temp_db_path):
-                # Verify the new database
-                try:
-                    conn = sqlite3.connect(str(temp_db_path))
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT COUNT(*) FROM books")
-                    new_count = cursor.fetchone()[0]
-                    conn.close()
-                    
-                    # Get current database count for comparison
-                    current_count = self.get_book_count()
-                    
-                    if new_count != current_count:
-                        print(f"📚 Library update available: {new_count} books (was {current_count})")
-                        # Replace current database with updated one
-                        if self.database_path.exists():
-                            self.database_path.unlink()  # Remove old database
-                        temp_db_path.rename(self.database_path)  # Move new database
-                        print("✅ Library updated successfully!")
-                    else:
-                        print("✅ Library is up to date")
-                        temp_db_path.unlink()  # Remove temp file
-                        
-                except Exception as e:
-                    print(f"⚠️ Database update verification failed: {e}")
-                    if temp_db_path.exists():
-                        temp_db_path.unlink()
+            if result["updated"]:
+                print(f"📚 Library updated: {result['book_count']} books")
+            elif result["success"]:
+                print("✅ Library is up to date")
             else:
-                print("⚠️ No updates available from Granddaddy's Google Drive")
+                print(f"⚠️ No updates available from {self.grandpa_name}'s Google Drive: {result['error']}")
                 
         except Exception as e:
             print(f"⚠️ Background update error: {e}")
     
-    def download_database_to_path(self, target_path):
-        """Download database to specific path"""
-        print(f"🔍 DIAGNOSTIC: Starting database download to {target_path}")
-        print(f"🔍 DIAGNOSTIC: Google Drive folder ID: {self.google_drive_folder_id}")
-        
-        if not self.google_drive_folder_id:
-            print("❌ DIAGNOSTIC: No Google Drive folder ID configured")
-            return False
-            
-        try:
-            # Search for MyLibrary.db in the folder
-            api_url = "https://www.googleapis.com/drive/v3/files"
-            params = {
-                'q': f"'{self.google_drive_folder_id}' in parents and name contains '.db'",
-                'fields': 'files(id,name,size,mimeType)'
-            }
-            
-            print(f"🔍 DIAGNOSTIC: Making Google Drive API request")
-            print(f"🔍 DIAGNOSTIC: API URL: {api_url}")
-            print(f"🔍 DIAGNOSTIC: Query: {params['q']}")
-            
-            response = requests.get(api_url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                files = response.json().get('files', [])
-                
-                # Look for MyLibrary.db specifically
-                db_file = None
-                for file in files:
-                    if 'MyLibrary.db' in file['name']:
-                        db_file = file
-                        break
-                
-                if not db_file and files:
-                    db_file = files[0]  # Use first .db file found
-                
-                if db_file:
-                    # Download the database
-                    file_id = db_file['id']
-                    download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
-                    
-                    response = requests.get(download_url, timeout=60)
-                    
-                    if response.status_code == 200:
-                        # Save database
-                        with open(target_path, 'wb') as f:
-                            f.write(response.content)
-                        return True
-                    else:
-                        print(f"❌ Download failed: HTTP {response.status_code}")
-                        return False
-                else:
-                    return False
-            else:
-                return False
-                
-        except Exception as e:
-            print(f"❌ Database download error: {e}")
-            return False
-
     def download_database_from_drive(self):
         """Download database from Grandpa's Google Drive"""
         print(f"📥 Downloading library from {self.grandpa_name}'s Google Drive...")
         
-        if self.download_database_to_path(self.database_path):
+        # Streams to a temporary file and swaps it in only after verification
+        result = self.updater.update()
+        if result["success"]:
             # Verify database
             if self.verify_database():
                 print(f"✅ Downloaded {self.grandpa_name}'s library successfully!")
@@ -227,7 +149,7 @@ class GrandsonLibrary:
                 print("❌ Downloaded database failed verification")
                 return False
         else:
-            print("❌ Failed to download database from Google Drive")
+            print(f"❌ Failed to download database from Google Drive: {result['error']}")
             return False
     
     def verify_database(self):
@@ -306,30 +228,16 @@ class GrandsonLibrary:
         """Setup database for grandson's use with auto-download"""
         print("🔄 Setting up library database...")
         
-        # Check if we should download fresh database from Google Drive
-        should_download = False
-        
-        if not self.database_path.exists():
-            print("📥 No local database found - downloading from Granddaddy's Google Drive...")
-            should_download = True
-        else:
-            # Check database age - download if older than 1 day
-            db_age_hours = (time.time() - self.database_path.stat().st_mtime) / 3600
-            if db_age_hours > 24:
-                print(f"📅 Database is {db_age_hours:.1f} hours old - checking for updates...")
-                should_download = True
-        
-        # Download fresh database if needed
-        if should_download and self.google_drive_folder_id:
-            # For first-time setup, download synchronously
+        # Download synchronously only when there is nothing to serve yet
+        if self.google_drive_folder_id:
             if not self.database_path.exists():
-                print("🌐 Downloading latest library from Granddaddy...")
+                print("📥 No local database found - downloading from Granddaddy's Google Drive...")
                 if self.download_database_from_drive():
                     print("✅ Latest library downloaded successfully!")
                 else:
                     print("⚠️ Download failed - will use fallback database")
             else:
-                # For updates, download in background to minimize startup time
+                # Metadata-only check every launch; the library keeps serving while it runs
                 print("🔄 Checking for library updates in background...")
                 threading.Thread(target=self.background_database_update, daemon=True).start()
         
@@ -497,6 +405,7 @@ class GrandsonLibrary:
                 # Save configuration
                 self.google_drive_folder_id = folder_id
                 self.google_drive_folder_url = share_url
+                self.updater.folder_id = folder_id
                 self.grandpa_name = grandpa_name
                 
                 # Download database
@@ -693,6 +602,11 @@ class GrandsonLibrary:
                 
                 book_title = result[0]
                 
+                # A caching peer found by the last database check serves the book over the LAN
+                if self.updater.peer_url:
+                    return {"download_url": f"{self.updater.peer_url}/api/peer/books/{book_id}",
+                            "title": book_title, "source": "peer"}
+                
                 # Get download URL from Google Drive
                 download_url = self.download_book_from_drive(book_title)
                 
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# File: StreamingDownloader.py
+# Path: /home/herb/Desktop/AndyLibrary/Standalone/StreamingDownloader.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 07:40PM
+
+"""
+Streaming downloads for the standalone clients
+The body is written in chunks to <name>.download next to the destination
+and hashed as it arrives, so memory use stays flat however big the library
+is. A dropped connection keeps the partial file and its validator in
+<name>.download.json. The next attempt, in this run or the next launch,
+asks for the rest with Range (and If-Range when the server gave a strong
+ETag). Once the size, checksums and the caller's check pass, the file is
+swapped over the destination with os.replace. A failed or corrupt transfer
+never touches the live database.
+"""
+
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+
+import requests
+
+# A dropped connection loses the chunk being read, so keep chunks modest
+CHUNK_SIZE = 64 * 1024
+DOWNLOAD_ATTEMPTS = 4
+RETRY_BASE_SECONDS = 0.5
+REPLACE_ATTEMPTS = 20
+REPLACE_RETRY_SECONDS = 0.25
+SHA256_HEADER = "X-Content-SHA256"
+
+class RestartDownload(Exception):
+    """The partial file no longer matches the remote file - start over"""
+
+def print_progress(label="Downloading", step=10):
+    """Progress callback that prints every `step` percent (or every 5 MB when the size is unknown)"""
+    state = {'next': step}
+
+    def report(downloaded, total):
+        if total:
+            percent = downloaded * 100 // total
+            if percent >= state['next'] or downloaded == total:
+                print(f"📥 {label}: {percent}% ({downloaded:,}/{total:,} bytes)")
+                state['next'] = (percent // step + 1) * step
+        elif downloaded >= state['next'] * 512 * 1024:
+            print(f"📥 {label}: {downloaded:,} bytes")
+            state['next'] += step
+    return report
+
+class StreamingDownloader:
+    """Chunked, resumable, verified downloads shared by the standalone clients"""
+
+    def __init__(self, session=None, chunk_size=CHUNK_SIZE, timeout=(10, 60),
+                 attempts=DOWNLOAD_ATTEMPTS, progress=None):
+        self.session = session or requests.Session()
+        self.chunk_size = chunk_size
+        self.timeout = timeout  # (connect, between chunks) - never a total deadline
+        self.attempts = attempts
+        self.progress = progress
+
+    @staticmethod
+    def temp_path_for(destination):
+        destination = Path(destination)
+        return destination.with_name(destination.name + ".download")
+
+    @staticmethod
+    def meta_path_for(temp_path):
+        return Path(temp_path).with_name(Path(temp_path).name + ".json")
+
+    # ---- partial state ---------------------------------------------------
+
+    def load_partial(self, temp_path, url):
+        """(bytes already on disk, recorded validator) for a resumable partial, else (0, None)"""
+        try:
+            with open(self.meta_path_for(temp_path), 'r') as f:
+                meta = json.load(f)
+            size = os.path.getsize(temp_path)
+        except (OSError, ValueError):
+            self.discard(temp_path)
+            return 0, None
+        if meta.get('url') != url or not meta.get('validator'):
+            self.discard(temp_path)
+            return 0, None
+        return size, meta['validator']
+
+    def save_partial(self, temp_path, url, validator):
+        with open(self.meta_path_for(temp_path), 'w') as f:
+            json.dump({'url': url, 'validator': validator}, f)
+
+    def discard_meta(self, temp_path):
+        try:
+            self.meta_path_for(temp_path).unlink()
+        except OSError:
+            pass
+
+    def discard(self, temp_path):
+        try:
+            Path(temp_path).unlink()
+        except OSError:
+            pass
+        self.discard_meta(temp_path)
+
+    @staticmethod
+    def response_validator(response):
+        """What identifies the remote file: its SHA-256 if announced, else a strong identity ETag"""
+        sha256 = response.headers.get(SHA256_HEADER)
+        if sha256:
+            return f"sha256:{sha256.lower()}"
+        etag = response.headers.get('ETag')
+        # A weak or per-encoding ETag cannot vouch for byte ranges of the identity body
+        if etag and not etag.startswith('W/') and not response.headers.get('Content-Encoding'):
+            return f"etag:{etag}"
+        return None
+
+    @staticmethod
+    def response_total(response, offset):
+        """Full size of the identity body, if the headers say"""
+        content_range = response.headers.get('Content-Range', '')
+        if '/' in content_range and not content_range.endswith('/*'):
+            return int(content_range.rsplit('/', 1)[1])
+        length = response.headers.get('Content-Length')
+        if length is not None and not response.headers.get('Content-Encoding'):
+            return offset + int(length)
+        return None
+
+    # ---- transfer --------------------------------------------------------
+
+    def hash_prefix(self, temp_path, digests):
+        with open(temp_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                for digest in digests:
+                    digest.update(chunk)
+
+    def fetch(self, url, temp_path, headers, pinned_validator):
+        """
+        One request: resume or (re)start the partial file and stream the body into it
+
+        Returns (status_code, response headers, bytes on disk, md5, sha256, total).
+        Raises requests/OS errors on a dropped connection, keeping the partial.
+        """
+        offset, validator = self.load_partial(temp_path, url)
+        if offset and pinned_validator and validator != pinned_validator:
+            self.discard(temp_path)
+            offset, validator = 0, None
+
+        request_headers = dict(headers)
+        if offset:
+            request_headers['Range'] = f"bytes={offset}-"
+            # Offsets count identity bytes, so the rest must come unencoded
+            request_headers['Accept-Encoding'] = 'identity'
+            if validator.startswith('etag:'):
+                request_headers['If-Range'] = validator[len('etag:'):]
+
+        response = self.session.get(url, headers=request_headers, stream=True, timeout=self.timeout)
+        with response:
+            if response.status_code not in (200, 206):
+                if response.status_code == 416 and offset:
+                    self.discard(temp_path)
+                    raise RestartDownload("Requested range not satisfiable")
+                return response.status_code, response.headers, 0, None, None, None
+
+            current = pinned_validator or self.response_validator(response)
+            if response.status_code == 206:
+                content_range = response.headers.get('Content-Range', '')
+                if not offset or not content_range.startswith(f"bytes {offset}-") or current != validator:
+                    self.discard(temp_path)
+                    raise RestartDownload("Remote file changed since the partial download")
+                print(f"↪️ Resuming download at {offset:,} bytes")
+            else:
+                offset = 0
+
+            md5, sha256 = hashlib.md5(), hashlib.sha256()
+            if offset:
+                self.hash_prefix(temp_path, (md5, sha256))
+            if current:
+                self.save_partial(temp_path, url, current)
+            else:
+                self.discard_meta(temp_path)  # nothing to resume against later
+
+            total = self.response_total(response, offset)
+            downloaded = offset
+            with open(temp_path, 'ab' if offset else 'wb') as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if not chunk:
+                        continue
+                    f.write(chunk)
+                    md5.update(chunk)
+                    sha256.update(chunk)
+                    downloaded += len(chunk)
+                    if self.progress:
+                        self.progress(downloaded, total)
+            return response.status_code, response.headers, downloaded, md5.hexdigest(), sha256.hexdigest(), total
+
+    def replace(self, temp_path, destination):
+        """os.replace, retried briefly because an open handle blocks the rename on Windows"""
+        for attempt in range(REPLACE_ATTEMPTS):
+            try:
+                os.replace(temp_path, destination)
+                return True
+            except PermissionError:
+                if attempt == REPLACE_ATTEMPTS - 1:
+                    return False
+                time.sleep(REPLACE_RETRY_SECONDS)
+
+    def download(self, url, destination, headers=None, expected_size=None, expected_md5=None,
+                 expected_sha256=None, verify=None, temp_path=None):
+        """
+        Stream url to destination, resuming a previous partial transfer
+
+        verify(path) checks the finished temporary file: it returns a truthy
+        value (reported as "verified") or raises ValueError/sqlite3.Error.
+
+        Returns {"success", "status", "bytes_downloaded", "md5", "sha256",
+        "headers", "verified", "error"}; status is one of downloaded,
+        not_modified, failed or interrupted. Never raises.
+        """
+        destination = Path(destination)
+        temp_path = Path(temp_path) if temp_path else self.temp_path_for(destination)
+        temp_path.parent.mkdir(parents=True, exist_ok=True)
+        result = {"success": False, "status": "failed", "bytes_downloaded": 0, "md5": None,
+                  "sha256": None, "headers": {}, "verified": None, "error": None}
+
+        # Checksums the caller got from metadata pin the partial to one remote version
+        pinned = f"sha256:{expected_sha256.lower()}" if expected_sha256 else (
+            f"md5:{expected_md5.lower()}" if expected_md5 else None)
+
+        for attempt in range(self.attempts):
+            try:
+                status, response_headers, downloaded, md5, sha256, total = self.fetch(
+                    url, temp_path, headers or {}, pinned)
+                break
+            except RestartDownload as e:
+                print(f"⚠️ {e} - restarting download")
+                result["error"] = str(e)
+            except (requests.RequestException, OSError) as e:
+                result["error"] = str(e)
+                if attempt < self.attempts - 1:
+                    delay = RETRY_BASE_SECONDS * 2 ** attempt
+                    print(f"⚠️ Download interrupted ({e}) - retrying in {delay:.1f}s")
+                    time.sleep(delay)
+        else:
+            result["status"] = "interrupted"  # the partial file is kept for the next try
+            return result
+
+        result["headers"] = response_headers
+        if status == 304:
+            return dict(result, success=True, status="not_modified", error=None)
+        if status not in (200, 206):
+            return dict(result, error=f"Server returned HTTP {status}")
+        result.update(bytes_downloaded=downloaded, md5=md5, sha256=sha256)
+
+        expected_size = expected_size if expected_size is not None else total
+        if expected_size is not None and int(expected_size) != downloaded:
+            return self.reject(temp_path, result, f"Size mismatch: got {downloaded} bytes, expected {expected_size}")
+        expected_sha256 = expected_sha256 or response_headers.get(SHA256_HEADER)
+        if (expected_md5 and expected_md5.lower() != md5) or (expected_sha256 and expected_sha256.lower() != sha256):
+            return self.reject(temp_path, result, "Checksum mismatch - download corrupted")
+
+        if verify:
+            try:
+                verified = verify(temp_path)
+            except Exception as e:
+                return self.reject(temp_path, result, str(e))
+            if not verified:
+                return self.reject(temp_path, result, "Downloaded file failed verification")
+            result["verified"] = verified
+
+        if not self.replace(temp_path, destination):
+            return self.reject(temp_path, result, "Destination is locked - will retry on next launch")
+        self.discard(temp_path)
+        return dict(result, success=True, status="downloaded", error=None)
+
+    def reject(self, temp_path, result, error):
+        self.discard(temp_path)
+        return dict(result, success=False, status="failed", error=error)
@@ -3,12 +3,13 @@
 # Path: /home/herb/Desktop/AndyLibrary/Standalone/WindowsStandaloneApp.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-31
-# Last Modified: 2025-08-01 04:40PM
+# Last Modified: 2026-10-19 07:10PM
 
 """
 Windows Standalone Library - Downloads Current Database from Google Drive
 This is the CORRECT implementation - NO bundled database
 On Windows: Double-click .exe → Downloads current DB from GDrive → Runs Library
+Later launches start from the cached copy and only re-download when Drive changed
 """
 
 import os
@@ -23,7 +24,6 @@ import requests
 import urllib.parse
 import re
 import time
-import tempfile
 from pathlib import Path
 from datetime import datetime
 
@@ -32,24 +32,28 @@ from fastapi import FastAPI, Request, Response, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, RedirectResponse
 
+from DatabaseUpdater import DatabaseUpdater
+
 class WindowsStandaloneLibrary:
-    """Windows Standalone Library - Always downloads fresh database from Google Drive"""
+    """Windows Standalone Library - Always serves the current database from Google Drive"""
     
     def __init__(self):
-        # Create temp directory for this session
-        self.temp_dir = Path(tempfile.mkdtemp(prefix="AndyLibrary_"))
-        self.data_dir = self.temp_dir / "Data"
+        # Per-user cache that survives restarts, so the next launch only revalidates
+        self.cache_dir = Path(os.environ.get('LOCALAPPDATA') or Path.home() / ".cache") / "AndyLibrary"
+        self.data_dir = self.cache_dir / "Data"
         self.database_path = self.data_dir / "MyLibrary.db"
         
-        print(f"📁 Created temporary directory: {self.temp_dir}")
+        print(f"📁 Using library cache directory: {self.cache_dir}")
         
         # Create data directory
-        self.data_dir.mkdir(exist_ok=True)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
         
         # Google Drive configuration - ACTUAL CURRENT DATABASE
         # These will be updated to point to the real current database
         self.google_drive_file_id = self.get_current_database_file_id()
         self.google_drive_folder_id = self.get_current_database_folder_id()
+        self.updater = DatabaseUpdater(self.database_path, folder_id=self.google_drive_folder_id,
+                                       discover_peers=True)
         
         # Get WebPages from bundle or relative location
         if hasattr(sys, '_MEIPASS'):
@@ -100,6 +104,20 @@ class WindowsStandaloneLibrary:
         print("📥 Using TRUSTED folder access - direct file download")
         
         try:
+            # A copy from an earlier launch is served right away; Drive is asked in the
+            # background (metadata only) whether it changed
+            if self.database_path.exists() and self.verify_database():
+                print("✅ Using library from last launch - checking Google Drive for changes in background")
+                threading.Thread(target=self.background_database_update, daemon=True).start()
+                return True
+            
+            # First launch: fetch the current database from the trusted folder
+            result = self.updater.update()
+            if result["success"] and self.verify_database():
+                print("✅ Current database downloaded from Google Drive")
+                return True
+            print(f"⚠️ Google Drive download unavailable: {result['error']}")
+            
             # SIMPLE METHOD: Use known database file IDs from trusted folder
             print(f"🔍 DIAGNOSTIC: Using trusted folder ID: {self.google_drive_folder_id}")
             
@@ -305,6 +323,16 @@ class WindowsStandaloneLibrary:
             print("❌ This application REQUIRES downloading the current database")
             return False
     
+    def background_database_update(self):
+        """Swap in a newer database while the library keeps serving the current one"""
+        result = self.updater.update()
+        if result["updated"]:
+            print(f"📚 Library updated in background: {result['book_count']} books")
+        elif result["success"]:
+            print("✅ Library is up to date")
+        else:
+            print(f"⚠️ Update check skipped: {result['error']}")
+    
     def verify_database(self):
         """Verify the downloaded database is valid"""
         try:
@@ -397,7 +425,7 @@ class WindowsStandaloneLibrary:
                 "books_available": book_count,
                 "version": "2.0.0",
                 "database_source": "live_google_drive",
-                "temp_directory": str(self.temp_dir)
+                "cache_directory": str(self.cache_dir)
             }
         
         @app.get("/api/categories")
@@ -546,6 +574,11 @@ class WindowsStandaloneLibrary:
                 
                 book_title = result[0]
                 
+                # A caching peer found by the last database check serves the book over the LAN
+                if self.updater.peer_url:
+                    return {"download_url": f"{self.updater.peer_url}/api/peer/books/{book_id}",
+                            "title": book_title, "source": "peer"}
+                
                 # Get download URL from Google Drive
                 download_url = self.download_book_from_drive(book_title)
                 
@@ -731,11 +764,9 @@ class WindowsStandaloneLibrary:
         raise Exception("No available ports found")
     
     def cleanup_on_exit(self):
-        """Clean up temporary directory on exit"""
+        """Remove an interrupted download; the verified database stays cached for next launch"""
         try:
-            if self.temp_dir.exists():
-                shutil.rmtree(self.temp_dir)
-                print(f"🧹 Cleaned up temporary directory: {self.temp_dir}")
+            self.updater.discard_partial()
         except Exception as e:
             print(f"⚠️ Cleanup warning: {e}")
     
@@ -3,7 +3,7 @@
 # Path: AndyGoogle/StartAndyGoogle.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-12
-# Last Modified: 2025-07-23  08:33PM
+# Last Modified: 2026-10-19  10:55PM
 """
 Description: AndyGoogle startup script with smart port detection and environment checks
 Main entry point for the AndyGoogle cloud-synchronized digital library system
@@ -172,8 +172,9 @@ class AndyGoogleStarter:
             # lsof not available
             pass
     
-    def start_server(self, host="127.0.0.1", port=None, mode="local", check_only=False):
-        """Start the AndyGoogle server"""
+    def start_server(self, host="127.0.0.1", port=None, mode="local", check_only=False, workers=1,
+                     announce=True, peer_cache=False, peer_upstream=None):
+        """Start the AndyGoogle server (workers=0 means one per CPU)"""
         
         # Environment check
         print("🔍 Checking environment...")
@@ -243,18 +244,38 @@ class AndyGoogleStarter:
         # Set mode for FastAPI app
         os.environ['ANDYGOOGLE_MODE'] = mode
         
+        # Peer settings are read by the app (and by every worker) from the environment
+        if peer_cache:
+            os.environ['ANDYLIBRARY_PEER_CACHE'] = '1'
+            print("📦 LAN caching peer: books are fetched from the internet once and shared from here")
+        if not peer_upstream and not peer_cache and announce:
+            # The app looks for a caching peer once it is serving, so startup never waits on the LAN
+            os.environ['ANDYLIBRARY_PEER_DISCOVERY'] = '1'
+        if peer_upstream:
+            os.environ['ANDYLIBRARY_PEER_UPSTREAM'] = peer_upstream
+            print(f"📦 Missing books come from LAN peer {peer_upstream}")
+        
+        # Let LAN clients find this server without scanning hosts and ports
+        announcer = None
+        if announce:
+            from Source.Utils.LanDiscovery import LanAnnouncer, PEER_CACHE_ROLE
+            announcer = LanAnnouncer(available_port, roles=("library", PEER_CACHE_ROLE) if peer_cache else ("library",))
+            if announcer.Start():
+                print(f"📡 LAN discovery: announcing on UDP {announcer.DiscoveryPort}")
+                if host in ("127.0.0.1", "localhost"):
+                    print("ℹ️ Bound to localhost - use --host 0.0.0.0 so other devices can connect")
+        
         # Import and start the FastAPI app
         try:
-            from Source.API.MainAPI import app
-            import uvicorn
+            from Source.Utils.ServerLauncher import ResolveWorkerCount, RunServer
             
-            uvicorn.run(
-                app,
-                host=host,
-                port=available_port,
-                log_level="info",
-                access_log=True
-            )
+            worker_count = ResolveWorkerCount(workers)
+            if worker_count > 1:
+                # Each worker imports the app itself; shared state is configured before fork
+                RunServer(host, available_port, workers=worker_count)
+            else:
+                from Source.API.MainAPI import app
+                RunServer(host, available_port, workers=1, app=app)
             
         except KeyboardInterrupt:
             print("\n👋 AndyGoogle server stopped by user")
@@ -262,6 +283,9 @@ class AndyGoogleStarter:
         except Exception as e:
             print(f"❌ Failed to start server: {e}")
             return False
+        finally:
+            if announcer:
+                announcer.Stop()
 
 
     def validate_database(self):
@@ -292,8 +316,26 @@ class AndyGoogleStarter:
         
         return False
 
+def profile_startup(mode, budget_ms=None):
+    """Print the import profile of the API server; False when it breaks the startup budget"""
+    from Source.Utils.StartupProfiler import ProfileImports, FormatImportTable, CheckStartupBudget
+    
+    profile = ProfileImports(mode=mode)
+    print(FormatImportTable(profile))
+    problems = CheckStartupBudget(profile, budget_ms)
+    print()
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ Startup within budget")
+    return not problems
+
 def main():
     """Main entry point"""
+    # Cold-start time on /api/health is measured from here
+    from Source.Utils.StartupReadiness import MarkLaunchTime
+    MarkLaunchTime()
+    
     parser = argparse.ArgumentParser(
         description="AndyGoogle - Cloud-synchronized digital library",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -304,6 +346,12 @@ Examples:
   python StartAndyGoogle.py --port 3000       # Use alternative port (good for development)
   python StartAndyGoogle.py --check           # Check environment only
   python StartAndyGoogle.py --host 0.0.0.0    # Allow external connections
+  python StartAndyGoogle.py --workers 0       # One worker process per CPU
+  python StartAndyGoogle.py --no-discovery    # Do not announce on the LAN
+  python StartAndyGoogle.py --host 0.0.0.0 --peer-cache   # Fetch books once, share them on the LAN
+  python StartAndyGoogle.py --peer-upstream http://192.168.1.10:8000   # Use a specific caching peer
+  python StartAndyGoogle.py --profile-startup # Per-module import times of the server
+  python StartAndyGoogle.py --profile-startup --startup-budget-ms 1500   # CI: fail if startup regressed
 
 Port Selection:
   AndyGoogle automatically finds available ports starting from 8000.
@@ -320,9 +368,24 @@ Port Selection:
                        help='Operating mode: local (SQLite only) or gdrive (Google Drive sync). Default: local')
     parser.add_argument('--check', action='store_true',
                        help='Check environment and exit')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Worker processes (default: 1, 0 = one per CPU; >1 uses shared SQLite/Redis state)')
+    parser.add_argument('--no-discovery', action='store_true',
+                       help='Do not announce this server to LAN clients')
+    parser.add_argument('--peer-cache', action='store_true',
+                       help='Caching peer: download missing books once and serve them to the LAN')
+    parser.add_argument('--peer-upstream', default=None,
+                       help='Fetch missing books from this caching peer (default: discovered on the LAN)')
+    parser.add_argument('--profile-startup', action='store_true',
+                       help='Report per-module import time of the server (python -X importtime) and exit')
+    parser.add_argument('--startup-budget-ms', type=float, default=None,
+                       help='With --profile-startup: exit 1 if the server module takes longer to import')
     
     args = parser.parse_args()
     
+    if args.profile_startup:
+        sys.exit(0 if profile_startup(args.mode, args.startup_budget_ms) else 1)
+    
     print("🚀 AndyGoogle - Cloud Library System")
     print("=" * 60)
     
@@ -331,7 +394,11 @@ Port Selection:
         host=args.host,
         port=args.port,
         mode=args.mode,
-        check_only=args.check
+        check_only=args.check,
+        workers=args.workers,
+        announce=not args.no_discovery,
+        peer_cache=args.peer_cache,
+        peer_upstream=args.peer_upstream
     )
     
     if not success:
@@ -0,0 +1,76 @@
+# File: test_book_costs.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_book_costs.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 04:20PM
+
+"""
+Tests for batched book cost estimation and the bulk /api/books/cost endpoint
+"""
+
+import asyncio
+import sqlite3
+import pytest
+
+from Source.Core import StudentBookDownloader as StudentBookDownloaderModule
+from Source.Core.StudentBookDownloader import StudentBookDownloader, StudentRegion
+
+@pytest.fixture
+def downloader(tmp_path):
+    library = tmp_path / "library.db"
+    with sqlite3.connect(library) as conn:
+        conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT, author TEXT, FileSize INTEGER)")
+        conn.executemany(
+            "INSERT INTO books VALUES (?, ?, ?, ?)",
+            [(i, f"Book {i}", "Author", None if i % 7 == 0 else i * 150000) for i in range(1, 1201)]
+        )
+    return StudentBookDownloader(str(library), history_path=str(tmp_path / "history.db"))
+
+class TestBatchCosts:
+    """One connection, same numbers as the per-book path"""
+
+    def test_batch_matches_single_estimates(self, downloader):
+        book_ids = [5, 14, 300, 1200]
+        batch = downloader.GetBookCostEstimates(book_ids, StudentRegion.EMERGING)
+        for book_id in book_ids:
+            assert batch[book_id] == downloader.GetBookCostEstimate(book_id, StudentRegion.EMERGING)
+
+    def test_large_list_uses_one_connection(self, downloader, monkeypatch):
+        connections = []
+        real_connect = sqlite3.connect
+        monkeypatch.setattr(StudentBookDownloaderModule.sqlite3, "connect",
+                            lambda *args, **kwargs: connections.append(args) or real_connect(*args, **kwargs))
+
+        result = downloader.GetMultipleBooksCost(list(range(1, 1201)))
+        assert len(result["books"]) == 1200
+        assert len(connections) == 1
+
+    def test_order_duplicates_and_missing_ids(self, downloader):
+        result = downloader.GetMultipleBooksCost([3, 9999, 3, 1])
+        assert [cost.book_id for cost in result["books"]] == [3, 3, 1]
+        assert result["missing_book_ids"] == [9999]
+        assert result["total_cost_usd"] == round(sum(c.estimated_cost_usd for c in result["books"]), 2)
+
+class TestBulkCostEndpoint:
+    """POST /api/books/cost prices a shelf in one round-trip"""
+
+    def test_endpoint_returns_all_books(self, downloader, monkeypatch):
+        from Source.API import MainAPI
+
+        # MainAPI imports the Core package by its own path, so build the downloader from its class
+        api_downloader = MainAPI.StudentBookDownloader(downloader.database_path, downloader.history_path)
+        monkeypatch.setattr(MainAPI, "StudentBookDownloader", lambda: api_downloader)
+        response = asyncio.run(MainAPI.get_books_cost(
+            MainAPI.BookCostBatchRequest(book_ids=[1, 2, 4242], region="developed")
+        ))
+
+        assert [book.book_id for book in response.books] == [1, 2]
+        assert response.missing_book_ids == [4242]
+        assert response.region == "developed"
+
+    def test_request_size_is_capped(self):
+        from pydantic import ValidationError
+        from Source.API import MainAPI
+
+        with pytest.raises(ValidationError):
+            MainAPI.BookCostBatchRequest(book_ids=list(range(501)))
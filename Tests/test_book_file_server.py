@@ -0,0 +1,161 @@
+# File: test_book_file_server.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_book_file_server.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 04:50PM
+
+"""
+Tests for cached book-file resolution and range/conditional PDF responses
+"""
+
+import os
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from Source.Utils.BookFileServer import (
+    BookFileResolver, BuildFileResponse, ParseByteRange, UNSATISFIABLE
+)
+
+CONTENT = bytes(range(256)) * 400  # 100KB
+
+@pytest.fixture
+def library(tmp_path):
+    books = tmp_path / "Data" / "Books"
+    books.mkdir(parents=True)
+    (books / "Algebra.pdf").write_bytes(CONTENT)
+    return tmp_path
+
+@pytest.fixture
+def resolver(library):
+    return BookFileResolver([str(library)])
+
+class CountingLookup:
+    def __init__(self, rows):
+        self.Rows = rows
+        self.Calls = 0
+
+    def __call__(self, book_id):
+        self.Calls += 1
+        return self.Rows.get(book_id)
+
+def _Client(resolver, lookup):
+    async def endpoint(request: Request):
+        entry = resolver.Resolve(int(request.path_params["book_id"]), lookup)
+        return BuildFileResponse(entry, request.headers, request.method)
+    return TestClient(Starlette(routes=[Route("/books/{book_id}", endpoint, methods=["GET", "HEAD"])]))
+
+class TestParseByteRange:
+    """Range header parsing"""
+
+    @pytest.mark.parametrize("header,expected", [
+        (None, None),
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-10", (990, 999)),
+        ("bytes=900-5000", (900, 999)),
+        ("bytes=1000-", UNSATISFIABLE),
+        ("bytes=0-1,5-9", None),
+        ("items=0-9", None),
+        ("bytes=9-2", None),
+    ])
+    def test_cases(self, header, expected):
+        assert ParseByteRange(header, 1000) == expected
+
+class TestResolver:
+    """Path cache avoids the database and path probing after the first hit"""
+
+    def test_lookup_only_on_miss(self, resolver):
+        lookup = CountingLookup({1: ("Algebra", "Books/Algebra.pdf")})
+        first = resolver.Resolve(1, lookup)
+        second = resolver.Resolve(1, lookup)
+
+        assert first.path.endswith(os.path.join("Data", "Books", "Algebra.pdf"))
+        assert second.size == len(CONTENT)
+        assert lookup.Calls == 1
+        assert resolver.GetStats()["hits"] == 1
+
+    def test_modified_file_gets_new_etag(self, resolver, library):
+        lookup = CountingLookup({1: ("Algebra", "Books/Algebra.pdf")})
+        etag = resolver.Resolve(1, lookup).etag
+        path = library / "Data" / "Books" / "Algebra.pdf"
+        path.write_bytes(CONTENT + b"more")
+
+        assert resolver.Resolve(1, lookup).etag != etag
+        assert lookup.Calls == 1
+
+    def test_missing_file_or_book(self, resolver, library):
+        lookup = CountingLookup({1: ("Algebra", "Books/Algebra.pdf"), 2: ("Ghost", "Books/Ghost.pdf")})
+        resolver.Resolve(1, lookup)
+        os.remove(library / "Data" / "Books" / "Algebra.pdf")
+
+        assert resolver.Resolve(1, lookup) is None
+        assert resolver.Resolve(2, lookup) is None
+        assert resolver.Resolve(3, lookup) is None
+
+class TestFileResponses:
+    """Range, If-Range, If-None-Match and HEAD"""
+
+    @pytest.fixture
+    def client(self, resolver):
+        return _Client(resolver, CountingLookup({1: ("Álgebra \"Basics\"", "Books/Algebra.pdf")}))
+
+    def test_full_response_advertises_ranges(self, client):
+        response = client.get("/books/1")
+        assert response.status_code == 200
+        assert response.content == CONTENT
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["etag"]
+        assert "filename*=UTF-8''%C3%81lgebra" in response.headers["content-disposition"]
+
+    def test_partial_content(self, client):
+        response = client.get("/books/1", headers={"Range": "bytes=1000-1999"})
+        assert response.status_code == 206
+        assert response.content == CONTENT[1000:2000]
+        assert response.headers["content-range"] == f"bytes 1000-1999/{len(CONTENT)}"
+
+    def test_if_none_match(self, client):
+        etag = client.get("/books/1").headers["etag"]
+        response = client.get("/books/1", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_if_range_mismatch_serves_full_body(self, client):
+        response = client.get("/books/1", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+        assert response.status_code == 200
+        assert len(response.content) == len(CONTENT)
+
+    def test_unsatisfiable_range(self, client):
+        response = client.get("/books/1", headers={"Range": f"bytes={len(CONTENT)}-"})
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    def test_head_has_no_body(self, client):
+        response = client.head("/books/1")
+        assert response.status_code == 200
+        assert response.headers["content-length"] == str(len(CONTENT))
+        assert response.content == b""
+
+class TestCanonicalRoute:
+    """MainAPI serves /api/books/{id}/pdf from one cached, range-capable route"""
+
+    def test_single_route_serves_ranges(self, library, monkeypatch):
+        from Source.API import MainAPI
+
+        routes = [route for route in MainAPI.app.routes if getattr(route, "path", "") == "/api/books/{book_id}/pdf"]
+        assert len(routes) == 1
+
+        resolver = MainAPI.BookFileResolver([str(library)])
+        lookup = CountingLookup({7: ("Algebra", "Books/Algebra.pdf")})
+        monkeypatch.setattr(MainAPI, "book_file_resolver", resolver)
+        monkeypatch.setattr(MainAPI, "lookup_book_file", lookup)
+
+        client = TestClient(MainAPI.app)
+        response = client.get("/api/books/7/pdf", headers={"Range": "bytes=0-1023"})
+        assert response.status_code == 206
+        assert response.content == CONTENT[:1024]
+
+        client.get("/api/books/7/pdf", headers={"Range": "bytes=1024-2047"})
+        assert lookup.Calls == 1
@@ -0,0 +1,143 @@
+# File: test_catalog_index.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_catalog_index.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 08:55PM
+
+"""
+Tests for the offline catalog index: versioning, incremental updates, and
+the browser catalog returning the same books as the server endpoints
+"""
+
+import os
+import json
+import gzip
+import shutil
+import sqlite3
+import subprocess
+
+import pytest
+from starlette.datastructures import Headers
+
+from Source.Utils.CatalogIndex import CatalogIndex
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLIENT_SCRIPT = os.path.join(PROJECT_ROOT, "WebPages", "static", "scripts", "library-api-client.js")
+
+@pytest.fixture
+def library_db(tmp_path):
+    db_path = tmp_path / "catalog.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript("""
+            CREATE TABLE categories (id INTEGER PRIMARY KEY, category TEXT);
+            CREATE TABLE subjects (id INTEGER PRIMARY KEY, subject TEXT, category_id INTEGER);
+            CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT, category_id INTEGER, subject_id INTEGER);
+            INSERT INTO categories VALUES (1, 'Science'), (2, 'History');
+            INSERT INTO subjects VALUES (10, 'Physics', 1), (11, 'Biology', 1), (20, 'Rome', 2);
+        """)
+        conn.executemany("INSERT INTO books VALUES (?, ?, ?, ?)", [
+            (book_id, f"{topic} Volume {book_id}", category, subject)
+            for book_id, (topic, category, subject) in enumerate(
+                [("Physics", 1, 10), ("Cells", 1, 11), ("Empire", 2, 20), ("Optics", 1, 10)] * 30, start=1)
+        ])
+    return str(db_path)
+
+def _Change(db_path, *statements):
+    with sqlite3.connect(db_path) as conn:
+        for statement in statements:
+            conn.execute(statement)
+    stat = os.stat(db_path)
+    os.utime(db_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_full_index_is_columnar_and_versioned_by_content(library_db):
+    index = CatalogIndex()
+    snapshot = index.Current(library_db)
+    document = json.loads(snapshot.body)
+
+    assert document["categories"] == {"id": [2, 1], "name": ["History", "Science"]}
+    assert document["subjects"]["name"] == ["Biology", "Physics", "Rome"]
+    assert len(document["books"]["id"]) == 120
+    assert document["books"]["title"] == sorted(document["books"]["title"])
+
+    # Touching the file is not a new catalog
+    _Change(library_db)
+    assert index.Current(library_db).version == snapshot.version
+
+    response = index.BuildResponse(library_db, Headers({"accept-encoding": "gzip"}))
+    assert response.headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.body)) == document
+    assert index.BuildResponse(library_db, Headers({"if-none-match": snapshot.etag})).status_code == 304
+
+def test_known_version_gets_only_the_changes(library_db):
+    index = CatalogIndex()
+    first = index.Current(library_db)
+
+    _Change(library_db, "UPDATE books SET title = 'Astronomy' WHERE id = 4",
+            "DELETE FROM books WHERE id = 5", "INSERT INTO books VALUES (500, 'Zoology', 1, 11)")
+    second = index.Current(library_db)
+    assert second.version != first.version
+
+    delta = json.loads(index.BuildResponse(library_db, Headers({}), since=first.version).body)
+    assert delta["base"] == first.version and delta["version"] == second.version
+    assert delta["books"] == {"id": [4, 500], "title": ["Astronomy", "Zoology"],
+                              "category_id": [1, 1], "subject_id": [10, 11]}
+    assert delta["deleted"] == [5]
+
+    # A version this server does not remember gets the whole index
+    full = json.loads(index.BuildResponse(library_db, Headers({}), since="unknown").body)
+    assert "base" not in full and len(full["books"]["id"]) == 120
+
+def test_catalog_endpoint(library_db, monkeypatch):
+    from starlette.testclient import TestClient
+    from Source.API import MainAPI
+
+    monkeypatch.setenv("ANDYGOOGLE_TEMP_DB", library_db)
+    monkeypatch.setattr(MainAPI, "drive_manager", None)
+    client = TestClient(MainAPI.app)
+
+    response = client.get("/api/catalog/index")
+    assert response.status_code == 200
+    assert len(response.json()["books"]["id"]) == 120
+    assert client.get("/api/catalog/index", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+CLIENT_HARNESS = """
+globalThis.navigator = globalThis.navigator || { onLine: true };
+const { OfflineCatalog } = require(process.argv[1]);
+const [full, delta] = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const catalog = new OfflineCatalog('/api');
+catalog.apply(catalog.merge(full, delta));
+console.log(JSON.stringify({
+  search: catalog.query({ search: 'VOLUME 1', limit: 500 }),
+  filtered: catalog.query({ category: 'Science', subject: 'Physics', page: 2, limit: 5 }),
+  subjects: catalog.subjects('Science'),
+  stats: catalog.stats()
+}));
+"""
+
+@pytest.mark.skipif(not shutil.which("node"), reason="node not installed")
+def test_browser_catalog_matches_server_queries(library_db, monkeypatch):
+    from starlette.testclient import TestClient
+    from Source.API import MainAPI
+
+    monkeypatch.setenv("ANDYGOOGLE_TEMP_DB", library_db)
+    monkeypatch.setattr(MainAPI, "drive_manager", None)
+    client = TestClient(MainAPI.app)
+    full = client.get("/api/catalog/index").json()
+    _Change(library_db, "UPDATE books SET title = 'Volume 1 revised' WHERE id = 2", "DELETE FROM books WHERE id = 10")
+    delta = client.get("/api/catalog/index", params={"since": full["version"]}).json()
+    assert "base" in delta
+
+    result = subprocess.run(["node", "-e", CLIENT_HARNESS, CLIENT_SCRIPT], input=json.dumps([full, delta]),
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    local = json.loads(result.stdout.strip().splitlines()[-1])
+
+    searched = client.get("/api/books", params={"search": "volume 1", "limit": 500}).json()
+    assert [book["id"] for book in local["search"]["books"]] == [book["id"] for book in searched["books"]]
+    assert local["search"]["total"] == len(searched["books"])
+
+    filtered = client.get("/api/books/filter", params={"category": "Science", "subject": "Physics",
+                                                       "page": 2, "limit": 5}).json()
+    assert local["filtered"]["books"] == filtered["books"]
+    assert local["subjects"] == client.get("/api/subjects", params={"category": "Science"}).json()
+    assert local["stats"]["total_books"] == 119
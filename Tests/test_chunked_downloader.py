@@ -0,0 +1,334 @@
+# File: test_chunked_downloader.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_chunked_downloader.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 10:35PM
+
+"""
+Tests for the ranged, multi-connection ChunkedDownloader engine
+Runs against a local range-capable HTTP server
+"""
+
+import os
+import json
+import time
+import base64
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from Source.Core.ChunkedDownloader import (
+    ChunkedDownloader, NetworkCondition, DownloadStatus, TransferScheduler, SessionPool,
+    AdaptiveTransferController, NetworkEstimator, ClassifyNetworkCondition
+)
+
+PAYLOAD = os.urandom(300 * 1024 + 123)
+CHUNK = 16 * 1024  # NetworkCondition.SLOW_2G
+
+class RangeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, payload, support_ranges=True, delay=0.0):
+        super().__init__(("127.0.0.1", 0), RangeHandler)
+        self.Payload = payload
+        self.SupportRanges = support_ranges
+        self.Delay = delay
+        self.Lock = threading.Lock()
+        self.Ranges = []
+        self.Spans = []
+        self.InFlight = 0
+        self.PeakInFlight = 0
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.Lock:
+            server.InFlight += 1
+            server.PeakInFlight = max(server.PeakInFlight, server.InFlight)
+        try:
+            time.sleep(server.Delay)
+            header = self.headers.get("Range")
+            if header and server.SupportRanges:
+                start, end = (int(part) for part in header.split("=")[1].split("-"))
+                body = server.Payload[start:end + 1]
+                with server.Lock:
+                    server.Ranges.append(start)
+                    server.Spans.append((start, end))
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(server.Payload)}")
+            else:
+                body = server.Payload
+                self.send_response(200)
+            self.send_header("Accept-Ranges", "bytes" if server.SupportRanges else "none")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.Lock:
+                server.InFlight -= 1
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def _Start(payload=PAYLOAD, **kwargs):
+        server = RangeServer(payload, **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server, f"http://127.0.0.1:{server.server_address[1]}/book.pdf"
+
+    yield _Start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def _Downloader(tmp_path, max_transfers=8, **kwargs):
+    kwargs.setdefault("estimator", NetworkEstimator())
+    return ChunkedDownloader(
+        downloads_dir=str(tmp_path / "Books"),
+        resume_info_dir=str(tmp_path / "Resume"),
+        scheduler=TransferScheduler(max_transfers),
+        session_pool=SessionPool(max_transfers),
+        **kwargs
+    )
+
+def _Wait(downloader, book_id, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        progress = downloader.GetDownloadProgress(book_id)
+        if progress and progress.status in ("completed", "error") and book_id not in downloader.download_threads:
+            return progress
+        time.sleep(0.02)
+    raise AssertionError("download did not finish")
+
+class TestRangedDownload:
+    """Parallel ranged chunks land at the right offsets"""
+
+    def test_downloads_exact_bytes(self, tmp_path, serve):
+        server, url = serve()
+        downloader = _Downloader(tmp_path)
+        downloader.StartChunkedDownload(1, "Book", len(PAYLOAD), url, network_condition=NetworkCondition.SLOW_2G)
+
+        progress = _Wait(downloader, 1)
+        assert progress.status == DownloadStatus.COMPLETED.value
+        assert progress.current_chunk == progress.total_chunks
+        with open(tmp_path / "Books" / "book_1.pdf", "rb") as f:
+            assert f.read() == PAYLOAD
+        # Requests span whole blocks and cover the file exactly once
+        spans = sorted(server.Spans)
+        assert spans[0][0] == 0 and spans[-1][1] == len(PAYLOAD) - 1
+        assert all(start % CHUNK == 0 for start, _ in spans)
+        assert all(spans[i][1] + 1 == spans[i + 1][0] for i in range(len(spans) - 1))
+        assert not (tmp_path / "Books" / "book_1.pdf.part").exists()
+        assert not (tmp_path / "Resume" / "book_1.json").exists()
+
+    def test_uses_multiple_connections(self, tmp_path, serve):
+        server, url = serve(delay=0.05)
+        downloader = _Downloader(tmp_path, connections_per_file=4, max_connections_per_file=4)
+        downloader.StartChunkedDownload(1, "Book", len(PAYLOAD), url, network_condition=NetworkCondition.SLOW_2G)
+
+        assert _Wait(downloader, 1).status == "completed"
+        assert server.PeakInFlight > 1
+
+    def test_scheduler_caps_transfers_across_books(self, tmp_path, serve):
+        server, url = serve(delay=0.03)
+        downloader = _Downloader(tmp_path, max_transfers=3, connections_per_file=4, max_connections_per_file=4)
+        for book_id in (1, 2, 3):
+            downloader.StartChunkedDownload(book_id, f"Book {book_id}", len(PAYLOAD), url,
+                                            network_condition=NetworkCondition.SLOW_2G)
+        for book_id in (1, 2, 3):
+            assert _Wait(downloader, book_id).status == "completed"
+
+        assert server.PeakInFlight <= 3
+        assert downloader.GetSchedulerStats()["peak_transfers"] == 3
+
+    def test_falls_back_without_range_support(self, tmp_path, serve):
+        server, url = serve(support_ranges=False)
+        downloader = _Downloader(tmp_path)
+        downloader.StartChunkedDownload(1, "Book", len(PAYLOAD), url, network_condition=NetworkCondition.SLOW_2G)
+
+        assert _Wait(downloader, 1).status == "completed"
+        with open(tmp_path / "Books" / "book_1.pdf", "rb") as f:
+            assert f.read() == PAYLOAD
+
+    def test_size_mismatch_is_an_error(self, tmp_path, serve):
+        server, url = serve()
+        downloader = _Downloader(tmp_path)
+        downloader.StartChunkedDownload(1, "Book", len(PAYLOAD) + CHUNK, url,
+                                        network_condition=NetworkCondition.SLOW_2G)
+        assert _Wait(downloader, 1).status == "error"
+
+class TestResume:
+    """The chunk bitmap lets an interrupted download skip finished chunks"""
+
+    def test_resume_skips_completed_chunks(self, tmp_path, serve):
+        server, url = serve()
+        downloader = _Downloader(tmp_path)
+        total_chunks = (len(PAYLOAD) + CHUNK - 1) // CHUNK
+
+        # Pretend an earlier run finished the even chunks
+        bitmap = bytearray((total_chunks + 7) // 8)
+        part = bytearray(len(PAYLOAD))
+        for index in range(0, total_chunks, 2):
+            bitmap[index >> 3] |= 1 << (index & 7)
+            part[index * CHUNK:(index + 1) * CHUNK] = PAYLOAD[index * CHUNK:(index + 1) * CHUNK]
+        (tmp_path / "Books" / "book_1.pdf.part").write_bytes(bytes(part))
+        (tmp_path / "Resume" / "book_1.json").write_text(json.dumps({
+            "total_size_bytes": len(PAYLOAD),
+            "chunk_size_bytes": CHUNK,
+            "chunk_bitmap": base64.b64encode(bytes(bitmap)).decode()
+        }))
+
+        downloader.StartChunkedDownload(1, "Book", len(PAYLOAD), url, network_condition=NetworkCondition.SLOW_2G)
+        assert _Wait(downloader, 1).status == "completed"
+
+        assert sorted(server.Ranges) == [index * CHUNK for index in range(1, total_chunks, 2)]
+        with open(tmp_path / "Books" / "book_1.pdf", "rb") as f:
+            assert f.read() == PAYLOAD
+
+    def test_pause_persists_bitmap_and_resume_finishes(self, tmp_path, serve):
+        server, url = serve(delay=0.02)
+        downloader = _Downloader(tmp_path, connections_per_file=2, max_connections_per_file=2,
+                                 resume_save_interval=60)
+        downloader.StartChunkedDownload(1, "Book", len(PAYLOAD), url, network_condition=NetworkCondition.SLOW_2G)
+        while downloader.GetDownloadProgress(1).current_chunk < 2:
+            time.sleep(0.01)
+
+        assert downloader.PauseDownload(1)
+        resume_data = json.loads((tmp_path / "Resume" / "book_1.json").read_text())
+        assert base64.b64decode(resume_data["chunk_bitmap"]) != b"\x00" * len(base64.b64decode(resume_data["chunk_bitmap"]))
+
+        time.sleep(0.1)
+        requests_while_paused = len(server.Ranges)
+        time.sleep(0.1)
+        assert len(server.Ranges) == requests_while_paused
+
+        assert downloader.ResumeDownload(1)
+        assert _Wait(downloader, 1).status == "completed"
+        with open(tmp_path / "Books" / "book_1.pdf", "rb") as f:
+            assert f.read() == PAYLOAD
+
+    def test_cancel_removes_partial_files(self, tmp_path, serve):
+        server, url = serve(delay=0.05)
+        downloader = _Downloader(tmp_path, connections_per_file=1, max_connections_per_file=1)
+        downloader.StartChunkedDownload(1, "Book", len(PAYLOAD), url, network_condition=NetworkCondition.SLOW_2G)
+        time.sleep(0.1)
+
+        assert downloader.CancelDownload(1)
+        deadline = time.time() + 5
+        while 1 in downloader.download_threads and time.time() < deadline:
+            time.sleep(0.02)
+        assert not (tmp_path / "Books" / "book_1.pdf.part").exists()
+        assert not (tmp_path / "Books" / "book_1.pdf").exists()
+
+    def test_restart_after_cancel_keeps_the_new_transfer(self, tmp_path, serve):
+        server, url = serve(delay=0.05)
+        downloader = _Downloader(tmp_path, connections_per_file=1, max_connections_per_file=1)
+        downloader.StartChunkedDownload(1, "Book", len(PAYLOAD), url, network_condition=NetworkCondition.SLOW_2G)
+        time.sleep(0.1)
+        old_thread = downloader.download_threads[1]
+
+        assert downloader.CancelDownload(1)
+        # Refused until the cancelled transfer has cleaned up its files
+        deadline = time.time() + 5
+        while downloader.StartChunkedDownload(1, "Book", len(PAYLOAD), url).startswith("Download already"):
+            assert time.time() < deadline
+            time.sleep(0.01)
+        old_thread.join(5)
+        assert downloader.download_threads.get(1) is not old_thread
+
+        assert _Wait(downloader, 1).status == "completed"
+        with open(tmp_path / "Books" / "book_1.pdf", "rb") as f:
+            assert f.read() == PAYLOAD
+
+class TestAdaptiveController:
+    """EWMA measurements drive AIMD request size and parallelism"""
+
+    def test_fast_requests_grow_request_size(self):
+        controller = AdaptiveTransferController(CHUNK, initial_connections=1, max_connections=1)
+        sizes = []
+        for _ in range(6):
+            controller.OnSuccess(controller.GetRequestBlocks() * CHUNK, 0.1, 0.01)
+            sizes.append(controller.GetRequestBlocks())
+        assert sizes[:3] == [2, 4, 8]  # slow start doubles
+
+        controller.OnSuccess(CHUNK, 0.8)  # near target: additive from here
+        assert controller.GetRequestBlocks() == sizes[-1] + 1
+
+    def test_slow_request_and_failure_back_off(self):
+        controller = AdaptiveTransferController(CHUNK, initial_connections=4, max_connections=8,
+                                                target_request_seconds=1.0)
+        for _ in range(4):
+            controller.OnSuccess(CHUNK, 0.1)
+        blocks = controller.GetRequestBlocks()
+
+        controller.OnSuccess(CHUNK, 5.0)
+        assert controller.GetRequestBlocks() == max(1, blocks // 2)
+
+        connections = controller.GetConnections()
+        controller.OnFailure()
+        assert controller.GetConnections() == max(1, connections // 2)
+
+    def test_connections_bounded_and_grow_only_with_throughput(self):
+        controller = AdaptiveTransferController(CHUNK, initial_connections=1, max_connections=3)
+        for _ in range(50):
+            controller.OnSuccess(CHUNK, 0.5)
+        assert controller.GetConnections() <= 3
+        assert controller.GetConnections() > 1
+
+        flat = AdaptiveTransferController(CHUNK, initial_connections=2, max_connections=8)
+        for _ in range(50):
+            # Aggregate bandwidth never improves when adding connections
+            flat.OnSuccess(CHUNK, 0.5 * flat.GetConnections())
+        assert flat.GetConnections() <= 3
+
+    def test_estimator_classifies_network(self):
+        estimator = NetworkEstimator()
+        assert estimator.GetEstimate()["measured"] is False
+        estimator.Record(150 * 1024, 0.08)
+        estimate = estimator.GetEstimate()
+        assert estimate["measured"] and estimate["rtt_ms"] == 80.0
+        assert ClassifyNetworkCondition(estimate["throughput_bytes_per_second"]) == NetworkCondition.SLOW_3G
+        assert ClassifyNetworkCondition(5 * 1024 * 1024) == NetworkCondition.WIFI
+
+class TestAdaptiveDownload:
+    """Live estimates reach progress displays and the performance endpoint"""
+
+    def test_progress_exposes_live_estimate(self, tmp_path, serve):
+        server, url = serve()
+        estimator = NetworkEstimator()
+        downloader = _Downloader(tmp_path, estimator=estimator)
+        assert downloader.DetectNetworkCondition() == NetworkCondition.SLOW_3G
+
+        downloader.StartChunkedDownload(1, "Book", len(PAYLOAD), url, network_condition=NetworkCondition.SLOW_2G)
+        assert _Wait(downloader, 1).status == "completed"
+
+        info = downloader.GetStudentFriendlyProgress(1)
+        assert info["estimated_speed_kbps"] > 0
+        assert info["connections"] >= 1
+        assert info["request_size_kb"] >= CHUNK / 1024
+        assert len(server.Spans) < (len(PAYLOAD) + CHUNK - 1) // CHUNK  # requests grew past one block
+        assert estimator.GetEstimate()["measured"]
+        assert downloader.DetectNetworkCondition() != NetworkCondition.DIALUP
+
+    def test_performance_assessment_uses_measurements(self):
+        import asyncio
+        from Source.API import MainAPI
+
+        estimator = NetworkEstimator()
+        estimator.Record(25 * 1000 * 1000 / 8, 0.02)  # 25 Mbps
+        original_getter = MainAPI.GetNetworkEstimator
+        MainAPI.GetNetworkEstimator = lambda: estimator
+        try:
+            result = asyncio.run(MainAPI.get_performance_assessment())
+        finally:
+            MainAPI.GetNetworkEstimator = original_getter
+
+        assert result["system"]["network_class"] == "fast"
+        assert result["network_measurement"]["source"] == "download_measurements"
+        assert result["network_measurement"]["rtt_ms"] == 20.0
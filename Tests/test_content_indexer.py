@@ -0,0 +1,166 @@
+# File: test_content_indexer.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_content_indexer.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 11:05PM
+
+"""
+Tests for the incremental FTS5 content index
+"""
+
+import os
+import sqlite3
+import pytest
+
+from Source.Core.ContentIndexer import ContentIndexer, ChunkText, BuildMatchQuery, HashFile
+
+def TextBookExtractor(path, known_sha256, ocr_engine):
+    """Worker-process extractor for plain-text 'books' whose pages are separated by form feeds"""
+    sha256 = HashFile(path)
+    if sha256 == known_sha256:
+        return {"sha256": sha256, "pages": None}
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if "CORRUPT" in text:
+        raise ValueError("cannot parse book")
+    return {"sha256": sha256, "pages": [(number, page, False) for number, page in enumerate(text.split("\f"), 1)]}
+
+@pytest.fixture
+def library(tmp_path):
+    books = tmp_path / "Books"
+    books.mkdir()
+    (books / "biology.txt").write_text("Cells divide by mitosis.\fPhotosynthesis happens in chloroplasts.", encoding="utf-8")
+    (books / "history.txt").write_text("The printing press spread literacy.\fMitosis is not history.", encoding="utf-8")
+    return {1: str(books / "biology.txt"), 2: str(books / "history.txt")}
+
+@pytest.fixture
+def indexer(tmp_path):
+    return ContentIndexer(str(tmp_path / "content_index.db"), max_workers=1, ocr_engine="none",
+                          extractor=TextBookExtractor)
+
+class TestHelpers:
+    """Chunking and query building"""
+
+    def test_chunks_respect_limit_and_words(self):
+        text = "alpha beta gamma\n\n" + "word " * 100
+        chunks = ChunkText(text, max_chars=60)
+        assert all(len(chunk) <= 60 for chunk in chunks)
+        assert chunks[0].startswith("alpha beta gamma")
+        assert " ".join(chunks).split() == text.split()
+
+    def test_match_query_is_safe(self):
+        assert BuildMatchQuery('photo "syn" OR (NEAR') == '"photo" "syn" "or" "near"*'
+        assert BuildMatchQuery("  ?!  ") is None
+
+class TestContentIndexer:
+    """Incremental indexing and page-level search"""
+
+    def test_page_level_hits(self, indexer, library):
+        stats = indexer.IndexBooks(library.items())
+        assert stats["indexed"] == 2
+
+        hits = indexer.Search("chloroplast")
+        assert [(hit["book_id"], hit["page"]) for hit in hits] == [(1, 2)]
+        assert "[chloroplasts]" in hits[0]["snippet"]
+
+        mitosis = {(hit["book_id"], hit["page"]) for hit in indexer.Search("mitosis")}
+        assert mitosis == {(1, 1), (2, 2)}
+        assert indexer.Search("mitosis", book_ids=[2])[0]["book_id"] == 2
+
+    def test_unchanged_books_skipped(self, indexer, library):
+        indexer.IndexBooks(library.items())
+        assert indexer.IndexBooks(library.items())["planned"] == 0
+
+    def test_touched_file_with_same_hash_not_reindexed(self, indexer, library):
+        indexer.IndexBooks(library.items())
+        stat = os.stat(library[1])
+        os.utime(library[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        stats = indexer.IndexBooks(library.items())
+        assert stats == {"planned": 1, "indexed": 0, "unchanged": 1, "failed": 0, "removed": 0}
+        assert indexer.IndexBooks(library.items())["planned"] == 0
+
+    def test_changed_book_replaces_chunks(self, indexer, library):
+        indexer.IndexBooks(library.items())
+        with open(library[1], "w", encoding="utf-8") as f:
+            f.write("Genetics and heredity.")
+
+        assert indexer.IndexBooks(library.items())["indexed"] == 1
+        assert indexer.Search("chloroplasts") == []
+        assert indexer.Search("heredity")[0]["page"] == 1
+
+    def test_failures_recorded_and_retried_after_change(self, indexer, library, tmp_path):
+        broken = tmp_path / "Books" / "broken.txt"
+        broken.write_text("CORRUPT", encoding="utf-8")
+        books = {**library, 3: str(broken)}
+
+        assert indexer.IndexBooks(books.items())["failed"] == 1
+        assert indexer.IndexBooks(books.items())["planned"] == 0
+        assert indexer.GetStatus()["failed_books"] == 1
+
+        broken.write_text("Recovered volcano text", encoding="utf-8")
+        assert indexer.IndexBooks(books.items())["indexed"] == 1
+        assert indexer.Search("volcano")[0]["book_id"] == 3
+
+    def test_failed_reindex_drops_the_old_pages(self, indexer, library):
+        indexer.IndexBooks(library.items())
+        with open(library[1], "w", encoding="utf-8") as f:
+            f.write("CORRUPT")
+
+        assert indexer.IndexBooks(library.items())["failed"] == 1
+        assert indexer.Search("chloroplasts") == []
+        assert {hit["book_id"] for hit in indexer.Search("mitosis")} == {2}
+
+    def test_interrupted_run_resumes(self, indexer, library, tmp_path):
+        indexer.IndexBooks([(1, library[1])])  # a run that stopped after the first book
+        resumed = ContentIndexer(str(tmp_path / "content_index.db"), max_workers=1, ocr_engine="none",
+                                 extractor=TextBookExtractor)
+        stats = resumed.IndexBooks(library.items())
+        assert stats["planned"] == 1 and stats["indexed"] == 1
+
+    def test_removed_books_dropped(self, indexer, library):
+        indexer.IndexBooks(library.items())
+        assert indexer.IndexBooks([(1, library[1])])["removed"] == 1
+        assert indexer.Search("printing") == []
+        with sqlite3.connect(indexer.IndexPath) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM content_files").fetchone()[0] == 1
+
+    def test_chunks_deleted_by_rowid_range(self, indexer, library):
+        indexer.IndexBooks(library.items())
+        with open(library[1], "w", encoding="utf-8") as f:
+            f.write("Genetics.\fHeredity.\fMutation.")
+        indexer.IndexBooks(library.items())
+
+        with sqlite3.connect(indexer.IndexPath) as conn:
+            ranges = dict((row[0], row[1:]) for row in conn.execute("SELECT * FROM content_chunk_ranges"))
+            for book_id, (first, last) in ranges.items():
+                rowids = [row[0] for row in conn.execute(
+                    "SELECT rowid FROM content_chunks WHERE book_id = ? ORDER BY rowid", (book_id,))]
+                assert rowids == list(range(first, last + 1))
+            plan = " ".join(row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN DELETE FROM content_chunks WHERE rowid BETWEEN ? AND ?", ranges[1]))
+        assert len(ranges[1]) == 2 and ranges[1][1] - ranges[1][0] == 2
+        assert "VIRTUAL TABLE INDEX" in plan
+
+        assert indexer.IndexBooks([(1, library[1])])["removed"] == 1
+        with sqlite3.connect(indexer.IndexPath) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM content_chunks WHERE book_id = 2").fetchone()[0] == 0
+            assert conn.execute("SELECT book_id FROM content_chunk_ranges").fetchall() == [(1,)]
+
+    def test_background_pass(self, indexer, library):
+        assert indexer.Start(lambda: list(library.items()))
+        indexer.Thread.join(60)
+        assert indexer.GetStatus()["indexed_books"] == 2
+        assert indexer.GetStatus()["running"] is False
+
+class TestContentSearchEndpoint:
+    """MainAPI content search route"""
+
+    def test_unavailable_without_indexer(self, monkeypatch):
+        from starlette.testclient import TestClient
+        from Source.API import MainAPI
+
+        monkeypatch.setattr(MainAPI, "get_content_indexer", lambda: None)
+        client = TestClient(MainAPI.app)
+        assert client.get("/api/search/content", params={"q": "cells"}).status_code == 503
+        assert client.get("/api/search/content/status").json() == {"available": False}
@@ -0,0 +1,158 @@
+# File: test_distribution_server.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_distribution_server.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 07:25PM
+
+"""
+Tests for the asyncio distribution server behind Scripts/DatabaseServer.py
+"""
+
+import os
+import sys
+import time
+import socket
+import sqlite3
+import hashlib
+
+import pytest
+import requests
+
+from Source.Utils.DistributionServer import (
+    BuildManifest, DistributionServer, FairShareLimiter, LoadManifest
+)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Standalone"))
+from DatabaseUpdater import DatabaseUpdater
+
+def build_public_dir(root):
+    root.mkdir()
+    conn = sqlite3.connect(root / "GrandsonLibrary_Full.db")
+    conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT, notes TEXT)")
+    conn.executemany("INSERT INTO books (title, notes) VALUES (?, ?)", [(f"Book {i}", "lorem ipsum " * 200) for i in range(80)])
+    conn.commit()
+    conn.close()
+    (root / "book.pdf").write_bytes(os.urandom(256 * 1024))  # incompressible
+    return root
+
+@pytest.fixture
+def public_dir(tmp_path):
+    return build_public_dir(tmp_path / "Public")
+
+@pytest.fixture
+def server(public_dir):
+    instance = DistributionServer(str(public_dir), "127.0.0.1", 0)
+    assert instance.Start()
+    instance.Url = f"http://127.0.0.1:{instance.Port}"
+    yield instance
+    instance.Stop()
+
+def test_manifest_hashes_and_precompresses(public_dir):
+    manifest = BuildManifest(str(public_dir), encodings=("gzip",))
+    database = manifest["files"]["GrandsonLibrary_Full.db"]
+    assert database["sha256"] == hashlib.sha256((public_dir / "GrandsonLibrary_Full.db").read_bytes()).hexdigest()
+    assert database["variants"]["gzip"]["size"] < database["size"] // 4
+    assert manifest["files"]["book.pdf"]["variants"] == {}
+    assert not (public_dir / "book.pdf.gz").exists()
+    assert "GrandsonLibrary_Full.db.gz" not in manifest["files"]
+    assert LoadManifest(str(public_dir))["files"] == manifest["files"]
+
+def test_manifest_rebuild_is_incremental(public_dir):
+    BuildManifest(str(public_dir), encodings=("gzip",))
+    variant = public_dir / "GrandsonLibrary_Full.db.gz"
+    built_at = variant.stat().st_mtime_ns
+
+    (public_dir / "new.pdf").write_bytes(b"%PDF" + os.urandom(2048))
+    manifest = BuildManifest(str(public_dir), encodings=("gzip",))
+    assert "new.pdf" in manifest["files"]
+    assert variant.stat().st_mtime_ns == built_at
+
+def test_ranges_and_strong_etags(server, public_dir):
+    content = (public_dir / "book.pdf").read_bytes()
+    full = requests.get(f"{server.Url}/book.pdf", timeout=5)
+    assert full.content == content
+    assert full.headers["ETag"] == f'"{hashlib.sha256(content).hexdigest()}"'
+    assert full.headers["Content-Disposition"] == 'attachment; filename="book.pdf"'
+
+    partial = requests.get(f"{server.Url}/book.pdf", headers={"Range": "bytes=100-199"}, timeout=5)
+    assert partial.status_code == 206
+    assert partial.content == content[100:200]
+    assert partial.headers["Content-Range"] == f"bytes 100-199/{len(content)}"
+
+    assert requests.get(f"{server.Url}/book.pdf", headers={"If-None-Match": full.headers["ETag"]},
+                        timeout=5).status_code == 304
+    assert requests.get(f"{server.Url}/book.pdf", headers={"Range": f"bytes={len(content)}-"},
+                        timeout=5).status_code == 416
+
+    # Stale If-Range: the whole (new) file instead of a mismatched piece
+    stale = requests.get(f"{server.Url}/book.pdf", headers={"Range": "bytes=0-9", "If-Range": '"old"'}, timeout=5)
+    assert stale.status_code == 200
+
+def test_precompressed_variant_is_negotiated(server, public_dir):
+    content = (public_dir / "GrandsonLibrary_Full.db").read_bytes()
+    compressed = requests.get(f"{server.Url}/GrandsonLibrary_Full.db", headers={"Accept-Encoding": "gzip"}, timeout=5)
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert int(compressed.headers["Content-Length"]) < len(content) // 4
+    assert compressed.content == content  # requests decodes it
+    assert compressed.headers["X-Content-SHA256"] == hashlib.sha256(content).hexdigest()
+
+    identity = requests.get(f"{server.Url}/GrandsonLibrary_Full.db", headers={"Accept-Encoding": "identity"}, timeout=5)
+    assert "Content-Encoding" not in identity.headers
+    assert identity.headers["ETag"] != compressed.headers["ETag"]
+
+def test_unknown_paths_are_not_served(server):
+    assert requests.get(f"{server.Url}/missing.db", timeout=5).status_code == 404
+    assert requests.get(f"{server.Url}/../Tests/conftest.py", timeout=5).status_code == 404
+    assert requests.post(f"{server.Url}/book.pdf", timeout=5).status_code == 405
+
+def test_slow_client_does_not_block_others(server):
+    # A client that requests the database and never reads it - the old TCPServer stalled on this
+    slow = socket.socket()
+    slow.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    slow.connect(("127.0.0.1", server.Port))
+    slow.sendall(b"GET /book.pdf HTTP/1.1\r\nHost: test\r\n\r\n")
+    try:
+        started = time.monotonic()
+        response = requests.get(f"{server.Url}/manifest.json", timeout=5)
+        assert response.status_code == 200
+        assert time.monotonic() - started < 1.0
+    finally:
+        slow.close()
+
+def test_replaced_file_is_rehashed_before_serving(server, public_dir):
+    first = requests.get(f"{server.Url}/book.pdf", timeout=5)
+    replacement = os.urandom(1000)
+    temp_path = public_dir / "book.pdf.new"
+    temp_path.write_bytes(replacement)
+    os.replace(temp_path, public_dir / "book.pdf")
+
+    second = requests.get(f"{server.Url}/book.pdf", timeout=5)
+    assert second.content == replacement
+    assert second.headers["ETag"] == f'"{hashlib.sha256(replacement).hexdigest()}"'
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+def test_fair_share_splits_total_rate():
+    limiter = FairShareLimiter(total_bytes_per_second=1000, per_client_bytes_per_second=400)
+    assert limiter.ShareRate() == 400
+    limiter.Join(), limiter.Join(), limiter.Join(), limiter.Join()
+    assert limiter.ShareRate() == 250
+    assert FairShareLimiter().ShareRate() == 0
+
+def test_per_client_rate_is_enforced(public_dir):
+    paced = DistributionServer(str(public_dir), "127.0.0.1", 0, per_client_bytes_per_second=512 * 1024,
+                               slice_size=16 * 1024)
+    assert paced.Start()
+    try:
+        started = time.monotonic()
+        body = requests.get(f"http://127.0.0.1:{paced.Port}/book.pdf", timeout=10).content
+        assert len(body) == 256 * 1024
+        assert time.monotonic() - started >= 0.35  # 256 KB at 512 KB/s, minus the initial burst
+    finally:
+        paced.Stop()
+
+def test_standalone_updater_revalidates_against_server(server, tmp_path):
+    updater = DatabaseUpdater(tmp_path / "client" / "MyLibrary.db", min_size=10000,
+                              server_url=f"{server.Url}/GrandsonLibrary_Full.db")
+    first = updater.update()
+    assert first["updated"] and first["book_count"] == 80
+    assert updater.update()["status"] == "current"
@@ -0,0 +1,237 @@
+# File: test_download_scheduler.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_download_scheduler.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 10:05PM
+
+"""
+Tests for the persistent download scheduler, token bucket and download history
+"""
+
+import time
+import threading
+import pytest
+from datetime import datetime
+
+from Source.Core.DownloadScheduler import DownloadScheduler
+from Source.Core.StudentBookDownloader import StudentBookDownloader
+from Source.Core.ChunkedDownloader import (
+    ChunkedDownloader, TokenBucket, TransferScheduler, SessionPool, NetworkEstimator
+)
+from Tests.test_chunked_downloader import RangeServer, PAYLOAD
+
+NOON = datetime(2026, 10, 19, 12, 0)
+LATE_NIGHT = datetime(2026, 10, 19, 23, 30)
+MB = 1024 * 1024
+
+@pytest.fixture
+def server_url():
+    server = RangeServer(PAYLOAD)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/book.pdf"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def budget(tmp_path):
+    return StudentBookDownloader(history_path=str(tmp_path / "history.db"))
+
+def _Scheduler(tmp_path, budget=None, **kwargs):
+    downloader = ChunkedDownloader(
+        downloads_dir=str(tmp_path / "Books"),
+        resume_info_dir=str(tmp_path / "Resume"),
+        scheduler=TransferScheduler(4),
+        session_pool=SessionPool(4),
+        estimator=NetworkEstimator()
+    )
+    return DownloadScheduler(str(tmp_path / "queue.db"), downloader=downloader, budget=budget, **kwargs)
+
+def _RunUntilSettled(scheduler, job_id, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        scheduler.RunPending()
+        job = scheduler.GetJob(job_id)
+        if job["status"] in ("completed", "error"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("job did not settle")
+
+class TestQueueOrdering:
+    """Priority order, persistence and windows"""
+
+    def test_highest_priority_starts_first(self, tmp_path, server_url):
+        scheduler = _Scheduler(tmp_path, max_active_downloads=1)
+        low = scheduler.Enqueue(1, "Low", len(PAYLOAD), server_url, priority=0)
+        high = scheduler.Enqueue(2, "High", len(PAYLOAD), server_url, priority=5)
+
+        assert scheduler.RunPending(NOON)["started"] == [high["job_id"]]
+        assert scheduler.GetJob(low["job_id"])["status"] == "queued"
+
+    def test_duplicate_enqueue_reuses_open_job(self, tmp_path):
+        scheduler = _Scheduler(tmp_path)
+        first = scheduler.Enqueue(1, "Book", 100, "http://127.0.0.1:9/x", priority=1)
+        second = scheduler.Enqueue(1, "Book", 100, "http://127.0.0.1:9/x", priority=3)
+        assert first["job_id"] == second["job_id"]
+        assert second["priority"] == 3
+
+    def test_queue_survives_restart(self, tmp_path):
+        scheduler = _Scheduler(tmp_path)
+        job = scheduler.Enqueue(1, "Book", 100, "http://127.0.0.1:9/x")
+        with scheduler._Connect() as conn:
+            conn.execute("UPDATE download_jobs SET status = 'downloading'")
+
+        restarted = _Scheduler(tmp_path)
+        assert [j["job_id"] for j in restarted.GetQueue()] == [job["job_id"]]
+        assert restarted.GetJob(job["job_id"])["status"] == "queued"
+
+    def test_second_worker_leaves_running_jobs_alone(self, tmp_path):
+        scheduler = _Scheduler(tmp_path)
+        job = scheduler.Enqueue(1, "Book", 100, "http://127.0.0.1:9/x")
+        with scheduler._Connect() as conn:
+            conn.execute("UPDATE download_jobs SET status = 'downloading'")
+
+        other_worker = _Scheduler(tmp_path, recover_interrupted=False)
+        assert other_worker.GetJob(job["job_id"])["status"] == "downloading"
+
+    def test_cancel_in_other_worker_stops_running_transfer(self, tmp_path, server_url):
+        scheduler = _Scheduler(tmp_path, bytes_per_second=16 * 1024)
+        job = scheduler.Enqueue(1, "Slow", len(PAYLOAD), server_url)
+        assert scheduler.RunPending(NOON)["started"] == [job["job_id"]]
+
+        other_worker = _Scheduler(tmp_path, recover_interrupted=False)
+        assert other_worker.Cancel(job["job_id"])
+        scheduler.RunPending(NOON)
+
+        deadline = time.time() + 10
+        while 1 in scheduler.Downloader.download_threads and time.time() < deadline:
+            time.sleep(0.05)
+        assert 1 not in scheduler.Downloader.download_threads
+        assert scheduler.GetJob(job["job_id"])["status"] == "cancelled"
+
+    def test_off_peak_jobs_wait_for_window(self, tmp_path, server_url):
+        scheduler = _Scheduler(tmp_path, off_peak_hours=(23, 6))
+        job = scheduler.Enqueue(1, "Night", len(PAYLOAD), server_url, method="download_later")
+
+        assert scheduler.NextOffPeakStart(NOON) == datetime(2026, 10, 19, 23, 0)
+        assert scheduler.IsOffPeak(datetime(2026, 10, 20, 3, 0))
+
+        with scheduler._Connect() as conn:
+            conn.execute("UPDATE download_jobs SET not_before = 0")
+        assert scheduler.RunPending(NOON)["started"] == []
+        assert scheduler.RunPending(LATE_NIGHT)["started"] == [job["job_id"]]
+
+    def test_unschedulable_method_rejected(self, tmp_path):
+        with pytest.raises(ValueError):
+            _Scheduler(tmp_path).Enqueue(1, "Book", 100, method="preview_only")
+
+class TestBudgetAndTransfer:
+    """Monthly byte budget and the real transfer path"""
+
+    def test_metered_job_deferred_when_budget_exhausted(self, tmp_path, budget):
+        budget.RecordDownload(99, 4.90, "download_now", 49 * MB)
+        scheduler = _Scheduler(tmp_path, budget=budget)
+        job = scheduler.Enqueue(1, "Big", 5 * MB, "http://127.0.0.1:9/x")
+
+        result = scheduler.RunPending(NOON)
+        assert result["deferred"] == [job["job_id"]]
+        deferred = scheduler.GetJob(job["job_id"])
+        assert deferred["status"] == "queued"
+        assert deferred["not_before"].startswith("2026-11-01")
+
+    def test_off_peak_job_ignores_metered_budget(self, tmp_path, budget, server_url):
+        budget.RecordDownload(99, 5.00, "download_now", 50 * MB)
+        scheduler = _Scheduler(tmp_path, budget=budget)
+        job = scheduler.Enqueue(1, "Night", len(PAYLOAD), server_url, method="download_wifi")
+        with scheduler._Connect() as conn:
+            conn.execute("UPDATE download_jobs SET not_before = 0")
+        assert scheduler.RunPending(LATE_NIGHT)["started"] == [job["job_id"]]
+
+    def test_completed_download_recorded_against_budget(self, tmp_path, budget, server_url):
+        scheduler = _Scheduler(tmp_path, budget=budget)
+        job = scheduler.Enqueue(1, "Book", len(PAYLOAD), server_url)
+
+        assert _RunUntilSettled(scheduler, job["job_id"])["status"] == "completed"
+        summary = budget.GetMonthlySpendingSummary()
+        assert summary["bytes_used"] == len(PAYLOAD)
+        assert summary["downloads_count"] == 1
+        assert (tmp_path / "Books" / "book_1.pdf").read_bytes() == PAYLOAD
+
+        # The same book can be queued again once its transfer finished
+        again = scheduler.Enqueue(1, "Book", len(PAYLOAD), server_url)
+        assert _RunUntilSettled(scheduler, again["job_id"])["status"] == "completed"
+
+    def test_missing_source_marks_error(self, tmp_path):
+        scheduler = _Scheduler(tmp_path, source_resolver=lambda book_id, title: None)
+        job = scheduler.Enqueue(1, "Nowhere", 100)
+        assert scheduler.RunPending(NOON)["failed"] == [job["job_id"]]
+        assert scheduler.GetJob(job["job_id"])["last_error"] == "No download source available"
+
+    def test_failing_source_lookup_fails_only_that_job(self, tmp_path, server_url):
+        def resolver(book_id, title):
+            if book_id == 1:
+                raise ConnectionError("Drive unreachable")
+            return {"download_url": server_url, "size_bytes": len(PAYLOAD)}
+
+        scheduler = _Scheduler(tmp_path, source_resolver=resolver)
+        broken = scheduler.Enqueue(1, "Broken", 100, priority=5)
+        working = scheduler.Enqueue(2, "Working", 100)
+        result = scheduler.RunPending(NOON)
+
+        assert result["failed"] == [broken["job_id"]]
+        assert result["started"] == [working["job_id"]]
+        assert "Drive unreachable" in scheduler.GetJob(broken["job_id"])["last_error"]
+        assert _RunUntilSettled(scheduler, working["job_id"])["status"] == "completed"
+
+    def test_enqueue_not_blocked_by_source_lookup(self, tmp_path):
+        resolving, release = threading.Event(), threading.Event()
+
+        def resolver(book_id, title):
+            resolving.set()
+            release.wait(10)
+            return None
+
+        scheduler = _Scheduler(tmp_path, source_resolver=resolver)
+        job = scheduler.Enqueue(1, "Slow", 100)
+        dispatch = threading.Thread(target=scheduler.RunPending, args=(NOON,))
+        dispatch.start()
+        try:
+            assert resolving.wait(5)
+            started = time.monotonic()
+            scheduler.Enqueue(2, "Queued meanwhile", 100)
+            assert scheduler.Cancel(job["job_id"])
+            assert time.monotonic() - started < 1
+        finally:
+            release.set()
+            dispatch.join(10)
+
+        # Cancelled while resolving - neither started nor failed
+        assert scheduler.GetJob(job["job_id"])["status"] == "cancelled"
+
+class TestTokenBucket:
+    """Global bytes/sec limit"""
+
+    def test_rate_is_enforced(self):
+        bucket = TokenBucket(200 * 1024, burst_bytes=10 * 1024)
+        start = time.monotonic()
+        for _ in range(10):
+            bucket.Consume(10 * 1024)
+        elapsed = time.monotonic() - start
+        assert elapsed >= 0.4
+
+    def test_cancel_interrupts_wait(self):
+        bucket = TokenBucket(1024, burst_bytes=1024)
+        cancelled = threading.Event()
+        cancelled.set()
+        assert bucket.Consume(100 * 1024, cancelled) is False
+
+class TestDownloadHistory:
+    """Spending survives a restart"""
+
+    def test_history_persists(self, tmp_path):
+        path = str(tmp_path / "history.db")
+        StudentBookDownloader(history_path=path).RecordDownload(1, 0.75, "download_now", 7 * MB)
+
+        summary = StudentBookDownloader(history_path=path).GetMonthlySpendingSummary()
+        assert summary["total_spent"] == 0.75
+        assert summary["downloads_count"] == 1
+        assert summary["remaining_bytes"] == summary["byte_budget"] - 7 * MB
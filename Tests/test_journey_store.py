@@ -0,0 +1,96 @@
+# File: test_journey_store.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_journey_store.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 09:35PM
+
+"""
+Tests for the bounded journey store and UserJourneyManager memory limits
+"""
+
+import time
+import pytest
+
+from Source.Utils.JourneyStore import JourneyStore
+from Source.Utils.StateBackend import SQLiteStateBackend
+from Source.Core.UserJourneyManager import UserJourneyManager, UserContext, JourneyStage
+
+class TestJourneyStore:
+    """Idle expiry and LRU capacity"""
+
+    def test_capacity_evicts_least_recently_used(self):
+        store = JourneyStore(max_entries=3)
+        for session_id in ("a", "b", "c"):
+            store[session_id] = session_id
+        store["a"]  # touch - "b" is now least recently used
+        store["d"] = "d"
+
+        assert set(store) == {"a", "c", "d"}
+        assert store.GetStats()["evictions"] == 1
+
+    def test_idle_entries_expire(self):
+        store = JourneyStore(idle_ttl_seconds=0.05)
+        store["idle"] = 1
+        time.sleep(0.1)
+        assert "idle" not in store
+        assert store.get("idle") is None
+        assert len(store) == 0
+
+    def test_access_refreshes_idle_timer(self):
+        store = JourneyStore(idle_ttl_seconds=0.2)
+        store["active"] = 1
+        for _ in range(3):
+            time.sleep(0.1)
+            assert store["active"] == 1
+
+    def test_shared_backend_roundtrip(self, tmp_path):
+        backend = SQLiteStateBackend(str(tmp_path / "journeys.db"))
+        store = JourneyStore(backend, encoder=lambda v: {"v": v}, decoder=lambda d: d["v"])
+        store["sid"] = 5
+        assert JourneyStore(backend, decoder=lambda d: d["v"])["sid"] == 5
+
+    def test_shared_backend_is_capacity_bounded(self, tmp_path):
+        store = JourneyStore(SQLiteStateBackend(str(tmp_path / "journeys.db")), max_entries=3)
+        for session_id in ("a", "b", "c", "d", "e"):
+            store[session_id] = session_id
+            time.sleep(0.01)
+
+        assert set(store) == {"c", "d", "e"}
+        assert store.GetStats()["evictions"] == 2
+
+class TestJourneyManagerLimits:
+    """Memory stays flat under anonymous traffic"""
+
+    def test_active_journeys_capped(self):
+        manager = UserJourneyManager({"max_active_journeys": 25})
+        for i in range(100):
+            manager.InitializeJourney(f"visitor_{i:03d}")
+        assert manager.GetActiveJourneyCount() == 25
+        assert "visitor_099" in manager.ActiveJourneys
+
+    def test_metrics_history_rolled_up(self):
+        manager = UserJourneyManager({"max_metrics_history": 3})
+        manager.InitializeJourney("session_rollup")
+        for _ in range(10):
+            manager.TrackInteraction("session_rollup", "click", {})
+            manager.AdvanceJourney("session_rollup", JourneyStage.ENGAGEMENT)
+
+        context = manager.ActiveJourneys["session_rollup"]
+        assert len(context.journey_metrics) == 3
+        assert context.metrics_rollup["stages"] == 8
+
+        summary = manager.CompleteJourney("session_rollup")["journey_summary"]
+        assert summary["total_stages"] == 11
+        assert summary["total_interactions"] == 10
+
+    def test_advance_returns_compact_context(self):
+        manager = UserJourneyManager()
+        manager.InitializeJourney("session_compact")
+        result = manager.AdvanceJourney("session_compact", JourneyStage.WELCOME)
+
+        assert result["context"]["previous_stage"] == "discovery"
+        assert result["context"]["current_stage"] == "welcome"
+        assert "journey_metrics" not in result["context"]
+
+    def test_context_uses_slots(self):
+        assert not hasattr(UserContext(), "__dict__")
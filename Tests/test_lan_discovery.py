@@ -0,0 +1,126 @@
+# File: test_lan_discovery.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_lan_discovery.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 07:10PM
+
+"""
+Tests for LAN server discovery (UDP announce/probe plus concurrent health checks)
+"""
+
+import json
+import time
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from Source.Utils.LanDiscovery import (
+    DiscoverServer, LanAnnouncer, LastServerCache, ParseMessage, BuildMessage, PEER_CACHE_ROLE
+)
+
+def free_udp_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def closed_tcp_ports(count):
+    ports = []
+    for _ in range(count):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            ports.append(sock.getsockname()[1])
+    return ports
+
+def start_health_server(body):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            payload = json.dumps(body).encode()
+            self.send_response(200 if self.path == "/api/health" else 404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+@pytest.fixture
+def library_server():
+    server = start_health_server({"status": "healthy", "service": "AndyLibrary"})
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def discovery_port():
+    return free_udp_port()
+
+def test_messages_round_trip():
+    message = ParseMessage(BuildMessage("announce", port=8080))
+    assert message["type"] == "announce" and message["port"] == 8080
+    assert ParseMessage(b"not json") is None
+    assert ParseMessage(json.dumps({"service": "other"}).encode()) is None
+
+def test_announced_server_is_found_quickly(library_server, discovery_port):
+    announcer = LanAnnouncer(library_server, interval=60, discovery_port=discovery_port)
+    assert announcer.Start()
+    try:
+        started = time.monotonic()
+        url = DiscoverServer(discovery_port=discovery_port, timeout=1.0)
+        elapsed = time.monotonic() - started
+    finally:
+        announcer.Stop()
+
+    assert url == f"http://127.0.0.1:{library_server}"
+    assert elapsed < 1.0
+    assert announcer.ProbesAnswered >= 1
+
+def test_candidates_are_probed_concurrently(library_server, discovery_port):
+    candidates = [("127.0.0.1", port) for port in closed_tcp_ports(30)] + [("127.0.0.1", library_server)]
+
+    started = time.monotonic()
+    url = DiscoverServer(candidates, discovery_port=discovery_port, timeout=1.0)
+
+    assert url == f"http://127.0.0.1:{library_server}"
+    assert time.monotonic() - started < 1.0
+
+def test_last_known_server_is_cached_and_tried_first(library_server, discovery_port, tmp_path):
+    cache_path = str(tmp_path / "last_server.json")
+    assert DiscoverServer([("127.0.0.1", library_server)], cache_path=cache_path,
+                          discovery_port=discovery_port, timeout=1.0)
+    assert LastServerCache(cache_path).Load() == ("127.0.0.1", library_server)
+
+    # No candidates and no announcer - only the cache can find it
+    url = DiscoverServer(cache_path=cache_path, discovery_port=discovery_port, timeout=1.0)
+    assert url == f"http://127.0.0.1:{library_server}"
+
+def test_other_services_are_ignored(discovery_port):
+    server = start_health_server({"status": "ok", "service": "printer"})
+    try:
+        started = time.monotonic()
+        url = DiscoverServer([("127.0.0.1", server.server_address[1])], discovery_port=discovery_port, timeout=0.5)
+        elapsed = time.monotonic() - started
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert url is None
+    assert elapsed < 1.0
+
+def test_role_filter_skips_plain_library_servers(library_server, discovery_port):
+    peer = start_health_server({"status": "healthy", "service": "AndyLibrary", "roles": ["library", PEER_CACHE_ROLE]})
+    try:
+        candidates = [("127.0.0.1", library_server), ("127.0.0.1", peer.server_address[1])]
+        url = DiscoverServer(candidates, discovery_port=discovery_port, timeout=1.0, role=PEER_CACHE_ROLE)
+        assert url == f"http://127.0.0.1:{peer.server_address[1]}"
+
+        assert DiscoverServer(candidates[:1], discovery_port=discovery_port, timeout=0.5, role=PEER_CACHE_ROLE) is None
+    finally:
+        peer.shutdown()
+        peer.server_close()
@@ -2,7 +2,7 @@
 # Path: /home/herb/Desktop/AndyLibrary/Tests/test_modern_oauth.py
 # Standard: AIDEV-PascalCase-2.1
 # Created: 2025-07-28
-# Last Modified: 2025-07-28 07:00AM
+# Last Modified: 2026-10-19 09:30PM
 
 """
 Comprehensive test suite for Modern OAuth 2.0 implementation
@@ -114,6 +114,20 @@ class TestModernSocialAuthManager:
         assert session_id in auth_manager.ActiveSessions
         assert auth_manager.ActiveSessions[session_id]['provider'] == 'google'
     
+    def test_forged_state_keeps_session(self, auth_manager):
+        """A callback with the wrong state must not consume the pending login"""
+        auth_manager.ActiveSessions["pending"] = {
+            "provider": "google",
+            "state": "real_state",
+            "code_verifier": "verifier",
+            "created_at": datetime.utcnow()
+        }
+        
+        result = auth_manager.HandleOAuthCallback(code='code', state='forged', session_id='pending')
+        
+        assert result == {"success": False, "error": "State validation failed"}
+        assert auth_manager.ActiveSessions["pending"]["state"] == "real_state"
+    
     def test_token_encryption(self, auth_manager):
         """Test OAuth token encryption"""
         # Mock credentials
@@ -0,0 +1,118 @@
+# File: test_oauth_state_store.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_oauth_state_store.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 09:30PM
+
+"""
+Tests for the indexed OAuth state store
+"""
+
+import time
+import pytest
+from datetime import datetime, timedelta
+
+from Source.Utils.OAuthStateStore import OAuthStateStore, HashState
+from Source.Utils.StateBackend import SQLiteStateBackend
+
+def _Session(state, age_minutes=0):
+    return {
+        "provider": "google",
+        "state": state,
+        "code_verifier": f"verifier-{state}",
+        "created_at": datetime.utcnow() - timedelta(minutes=age_minutes)
+    }
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return OAuthStateStore(max_sessions=50)
+    return OAuthStateStore(SQLiteStateBackend(str(tmp_path / "oauth.db")), max_sessions=50)
+
+class TestOAuthStateStore:
+    """Dict compatibility and indexed lookups"""
+
+    def test_behaves_like_session_dict(self, store):
+        store["sid"] = _Session("abc")
+        assert "sid" in store
+        assert store["sid"]["provider"] == "google"
+        assert len(store) == 1
+        assert store.pop("sid")["state"] == "abc"
+        assert "sid" not in store
+
+    def test_find_by_state(self, store):
+        store["sid"] = _Session("abc")
+        session_id, session_data = store.FindByState("abc")
+        assert session_id == "sid"
+        assert session_data["code_verifier"] == "verifier-abc"
+        assert store.FindByState("other") is None
+
+    def test_consume_by_state_is_single_use(self, store):
+        store["sid"] = _Session("abc")
+        assert store.ConsumeByState("abc")[0] == "sid"
+        assert store.ConsumeByState("abc") is None
+        assert store.FindSessionId("abc") is None
+
+    def test_expired_sessions_are_not_stored(self, store):
+        store["old"] = _Session("stale", age_minutes=20)
+        assert "old" not in store
+        assert store.FindByState("stale") is None
+
+class TestLocalExpiryAndCapacity:
+    """Heap-driven expiry and the capacity bound of the in-process store"""
+
+    def test_heap_purges_expired(self):
+        store = OAuthStateStore(ttl_seconds=0.05)
+        for i in range(10):
+            store[f"sid{i}"] = {"state": f"s{i}"}
+        time.sleep(0.1)
+        assert store.PurgeExpired() == 10
+        assert store.GetStats()["indexed_states"] == 0
+
+    def test_capacity_evicts_oldest(self):
+        store = OAuthStateStore(max_sessions=3)
+        for i in range(5):
+            store[f"sid{i}"] = {"state": f"s{i}", "created_at": datetime.utcnow() - timedelta(seconds=10 - i)}
+        assert len(store) == 3
+        assert "sid0" not in store and "sid1" not in store
+        assert store.FindSessionId("s4") == "sid4"
+        assert store.GetStats()["evictions"] == 2
+
+    def test_overwrite_reindexes_state(self):
+        store = OAuthStateStore()
+        store["sid"] = {"state": "first"}
+        store["sid"] = {"state": "second"}
+        assert store.FindSessionId("first") is None
+        assert store.FindSessionId("second") == "sid"
+
+class TestSharedOAuthStateStore:
+    """A callback can land on a different worker than the login"""
+
+    def test_state_visible_across_workers(self, tmp_path):
+        path = str(tmp_path / "oauth.db")
+        login_worker = OAuthStateStore(SQLiteStateBackend(path))
+        callback_worker = OAuthStateStore(SQLiteStateBackend(path))
+
+        login_worker["sid"] = _Session("abc")
+        session_id, session_data = callback_worker.ConsumeByState("abc")
+
+        assert session_id == "sid"
+        assert isinstance(session_data["created_at"], datetime)
+        assert login_worker.FindByState("abc") is None
+
+    def test_state_keys_are_hashed(self, tmp_path):
+        backend = SQLiteStateBackend(str(tmp_path / "oauth.db"))
+        store = OAuthStateStore(backend)
+        store["sid"] = _Session("secret-state")
+        assert backend.Keys(OAuthStateStore.STATE_NAMESPACE) == [HashState("secret-state")]
+
+    def test_shared_store_is_capacity_bounded(self, tmp_path):
+        backend = SQLiteStateBackend(str(tmp_path / "oauth.db"))
+        store = OAuthStateStore(backend, max_sessions=3)
+        for i in range(6):
+            store[f"sid{i}"] = {"state": f"s{i}", "created_at": datetime.utcnow() - timedelta(seconds=10 - i)}
+
+        assert sorted(store) == ["sid3", "sid4", "sid5"]
+        assert store.FindByState("s0") is None
+        assert store.FindSessionId("s5") == "sid5"
+        assert store.GetStats()["evictions"] == 3
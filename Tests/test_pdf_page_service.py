@@ -0,0 +1,126 @@
+# File: test_pdf_page_service.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_pdf_page_service.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 09:25PM
+
+"""
+Tests for page-level PDF delivery (page index and cached page bundles)
+"""
+
+import os
+import pytest
+
+from Source.Utils.BookFileServer import BookFileResolver
+from Source.Utils.PdfPageService import PdfPageService, ClampPageRange, PageRangeError
+
+class TestClampPageRange:
+    """Page range normalisation"""
+
+    @pytest.mark.parametrize("from_page,to_page,expected", [
+        (None, None, (1, 40)),
+        (3, None, (3, 40)),
+        (5, 9, (5, 9)),
+        (38, 100, (38, 40)),
+        (1, 40, (1, 40)),
+    ])
+    def test_valid(self, from_page, to_page, expected):
+        assert ClampPageRange(from_page, to_page, 40) == expected
+
+    def test_span_capped(self):
+        assert ClampPageRange(1, 200, 500, max_pages=64) == (1, 64)
+
+    @pytest.mark.parametrize("from_page,to_page", [(0, 5), (41, None), (9, 5)])
+    def test_invalid(self, from_page, to_page):
+        with pytest.raises(PageRangeError):
+            ClampPageRange(from_page, to_page, 40)
+
+@pytest.fixture
+def book(tmp_path):
+    fitz = pytest.importorskip("fitz")
+    books = tmp_path / "Data" / "Books"
+    books.mkdir(parents=True)
+    document = fitz.open()
+    for number in range(1, 21):
+        page = document.new_page(width=300, height=400)
+        page.insert_text((50, 50), f"Page {number}")
+    document.save(str(books / "Physics.pdf"))
+    document.close()
+
+    resolver = BookFileResolver([str(tmp_path)])
+    return resolver.Resolve(1, lambda book_id: ("Physics", "Books/Physics.pdf"))
+
+@pytest.fixture
+def service(tmp_path):
+    return PdfPageService(str(tmp_path / "Cache"), pages_per_bundle=8)
+
+class TestPageBundles:
+    """Index and bundle building with PyMuPDF"""
+
+    def test_index_layout(self, service, book):
+        index = service.GetPageIndex(book)
+        assert index["page_count"] == 20
+        assert index["bundles"] == [[1, 8], [9, 16], [17, 20]]
+        assert index["page_sizes"][0] == [300.0, 400.0]
+
+    def test_index_persisted_across_instances(self, service, book, tmp_path):
+        service.GetPageIndex(book)
+        os.chmod(book.path, 0)  # the persisted index must not reopen the PDF
+        try:
+            fresh = PdfPageService(str(tmp_path / "Cache"), pages_per_bundle=8)
+            assert fresh.GetPageIndex(book)["page_count"] == 20
+        finally:
+            os.chmod(book.path, 0o644)
+
+    def test_bundle_holds_requested_pages(self, service, book):
+        import fitz
+        path, start, end = service.GetBundlePath(book, 9, 16)
+        assert (start, end) == (9, 16)
+        with fitz.open(path) as bundle:
+            assert bundle.page_count == 8
+            assert "Page 9" in bundle[0].get_text()
+
+        again, _, _ = service.GetBundlePath(book, 9, 16)
+        assert again == path
+        assert service.GetStats()["bundles_built"] == 1
+
+    def test_unaligned_ranges_served_from_cached_bundles(self, service, book):
+        path, _, _ = service.GetBundlePath(book, 9, 16)
+        assert service.GetBundlePath(book, 10, 12) == (path, 9, 16)
+        assert service.GetBundlePath(book, 15, 40) == (path, 9, 16)
+        assert service.GetBundlePath(book, None, None)[1:] == (1, 8)
+
+        assert sorted(os.listdir(os.path.dirname(path))) == ["index.json", "pages_1-8.pdf", "pages_9-16.pdf"]
+        assert service.GetStats()["bundles_built"] == 2
+        assert service.BuildLocks == {}
+
+    def test_replaced_file_discards_old_bundles(self, service, book, tmp_path):
+        import fitz
+        old_path, _, _ = service.GetBundlePath(book, 1, 8)
+
+        document = fitz.open()
+        document.new_page()
+        document.save(book.path)
+        document.close()
+        stat = os.stat(book.path)
+        from dataclasses import replace
+        updated = replace(book, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+        assert service.GetPageIndex(updated)["page_count"] == 1
+        assert not os.path.exists(old_path)
+
+    def test_precompute_builds_opening_bundles(self, service, book):
+        assert service.Precompute(book, bundle_count=2) == 2
+        assert service.GetStats()["bundles_built"] == 2
+
+class TestPagesEndpoint:
+    """MainAPI page routes"""
+
+    def test_unavailable_without_pymupdf(self, monkeypatch):
+        from starlette.testclient import TestClient
+        from Source.API import MainAPI
+
+        monkeypatch.setattr(MainAPI.pdf_page_service, "IsAvailable", lambda: False)
+        client = TestClient(MainAPI.app)
+        assert client.get("/api/books/1/pages/index").status_code == 503
+        assert client.get("/api/books/1/pages?from=1&to=8").status_code == 503
@@ -0,0 +1,297 @@
+# File: test_peer_cache.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_peer_cache.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 10:55PM
+
+"""
+Tests for LAN caching-peer mode
+Two real server instances run the peer API: "A" fetches from a fake Google
+Drive, "B" uses A as its upstream. The fake Drive counts full transfers so
+the tests can check that the uplink is used once.
+"""
+
+import os
+import sys
+import time
+import socket
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+import uvicorn
+from fastapi import FastAPI
+
+from Source.API import PeerCacheAPI as peer_api
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Standalone"))
+from DatabaseUpdater import DatabaseUpdater
+
+BOOK_ID = 7
+BOOK_BYTES = b"%PDF-1.4\n" + os.urandom(300 * 1024) + b"\n%%EOF"
+
+class FakeDrive:
+    """Serves BOOK_BYTES with Range support and counts requests"""
+
+    def __init__(self):
+        self.Requests = 0
+        self.RangeRequests = 0
+        self.Delay = 0.0
+
+        drive = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                drive.Requests += 1
+                time.sleep(drive.Delay)
+                body, status = BOOK_BYTES, 200
+                byte_range = self.headers.get("Range")
+                if byte_range:
+                    drive.RangeRequests += 1
+                    start = int(byte_range.split("=")[1].rstrip("-"))
+                    body, status = BOOK_BYTES[start:], 206
+                self.send_response(status)
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{len(BOOK_BYTES) - 1}/{len(BOOK_BYTES)}")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.Server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.Url = f"http://127.0.0.1:{self.Server.server_address[1]}/book.pdf"
+        threading.Thread(target=self.Server.serve_forever, daemon=True).start()
+
+    def Close(self):
+        self.Server.shutdown()
+        self.Server.server_close()
+
+class PeerInstance:
+    """One peer API served by uvicorn on an ephemeral port"""
+
+    def __init__(self, cache_dir, database_path=None, upstream=None):
+        self.Api = peer_api.PeerCacheAPI(
+            peer_api.PeerCache(str(cache_dir)),
+            ResolveLocalBook=lambda book_id: None,
+            ListLocalBooks=lambda: [],
+            DatabasePath=lambda: database_path,
+            ResolveUpstream=upstream
+        )
+        app = FastAPI()
+        app.include_router(self.Api.Router, prefix="/api")
+
+        self.Socket = socket.socket()
+        self.Socket.bind(("127.0.0.1", 0))
+        self.Url = f"http://127.0.0.1:{self.Socket.getsockname()[1]}"
+        self.Server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+        self.Thread = threading.Thread(target=self.Server.run, kwargs={"sockets": [self.Socket]}, daemon=True)
+        self.Thread.start()
+        deadline = time.monotonic() + 10
+        while not self.Server.started and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+    def Close(self):
+        self.Server.should_exit = True
+        self.Thread.join(timeout=5)
+        self.Socket.close()
+
+@pytest.fixture
+def drive():
+    fake = FakeDrive()
+    yield fake
+    fake.Close()
+
+@pytest.fixture
+def peers(drive, tmp_path):
+    """A fetches from Drive; B fetches from A"""
+    database_path = tmp_path / "MyLibrary.db"
+    conn = sqlite3.connect(database_path)
+    conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT, notes TEXT)")
+    conn.executemany("INSERT INTO books (title, notes) VALUES (?, ?)", [(f"Book {i}", "x" * 2000) for i in range(60)])
+    conn.commit()
+    conn.close()
+
+    peer_a = PeerInstance(tmp_path / "cache_a", str(database_path),
+                          upstream=lambda book_id: {"url": drive.Url, "title": f"Book {book_id}"})
+    peer_b = PeerInstance(tmp_path / "cache_b",
+                          upstream=lambda book_id: {"url": f"{peer_a.Url}/api/peer/books/{book_id}"})
+    yield peer_a, peer_b
+    peer_b.Close()
+    peer_a.Close()
+
+def test_book_crosses_the_uplink_once(drive, peers):
+    peer_a, peer_b = peers
+    expected = hashlib.sha256(BOOK_BYTES).hexdigest()
+
+    first = requests.get(f"{peer_b.Url}/api/peer/books/{BOOK_ID}", timeout=10)
+    assert first.status_code == 200
+    assert first.content == BOOK_BYTES
+    assert first.headers["X-Content-SHA256"] == expected
+    assert first.headers["ETag"] == f'"{expected}"'
+
+    # Later students, on either peer, never touch Drive
+    for url in (peer_b.Url, peer_a.Url, peer_b.Url):
+        assert requests.get(f"{url}/api/peer/books/{BOOK_ID}", timeout=10).content == BOOK_BYTES
+    assert drive.Requests == 1
+    assert peer_a.Api.Cache.GetStats()["fetches"] == 1
+    assert peer_b.Api.Cache.GetStats()["fetches"] == 1
+
+def test_concurrent_requests_share_one_upstream_transfer(drive, peers):
+    peer_a, _ = peers
+    drive.Delay = 0.3
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        bodies = list(pool.map(lambda _: requests.get(f"{peer_a.Url}/api/peer/books/{BOOK_ID}", timeout=10).content,
+                               range(6)))
+
+    assert all(body == BOOK_BYTES for body in bodies)
+    assert drive.Requests == 1
+
+def test_ranges_and_revalidation_between_peers(peers):
+    peer_a, peer_b = peers
+    full = requests.get(f"{peer_b.Url}/api/peer/books/{BOOK_ID}", timeout=10)
+
+    partial = requests.get(f"{peer_b.Url}/api/peer/books/{BOOK_ID}", headers={"Range": "bytes=0-8"}, timeout=10)
+    assert partial.status_code == 206
+    assert partial.content == b"%PDF-1.4\n"
+
+    # Content-addressed ETags: a copy from B revalidates against A
+    revalidated = requests.get(f"{peer_a.Url}/api/peer/books/{BOOK_ID}",
+                               headers={"If-None-Match": full.headers["ETag"]}, timeout=10)
+    assert revalidated.status_code == 304
+
+def test_manifest_lists_database_and_cached_books(peers):
+    peer_a, _ = peers
+    requests.get(f"{peer_a.Url}/api/peer/books/{BOOK_ID}", timeout=10)
+
+    manifest = requests.get(f"{peer_a.Url}/api/peer/manifest", timeout=10).json()
+    assert manifest["caching_peer"] is True
+    assert manifest["database"]["url"] == "/api/peer/database"
+    assert len(manifest["database"]["sha256"]) == 64
+    assert manifest["books"] == [{"book_id": BOOK_ID, "title": f"Book {BOOK_ID}", "size": len(BOOK_BYTES),
+                                  "sha256": hashlib.sha256(BOOK_BYTES).hexdigest(), "source": "cache",
+                                  "url": f"/api/peer/books/{BOOK_ID}"}]
+
+def test_serving_peer_does_not_fetch(drive, tmp_path):
+    serving_only = PeerInstance(tmp_path / "cache")
+    try:
+        assert requests.get(f"{serving_only.Url}/api/peer/books/{BOOK_ID}", timeout=10).status_code == 404
+    finally:
+        serving_only.Close()
+    assert drive.Requests == 0
+
+def test_interrupted_fetch_resumes_with_range(drive, tmp_path):
+    cache = peer_api.PeerCache(str(tmp_path / "cache"))
+    key = peer_api.BookKey(BOOK_ID)
+    with open(cache.PathFor(key) + ".part", "wb") as f:
+        f.write(BOOK_BYTES[:100000])
+
+    entry = cache.Fetch(key, drive.Url, "Book", BOOK_ID, expected_sha256=hashlib.sha256(BOOK_BYTES).hexdigest())
+    assert entry is not None
+    assert drive.RangeRequests == 1
+    assert cache.GetStats()["upstream_bytes"] == len(BOOK_BYTES) - 100000
+    with open(entry.path, "rb") as f:
+        assert f.read() == BOOK_BYTES
+
+def test_corrupt_fetch_is_rejected(drive, tmp_path):
+    cache = peer_api.PeerCache(str(tmp_path / "cache"))
+    key = peer_api.BookKey(BOOK_ID)
+
+    assert cache.Fetch(key, drive.Url, "Book", BOOK_ID, expected_sha256="0" * 64) is None
+    assert cache.Get(key) is None
+    assert not os.path.exists(cache.PathFor(key) + ".part")
+
+def test_cache_survives_restart_and_evicts_by_bytes(drive, tmp_path):
+    cache = peer_api.PeerCache(str(tmp_path / "cache"), max_bytes=len(BOOK_BYTES) + 1000)
+    cache.Fetch(peer_api.BookKey(1), drive.Url, "One", 1)
+    cache.Fetch(peer_api.BookKey(2), drive.Url, "Two", 2)
+
+    reopened = peer_api.PeerCache(str(tmp_path / "cache"))
+    assert reopened.Get(peer_api.BookKey(1)) is None  # least recently used went first
+    assert reopened.Get(peer_api.BookKey(2)).sha256 == hashlib.sha256(BOOK_BYTES).hexdigest()
+
+def test_standalone_client_prefers_peer_database(peers, tmp_path):
+    peer_a, _ = peers
+    database_path = tmp_path / "client" / "MyLibrary.db"
+    updater = DatabaseUpdater(database_path, folder_id="folder", min_size=10000, api_key="", peer_url=peer_a.Url)
+    updater.files_url = "http://127.0.0.1:9/drive/files"  # internet is unreachable
+
+    first = updater.update()
+    assert first["updated"] and first["book_count"] == 60
+    assert updater.update()["status"] == "current"
+
+def test_local_hashes_saved_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys.modules[peer_api.PeerCache.__module__], "MANIFEST_SAVE_INTERVAL", 3)
+    cache = peer_api.PeerCache(str(tmp_path / "cache"))
+    files = []
+    for i in range(4):
+        path = tmp_path / f"book{i}.pdf"
+        path.write_bytes(BOOK_BYTES[:1000 * (i + 1)])
+        stat = path.stat()
+        files.append((str(path), stat.st_size, stat.st_mtime_ns))
+
+    for path, size, mtime_ns in files[:2]:
+        cache.HashOf(path, size, mtime_ns)
+    assert not os.path.exists(cache.ManifestPath)
+
+    cache.HashOf(*files[2])  # third hash reaches the interval
+    assert len(peer_api.PeerCache(str(tmp_path / "cache")).Hashes) == 3
+
+    cache.HashOf(*files[3])
+    cache.SaveManifest()
+    assert len(peer_api.PeerCache(str(tmp_path / "cache")).Hashes) == 4
+    assert os.listdir(tmp_path / "cache") == ["manifest.json"]
+
+def test_unreachable_upstream_falls_back_to_drive(monkeypatch):
+    from Source.API import MainAPI
+
+    class Health(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200 if self.path == "/api/health" else 404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Health)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    live = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(MainAPI, "peer_upstream_status", {})
+    monkeypatch.setattr(MainAPI, "is_caching_peer", lambda: False)
+    try:
+        monkeypatch.setenv("ANDYLIBRARY_PEER_UPSTREAM", live + "/")
+        assert MainAPI.peer_book_url(BOOK_ID) == f"{live}/api/peer/books/{BOOK_ID}"
+
+        monkeypatch.setenv("ANDYLIBRARY_PEER_UPSTREAM", "http://127.0.0.1:9")
+        assert MainAPI.peer_book_url(BOOK_ID) is None
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_peer_found_after_startup_is_used(monkeypatch):
+    import asyncio
+    import importlib
+    from Source.API import MainAPI
+
+    lan = importlib.import_module("Utils.LanDiscovery")
+
+    async def discover(role=None, **kwargs):
+        assert role == lan.PEER_CACHE_ROLE
+        return "http://192.0.2.7:8000"
+
+    monkeypatch.setattr(lan, "DiscoverServerAsync", discover)
+    monkeypatch.setattr(MainAPI, "discovered_peer_upstream", None)
+    monkeypatch.setattr(MainAPI, "is_caching_peer", lambda: False)
+    monkeypatch.setattr(MainAPI, "peer_upstream_alive", lambda upstream: True)
+    monkeypatch.delenv("ANDYLIBRARY_PEER_UPSTREAM", raising=False)
+
+    assert MainAPI.peer_book_url(BOOK_ID) is None
+    asyncio.run(MainAPI.discover_peer_upstream())
+    assert MainAPI.peer_book_url(BOOK_ID) == f"http://192.0.2.7:8000/api/peer/books/{BOOK_ID}"
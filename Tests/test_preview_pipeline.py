@@ -0,0 +1,130 @@
+# File: test_preview_pipeline.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_preview_pipeline.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 10:25PM
+
+"""
+Tests for the content-addressed preview cache and the process-pool render pipeline
+"""
+
+import os
+import time
+import pytest
+
+from Source.Utils.BookFileServer import BookFileResolver
+from Source.Utils.PreviewPipeline import PreviewCache, PreviewPipeline
+
+@pytest.fixture
+def cache(tmp_path):
+    return PreviewCache(str(tmp_path / "Previews"), max_bytes=1000)
+
+class TestPreviewCache:
+    """Content addressing and LRU byte bound"""
+
+    def test_store_and_lookup(self, cache):
+        stored = cache.Store(1, "v1", [(1, b"a" * 100), (2, b"b" * 100)])
+        assert cache.Lookup(1, "v1", 1) == stored[1]
+        assert open(cache.BlobPath(stored[2]), "rb").read() == b"b" * 100
+        assert cache.Lookup(1, "v1", 3) is None
+        assert cache.Lookup(1, "v2", 1) is None
+
+    def test_identical_images_stored_once(self, cache):
+        cache.Store(1, "v1", [(1, b"blank" * 20)])
+        cache.Store(2, "v1", [(1, b"blank" * 20)])
+        assert cache.GetStats()["blobs"] == 1
+        assert cache.GetStats()["total_bytes"] == 100
+
+    def test_new_version_replaces_old(self, cache):
+        old = cache.Store(1, "v1", [(1, b"old" * 10)])[1]
+        cache.Store(1, "v2", [(1, b"new" * 10)])
+        assert not cache.HasBook(1, "v1")
+        assert not os.path.exists(cache.BlobPath(old))
+
+    def test_least_recently_served_evicted(self, cache):
+        cache.Store(1, "v1", [(1, b"1" * 400)])
+        time.sleep(0.01)
+        cache.Store(2, "v1", [(1, b"2" * 400)])
+        time.sleep(0.01)
+        cache.Lookup(1, "v1", 1)  # book 2 is now least recently served
+        time.sleep(0.01)
+        cache.Store(3, "v1", [(1, b"3" * 400)])
+
+        assert cache.HasBook(1, "v1") and cache.HasBook(3, "v1")
+        assert not cache.HasBook(2, "v1")
+        stats = cache.GetStats()
+        assert stats["total_bytes"] == 800
+        assert stats["evictions"] == 1
+
+    def test_eviction_forgets_whole_book(self, cache):
+        cache.Store(1, "v1", [(1, b"x" * 300), (2, b"y" * 300)])
+        os.remove(cache.BlobPath(cache.Lookup(1, "v1", 2)))
+        assert cache.Lookup(1, "v1", 2) is None
+        assert not cache.HasBook(1, "v1")
+
+    def test_manifest_survives_restart(self, cache, tmp_path):
+        cache.Store(1, "v1", [(1, b"z" * 50)])
+        reopened = PreviewCache(str(tmp_path / "Previews"), max_bytes=1000)
+        assert reopened.Lookup(1, "v1", 1)
+        assert reopened.GetStats()["total_bytes"] == 50
+
+@pytest.fixture
+def book(tmp_path):
+    fitz = pytest.importorskip("fitz")
+    books = tmp_path / "Data" / "Books"
+    books.mkdir(parents=True)
+    document = fitz.open()
+    for number in range(1, 6):
+        document.new_page(width=300, height=400).insert_text((50, 50), f"Page {number}")
+    document.save(str(books / "Biology.pdf"))
+    document.close()
+    return BookFileResolver([str(tmp_path)]).Resolve(1, lambda book_id: ("Biology", "Books/Biology.pdf"))
+
+class TestPreviewPipeline:
+    """Rendering on the process pool"""
+
+    @pytest.fixture
+    def pipeline(self, tmp_path):
+        pipeline = PreviewPipeline(PreviewCache(str(tmp_path / "Previews")), page_limit=3, width=120, max_workers=1)
+        yield pipeline
+        pipeline.Shutdown()
+
+    def test_renders_first_pages(self, pipeline, book):
+        path = pipeline.GetPreview(book, 1)
+        with open(path, "rb") as f:
+            assert f.read(3) == b"\xff\xd8\xff"  # JPEG
+        assert pipeline.GetPreview(book, 3)
+        assert pipeline.GetPreview(book, 4) is None
+        assert pipeline.GetStats()["rendered"] == 1
+
+    def test_concurrent_submits_share_one_render(self, pipeline, book):
+        first, second = pipeline.Submit(book), pipeline.Submit(book)
+        assert first is second
+        assert sorted(first.result(timeout=60)) == [1, 2, 3]
+        assert pipeline.QueueMissing([book]) == 0
+
+    def test_warmup_keeps_the_pool_free_for_interactive_requests(self, pipeline, book, tmp_path):
+        resolver = BookFileResolver([str(tmp_path)])
+        library = [resolver.Resolve(book_id, lambda book_id: ("Biology", "Books/Biology.pdf"))
+                   for book_id in range(2, 6)]
+        outstanding = []
+        submit = pipeline.Submit
+
+        def counting_submit(entry):
+            future = submit(entry)
+            outstanding.append(len(pipeline.InFlight))
+            return future
+
+        pipeline.Submit = counting_submit
+        assert pipeline.QueueMissing(library) == 4
+        assert max(outstanding) == pipeline.MaxWorkers
+
+class TestPreviewEndpoint:
+    """MainAPI preview route"""
+
+    def test_unavailable_without_pymupdf(self, monkeypatch):
+        from starlette.testclient import TestClient
+        from Source.API import MainAPI
+
+        monkeypatch.setattr(MainAPI, "get_preview_pipeline", lambda: None)
+        assert TestClient(MainAPI.app).get("/api/books/1/preview/1").status_code == 503
@@ -0,0 +1,211 @@
+# File: test_standalone_database_updater.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_standalone_database_updater.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 06:40PM
+
+"""
+Tests for conditional database revalidation in the standalone apps
+A local HTTP server plays both Google Drive (metadata + download) and the
+desktop server (conditional GET).
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Standalone"))
+from DatabaseUpdater import DatabaseUpdater
+
+def build_library(path, titles):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT, notes TEXT)")
+    conn.executemany("INSERT INTO books (title, notes) VALUES (?, ?)", [(t, "x" * 2000) for t in titles])
+    conn.commit()
+    conn.close()
+    with open(path, "rb") as f:
+        return f.read()
+
+class RemoteLibrary:
+    """Serves one database both Drive-style and server-style, counting full downloads"""
+
+    def __init__(self, content):
+        self.Content = content
+        self.ModifiedTime = "2026-10-01T00:00:00.000Z"
+        self.Downloads = 0
+        self.MetadataRequests = 0
+        self.Corrupt = False
+
+    @property
+    def Md5(self):
+        return hashlib.md5(self.Content).hexdigest()
+
+    @property
+    def ETag(self):
+        return f'"{self.Md5}"'
+
+    def Publish(self, content, modified_time):
+        self.Content = content
+        self.ModifiedTime = modified_time
+
+@pytest.fixture
+def remote(tmp_path):
+    library = RemoteLibrary(build_library(str(tmp_path / "remote_v1.db"), [f"Book {i}" for i in range(60)]))
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _Send(self, status, body=b"", headers=None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.startswith("/drive/files"):
+                library.MetadataRequests += 1
+                meta = {"id": "db-file", "name": "MyLibrary.db", "size": str(len(library.Content)),
+                        "md5Checksum": library.Md5, "modifiedTime": library.ModifiedTime}
+                body = meta if self.path.startswith("/drive/files/db-file") else {"files": [meta]}
+                return self._Send(200, json.dumps(body).encode(), {"Content-Type": "application/json"})
+            if self.path.startswith("/drive/download"):
+                library.Downloads += 1
+                body = library.Content[:-100] + b"\0" * 100 if library.Corrupt else library.Content
+                return self._Send(200, body)
+            if self.path == "/api/database/download":
+                if self.headers.get("If-None-Match") == library.ETag:
+                    return self._Send(304, headers={"ETag": library.ETag})
+                library.Downloads += 1
+                return self._Send(200, library.Content, {"ETag": library.ETag})
+            self._Send(404)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    library.BaseUrl = f"http://127.0.0.1:{server.server_address[1]}"
+    yield library
+    server.shutdown()
+    server.server_close()
+
+def drive_updater(remote, database_path, **kwargs):
+    updater = DatabaseUpdater(database_path, folder_id="folder", min_size=10000, api_key="", **kwargs)
+    updater.files_url = f"{remote.BaseUrl}/drive/files"
+    updater.download_url = f"{remote.BaseUrl}/drive/download?id={{file_id}}"
+    return updater
+
+def test_first_update_downloads_then_revalidates_without_download(remote, tmp_path):
+    database_path = tmp_path / "Data" / "MyLibrary.db"
+    updater = drive_updater(remote, database_path)
+
+    first = updater.update()
+    assert first["success"] and first["updated"] and first["book_count"] == 60
+    assert database_path.read_bytes() == remote.Content
+
+    second = updater.update()
+    assert second == {"success": True, "updated": False, "status": "current", "error": None}
+    assert remote.Downloads == 1
+    assert remote.MetadataRequests == 2
+
+def test_same_count_edit_is_detected(remote, tmp_path):
+    database_path = tmp_path / "MyLibrary.db"
+    updater = drive_updater(remote, database_path)
+    updater.update()
+
+    # Same number of books, different content - the old COUNT(*) comparison missed this
+    edited = build_library(str(tmp_path / "remote_v2.db"), [f"Revised {i}" for i in range(60)])
+    remote.Publish(edited, "2026-10-02T00:00:00.000Z")
+
+    result = updater.update()
+    assert result["updated"]
+    assert database_path.read_bytes() == edited
+    assert remote.Downloads == 2
+
+def test_existing_copy_with_matching_checksum_is_adopted(remote, tmp_path):
+    database_path = tmp_path / "MyLibrary.db"
+    database_path.write_bytes(remote.Content)  # e.g. copied from the bundle
+
+    result = drive_updater(remote, database_path).update()
+    assert result["status"] == "current"
+    assert remote.Downloads == 0
+
+def test_corrupt_download_keeps_live_database(remote, tmp_path):
+    database_path = tmp_path / "MyLibrary.db"
+    updater = drive_updater(remote, database_path)
+    updater.update()
+    original = database_path.read_bytes()
+
+    remote.Publish(build_library(str(tmp_path / "remote_v2.db"), ["Only one"] * 30), "2026-10-03T00:00:00.000Z")
+    remote.Corrupt = True
+
+    result = updater.update()
+    assert not result["success"]
+    assert "Checksum" in result["error"]
+    assert database_path.read_bytes() == original
+    assert not updater.temp_path.exists()
+
+def test_swap_is_atomic_for_open_readers(remote, tmp_path):
+    database_path = tmp_path / "MyLibrary.db"
+    updater = drive_updater(remote, database_path)
+    updater.update()
+
+    reader = sqlite3.connect(str(database_path))
+    remote.Publish(build_library(str(tmp_path / "remote_v2.db"), [f"New {i}" for i in range(80)]), "2026-10-04T00:00:00.000Z")
+    try:
+        assert updater.update()["updated"]
+        # The open connection keeps reading the old file; new connections see the new one
+        assert reader.execute("SELECT COUNT(*) FROM books").fetchone()[0] == 60
+    finally:
+        reader.close()
+    with sqlite3.connect(str(database_path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM books").fetchone()[0] == 80
+
+def test_drive_unreachable_reports_unavailable(tmp_path):
+    updater = DatabaseUpdater(tmp_path / "MyLibrary.db", folder_id="folder", api_key="")
+    updater.files_url = "http://127.0.0.1:9/drive/files"
+    result = updater.update()
+    assert result["success"] is False
+    assert result["status"] == "unavailable"
+
+def test_server_conditional_get(remote, tmp_path):
+    database_path = tmp_path / "MyLibrary.db"
+    updater = DatabaseUpdater(database_path, server_url=f"{remote.BaseUrl}/api/database/download", min_size=10000)
+
+    assert updater.update()["updated"]
+    assert updater.update()["status"] == "current"
+    assert remote.Downloads == 1
+
+    remote.Publish(build_library(str(tmp_path / "remote_v2.db"), [f"New {i}" for i in range(70)]), "")
+    assert updater.update()["book_count"] == 70
+    assert remote.Downloads == 2
+
+def test_main_api_database_download_is_conditional(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+    from starlette.testclient import TestClient
+    from Source.API import MainAPI
+
+    database_path = tmp_path / "MyLibrary.db"
+    content = build_library(str(database_path), [f"Book {i}" for i in range(10)])
+    monkeypatch.setattr(MainAPI, "drive_manager", SimpleNamespace(local_db_path=str(database_path)))
+    monkeypatch.setattr(MainAPI, "sheets_logger", None)
+
+    client = TestClient(MainAPI.app)
+    response = client.get("/api/database/download")
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers["content-disposition"].startswith("attachment")
+
+    revalidated = client.get("/api/database/download", headers={"If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+    partial = client.get("/api/database/download", headers={"Range": "bytes=0-15"})
+    assert partial.status_code == 206
+    assert partial.content == b"SQLite format 3\x00"
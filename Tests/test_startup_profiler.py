@@ -0,0 +1,77 @@
+# File: test_startup_profiler.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_startup_profiler.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 08:10PM
+
+"""
+Tests for lazy imports of optional subsystems and the startup import profile
+"""
+
+import time
+
+import pytest
+
+from Source.Utils.LazyImport import LazyImport
+from Source.Utils.StartupReadiness import StartupReadiness
+from Source.Utils.StartupProfiler import (
+    ImportProfile, ParseImportTime, FormatImportTable, CheckStartupBudget, ProfileImports
+)
+
+IMPORTTIME_REPORT = """\
+import time: self [us] | cumulative | imported package
+import time:       900 |        900 |     urllib3
+import time:      2000 |       2900 |   requests
+import time:      1500 |       4400 | Core.PeerCache
+import time:      5000 |       5000 |   fastapi
+import time:     30000 |      39400 | Source.API.MainAPI
+"""
+
+def test_import_time_report_is_parsed():
+    records = ParseImportTime("Some print from the module\n" + IMPORTTIME_REPORT)
+    assert [record.module for record in records] == [
+        "urllib3", "requests", "Core.PeerCache", "fastapi", "Source.API.MainAPI"]
+    assert records[0].depth == 2 and records[0].parent == "requests"
+    assert records[3].parent == "Source.API.MainAPI"
+
+    profile = ImportProfile("Source.API.MainAPI", "local", records)
+    assert profile.total_ms == 39.4
+    assert profile.ImportChain(records[0]) == ["requests", "Core.PeerCache"]
+    assert "fastapi" in FormatImportTable(profile)
+
+def test_budget_check_reports_regressions():
+    profile = ImportProfile("Core.PeerCache", "local", ParseImportTime(IMPORTTIME_REPORT))
+    problems = CheckStartupBudget(profile, budget_ms=2, deferred=("requests", "fitz"))
+    assert problems[0].startswith("Core.PeerCache took 4 ms")
+    assert problems[1] == "requests is imported at startup (via Core.PeerCache)"
+    assert len(problems) == 2
+    assert CheckStartupBudget(profile, budget_ms=10, deferred=("fitz",)) == []
+
+def test_lazy_import_waits_for_first_use(capsys):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        import json
+        return locals()
+
+    dumps = LazyImport(loader).Symbol("json")
+    assert calls == []
+    assert dumps.dumps([1]) == "[1]"
+    assert calls == [1]
+
+    missing = LazyImport(lambda: __import__("not_a_real_module"), "⚠️ Missing not available", probe="not_a_real_module")
+    assert not missing.Symbol("anything")
+    with pytest.raises(ImportError):
+        missing.Symbol("anything")()
+    assert capsys.readouterr().out.count("Missing not available") == 1
+
+def test_missing_subsystem_disables_its_stage():
+    readiness = StartupReadiness(launch_time=time.time())
+    readiness.Run("oauth", lambda: LazyImport(lambda: __import__("not_a_real_module")).Get("Manager"))
+    stage = readiness.Snapshot()["stages"]["oauth"]
+    assert stage["state"] == "disabled" and "not_a_real_module" in stage["error"]
+
+def test_local_mode_does_not_import_deferred_subsystems():
+    profile = ProfileImports(mode="local", runs=1)
+    assert CheckStartupBudget(profile) == []
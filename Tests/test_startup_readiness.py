@@ -0,0 +1,80 @@
+# File: test_startup_readiness.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_startup_readiness.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 10:05PM
+
+"""
+Tests for staged (fast-start) startup and the readiness flags on /api/health
+"""
+
+import time
+import sqlite3
+import threading
+
+import pytest
+
+from Source.Utils.StartupReadiness import StartupReadiness, ResolveStartupBudget
+
+def test_stage_outcomes_are_recorded():
+    readiness = StartupReadiness(launch_time=time.time())
+    readiness.Run("ok", lambda: None)
+    readiness.Run("degraded", lambda: False)
+    readiness.Run("broken", lambda: 1 / 0)
+    readiness.Disable("drive_sync", "local mode")
+    readiness.Register("later")
+
+    snapshot = readiness.Snapshot()
+    assert snapshot["stages"]["ok"]["state"] == "ready"
+    assert snapshot["stages"]["degraded"]["state"] == "failed"
+    assert "division by zero" in snapshot["stages"]["broken"]["error"]
+    assert snapshot["stages"]["drive_sync"] == {"state": "disabled", "seconds": None, "error": "local mode"}
+    assert snapshot["ready"] is False and snapshot["serving"] is False
+
+    readiness.Run("later", lambda: None)
+    readiness.MarkServing()
+    assert readiness.IsReady()
+    assert readiness.Snapshot()["cold_start_seconds"] >= 0
+
+def test_startup_budget_from_environment(monkeypatch):
+    monkeypatch.setenv("ANDYLIBRARY_STARTUP_BUDGET", "2.5")
+    assert ResolveStartupBudget() == 2.5
+    monkeypatch.setenv("ANDYLIBRARY_FAST_START", "0")
+    assert ResolveStartupBudget() is None
+
+def test_slow_drive_sync_does_not_delay_serving(tmp_path, monkeypatch):
+    from starlette.testclient import TestClient
+    from Source.API import MainAPI
+
+    database_path = tmp_path / "MyLibrary.db"
+    with sqlite3.connect(database_path) as conn:
+        conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT)")
+        conn.execute("INSERT INTO books (title) VALUES ('Bundled book')")
+
+    release = threading.Event()
+    monkeypatch.setenv("ANDYGOOGLE_MODE", "gdrive")
+    monkeypatch.setenv("ANDYGOOGLE_TEMP_DB", str(database_path))
+    monkeypatch.setenv("ANDYLIBRARY_STARTUP_BUDGET", "0.2")
+    monkeypatch.setenv("ANDYLIBRARY_CONTENT_INDEX", "0")
+    monkeypatch.setenv("ANDYLIBRARY_PREVIEW_WARMUP", "0")
+    monkeypatch.setenv("ANDYLIBRARY_DOWNLOAD_QUEUE", "0")
+    monkeypatch.setattr(MainAPI, "startup_readiness", StartupReadiness())
+    monkeypatch.setattr(MainAPI, "drive_manager", None)
+    monkeypatch.setattr(MainAPI, "init_drive_sync", lambda: release.wait(10))  # a Drive behind a 2G link
+    monkeypatch.setattr(MainAPI, "init_sheets_logger", lambda: None)
+
+    started = time.monotonic()
+    with TestClient(MainAPI.app) as client:
+        assert time.monotonic() - started < 2.0
+
+        startup = client.get("/api/health").json()["startup"]
+        assert startup["serving"] and not startup["ready"]
+        assert startup["stages"]["database"]["state"] == "ready"
+        assert startup["stages"]["drive_sync"]["state"] == "running"
+
+        release.set()
+        deadline = time.monotonic() + 5
+        while not client.get("/api/health").json()["startup"]["ready"]:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        assert client.get("/api/health").json()["startup"]["stages"]["drive_sync"]["state"] == "ready"
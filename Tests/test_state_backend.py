@@ -0,0 +1,228 @@
+# File: test_state_backend.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_state_backend.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 10:45PM
+
+"""
+Tests for the shared state backend and multi-worker launcher helpers
+"""
+
+import os
+import sys
+import time
+import subprocess
+import threading
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+
+from Source.Utils.StateBackend import (
+    MemoryStateBackend, SQLiteStateBackend, RedisStateBackend, SharedStateMapping, GetStateBackend,
+    EncodeValue, DecodeValue
+)
+from Source.Utils.ServerLauncher import ResolveWorkerCount, ConfigureSharedState, AcquireBackgroundRole
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    """Each backend must honour the same contract"""
+    if request.param == "memory":
+        return MemoryStateBackend()
+    return SQLiteStateBackend(str(tmp_path / "state.db"))
+
+class TestStateBackendContract:
+    """Behaviour shared by every backend"""
+
+    def test_set_get_delete(self, backend):
+        backend.Set("ns", "key", {"value": 1})
+        assert backend.Get("ns", "key") == {"value": 1}
+        assert backend.Delete("ns", "key") is True
+        assert backend.Get("ns", "key", "missing") == "missing"
+
+    def test_ttl_expiry(self, backend):
+        backend.Set("ns", "short", "v", ttl_seconds=0.05)
+        assert backend.Get("ns", "short") == "v"
+        time.sleep(0.1)
+        assert backend.Get("ns", "short") is None
+        assert "short" not in backend.Keys("ns")
+
+    def test_add_is_set_if_absent(self, backend):
+        assert backend.Add("ns", "once", 1) is True
+        assert backend.Add("ns", "once", 2) is False
+        assert backend.Get("ns", "once") == 1
+
+    def test_pop_reads_and_deletes(self, backend):
+        backend.Set("ns", "key", "v")
+        assert backend.Pop("ns", "key") == "v"
+        assert backend.Pop("ns", "key", "gone") == "gone"
+
+    def test_increment_counts(self, backend):
+        assert backend.Increment("ns", "counter", ttl_seconds=60) == 1
+        assert backend.Increment("ns", "counter", 4) == 5
+        assert backend.Count("ns") == 1
+
+    def test_trim_evicts_soonest_to_expire(self, backend):
+        backend.Set("ns", "forever", 0)
+        for i, ttl in enumerate((30, 10, 20)):
+            backend.Set("ns", f"k{i}", i, ttl_seconds=ttl)
+        assert backend.Trim("ns", 2) == 2
+        assert sorted(backend.Keys("ns")) == ["forever", "k0"]
+        assert backend.Trim("ns", 2) == 0
+
+    def test_namespaces_are_isolated(self, backend):
+        backend.Set("a", "key", 1)
+        backend.Set("b", "key", 2)
+        backend.Clear("a")
+        assert backend.Get("a", "key") is None
+        assert backend.Get("b", "key") == 2
+
+class TestSharedSQLiteBackend:
+    """Two backend instances on one file behave like two workers"""
+
+    def test_state_visible_across_instances(self, tmp_path):
+        path = str(tmp_path / "shared.db")
+        worker_a = SQLiteStateBackend(path)
+        worker_b = SQLiteStateBackend(path)
+
+        worker_a.Set("oauth_sessions", "sid", {"state": "abc", "created_at": datetime(2026, 1, 1)})
+        session = worker_b.Pop("oauth_sessions", "sid")
+
+        assert session["state"] == "abc"
+        assert session["created_at"] == datetime(2026, 1, 1)
+        assert worker_a.Get("oauth_sessions", "sid") is None
+
+    def test_counters_shared_across_instances(self, tmp_path):
+        path = str(tmp_path / "shared.db")
+        worker_a = SQLiteStateBackend(path)
+        worker_b = SQLiteStateBackend(path)
+
+        for _ in range(3):
+            worker_a.Increment("rate_limits", "ip")
+            worker_b.Increment("rate_limits", "ip")
+
+        assert worker_a.Get("rate_limits", "ip") == 6
+
+    def test_replay_guard_wins_once(self, tmp_path):
+        path = str(tmp_path / "shared.db")
+        assert SQLiteStateBackend(path).Add("oauth_states_seen", "state", True) is True
+        assert SQLiteStateBackend(path).Add("oauth_states_seen", "state", True) is False
+
+    def test_purge_expired(self, tmp_path):
+        backend = SQLiteStateBackend(str(tmp_path / "purge.db"))
+        backend.Set("ns", "old", 1, ttl_seconds=0.01)
+        backend.Set("ns", "new", 1)
+        time.sleep(0.05)
+        assert backend.PurgeExpired() == 1
+        assert backend.GetStats()["namespaces"] == {"ns": 1}
+
+    def test_security_checks_leave_the_event_loop(self, tmp_path):
+        from starlette.applications import Starlette
+        from starlette.responses import JSONResponse
+        from starlette.routing import Route
+        from starlette.testclient import TestClient
+        from Source.Middleware.SecurityMiddleware import SecurityMiddleware
+
+        backend = SQLiteStateBackend(str(tmp_path / "shared.db"))
+        increment = backend.Increment
+        counted_on = []
+
+        def recording_increment(*args, **kwargs):
+            counted_on.append(threading.get_ident())
+            return increment(*args, **kwargs)
+
+        async def endpoint(request):
+            return JSONResponse({"loop_thread": threading.get_ident()})
+
+        app = Starlette(routes=[Route("/api/books", endpoint)])
+        app.add_middleware(SecurityMiddleware)
+        client = TestClient(app)
+        client.get("/api/books")  # builds the middleware stack
+
+        middleware = app.middleware_stack
+        while not isinstance(middleware, SecurityMiddleware):
+            middleware = middleware.app
+        middleware.StateBackend = backend
+        backend.Increment = recording_increment
+
+        loop_thread = client.get("/api/books").json()["loop_thread"]
+        assert counted_on and loop_thread not in counted_on
+
+class TestSharedStateMapping:
+    """Dict view used by the managers"""
+
+    def test_mapping_roundtrip_with_codec(self, tmp_path):
+        backend = SQLiteStateBackend(str(tmp_path / "map.db"))
+        mapping = SharedStateMapping(backend, "items", encoder=lambda v: {"n": v}, decoder=lambda d: d["n"])
+
+        mapping["one"] = 1
+        assert "one" in mapping
+        assert mapping["one"] == 1
+        assert len(mapping) == 1
+        assert list(mapping) == ["one"]
+        assert mapping.pop("one") == 1
+        assert mapping.pop("one", None) is None
+        with pytest.raises(KeyError):
+            mapping["one"]
+
+    def test_memory_mapping_keeps_objects(self):
+        mapping = SharedStateMapping(MemoryStateBackend(), "items", encoder=str)
+        value = {"mutable": True}
+        mapping["key"] = value
+        assert mapping["key"] is value
+
+    def test_codec_preserves_datetime(self):
+        now = datetime.utcnow()
+        assert DecodeValue(EncodeValue({"at": now})) == {"at": now}
+
+class TestBackendSelection:
+    """Factory and launcher configuration"""
+
+    def test_memory_backends_are_private(self):
+        with patch.dict(os.environ, {"ANDYLIBRARY_STATE_BACKEND": "memory"}):
+            assert GetStateBackend() is not GetStateBackend()
+
+    def test_sqlite_backends_are_shared_per_path(self, tmp_path):
+        config = {"backend": "sqlite", "path": str(tmp_path / "factory.db")}
+        assert GetStateBackend(config) is GetStateBackend(config)
+        assert GetStateBackend(config).IsShared is True
+
+    def test_unreachable_redis_falls_back_to_sqlite(self, tmp_path):
+        def refuse(self, *args, **kwargs):
+            raise ConnectionError("Connection refused")
+
+        result = {}
+        config = {"backend": "redis", "path": str(tmp_path / "fallback.db")}
+        with patch.object(RedisStateBackend, "__init__", refuse):
+            # Run in a thread so a deadlock fails the test instead of hanging it
+            worker = threading.Thread(target=lambda: result.update(backend=GetStateBackend(config)), daemon=True)
+            worker.start()
+            worker.join(timeout=10)
+
+        assert not worker.is_alive(), "GetStateBackend deadlocked on the SQLite fallback"
+        assert isinstance(result["backend"], SQLiteStateBackend)
+
+    def test_resolve_worker_count(self):
+        assert ResolveWorkerCount(3) == 3
+        assert ResolveWorkerCount("2") == 2
+        assert ResolveWorkerCount(0) >= 1
+        assert ResolveWorkerCount("auto") == ResolveWorkerCount(0)
+
+    def test_multiple_workers_switch_to_sqlite(self, tmp_path):
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("ANDYLIBRARY_STATE_BACKEND", None)
+            os.environ.pop("ANDYLIBRARY_STATE_PATH", None)
+
+            assert ConfigureSharedState(1, str(tmp_path)) == "memory"
+            assert ConfigureSharedState(4, str(tmp_path)) == "sqlite"
+            assert os.environ["ANDYLIBRARY_STATE_PATH"].startswith(str(tmp_path))
+
+    def test_background_jobs_elect_one_worker(self, tmp_path):
+        lock_path = str(tmp_path / "background.lock")
+        assert AcquireBackgroundRole(lock_path)
+        assert AcquireBackgroundRole(lock_path)  # this worker keeps the role
+
+        other_worker = subprocess.run(
+            [sys.executable, "-c", "import sys; from Source.Utils.ServerLauncher import AcquireBackgroundRole; "
+                                   "sys.exit(0 if AcquireBackgroundRole(sys.argv[1]) else 3)", lock_path],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), capture_output=True, text=True)
+        assert other_worker.returncode == 3, other_worker.stderr
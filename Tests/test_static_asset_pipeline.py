@@ -0,0 +1,234 @@
+# File: test_static_asset_pipeline.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_static_asset_pipeline.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 10:15PM
+
+"""
+Tests for the web asset pipeline: minification, precompression,
+fingerprinting, the generated service-worker core files and cache
+config, and the service worker's cache budgets
+"""
+
+import os
+import re
+import gzip
+import json
+import shutil
+import sqlite3
+import subprocess
+import time
+
+import pytest
+from starlette.datastructures import Headers
+
+from Source.Utils.StaticAssetPipeline import (
+    StaticAssetPipeline, MinifyJavaScript, MinifyCss, MinifyHtml, IMMUTABLE_CACHE_CONTROL, SERVICE_WORKER_CACHES
+)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WEB_ROOT = os.path.join(PROJECT_ROOT, "WebPages")
+
+def test_javascript_minifier_keeps_literals():
+    source = """
+    // drop me
+    const url = "http://example.org/*not a comment*/";   /* block */
+    const pattern = /\\/\\/[a-z]+/g;
+    const page = `<div>
+        ${items.map(item => `<b>${item}</b>`).join('')}   // kept
+    </div>`;
+    const half = total / 2 / scale;
+    """
+    minified = MinifyJavaScript(source)
+    assert "drop me" not in minified and "block" not in minified
+    assert '"http://example.org/*not a comment*/"' in minified
+    assert "/\\/\\/[a-z]+/g" in minified
+    assert "`<div>\n        ${items.map(item => `<b>${item}</b>`).join('')}   // kept\n    </div>`" in minified
+    assert "const half = total / 2 / scale;" in minified
+    assert minified.count("\n") == 6
+
+def test_css_and_html_minifiers():
+    assert MinifyCss("a:hover , b > c {\n  color: red;  /* x */\n  content: 'a  b';\n}\n") == \
+        "a:hover,b>c{color: red;content: 'a  b'}"
+    html = MinifyHtml("<html>\n    <!-- note -->\n    <pre>\n  keep   this\n</pre>\n"
+                      "    <script>\n        // setup\n        go();\n    </script>\n</html>")
+    assert html == "<html>\n<pre>\n  keep   this\n</pre>\n<script>\ngo();\n</script>\n</html>\n"
+
+@pytest.mark.skipif(not shutil.which("node"), reason="node not installed")
+def test_minified_web_scripts_still_parse(tmp_path):
+    scripts = []
+    for directory, _, files in os.walk(WEB_ROOT):
+        for name in files:
+            with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as f:
+                source = f.read()
+            if name.endswith(".js"):
+                scripts.append(MinifyJavaScript(source))
+            elif name.endswith(".html"):
+                scripts += re.findall(r"<script>(.*?)</script>", MinifyHtml(source), re.DOTALL)
+    assert len(scripts) > 10
+    for index, script in enumerate(scripts):
+        path = tmp_path / f"script{index}.js"
+        path.write_text(script, encoding="utf-8")
+        result = subprocess.run(["node", "--check", str(path)], capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
+@pytest.fixture
+def web_root(tmp_path):
+    root = tmp_path / "WebPages"
+    (root / "static" / "styles").mkdir(parents=True)
+    (root / "static" / "styles" / "site.css").write_text("body {\n  margin: 0;\n}\n" * 100)
+    (root / "index.html").write_text(
+        '<html>\n  <link rel="stylesheet" href="/static/styles/site.css?v=2">\n'
+        '  <img src="/static/missing.png">\n' + "  <p>Hello reader</p>\n" * 100 + "</html>\n")
+    (root / "service-worker.js").write_text(
+        "const CORE_FILES = [\n  '/',\n  '/static/styles/site.css',\n  '/gone.html'\n];\n"
+        'const CACHE_CONFIG = {\n  "version": "dev",\n  "caches": {\n    "static": { "name": "x" }\n  }\n};\n'
+        "const CACHE_NAME = CACHE_CONFIG.caches.static.name;\n")
+    return root
+
+def test_build_fingerprints_and_generates_core_files(web_root, tmp_path):
+    pipeline = StaticAssetPipeline(str(web_root), str(tmp_path / "cache"), core_pages={"/": "index.html"})
+    assert pipeline.Build()
+
+    css_url = pipeline.Manifest["files"]["/static/styles/site.css"]
+    assert re.fullmatch(r"/static/styles/site\.[0-9a-f]{10}\.css", css_url)
+    page = pipeline.Find("index.html")[0].body.decode()
+    assert f'href="{css_url}"' in page and 'src="/static/missing.png"' in page
+
+    worker = pipeline.Find("service-worker.js")[0].body.decode()
+    assert json.loads(re.search(r"CORE_FILES = (\[.*?\]);", worker, re.DOTALL).group(1)) == ["/", css_url]
+    assert pipeline.Manifest["core"] == ["/", css_url]
+
+    # Each build gets its own static cache; the data caches keep their names
+    config = json.loads(re.search(r"CACHE_CONFIG = (\{.*?\n\});", worker, re.DOTALL).group(1))
+    assert config["caches"] == pipeline.Manifest["caches"]
+    assert config["caches"]["static"]["name"] == f"andylibrary-static-{pipeline.Manifest['version']}"
+    assert config["caches"]["pdfs"]["name"] == SERVICE_WORKER_CACHES["pdfs"]["name"]
+    assert "CACHE_NAME = CACHE_CONFIG.caches.static.name;" in worker
+
+    # Compressed copies are reused from the disk cache on the next build
+    assert len(os.listdir(tmp_path / "cache")) >= 2
+    assert StaticAssetPipeline(str(web_root), str(tmp_path / "cache"), core_pages={"/": "index.html"}).Build()
+
+def test_rebuild_prunes_compressed_copies_of_old_content(web_root, tmp_path):
+    cache = tmp_path / "cache"
+    pipeline = StaticAssetPipeline(str(web_root), str(cache), core_pages={"/": "index.html"})
+    pipeline.Build()
+    old_digest = pipeline.Find("static/styles/site.css")[0].digest
+    (cache / "notes.txt").write_text("not ours")
+
+    (web_root / "static" / "styles" / "site.css").write_text("main {\n  padding: 1px;\n}\n" * 100)
+    pipeline.Build()
+
+    current = {asset.digest for asset in pipeline.Assets.values()}
+    cached = {name.split(".")[0] for name in os.listdir(cache) if name != "notes.txt"}
+    assert old_digest not in cached and cached <= current
+    assert pipeline.Find("static/styles/site.css")[0].digest in cached
+    assert (cache / "notes.txt").exists()
+
+def test_responses_negotiate_encoding_and_revalidate(web_root):
+    pipeline = StaticAssetPipeline(str(web_root), core_pages={"/": "index.html"}, use_brotli=False)
+    pipeline.Build()
+
+    compressed = pipeline.BuildResponse("index.html", Headers({"accept-encoding": "gzip, br"}))
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["cache-control"] == "no-cache"
+    assert gzip.decompress(compressed.body) == pipeline.Find("index.html")[0].body
+
+    plain = pipeline.BuildResponse("index.html", Headers({"accept-encoding": "gzip;q=0"}))
+    assert "content-encoding" not in plain.headers
+
+    for etag in (compressed.headers["etag"], plain.headers["etag"]):
+        assert pipeline.BuildResponse("index.html", Headers({"if-none-match": etag})).status_code == 304
+
+    css_url = pipeline.Manifest["files"]["/static/styles/site.css"]
+    assert pipeline.BuildResponse(css_url, Headers({})).headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert pipeline.BuildResponse("nothing.html", Headers({})) is None
+
+def test_web_routes_serve_pipeline_assets():
+    from starlette.testclient import TestClient
+    from Source.API import MainAPI
+
+    MainAPI.web_assets.Build()
+    client = TestClient(MainAPI.app)
+    response = client.get("/auth.html", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert client.get("/auth.html", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+    css_url = client.get("/asset-manifest.json").json()["files"]["/static/styles/desktop-library.css"]
+    fingerprinted = client.get(css_url)
+    assert fingerprinted.status_code == 200 and fingerprinted.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert client.get("/static/styles/desktop-library.css").headers["cache-control"] == "no-cache"
+
+SERVICE_WORKER_HARNESS = """
+const vm = require('vm');
+const fs = require('fs');
+const context = vm.createContext({ self: { addEventListener() {}, location: { origin: 'http://library' } },
+                                   console: { log() {} }, URL });
+vm.runInContext(fs.readFileSync(process.argv[1], 'utf8'), context);
+const outcome = vm.runInContext(`(() => {
+  const entry = (book, bytes, lastUsed) => ({ cache: PDF_CACHE, url: 'http://library/api/books/' + book + '/pdf', bytes, lastUsed });
+  const entries = [entry(7, 600, 1), entry(8, 300, 2), entry(9, 300, 3), entry(10, 100, 4)];
+  return {
+    evicted: selectEvictions(entries, 900, makePinnedTest([7])).map(evicted => evicted.url),
+    catalog: ['/api/books', '/api/books/filter', '/api/categories', '/api/books/12/pdf'].map(path => CATALOG_PATH.test(path))
+  };
+})()`, context);
+console.log(JSON.stringify(outcome));
+"""
+
+@pytest.mark.skipif(not shutil.which("node"), reason="node not installed")
+def test_service_worker_evicts_least_recently_used_unpinned(tmp_path):
+    pipeline = StaticAssetPipeline(WEB_ROOT, use_brotli=False)
+    pipeline.Build()
+    worker = tmp_path / "service-worker.js"
+    worker.write_bytes(pipeline.Find("service-worker.js")[0].body)
+
+    result = subprocess.run(["node", "-e", SERVICE_WORKER_HARNESS, str(worker)],
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    outcome = json.loads(result.stdout)
+    # Book 7 is bookmarked, so the two next least recently used books go instead
+    assert outcome["evicted"] == ["http://library/api/books/8/pdf", "http://library/api/books/9/pdf"]
+    assert outcome["catalog"] == [True, True, True, False]
+
+def test_catalog_revalidates_against_catalog_version(tmp_path, monkeypatch):
+    from starlette.testclient import TestClient
+    from Source.API import MainAPI
+
+    db_path = tmp_path / "catalog.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript("""
+            CREATE TABLE categories (id INTEGER PRIMARY KEY, category TEXT);
+            CREATE TABLE subjects (id INTEGER PRIMARY KEY, subject TEXT, category_id INTEGER);
+            CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT, category_id INTEGER, subject_id INTEGER);
+            CREATE TABLE reading_progress (book_id INTEGER, page INTEGER);
+            INSERT INTO categories (category) VALUES ('Science');
+        """)
+    monkeypatch.setenv("ANDYGOOGLE_TEMP_DB", str(db_path))
+    monkeypatch.setattr(MainAPI, "drive_manager", None)
+    monkeypatch.setattr(MainAPI, "catalog_index", MainAPI.CatalogIndex())
+
+    def _Touch():
+        os.utime(db_path, ns=(time.time_ns(), os.stat(db_path).st_mtime_ns + 1_000_000_000))
+
+    client = TestClient(MainAPI.app)
+    response = client.get("/api/categories")
+    assert response.status_code == 200 and response.headers["cache-control"] == "no-cache"
+    etag = response.headers["etag"]
+    assert etag == response.headers["x-database-etag"] == MainAPI.catalog_etag(str(db_path))
+    assert client.get("/api/categories", headers={"If-None-Match": etag}).status_code == 304
+
+    # Reading progress lives in the same file but is not part of the catalog
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO reading_progress VALUES (1, 12)")
+    _Touch()
+    assert client.get("/api/categories", headers={"If-None-Match": etag}).status_code == 304
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO categories (category) VALUES ('History')")
+    _Touch()
+    changed = client.get("/api/categories", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and len(changed.json()) == 2
+    assert changed.headers["etag"] != etag
@@ -0,0 +1,149 @@
+# File: test_streaming_downloader.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_streaming_downloader.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 07:40PM
+
+"""
+Tests for the shared streaming downloader used by the standalone clients
+A local HTTP server can cut the connection part-way through a body, the way
+a flaky rural link does.
+"""
+
+import os
+import sys
+import sqlite3
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Standalone"))
+from StreamingDownloader import StreamingDownloader
+from ClientStandalone import ClientStandalone
+
+def build_library(path, count=400):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT, notes TEXT)")
+    conn.executemany("INSERT INTO books (title, notes) VALUES (?, ?)", [(f"Book {i}", "x" * 2000) for i in range(count)])
+    conn.commit()
+    conn.close()
+    with open(path, "rb") as f:
+        return f.read()
+
+class FlakyServer:
+    """Serves Content with ETag/Range/If-Range; CutAfter drops the next full response after that many bytes"""
+
+    def __init__(self, content):
+        self.Content = content
+        self.CutAfter = None
+        self.Requests = []
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.Requests.append(dict(self.headers))
+                content = server.Content
+                etag = f'"{hashlib.md5(content).hexdigest()}"'
+                body, status = content, 200
+                byte_range = self.headers.get("Range")
+                if byte_range and self.headers.get("If-Range", etag) == etag:
+                    start = int(byte_range.split("=")[1].rstrip("-"))
+                    body, status = content[start:], 206
+                self.send_response(status)
+                self.send_header("ETag", etag)
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if server.CutAfter is not None and status == 200:
+                    cut, server.CutAfter = server.CutAfter, None
+                    self.wfile.write(body[:cut])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+        self.Server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.Url = f"http://127.0.0.1:{self.Server.server_address[1]}/api/database/download"
+        threading.Thread(target=self.Server.serve_forever, daemon=True).start()
+
+    def Close(self):
+        self.Server.shutdown()
+        self.Server.server_close()
+
+@pytest.fixture
+def library(tmp_path):
+    server = FlakyServer(build_library(str(tmp_path / "remote.db")))
+    yield server
+    server.Close()
+
+def test_interrupted_download_resumes_with_range(library, tmp_path):
+    destination = tmp_path / "MyLibrary.db"
+    destination.write_bytes(b"live copy")
+    library.CutAfter = 300000
+    progress = []
+
+    downloader = StreamingDownloader(progress=lambda done, total: progress.append((done, total)))
+    result = downloader.download(library.Url, destination)
+
+    assert result["success"] and result["status"] == "downloaded"
+    assert destination.read_bytes() == library.Content
+    assert result["sha256"] == hashlib.sha256(library.Content).hexdigest()
+    resumed_at = int(library.Requests[1]["Range"][len("bytes="):-1])
+    assert 0 < resumed_at <= 300000
+    assert library.Requests[1]["If-Range"] == f'"{hashlib.md5(library.Content).hexdigest()}"'
+    assert progress[-1] == (len(library.Content), len(library.Content))
+    assert not StreamingDownloader.temp_path_for(destination).exists()
+
+def test_partial_survives_until_next_launch(library, tmp_path):
+    destination = tmp_path / "MyLibrary.db"
+    library.CutAfter = 300000
+    assert StreamingDownloader(attempts=1).download(library.Url, destination)["status"] == "interrupted"
+    assert not destination.exists()
+    partial = StreamingDownloader.temp_path_for(destination).stat().st_size
+    assert 0 < partial <= 300000
+
+    result = StreamingDownloader().download(library.Url, destination)
+    assert result["success"]
+    assert destination.read_bytes() == library.Content
+    assert library.Requests[-1]["Range"] == f"bytes={partial}-"
+
+def test_changed_file_restarts_instead_of_splicing(library, tmp_path):
+    destination = tmp_path / "MyLibrary.db"
+    library.CutAfter = 300000
+    StreamingDownloader(attempts=1).download(library.Url, destination)
+
+    library.Content = build_library(str(tmp_path / "remote_v2.db"), count=450)
+    result = StreamingDownloader().download(library.Url, destination)
+    assert result["success"]
+    assert destination.read_bytes() == library.Content
+
+def test_failed_verification_keeps_live_copy(library, tmp_path):
+    destination = tmp_path / "MyLibrary.db"
+    destination.write_bytes(b"live copy")
+
+    result = StreamingDownloader().download(library.Url, destination, expected_md5="0" * 32)
+    assert result["status"] == "failed" and "Checksum" in result["error"]
+    assert destination.read_bytes() == b"live copy"
+    assert not StreamingDownloader.temp_path_for(destination).exists()
+
+    rejected = StreamingDownloader().download(library.Url, destination, verify=lambda path: False)
+    assert not rejected["success"]
+    assert destination.read_bytes() == b"live copy"
+
+def test_client_standalone_streams_from_desktop(library, tmp_path):
+    client = ClientStandalone()
+    client.database_path = tmp_path / "MyLibrary.db"
+    client.desktop_server_url = library.Url.rsplit("/api/", 1)[0]
+    library.CutAfter = 300000
+
+    assert client.download_database_from_desktop()
+    assert client.database_path.read_bytes() == library.Content
@@ -0,0 +1,121 @@
+# File: test_thumbnail_build.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_thumbnail_build.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 09:40PM
+
+"""
+Tests for the CreateThumbs thumbnail build stage
+"""
+
+import os
+import sqlite3
+import pytest
+
+from CreateThumbs.ConvertToThumbnails import (
+    GenerateThumbnails, ParseSizes, ParseFormats, Main
+)
+
+class TestOptions:
+    """Size and format parsing"""
+
+    def test_sizes(self):
+        assert ParseSizes("64x85, 128X170") == [(64, 85), (128, 170)]
+        with pytest.raises(ValueError):
+            ParseSizes("64")
+
+    def test_formats(self):
+        assert ParseFormats("png,jpg,webp") == ["png", "jpeg", "webp"]
+        with pytest.raises(ValueError):
+            ParseFormats("png,gif")
+
+@pytest.fixture
+def covers(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    source = tmp_path / "Covers"
+    source.mkdir()
+    Image.new("RGBA", (300, 400), (200, 30, 30, 128)).save(source / "Algebra Basics.png")
+    Image.new("RGB", (600, 800), (30, 200, 30)).save(source / "World History.jpg")
+    Image.new("P", (300, 400)).save(source / "No Such Book.png")
+
+    database = tmp_path / "library.db"
+    with sqlite3.connect(database) as conn:
+        conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, title TEXT, ThumbnailImage BLOB)")
+        conn.executemany("INSERT INTO books (id, title) VALUES (?, ?)", [(1, "Algebra Basics"), (2, "world history")])
+    return {"source": str(source), "output": str(tmp_path / "Thumbs"), "database": str(database)}
+
+def _Build(covers, **options):
+    return GenerateThumbnails(covers["source"], covers["output"], [(64, 85), (128, 170)], ["png", "jpeg"],
+                              covers["database"], Workers=2, Quiet=True, **options)
+
+class TestThumbnailBuild:
+    """Process-pool conversion, manifest skipping and batched database load"""
+
+    def test_sizes_formats_and_database(self, covers):
+        from PIL import Image
+        stats = _Build(covers, BatchSize=1)
+
+        assert stats["processed"] == 3 and stats["errors"] == 0
+        assert stats["stored"] == 2 and stats["unmatched"] == 1
+        assert stats["images_per_second"] > 0
+        with Image.open(os.path.join(covers["output"], "128x170", "World History.jpg")) as thumb:
+            assert thumb.size[1] == 170 and thumb.size[0] <= 128  # aspect ratio kept
+        assert os.path.exists(os.path.join(covers["output"], "64x85", "Algebra Basics.png"))
+
+        with sqlite3.connect(covers["database"]) as conn:
+            blob = conn.execute("SELECT ThumbnailImage FROM books WHERE id = 1").fetchone()[0]
+        assert blob.startswith(b"\x89PNG")
+
+    def test_unchanged_covers_skipped(self, covers):
+        _Build(covers)
+        stats = _Build(covers)
+        assert stats["processed"] == 0 and stats["skipped"] == 3
+
+    def test_touched_cover_not_reconverted(self, covers):
+        _Build(covers)
+        path = os.path.join(covers["source"], "Algebra Basics.png")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert _Build(covers)["processed"] == 0
+
+    def test_changed_or_missing_outputs_rebuilt(self, covers):
+        from PIL import Image
+        _Build(covers)
+        Image.new("RGB", (300, 400), (0, 0, 255)).save(os.path.join(covers["source"], "Algebra Basics.png"))
+        os.remove(os.path.join(covers["output"], "64x85", "World History.png"))
+
+        stats = _Build(covers)
+        assert stats["processed"] == 2 and stats["skipped"] == 1
+
+    def test_skipped_covers_loaded_into_new_database(self, covers):
+        _Build(covers)
+        with sqlite3.connect(covers["database"]) as conn:
+            conn.execute("UPDATE books SET ThumbnailImage = NULL")
+
+        stats = _Build(covers)
+        assert stats["processed"] == 0 and stats["stored"] == 2
+        with open(os.path.join(covers["output"], "64x85", "World History.png"), "rb") as thumb:
+            expected = thumb.read()
+        with sqlite3.connect(covers["database"]) as conn:
+            assert conn.execute("SELECT ThumbnailImage FROM books WHERE id = 2").fetchone()[0] == expected
+
+        # Rows already holding the thumbnail are not rewritten
+        assert _Build(covers)["stored"] == 0
+
+    def test_cover_not_recorded_until_database_updated(self, covers):
+        with sqlite3.connect(covers["database"]) as conn:
+            conn.execute("""CREATE TRIGGER reject BEFORE UPDATE ON books
+                            BEGIN SELECT RAISE(ABORT, 'database locked'); END""")
+        with pytest.raises(sqlite3.DatabaseError):
+            _Build(covers)
+
+        with sqlite3.connect(covers["database"]) as conn:
+            conn.execute("DROP TRIGGER reject")
+        stats = _Build(covers)
+        assert stats["processed"] == 2 and stats["skipped"] == 1  # only the unmatched cover was recorded
+        assert stats["stored"] == 2
+
+    def test_cli_without_database(self, covers):
+        assert Main(["--source", covers["source"], "--output", covers["output"], "--no-database",
+                     "--sizes", "32x40", "--formats", "png", "--workers", "1"]) == 0
+        assert os.path.exists(os.path.join(covers["output"], "32x40", "World History.png"))
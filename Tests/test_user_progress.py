@@ -0,0 +1,178 @@
+# File: test_user_progress.py
+# Path: /home/herb/Desktop/AndyLibrary/Tests/test_user_progress.py
+# Standard: AIDEV-PascalCase-2.1
+# Created: 2026-10-19
+# Last Modified: 2026-10-19 09:15PM
+
+"""
+Tests for incremental learning statistics, offline progress sync and bookmarks in UserProgressManager
+"""
+
+import sqlite3
+import pytest
+from datetime import datetime, timedelta
+
+from Source.Core.UserProgressManager import UserProgressManager
+
+@pytest.fixture
+def manager(tmp_path):
+    return UserProgressManager(str(tmp_path / "progress.db"), UserId=7)
+
+def _ReadBook(manager, book_id, category, completion=10.0, seconds=60):
+    """Start and end a session, back-dating the start to simulate reading time"""
+    session_id = manager.StartReadingSession(book_id, f"Book {book_id}", category)
+    with sqlite3.connect(manager.DatabasePath) as conn:
+        start = (datetime.now() - timedelta(seconds=seconds)).isoformat()
+        conn.execute("UPDATE reading_sessions SET start_time = ? WHERE session_id = ?", (start, session_id))
+        # Session ids are per-second; make them unique for back-to-back sessions
+        conn.execute("UPDATE reading_sessions SET session_id = session_id || '_' || id WHERE session_id = ?", (session_id,))
+        session_id = conn.execute("SELECT session_id FROM reading_sessions ORDER BY id DESC LIMIT 1").fetchone()[0]
+    return manager.EndReadingSession(session_id, PagesRead=3, CompletionPercentage=completion)
+
+def _Statistics(manager):
+    return manager.GetUserProgress(manager.UserId)["statistics"]
+
+class TestIncrementalStatistics:
+    """learning_statistics stays equal to a full rebuild"""
+
+    def test_first_session_creates_statistics(self, manager):
+        _ReadBook(manager, 1, "Science", seconds=120)
+        stats = _Statistics(manager)
+
+        assert stats["total_books_accessed"] == 1
+        assert stats["total_sessions"] == 1
+        assert stats["total_reading_time"] >= 120
+        assert stats["favorite_category"] == "Science"
+        assert stats["reading_streak"] == 1
+
+    def test_deltas_match_full_rebuild(self, manager):
+        _ReadBook(manager, 1, "Science", seconds=100)
+        _ReadBook(manager, 2, "History", seconds=300, completion=100.0)
+        _ReadBook(manager, 1, "Science", seconds=50)
+        incremental = _Statistics(manager)
+
+        manager.UpdateLearningStatistics(manager.UserId)
+        rebuilt = _Statistics(manager)
+
+        for field in ("total_books_accessed", "total_reading_time", "total_sessions",
+                      "favorite_category", "books_completed", "average_session_time", "reading_streak"):
+            assert incremental[field] == rebuilt[field], field
+        assert incremental["favorite_category"] == "History"
+        assert incremental["books_completed"] == 1
+
+    def test_completed_book_counted_once(self, manager):
+        _ReadBook(manager, 1, "Math", completion=100.0)
+        _ReadBook(manager, 1, "Math", completion=100.0)
+        assert _Statistics(manager)["books_completed"] == 1
+
+    def test_streak_counts_consecutive_days(self, manager):
+        _ReadBook(manager, 1, "Math")
+        yesterday = (datetime.now() - timedelta(days=1)).isoformat()
+        with sqlite3.connect(manager.DatabasePath) as conn:
+            conn.execute("UPDATE learning_statistics SET last_active_date = ?, reading_streak = 4", (yesterday,))
+
+        _ReadBook(manager, 1, "Math")
+        assert _Statistics(manager)["reading_streak"] == 5
+
+    def test_lapsed_streak_reported_as_zero(self, manager):
+        _ReadBook(manager, 1, "Math")
+        old = (datetime.now() - timedelta(days=3)).isoformat()
+        with sqlite3.connect(manager.DatabasePath) as conn:
+            conn.execute("UPDATE learning_statistics SET last_active_date = ?", (old,))
+        assert _Statistics(manager)["reading_streak"] == 0
+
+class TestProgressIndexes:
+    """Progress page queries are served by indexes"""
+
+    def test_recent_queries_use_covering_indexes(self, manager):
+        with sqlite3.connect(manager.DatabasePath) as conn:
+            books_plan = " ".join(row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM book_progress WHERE user_id = ? ORDER BY last_accessed DESC LIMIT 20", (7,)
+            ))
+            activity_plan = " ".join(row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT DATE(start_time), COUNT(*), SUM(time_spent) FROM reading_sessions "
+                "WHERE user_id = ? AND start_time >= date('now', '-30 days') GROUP BY DATE(start_time)", (7,)
+            ))
+
+        assert "idx_book_progress_user_last_accessed" in books_plan
+        assert "COVERING INDEX idx_reading_sessions_user_start" in activity_plan
+
+class TestProgressSync:
+    """Batched offline progress events"""
+
+    def test_events_coalesced_per_book(self, manager):
+        result = manager.SyncProgressEvents(7, "tablet", [
+            {"seq": 1, "book_id": 5, "page": 3, "total_pages": 100, "timestamp": "2026-01-01T10:00:00"},
+            {"seq": 2, "book_id": 5, "page": 9, "total_pages": 100, "timestamp": "2026-01-01T10:05:00"},
+            {"seq": 3, "book_id": 6, "page": 1, "total_pages": 10, "timestamp": "2026-01-01T10:06:00"},
+        ])
+
+        assert result == {"cursor": 3, "accepted": 3, "duplicates": 0, "books_updated": 2}
+        with sqlite3.connect(manager.DatabasePath) as conn:
+            row = conn.execute(
+                "SELECT last_page, completion_percentage FROM book_progress WHERE book_id = 5 AND user_id = 7"
+            ).fetchone()
+        assert row == (9, 9.0)
+
+    def test_replayed_batch_is_deduplicated(self, manager):
+        batch = [{"seq": 1, "book_id": 5, "page": 4}, {"seq": 2, "book_id": 5, "page": 5}]
+        manager.SyncProgressEvents(7, "tablet", batch)
+        retry = manager.SyncProgressEvents(7, "tablet", batch + [{"seq": 3, "book_id": 5, "page": 6}])
+
+        assert retry["duplicates"] == 2
+        assert retry["cursor"] == 3
+        assert manager.GetSyncCursor(7, "tablet") == 3
+        assert manager.GetSyncCursor(7, "phone") == 0
+
+    def test_older_events_do_not_move_position_back(self, manager):
+        manager.SyncProgressEvents(7, "tablet", [{"seq": 1, "book_id": 5, "page": 50, "timestamp": "2026-01-02T10:00:00"}])
+        manager.SyncProgressEvents(7, "phone", [{"seq": 1, "book_id": 5, "page": 10, "timestamp": "2026-01-01T10:00:00"}])
+
+        with sqlite3.connect(manager.DatabasePath) as conn:
+            assert conn.execute("SELECT last_page FROM book_progress WHERE book_id = 5").fetchone()[0] == 50
+
+    def test_synced_books_move_statistics(self, manager):
+        _ReadBook(manager, 1, "Science")
+        manager.SyncProgressEvents(7, "tablet", [
+            {"seq": 1, "book_id": 1, "completion_percentage": 100.0},
+            {"seq": 2, "book_id": 2, "page": 5, "total_pages": 10},
+            {"seq": 3, "book_id": 3, "completion_percentage": 100.0},
+        ])
+        # Replays and already-completed books are not counted again
+        manager.SyncProgressEvents(7, "phone", [{"seq": 1, "book_id": 3, "completion_percentage": 100.0}])
+        incremental = _Statistics(manager)
+        assert incremental["total_books_accessed"] == 3
+        assert incremental["books_completed"] == 2
+
+        manager.UpdateLearningStatistics(manager.UserId)
+        rebuilt = _Statistics(manager)
+        for field in ("total_books_accessed", "books_completed"):
+            assert incremental[field] == rebuilt[field], field
+
+    def test_sync_before_any_session_creates_statistics(self, manager):
+        manager.SyncProgressEvents(7, "tablet", [{"seq": 1, "book_id": 5, "completion_percentage": 100.0}])
+        stats = _Statistics(manager)
+        assert stats["total_books_accessed"] == 1
+        assert stats["books_completed"] == 1
+
+    def test_oversized_batch_rejected(self, manager):
+        with pytest.raises(ValueError):
+            manager.SyncProgressEvents(7, "tablet", [{"book_id": 1}] * 1001)
+
+    def test_bookmarks_listed_for_pinning(self, manager):
+        manager.SyncProgressEvents(7, "tablet", [{"seq": 1, "book_id": 5, "page": 1},
+                                                 {"seq": 2, "book_id": 6, "page": 1}])
+        manager.ToggleBookmark(7, 6)
+        assert [bookmark["book_id"] for bookmark in manager.GetBookmarks(7)] == [6]
+        assert manager.GetUserProgress(7)["bookmarks"] == manager.GetBookmarks(7)
+
+        manager.ToggleBookmark(7, 6)
+        assert manager.GetBookmarks(7) == []
+
+    def test_compressed_payload_decoding(self):
+        import gzip
+        import json
+        from Source.API.MainAPI import decode_sync_payload
+
+        body = gzip.compress(json.dumps({"device_id": "d", "events": []}).encode())
+        assert decode_sync_payload(body, "gzip") == {"device_id": "d", "events": []}
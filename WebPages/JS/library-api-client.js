@@ -8,7 +8,7 @@
 // Constants: UPPER_SNAKE_CASE per JavaScript ecosystem standards
 // API Integration: FastAPI backend with Design Standard v2.0 compliance
 // Created: 2025-07-07
-// Last Modified: 2025-07-11  03:50PM
+// Last Modified: 2026-10-19  08:55PM
 /**
  * Description: Anderson's Library API Client - Design Standard v2.0
  * Connects desktop web twin and mobile app to FastAPI backend
@@ -16,6 +16,249 @@
  * Follows JavaScript ecosystem conventions while maintaining backend compatibility
  */
 
+// ==================== OFFLINE CATALOG ====================
+
+const CATALOG_DB_NAME = 'andylibrary-catalog';
+const CATALOG_STORE = 'index';
+const CATALOG_KEY = 'current';
+const CATALOG_FORMAT = 1;
+const CATALOG_REFRESH_MS = 5 * 60 * 1000; // check for catalog changes every 5 minutes
+const CATALOG_RETRY_MS = 60 * 1000;
+
+/**
+ * Offline Catalog - the whole library index, searched and filtered in the browser
+ * Downloads /api/catalog/index once, keeps it in IndexedDB and fetches only
+ * changed books afterwards, so browsing costs no network on slow links
+ */
+class OfflineCatalog {
+    constructor(apiBase, onUpdate = null) {
+        this.apiBase = apiBase;
+        this.onUpdate = onUpdate;
+        this.index = null;
+        this.books = [];
+        this.titles = [];
+        this.loading = null;
+        this.refreshing = null;
+        this.nextRefresh = 0;
+    }
+
+    static isSupported() {
+        return typeof indexedDB !== 'undefined' && typeof fetch !== 'undefined';
+    }
+
+    /**
+     * True once a catalog is loaded; the first call loads the stored copy and
+     * starts a download in the background when there is none yet
+     */
+    async ready() {
+        if (this.index) {
+            this.refreshIfDue();
+            return true;
+        }
+        if (!this.loading) {
+            this.loading = this.loadStored();
+        }
+        return (await this.loading) || this.index !== null;
+    }
+
+    async loadStored() {
+        try {
+            const stored = await this.readStored();
+            if (stored && stored.format === CATALOG_FORMAT) {
+                this.apply(stored);
+            }
+        } catch (error) {
+            console.warn('Stored catalog unavailable:', error);
+        }
+        this.refreshIfDue();
+        return this.index !== null;
+    }
+
+    refreshIfDue() {
+        if (this.refreshing || Date.now() < this.nextRefresh || navigator.onLine === false) {
+            return;
+        }
+        this.refreshing = this.refresh()
+            .then(() => {
+                this.nextRefresh = Date.now() + CATALOG_REFRESH_MS;
+            })
+            .catch(error => {
+                console.warn('Catalog update deferred:', error.message);
+                this.nextRefresh = Date.now() + CATALOG_RETRY_MS;
+            })
+            .finally(() => {
+                this.refreshing = null;
+            });
+    }
+
+    /**
+     * Bring the catalog up to date: 304 when current, only the changes when the
+     * server still knows our version, the full index otherwise
+     */
+    async refresh() {
+        const headers = { 'Accept': 'application/json' };
+        let url = `${this.apiBase}/catalog/index`;
+        if (this.index) {
+            url += `?since=${encodeURIComponent(this.index.version)}`;
+            headers['If-None-Match'] = `"catalog-${this.index.version}"`;
+        }
+
+        const response = await fetch(url, { headers, cache: 'no-store', credentials: 'same-origin' });
+        if (response.status === 304) {
+            return false;
+        }
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+
+        const received = await response.json();
+        if (received.base && (!this.index || received.base !== this.index.version)) {
+            this.index = null; // a delta for some other version - start over
+            return this.refresh();
+        }
+        const updated = received.base ? this.merge(this.index, received) : received;
+        this.apply(updated);
+        await this.writeStored(updated);
+        console.log(`📚 Offline catalog ${updated.version}: ${this.books.length} books`);
+        if (this.onUpdate) {
+            this.onUpdate(updated.version);
+        }
+        return true;
+    }
+
+    /**
+     * Apply an incremental update (changed and deleted books) to the stored index
+     */
+    merge(base, delta) {
+        const rows = new Map();
+        base.books.id.forEach((id, i) => {
+            rows.set(id, [base.books.title[i], base.books.category_id[i], base.books.subject_id[i]]);
+        });
+        delta.deleted.forEach(id => rows.delete(id));
+        delta.books.id.forEach((id, i) => {
+            rows.set(id, [delta.books.title[i], delta.books.category_id[i], delta.books.subject_id[i]]);
+        });
+
+        // Same order as the server (ORDER BY title)
+        const ids = [...rows.keys()].sort((a, b) => {
+            const titleA = rows.get(a)[0];
+            const titleB = rows.get(b)[0];
+            return titleA < titleB ? -1 : titleA > titleB ? 1 : 0;
+        });
+        return {
+            format: delta.format,
+            version: delta.version,
+            generated_at: delta.generated_at,
+            categories: delta.categories,
+            subjects: delta.subjects,
+            books: {
+                id: ids,
+                title: ids.map(id => rows.get(id)[0]),
+                category_id: ids.map(id => rows.get(id)[1]),
+                subject_id: ids.map(id => rows.get(id)[2])
+            }
+        };
+    }
+
+    /**
+     * Turn the columnar index into the book objects the API returns
+     */
+    apply(index) {
+        const categoryNames = new Map(index.categories.id.map((id, i) => [id, index.categories.name[i]]));
+        const subjectNames = new Map(index.subjects.id.map((id, i) => [id, index.subjects.name[i]]));
+        const { id, title, category_id, subject_id } = index.books;
+
+        this.index = index;
+        this.books = id.map((bookId, i) => ({
+            id: bookId,
+            title: title[i],
+            author: null,
+            category: categoryNames.has(category_id[i]) ? categoryNames.get(category_id[i]) : null,
+            subject: subjectNames.has(subject_id[i]) ? subjectNames.get(subject_id[i]) : null,
+            file_path: null,
+            file_size: null,
+            page_count: null,
+            rating: null,
+            last_opened: null
+        }));
+        this.titles = title.map(text => text.toLowerCase());
+    }
+
+    // ---- queries (same results and response shapes as the server endpoints) ----
+
+    query({ search = '', category = '', subject = '', page = 1, limit = 50 } = {}) {
+        const term = (search || '').trim().toLowerCase();
+        const matches = [];
+        for (let i = 0; i < this.books.length; i++) {
+            const book = this.books[i];
+            if ((category && book.category !== category) ||
+                (subject && book.subject !== subject) ||
+                (term && !this.titles[i].includes(term))) {
+                continue;
+            }
+            matches.push(book);
+        }
+
+        const offset = (page - 1) * limit;
+        return { books: matches.slice(offset, offset + limit), total: matches.length, page, limit };
+    }
+
+    categories() {
+        const { id, name } = this.index.categories;
+        return id.map((categoryId, i) => ({ id: categoryId, category: name[i] }));
+    }
+
+    subjects(category = null) {
+        const { categories, subjects } = this.index;
+        const categoryIds = category
+            ? new Set(categories.id.filter((id, i) => categories.name[i] === category))
+            : null;
+        return subjects.id
+            .map((id, i) => ({ id, subject: subjects.name[i], category_id: subjects.category_id[i] }))
+            .filter(subject => !categoryIds || categoryIds.has(subject.category_id));
+    }
+
+    stats() {
+        return {
+            total_books: this.books.length,
+            total_categories: this.index.categories.id.length,
+            total_subjects: this.index.subjects.id.length,
+            database_version: this.index.version,
+            last_sync: this.index.generated_at,
+            offline_mode: navigator.onLine === false
+        };
+    }
+
+    // ---- IndexedDB storage ----
+
+    openDatabase() {
+        return new Promise((resolve, reject) => {
+            const request = indexedDB.open(CATALOG_DB_NAME, 1);
+            request.onupgradeneeded = () => request.result.createObjectStore(CATALOG_STORE);
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+
+    async readStored() {
+        const db = await this.openDatabase();
+        return new Promise((resolve, reject) => {
+            const request = db.transaction(CATALOG_STORE).objectStore(CATALOG_STORE).get(CATALOG_KEY);
+            request.onsuccess = () => resolve(request.result || null);
+            request.onerror = () => reject(request.error);
+        });
+    }
+
+    async writeStored(index) {
+        const db = await this.openDatabase();
+        return new Promise((resolve, reject) => {
+            const request = db.transaction(CATALOG_STORE, 'readwrite').objectStore(CATALOG_STORE).put(index, CATALOG_KEY);
+            request.onsuccess = () => resolve();
+            request.onerror = () => reject(request.error);
+        });
+    }
+}
+
 /**
  * Anderson's Library API Client Class
  * Handles all communication with FastAPI backend
@@ -54,16 +297,42 @@ class AndersonLibraryAPI {
         // Event Handling
         this.eventListeners = new Map();
         
+        // Offline catalog: searches and filters run in the browser once the index is loaded
+        this.offlineCatalog = OfflineCatalog.isSupported()
+            ? new OfflineCatalog(this.apiBase, version => this.emit('catalogUpdated', { version }))
+            : null;
+        
         // API initialized
     }
 
     // ==================== CORE API METHODS ====================
 
+    /**
+     * The offline catalog when it is loaded, otherwise null (use the server)
+     */
+    async localCatalog() {
+        if (!this.offlineCatalog) {
+            return null;
+        }
+        return (await this.offlineCatalog.ready()) ? this.offlineCatalog : null;
+    }
+
     /**
      * Search Books - Google-type instant search
      * Maintains exact desktop functionality with debouncing
      */
     async searchBooks(searchTerm, useCache = true) {
+        const catalog = await this.localCatalog();
+        if (catalog) {
+            return catalog.query({
+                search: searchTerm,
+                category: this.currentFilters.category,
+                subject: this.currentFilters.subject,
+                page: this.currentFilters.page,
+                limit: this.currentFilters.limit
+            });
+        }
+
         const cacheKey = `search_${searchTerm}_${this.currentFilters.page}_${this.currentFilters.limit}`;
         
         // Check cache first
@@ -113,6 +382,11 @@ class AndersonLibraryAPI {
      * Maintains exact desktop pagination behavior
      */
     async getAllBooks(page = 1, limit = 50) {
+        const catalog = await this.localCatalog();
+        if (catalog) {
+            return catalog.query({ page, limit });
+        }
+
         const cacheKey = `all_books_${page}_${limit}`;
         
         // Check cache
@@ -151,6 +425,11 @@ class AndersonLibraryAPI {
      * Maintains exact desktop filter behavior
      */
     async getBooksByFilters(category = '', subject = '', rating = 0, page = 1, limit = 50) {
+        const catalog = await this.localCatalog();
+        if (catalog) {
+            return catalog.query({ category, subject, page, limit });
+        }
+
         const cacheKey = `filters_${category}_${subject}_${rating}_${page}_${limit}`;
         
         // Check cache
@@ -196,6 +475,11 @@ class AndersonLibraryAPI {
      * Cached for performance
      */
     async getCategories() {
+        const catalog = await this.localCatalog();
+        if (catalog) {
+            return catalog.categories();
+        }
+
         const cacheKey = 'categories';
         
         if (this.cache.has(cacheKey)) {
@@ -228,6 +512,11 @@ class AndersonLibraryAPI {
      * Optionally filtered by category
      */
     async getSubjects(categoryId = null) {
+        const catalog = await this.localCatalog();
+        if (catalog) {
+            return catalog.subjects(categoryId);
+        }
+
         const cacheKey = `subjects_${categoryId || 'all'}`;
         
         // Temporarily disable caching for debugging
@@ -264,6 +553,11 @@ class AndersonLibraryAPI {
      * Matches desktop status bar information
      */
     async getLibraryStats() {
+        const catalog = await this.localCatalog();
+        if (catalog) {
+            return catalog.stats();
+        }
+
         const cacheKey = 'library_stats';
         
         if (this.cache.has(cacheKey)) {
@@ -1576,9 +1870,10 @@ class MobileLibraryInterface {
 
 // Export for use in other modules
 if (typeof module !== 'undefined' && module.exports) {
-    module.exports = { AndersonLibraryAPI, DesktopLibraryInterface, MobileLibraryInterface };
+    module.exports = { AndersonLibraryAPI, OfflineCatalog, DesktopLibraryInterface, MobileLibraryInterface };
 } else {
     window.AndersonLibraryAPI = AndersonLibraryAPI;
+    window.OfflineCatalog = OfflineCatalog;
     window.DesktopLibraryInterface = DesktopLibraryInterface;
     window.MobileLibraryInterface = MobileLibraryInterface;
 }
@@ -2,18 +2,60 @@
 // Path: /home/herb/Desktop/AndyLibrary/WebPages/service-worker.js
 // Standard: AIDEV-PascalCase-2.1
 // Created: 2025-07-27
-// Last Modified: 2025-07-27 10:58PM
+// Last Modified: 2026-10-19 10:15PM
 
 /**
  * Service Worker for AndyLibrary PWA
  * Educational mission: Offline-first caching for global accessibility
  */
 
-const CACHE_NAME = 'andylibrary-v1.0.0';
-const API_CACHE = 'andylibrary-api-v1.0.0';
-const THUMBNAIL_CACHE = 'andylibrary-thumbnails-v1.0.0';
+// Runtime caches. The server rewrites this object from its asset manifest: the
+// static cache is named after the build, and every cache gets a byte budget and
+// the largest share of the device's storage quota it may take.
+const CACHE_CONFIG = {
+  "version": "dev",
+  "caches": {
+    "static": { "name": "andylibrary-static-dev", "max_bytes": 16777216, "quota_share": 0.05 },
+    "api": { "name": "andylibrary-api-v2", "max_bytes": 4194304, "quota_share": 0.02 },
+    "thumbnails": { "name": "andylibrary-thumbnails-v1.0.0", "max_bytes": 33554432, "quota_share": 0.05 },
+    "pdfs": { "name": "andylibrary-pdfs-v1.0.0", "max_bytes": 536870912, "quota_share": 0.5 }
+  }
+};
+
+const CACHE_NAME = CACHE_CONFIG.caches.static.name;
+const API_CACHE = CACHE_CONFIG.caches.api.name;
+const THUMBNAIL_CACHE = CACHE_CONFIG.caches.thumbnails.name;
+const PDF_CACHE = CACHE_CONFIG.caches.pdfs.name;
+const CACHE_PREFIX = 'andylibrary-';
+
+// Size and last use of every cached response (IndexedDB) - the Cache API
+// cannot report either, and both are needed for LRU eviction by bytes
+const CACHE_INDEX_DB_NAME = 'andylibrary-cache-index';
+const CACHE_ENTRY_STORE = 'entries';
+
+// Catalog responses carry the catalog version as their ETag. A cached copy
+// is served at once and revalidated in the background once the catalog
+// changes, or at most once a minute while it stays the same.
+const CATALOG_PATH = /^\/api\/(books(\/filter)?|categories|subjects|stats)$/;
+const CATALOG_REVALIDATE_MS = 60000;
+let currentDatabaseEtag = null;
+
+// Bookmarked books are pinned: eviction never removes their PDFs or page bundles
+const BOOKMARKS_URL = '/api/progress/bookmarks';
+const BOOKMARK_TOGGLE_URL = '/api/progress/bookmark';
+const PINNED_BOOK_PATH = /^\/api\/books\/(\d+)\//;
+
+// Offline reading-progress queue (IndexedDB), flushed to the server in batches
+const SYNC_DB_NAME = 'andylibrary-sync';
+const PROGRESS_STORE = 'progress-events';
+const META_STORE = 'meta';
+const PROGRESS_BATCH_SIZE = 50;
+const PROGRESS_FLUSH_DELAY_MS = 30000;
+const PROGRESS_SYNC_URL = '/api/progress/sync';
 
-// Core files for offline functionality
+// Core files for offline functionality. The server regenerates this list from
+// its asset manifest (core pages plus the fingerprinted files they use); this
+// literal is only what goes out before the asset pipeline has run.
 const CORE_FILES = [
   '/',
   '/pdf-reader.html',
@@ -47,14 +89,13 @@ self.addEventListener('install', event => {
 self.addEventListener('activate', event => {
   console.log('🚀 Service Worker activating...');
   
+  const currentCaches = Object.values(CACHE_CONFIG.caches).map(cache => cache.name);
   event.waitUntil(
     caches.keys()
       .then(cacheNames => {
         return Promise.all(
           cacheNames.map(cacheName => {
-            if (cacheName !== CACHE_NAME && 
-                cacheName !== API_CACHE && 
-                cacheName !== THUMBNAIL_CACHE) {
+            if (cacheName.startsWith(CACHE_PREFIX) && !currentCaches.includes(cacheName)) {
               console.log('🗑️ Removing old cache:', cacheName);
               return caches.delete(cacheName);
             }
@@ -65,6 +106,11 @@ self.addEventListener('activate', event => {
         console.log('✅ Service Worker activated - offline mode ready');
         return self.clients.claim();
       })
+      .then(() => refreshPinnedBooks())
+      .then(() => reconcileCacheIndex())
+      .catch(error => {
+        console.error('❌ Cache index maintenance failed:', error);
+      })
   );
 });
 
@@ -72,16 +118,31 @@ self.addEventListener('activate', event => {
 self.addEventListener('fetch', event => {
   const url = new URL(event.request.url);
   
+  // Only GET responses can be cached - let writes go straight to the network
+  if (event.request.method !== 'GET') {
+    if (event.request.method === 'POST' && url.pathname === BOOKMARK_TOGGLE_URL) {
+      event.respondWith(handleBookmarkToggle(event));
+    }
+    return;
+  }
+  
   // Handle different types of requests
-  if (url.pathname.startsWith('/api/books/') && url.pathname.endsWith('/pdf')) {
-    // PDF files: Aggressive caching for offline reading
+  if (url.pathname.startsWith('/api/books/') &&
+      (url.pathname.endsWith('/pdf') || url.pathname.endsWith('/pages'))) {
+    // PDF files and page bundles: cached for offline reading within the PDF budget
     event.respondWith(handlePdfRequest(event.request));
+  } else if (CATALOG_PATH.test(url.pathname)) {
+    // Catalog: cached copy at once, revalidated against the catalog version
+    event.respondWith(handleCatalogRequest(event));
   } else if (url.pathname.startsWith('/api/thumbnails/')) {
     // Thumbnails: Cache first, network fallback
     event.respondWith(handleThumbnailRequest(event.request));
   } else if (url.pathname.startsWith('/api/auth/')) {
     // Auth API calls: Always use network, never cache
     return; // Let browser handle directly
+  } else if (url.pathname.startsWith('/api/catalog/')) {
+    // Offline catalog index: the page keeps its own copy in IndexedDB
+    return;
   } else if (url.pathname.startsWith('/api/')) {
     // API calls: Network first, cache fallback
     event.respondWith(handleApiRequest(event.request));
@@ -92,19 +153,272 @@ self.addEventListener('fetch', event => {
 });
 
 /**
- * Handle PDF requests with maximum caching for offline reading
- * Educational priority: PDFs are large files - cache aggressively for cost protection
+ * Open the IndexedDB database that records the size and last use of cached responses
  */
-async function handlePdfRequest(request) {
-  const PDF_CACHE = 'andylibrary-pdfs-v1.0.0';
+function openCacheIndex() {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(CACHE_INDEX_DB_NAME, 1);
+    request.onupgradeneeded = () => {
+      const store = request.result.createObjectStore(CACHE_ENTRY_STORE, { keyPath: 'key' });
+      store.createIndex('cache', 'cache');
+    };
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+function cacheEntryKey(cacheName, url) {
+  return `${cacheName} ${url}`;
+}
+
+async function getCacheEntry(cacheName, url) {
+  const db = await openCacheIndex();
+  return idbRequest(db.transaction(CACHE_ENTRY_STORE).objectStore(CACHE_ENTRY_STORE).get(cacheEntryKey(cacheName, url)));
+}
+
+async function writeCacheEntry(entry) {
+  const db = await openCacheIndex();
+  return idbRequest(db.transaction(CACHE_ENTRY_STORE, 'readwrite').objectStore(CACHE_ENTRY_STORE).put(entry));
+}
+
+/**
+ * Mark a cached response as just used (and apply any other changes to its record)
+ */
+async function touchCacheEntry(cacheName, url, changes = {}) {
+  const entry = await getCacheEntry(cacheName, url);
+  if (entry) {
+    await writeCacheEntry({ ...entry, lastUsed: Date.now(), ...changes });
+  }
+}
+
+function recordCacheHit(cacheName, url) {
+  touchCacheEntry(cacheName, url).catch(() => {});
+}
+
+/**
+ * Stored size of a response: Content-Length when the body is not encoded, otherwise the decoded body
+ */
+async function responseBytes(response) {
+  const length = response.headers.get('Content-Length');
+  if (length && !response.headers.get('Content-Encoding')) {
+    return parseInt(length, 10);
+  }
+  return (await response.clone().blob()).size;
+}
+
+/**
+ * Byte budget of a cache: its configured size, capped at its share of the storage quota
+ */
+async function cacheBudget(cacheName) {
+  const config = Object.values(CACHE_CONFIG.caches).find(cache => cache.name === cacheName);
+  if (!config) {
+    return Infinity;
+  }
+  let budget = config.max_bytes;
+  if (self.navigator && navigator.storage && navigator.storage.estimate) {
+    try {
+      const { quota } = await navigator.storage.estimate();
+      if (quota) {
+        budget = Math.min(budget, Math.floor(quota * config.quota_share));
+      }
+    } catch (error) {
+      // Keep the configured budget
+    }
+  }
+  return budget;
+}
+
+/**
+ * Predicate for entries eviction must keep: the core files, and the PDFs of bookmarked books
+ */
+function makePinnedTest(pinnedBooks) {
+  const pinned = new Set((pinnedBooks || []).map(Number));
+  return entry => {
+    const path = new URL(entry.url, self.location.origin).pathname;
+    if (entry.cache === CACHE_NAME) {
+      return CORE_FILES.includes(path);
+    }
+    const match = PINNED_BOOK_PATH.exec(path);
+    return entry.cache === PDF_CACHE && match !== null && pinned.has(Number(match[1]));
+  };
+}
+
+async function loadPinnedTest() {
+  const db = await openSyncDatabase();
+  return makePinnedTest(await getSyncMeta(db, 'pinned_books'));
+}
+
+/**
+ * Entries to delete so a cache fits its budget: least recently used first, never pinned ones
+ */
+function selectEvictions(entries, budget, isPinned) {
+  let total = entries.reduce((sum, entry) => sum + entry.bytes, 0);
+  const evictions = [];
+  const candidates = entries
+    .filter(entry => !isPinned(entry))
+    .sort((a, b) => a.lastUsed - b.lastUsed);
+  for (const entry of candidates) {
+    if (total <= budget) {
+      break;
+    }
+    evictions.push(entry);
+    total -= entry.bytes;
+  }
+  return evictions;
+}
+
+/**
+ * Evict least recently used responses until the cache is within its budget
+ */
+async function trimCache(cacheName) {
+  const db = await openCacheIndex();
+  const entries = await idbRequest(
+    db.transaction(CACHE_ENTRY_STORE).objectStore(CACHE_ENTRY_STORE).index('cache').getAll(cacheName)
+  );
+  const evictions = selectEvictions(entries, await cacheBudget(cacheName), await loadPinnedTest());
+  if (evictions.length === 0) {
+    return;
+  }
+  
+  const cache = await caches.open(cacheName);
+  await Promise.all(evictions.map(entry => cache.delete(entry.url)));
+  const store = db.transaction(CACHE_ENTRY_STORE, 'readwrite').objectStore(CACHE_ENTRY_STORE);
+  await Promise.all(evictions.map(entry => idbRequest(store.delete(entry.key))));
+  const freed = evictions.reduce((sum, entry) => sum + entry.bytes, 0);
+  console.log(`🧹 Evicted ${evictions.length} responses (${Math.round(freed / 1024)} KB) from ${cacheName}`);
+}
+
+/**
+ * Store a response, record its size, and trim the cache back to its budget
+ * Returns false when the response alone is larger than the budget and was not stored
+ */
+async function putInCache(cacheName, request, response) {
+  const url = new URL(typeof request === 'string' ? request : request.url, self.location.origin).href;
+  const bytes = await responseBytes(response);
+  const entry = {
+    key: cacheEntryKey(cacheName, url),
+    cache: cacheName,
+    url,
+    bytes,
+    lastUsed: Date.now(),
+    validatedAt: Date.now(),
+    etag: response.headers.get('ETag')
+  };
+  if (bytes > await cacheBudget(cacheName) && !(await loadPinnedTest())(entry)) {
+    console.log(`⚠️ Not caching ${url} - larger than the ${cacheName} budget`);
+    return false;
+  }
+  
+  const cache = await caches.open(cacheName);
+  await cache.put(request, response);
+  await writeCacheEntry(entry);
+  await trimCache(cacheName);
+  return true;
+}
+
+/**
+ * Index responses cached before the index existed (or by an older worker), drop
+ * records of caches that are gone, and trim every cache to its current budget
+ */
+async function reconcileCacheIndex() {
+  const db = await openCacheIndex();
+  const currentCaches = Object.values(CACHE_CONFIG.caches).map(cache => cache.name);
+  const entries = await idbRequest(db.transaction(CACHE_ENTRY_STORE).objectStore(CACHE_ENTRY_STORE).getAll());
+  const known = new Set(entries.map(entry => entry.key));
+  
+  const obsolete = entries.filter(entry => !currentCaches.includes(entry.cache));
+  if (obsolete.length > 0) {
+    const store = db.transaction(CACHE_ENTRY_STORE, 'readwrite').objectStore(CACHE_ENTRY_STORE);
+    await Promise.all(obsolete.map(entry => idbRequest(store.delete(entry.key))));
+  }
   
+  for (const cacheName of currentCaches) {
+    const cache = await caches.open(cacheName);
+    for (const request of await cache.keys()) {
+      if (known.has(cacheEntryKey(cacheName, request.url))) {
+        continue;
+      }
+      const response = await cache.match(request);
+      if (response) {
+        await writeCacheEntry({
+          key: cacheEntryKey(cacheName, request.url),
+          cache: cacheName,
+          url: request.url,
+          bytes: await responseBytes(response),
+          lastUsed: 0,
+          validatedAt: 0,
+          etag: response.headers.get('ETag')
+        });
+      }
+    }
+    await trimCache(cacheName);
+  }
+}
+
+/**
+ * Remember the newest catalog version the server has reported
+ */
+function noteDatabaseEtag(response) {
+  const etag = response.headers.get('X-Database-ETag');
+  if (etag) {
+    currentDatabaseEtag = etag;
+  }
+}
+
+/**
+ * Answer a Range request from a fully cached PDF
+ */
+async function sliceCachedPdf(cached, rangeHeader) {
+  const blob = await cached.blob();
+  const match = /^bytes=(\d*)-(\d*)$/.exec(rangeHeader.trim());
+  if (!match || (match[1] === '' && match[2] === '')) {
+    return cached;
+  }
+  
+  let start, end;
+  if (match[1] === '') {
+    start = Math.max(0, blob.size - parseInt(match[2], 10));
+    end = blob.size - 1;
+  } else {
+    start = parseInt(match[1], 10);
+    end = match[2] === '' ? blob.size - 1 : Math.min(parseInt(match[2], 10), blob.size - 1);
+  }
+  
+  if (start >= blob.size || end < start) {
+    return new Response(null, { status: 416, headers: { 'Content-Range': `bytes */${blob.size}` } });
+  }
+  
+  return new Response(blob.slice(start, end + 1), {
+    status: 206,
+    headers: {
+      'Content-Type': 'application/pdf',
+      'Content-Range': `bytes ${start}-${end}/${blob.size}`,
+      'Content-Length': String(end - start + 1),
+      'Accept-Ranges': 'bytes'
+    }
+  });
+}
+
+/**
+ * Handle PDF requests with cache-first reads for offline reading
+ * Educational priority: PDFs are large files - keep as many as the PDF budget allows,
+ * evicting the least recently read ones (never bookmarked books)
+ */
+async function handlePdfRequest(request) {
   try {
     const cache = await caches.open(PDF_CACHE);
-    const cached = await cache.match(request);
+    const rangeHeader = request.headers.get('Range');
+    const cached = await cache.match(request.url);
     
     if (cached) {
       console.log('📖 Serving cached PDF for offline reading');
-      return cached;
+      recordCacheHit(PDF_CACHE, request.url);
+      return rangeHeader ? sliceCachedPdf(cached, rangeHeader) : cached;
+    }
+    
+    // Partial reads go straight to the network (the Cache API cannot store 206 responses)
+    if (rangeHeader) {
+      return fetch(request);
     }
     
     // Fetch and cache new PDF
@@ -113,7 +427,7 @@ async function handlePdfRequest(request) {
     
     if (response.ok) {
       console.log('📖 Caching PDF for offline reading');
-      cache.put(request, response.clone());
+      putInCache(PDF_CACHE, request.url, response.clone()).catch(() => {});
     }
     
     return response;
@@ -138,6 +452,7 @@ async function handleThumbnailRequest(request) {
     
     if (cached) {
       console.log('📸 Serving cached thumbnail');
+      recordCacheHit(THUMBNAIL_CACHE, request.url);
       return cached;
     }
     
@@ -145,7 +460,7 @@ async function handleThumbnailRequest(request) {
     const response = await fetch(request);
     if (response.ok) {
       console.log('📸 Caching new thumbnail');
-      cache.put(request, response.clone());
+      putInCache(THUMBNAIL_CACHE, request, response.clone()).catch(() => {});
     }
     return response;
     
@@ -163,11 +478,11 @@ async function handleApiRequest(request) {
   try {
     // Try network first
     const response = await fetch(request);
+    noteDatabaseEtag(response);
     
     if (response.ok) {
       // Cache successful API responses
-      const cache = await caches.open(API_CACHE);
-      cache.put(request, response.clone());
+      putInCache(API_CACHE, request, response.clone()).catch(() => {});
       console.log('📡 API response cached');
     }
     
@@ -182,6 +497,7 @@ async function handleApiRequest(request) {
     
     if (cached) {
       console.log('📚 Serving cached API data');
+      recordCacheHit(API_CACHE, request.url);
       return cached;
     }
     
@@ -199,6 +515,97 @@ async function handleApiRequest(request) {
   }
 }
 
+/**
+ * Handle catalog requests with stale-while-revalidate
+ * Educational priority: browsing is instant on slow links, and a new database still shows up
+ */
+async function handleCatalogRequest(event) {
+  const request = event.request;
+  const cache = await caches.open(API_CACHE);
+  const cached = await cache.match(request);
+  
+  if (!cached) {
+    return handleApiRequest(request);
+  }
+  
+  event.waitUntil(revalidateCatalogEntry(request, cached));
+  return cached;
+}
+
+/**
+ * Refresh a cached catalog response when the catalog may have changed
+ * The server answers 304 while the catalog ETag still matches, so this costs a few hundred bytes
+ */
+async function revalidateCatalogEntry(request, cached, force = false) {
+  const etag = cached.headers.get('ETag');
+  const entry = await getCacheEntry(API_CACHE, request.url);
+  const recentlyValidated = entry && Date.now() - entry.validatedAt < CATALOG_REVALIDATE_MS;
+  const databaseUnchanged = !currentDatabaseEtag || currentDatabaseEtag === etag;
+  if (!force && recentlyValidated && databaseUnchanged) {
+    await touchCacheEntry(API_CACHE, request.url);
+    return;
+  }
+  
+  try {
+    const response = await fetch(request.url, {
+      headers: etag ? { 'If-None-Match': etag } : {},
+      cache: 'no-store'
+    });
+    noteDatabaseEtag(response);
+    
+    if (response.status === 304) {
+      await touchCacheEntry(API_CACHE, request.url, { validatedAt: Date.now() });
+    } else if (response.ok) {
+      console.log('🔄 Catalog updated from the server:', new URL(request.url).pathname);
+      await putInCache(API_CACHE, request, response);
+    }
+  } catch (error) {
+    // Offline - the cached copy stays in use
+    await touchCacheEntry(API_CACHE, request.url).catch(() => {});
+  }
+}
+
+/**
+ * Pass a bookmark toggle through, then refresh the pinned books
+ */
+async function handleBookmarkToggle(event) {
+  const authorization = event.request.headers.get('Authorization') || '';
+  const response = await fetch(event.request);
+  if (response.ok) {
+    event.waitUntil(refreshPinnedBooks(authorization.replace(/^Bearer\s+/i, '') || null));
+  }
+  return response;
+}
+
+/**
+ * Fetch the reader's bookmarked books and keep their PDFs pinned in the cache
+ */
+async function refreshPinnedBooks(authToken) {
+  const db = await openSyncDatabase();
+  if (authToken) {
+    await setSyncMeta(db, 'auth_token', authToken);
+  }
+  const token = authToken || await getSyncMeta(db, 'auth_token');
+  if (!token) {
+    return; // Nothing is pinned until the reader signs in
+  }
+  
+  try {
+    const response = await fetch(BOOKMARKS_URL, {
+      headers: { 'Authorization': `Bearer ${token}` },
+      cache: 'no-store'
+    });
+    if (!response.ok) {
+      return;
+    }
+    const result = await response.json();
+    await setSyncMeta(db, 'pinned_books', result.book_ids);
+    console.log(`📌 ${result.book_ids.length} bookmarked books pinned for offline reading`);
+  } catch (error) {
+    console.log('🔄 Bookmark refresh deferred - offline');
+  }
+}
+
 /**
  * Handle static file requests
  * Educational priority: Core functionality always available
@@ -210,6 +617,7 @@ async function handleStaticRequest(request) {
     
     if (cached) {
       console.log('📄 Serving cached static file');
+      recordCacheHit(CACHE_NAME, request.url);
       return cached;
     }
     
@@ -217,7 +625,7 @@ async function handleStaticRequest(request) {
     const response = await fetch(request);
     if (response.ok) {
       console.log('📄 Caching new static file');
-      cache.put(request, response.clone());
+      putInCache(CACHE_NAME, request, response.clone()).catch(() => {});
     }
     return response;
     
@@ -238,24 +646,196 @@ self.addEventListener('sync', event => {
   if (event.tag === 'library-sync') {
     console.log('🔄 Background sync: Updating library data...');
     event.waitUntil(syncLibraryData());
+  } else if (event.tag === 'progress-sync') {
+    console.log('🔄 Background sync: Uploading reading progress...');
+    event.waitUntil(flushProgressQueue());
   }
 });
 
+/**
+ * Open the IndexedDB database that queues offline progress events
+ * Event keys are auto-incremented and double as the per-device sync sequence
+ */
+function openSyncDatabase() {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(SYNC_DB_NAME, 1);
+    request.onupgradeneeded = () => {
+      const db = request.result;
+      if (!db.objectStoreNames.contains(PROGRESS_STORE)) {
+        db.createObjectStore(PROGRESS_STORE, { autoIncrement: true });
+      }
+      if (!db.objectStoreNames.contains(META_STORE)) {
+        db.createObjectStore(META_STORE);
+      }
+    };
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+function idbRequest(request) {
+  return new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+async function getSyncMeta(db, key) {
+  return idbRequest(db.transaction(META_STORE).objectStore(META_STORE).get(key));
+}
+
+async function setSyncMeta(db, key, value) {
+  return idbRequest(db.transaction(META_STORE, 'readwrite').objectStore(META_STORE).put(value, key));
+}
+
+async function getDeviceId(db) {
+  let deviceId = await getSyncMeta(db, 'device_id');
+  if (!deviceId) {
+    deviceId = self.crypto && self.crypto.randomUUID
+      ? self.crypto.randomUUID()
+      : `device-${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    await setSyncMeta(db, 'device_id', deviceId);
+  }
+  return deviceId;
+}
+
+let progressFlushTimer = null;
+let progressFlushInFlight = null;
+
+/**
+ * Queue one reading-progress event; flush when a batch is full or after a short delay
+ */
+async function queueProgressEvent(progressEvent, authToken) {
+  const db = await openSyncDatabase();
+  if (authToken) {
+    await setSyncMeta(db, 'auth_token', authToken);
+  }
+  
+  const store = db.transaction(PROGRESS_STORE, 'readwrite').objectStore(PROGRESS_STORE);
+  await idbRequest(store.add(progressEvent));
+  const queued = await idbRequest(db.transaction(PROGRESS_STORE).objectStore(PROGRESS_STORE).count());
+  
+  if (queued >= PROGRESS_BATCH_SIZE) {
+    return flushProgressQueue();
+  }
+  
+  if (!progressFlushTimer) {
+    progressFlushTimer = setTimeout(() => {
+      progressFlushTimer = null;
+      flushProgressQueue();
+    }, PROGRESS_FLUSH_DELAY_MS);
+  }
+  
+  // Ask the browser to retry once connectivity returns
+  if (self.registration.sync) {
+    self.registration.sync.register('progress-sync').catch(() => {});
+  }
+}
+
+/**
+ * Compress a JSON body with gzip when the browser supports CompressionStream
+ */
+async function encodeSyncBody(payload) {
+  const json = JSON.stringify(payload);
+  if (typeof CompressionStream === 'undefined') {
+    return { body: json, headers: {} };
+  }
+  const stream = new Blob([json]).stream().pipeThrough(new CompressionStream('gzip'));
+  const body = await new Response(stream).arrayBuffer();
+  return { body, headers: { 'Content-Encoding': 'gzip' } };
+}
+
+/**
+ * Upload queued events in batches; the server's cursor says which ones it has applied
+ */
+function flushProgressQueue() {
+  if (!progressFlushInFlight) {
+    progressFlushInFlight = uploadProgressBatches().finally(() => {
+      progressFlushInFlight = null;
+    });
+  }
+  return progressFlushInFlight;
+}
+
+async function uploadProgressBatches() {
+  const db = await openSyncDatabase();
+  const authToken = await getSyncMeta(db, 'auth_token');
+  if (!authToken) {
+    return; // Progress stays queued until the reader signs in
+  }
+  const deviceId = await getDeviceId(db);
+  
+  try {
+    while (true) {
+      const store = db.transaction(PROGRESS_STORE).objectStore(PROGRESS_STORE);
+      const [keys, values] = await Promise.all([
+        idbRequest(store.getAllKeys(null, PROGRESS_BATCH_SIZE * 4)),
+        idbRequest(store.getAll(null, PROGRESS_BATCH_SIZE * 4))
+      ]);
+      if (keys.length === 0) {
+        return;
+      }
+      
+      const events = values.map((value, index) => ({ ...value, seq: keys[index] }));
+      const { body, headers } = await encodeSyncBody({ device_id: deviceId, events });
+      const response = await fetch(PROGRESS_SYNC_URL, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': `Bearer ${authToken}`,
+          ...headers
+        },
+        body
+      });
+      
+      if (!response.ok) {
+        console.warn(`⚠️ Progress sync rejected (${response.status}) - will retry later`);
+        return;
+      }
+      
+      const result = await response.json();
+      await idbRequest(
+        db.transaction(PROGRESS_STORE, 'readwrite')
+          .objectStore(PROGRESS_STORE)
+          .delete(IDBKeyRange.upperBound(result.cursor))
+      );
+      console.log(`✅ Reading progress synced (${result.accepted} events, cursor ${result.cursor})`);
+      
+      if (keys.length < PROGRESS_BATCH_SIZE * 4) {
+        return;
+      }
+    }
+  } catch (error) {
+    console.log('🔄 Progress sync deferred - offline');
+  }
+}
+
 /**
  * Sync library data when connection is restored
  */
 async function syncLibraryData() {
   try {
-    // Fetch latest categories and popular books
-    const responses = await Promise.all([
-      fetch('/api/categories'),
-      fetch('/api/books/search?limit=100')
-    ]);
+    // Revalidate every cached catalog response against the current catalog
+    const cache = await caches.open(API_CACHE);
+    const requests = (await cache.keys()).filter(request => CATALOG_PATH.test(new URL(request.url).pathname));
+    await Promise.all(requests.map(async request => {
+      const cached = await cache.match(request);
+      if (cached) {
+        await revalidateCatalogEntry(request, cached, true);
+      }
+    }));
     
-    if (responses.every(r => r.ok)) {
-      console.log('✅ Library data synced successfully');
+    if (requests.length === 0) {
+      const response = await fetch('/api/categories');
+      noteDatabaseEtag(response);
+      if (response.ok) {
+        await putInCache(API_CACHE, '/api/categories', response);
+      }
     }
     
+    await refreshPinnedBooks();
+    console.log('✅ Library data synced successfully');
+    
   } catch (error) {
     console.error('❌ Background sync failed:', error);
   }
@@ -266,6 +846,12 @@ self.addEventListener('message', event => {
   if (event.data && event.data.type === 'SKIP_WAITING') {
     console.log('🔄 Updating to new version...');
     self.skipWaiting();
+  } else if (event.data && event.data.type === 'QUEUE_PROGRESS') {
+    event.waitUntil(queueProgressEvent(event.data.event, event.data.authToken));
+  } else if (event.data && event.data.type === 'FLUSH_PROGRESS') {
+    event.waitUntil(flushProgressQueue());
+  } else if (event.data && event.data.type === 'BOOKMARKS_CHANGED') {
+    event.waitUntil(refreshPinnedBooks(event.data.authToken));
   }
 });
 